@@ -0,0 +1 @@
+# Offline benchmarks - run from backend/ with `python -m benchmarks.<name>`
@@ -0,0 +1,175 @@
+"""Benchmark: firmware image ingestion, streaming multipart copy vs read-all copy
+
+Drives S3FirmwareStorage.ingest() (as called by process_firmware_upload)
+against moto's in-process S3 with large random images, checks the digest
+of the accepted path, the rejected path and the published object, and
+reports throughput and peak Python heap use of each path.
+
+moto itself holds whole objects in memory (the GetObject response body,
+and the parts joined by CompleteMultipartUpload), which real S3 does not.
+The heap figure of each path is therefore its peak above the heap right
+after GetObject returned, taken before CompleteMultipartUpload; parts are
+spooled to disk by moto (MOTO_S3_DEFAULT_KEY_BUFFER_SIZE) so they do not
+count either. moto's own total peak is printed alongside. The streaming
+peak should stay flat as --size-mb grows: (concurrency + 1) parts, plus
+the copies botocore and moto make of the parts in flight.
+
+Usage (from backend/):
+    python -m benchmarks.bench_firmware_ingestion [--size-mb 128] [--part-mb 8]
+        [--concurrency 4] [--repeat 3]
+"""
+import argparse
+import hashlib
+import logging
+import os
+import time
+import tracemalloc
+
+# Read by moto when it creates keys: spool part and object bodies to disk
+os.environ.setdefault('MOTO_S3_DEFAULT_KEY_BUFFER_SIZE', str(1024 * 1024))
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+import boto3  # noqa: E402
+from botocore.config import Config  # noqa: E402
+from moto import mock_s3  # noqa: E402
+
+from src.infrastructure.external.s3_firmware_storage import S3FirmwareStorage  # noqa: E402
+from src.shared.middleware.logger import logger  # noqa: E402
+
+BUCKET = 'bench-firmware'
+SOURCE_KEY = 'uploads/fw-bench.bin'
+MIB = 1024 * 1024
+
+
+class HeapProbe:
+    """
+    S3 client proxy recording the peak heap between GetObject and
+    CompleteMultipartUpload (or the end of the run), above the heap
+    right after GetObject
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.baseline = None
+        self.peak = None
+
+    def get_object(self, **kwargs):
+        response = self._client.get_object(**kwargs)
+        tracemalloc.reset_peak()
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        return response
+
+    def complete_multipart_upload(self, **kwargs):
+        self.stop()
+        return self._client.complete_multipart_upload(**kwargs)
+
+    def stop(self):
+        if self.peak is None and self.baseline is not None:
+            self.peak = tracemalloc.get_traced_memory()[1] - self.baseline
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def make_image(client, size: int) -> str:
+    """Upload `size` random bytes to SOURCE_KEY; returns their SHA-256"""
+    data = os.urandom(size)
+    client.put_object(Bucket=BUCKET, Key=SOURCE_KEY, Body=data)
+    return hashlib.sha256(data).hexdigest()
+
+
+def object_digest(client, key: str) -> str:
+    body = client.get_object(Bucket=BUCKET, Key=key)['Body']
+    digest = hashlib.sha256()
+    for chunk in body.iter_chunks(8 * MIB):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_all_copy(storage: S3FirmwareStorage, source_key: str, key: str, expected_checksum: str):
+    """The non-streaming baseline: read the image, hash it, write it back"""
+    data = storage.read(source_key)
+    checksum = hashlib.sha256(data).hexdigest()
+    if checksum == expected_checksum:
+        storage.write(key, data)
+    return len(data), checksum
+
+
+def measure(label: str, func, client, size: int, repeat: int):
+    """Run func(probe) `repeat` times; report the best MiB/s and the largest heap peak"""
+    best = float('inf')
+    heap_peak = 0
+    total_peak = 0
+    for _ in range(repeat):
+        probe = HeapProbe(client)
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        func(probe)
+        best = min(best, time.perf_counter() - start)
+        probe.stop()
+        heap_peak = max(heap_peak, probe.peak or 0)
+        total_peak = max(total_peak, tracemalloc.get_traced_memory()[1])
+    print(f"{label:<36} {size / MIB / best:>8.1f} MiB/s  ({best:.2f} s)  "
+          f"heap peak {heap_peak / MIB:7.1f} MiB  (with moto {total_peak / MIB:.1f} MiB)")
+    return heap_peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=128, help='image size in MiB')
+    parser.add_argument('--part-mb', type=int, default=8, help='multipart part size in MiB')
+    parser.add_argument('--concurrency', type=int, default=4, help='parts uploaded at once')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    # Per-upload logs would dominate the output
+    logger.setLevel(logging.WARNING)
+    size = args.size_mb * MIB
+    part_size = args.part_mb * MIB
+
+    with mock_s3():
+        # moto 4 does not decode the aws-chunked bodies botocore sends
+        # with its default request checksums
+        client = boto3.client('s3', region_name='us-east-1', config=Config(
+            request_checksum_calculation='when_required', response_checksum_validation='when_required'
+        ))
+        client.create_bucket(Bucket=BUCKET)
+        expected = make_image(client, size)
+
+        def storage(probe) -> S3FirmwareStorage:
+            return S3FirmwareStorage(BUCKET, probe, part_size=part_size, concurrency=args.concurrency)
+
+        # Correctness: the published object is the image, a mismatch publishes nothing
+        published = storage(client).ingest(SOURCE_KEY, 'firmware/accepted.bin', expected.upper())
+        assert published == (size, expected), published
+        assert object_digest(client, 'firmware/accepted.bin') == expected
+        rejected = storage(client).ingest(SOURCE_KEY, 'firmware/rejected.bin', '0' * 64)
+        assert rejected == (size, expected), rejected
+        assert 'Contents' not in client.list_objects_v2(Bucket=BUCKET, Prefix='firmware/rejected.bin')
+        assert not client.list_multipart_uploads(Bucket=BUCKET).get('Uploads')
+
+        print(f"{args.size_mb} MiB image, {args.part_mb} MiB parts, concurrency {args.concurrency}, "
+              f"best of {args.repeat}; digest verified")
+        tracemalloc.start()
+        try:
+            streamed = measure(
+                'ingest (streaming multipart)',
+                lambda probe: storage(probe).ingest(SOURCE_KEY, 'firmware/streamed.bin', expected),
+                client, size, args.repeat
+            )
+            measure(
+                'read-all copy (baseline)',
+                lambda probe: read_all_copy(storage(probe), SOURCE_KEY, 'firmware/copied.bin', expected),
+                client, size, args.repeat
+            )
+        finally:
+            tracemalloc.stop()
+        assert object_digest(client, 'firmware/streamed.bin') == expected
+
+    bound = (args.concurrency + 1) * part_size
+    print(f"\nstreaming heap peak {streamed / MIB:.1f} MiB for a {args.size_mb} MiB image; "
+          f"(concurrency + 1) parts = {bound / MIB:.0f} MiB, the rest are request copies of parts in flight")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark: last-24h reads from the memory-mapped local time-series store
+
+Usage (from backend/):
+    python -m benchmarks.bench_local_timeseries [--interval 5] [--repeat 20]
+"""
+import argparse
+import gc
+import math
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from src.infrastructure.repositories.mmap_timeseries_repository import MmapTimeSeriesRepository
+
+
+def measure(label: str, func, repeat: int) -> float:
+    """Run func() `repeat` times and report the best time in ms"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    print(f"{label:<40} {best * 1000:>10.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--interval', type=int, default=5, help='seconds between points')
+    parser.add_argument('--days', type=int, default=30, help='days of history stored')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench-timeseries-')
+    try:
+        repository = MmapTimeSeriesRepository(root)
+        end_time = datetime.utcnow()
+        end = int(end_time.timestamp() * 1000)
+        step = args.interval * 1000
+        count = args.days * 86400 // args.interval
+        first = end - (count - 1) * step
+        repository.append('dev-bench', 'temperature', [
+            (first + i * step, 20 + math.sin(i / 500)) for i in range(count)
+        ])
+
+        start_time = end_time - timedelta(hours=24)
+        day_points = sum(1 for _ in repository.query_raw_series('dev-bench', 'temperature', start_time, end_time))
+        print(f"{count:,} points stored, {day_points:,} in the last 24h, best of {args.repeat}")
+
+        measure('seek + zero-copy slice (24h)',
+                lambda: repository.read_range('dev-bench', 'temperature', end - 86400000, end),
+                args.repeat)
+        measure('iterate raw series (24h)',
+                lambda: sum(v for _, v in repository.query_raw_series(
+                    'dev-bench', 'temperature', start_time, end_time)),
+                args.repeat)
+        measure('aggregate 15m (24h)',
+                lambda: repository.query_aggregated_data(
+                    'dev-bench', ['temperature'], start_time, end_time, '15m'),
+                args.repeat)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+"""Benchmark: WebSocket connect/subscribe churn and telemetry fan-out
+
+Drives the real websocket/connect.py, subscribe.py, disconnect.py and
+stream_processing/realtime_notifier.py handlers against in-memory stand-ins
+for the DynamoDB tables and the API Gateway management API, fully offline.
+
+Usage (from backend/):
+    python -m benchmarks.bench_websocket_fanout [--connections 10000] [--devices 2000]
+        [--subscriptions 10] [--rounds 10] [--updates 1000] [--churn 0.02]
+        [--latency-ms 5] [--jitter-ms 5] [--gone-rate 0.01] [--max-fps 1] [--tracemalloc]
+"""
+import argparse
+import json
+import logging
+import random
+import resource
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import jwt
+from botocore.exceptions import ClientError
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from src.domain.entities.device import Device, DeviceStatus
+from src.domain.services.update_conflator import UpdateConflator
+from src.functions.stream_processing import realtime_notifier
+from src.functions.websocket import connect, disconnect, subscribe
+from src.infrastructure.external.websocket_broadcaster import WebSocketBroadcaster
+from src.infrastructure.repositories.dynamodb_codec import serialize_item
+from src.infrastructure.repositories.dynamodb_connection_repository import DynamoDBConnectionRepository
+from src.infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from src.shared.config.settings import settings
+from src.shared.middleware import auth
+from src.shared.middleware.auth import TokenVerifier
+from src.shared.middleware.logger import logger
+
+ORGANIZATION_ID = 'org-bench'
+ISSUER = 'https://cognito-idp.local/bench'
+CLIENT_ID = 'bench-client'
+
+
+def _client_error(code: str, operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+
+
+class InMemoryDynamoDB:
+    """
+    Just enough of the low-level DynamoDB client for the connection and
+    device repositories: items stay in their AttributeValue form, keyed by
+    hash key and, for the subscriptions table, range key
+    """
+
+    class _QueryPaginator:
+        def __init__(self, db):
+            self.db = db
+
+        def paginate(self, TableName, KeyConditionExpression, ExpressionAttributeValues, **kwargs):
+            (value,) = ExpressionAttributeValues.values()
+            with self.db.lock:
+                items = list(self.db.tables[TableName].get(value['S'], {}).values())
+            yield {'Items': items}
+
+    def __init__(self, key_schema):
+        # table -> (hash key, range key or None)
+        self.key_schema = key_schema
+        self.tables = {table: {} for table in key_schema}
+        self.lock = threading.Lock()
+
+    def _locate(self, table, key):
+        hash_key, range_key = self.key_schema[table]
+        partition = self.tables[table].setdefault(key[hash_key]['S'], {})
+        return partition, key[range_key]['S'] if range_key else None
+
+    def put_item(self, TableName, Item, **kwargs):
+        with self.lock:
+            partition, sort = self._locate(TableName, Item)
+            old = partition.get(sort)
+            partition[sort] = dict(Item)
+        return {'Attributes': old} if old and kwargs.get('ReturnValues') == 'ALL_OLD' else {}
+
+    def get_item(self, TableName, Key, **kwargs):
+        with self.lock:
+            partition, sort = self._locate(TableName, Key)
+            item = partition.get(sort)
+        return {'Item': dict(item)} if item else {}
+
+    def delete_item(self, TableName, Key, **kwargs):
+        with self.lock:
+            partition, sort = self._locate(TableName, Key)
+            old = partition.pop(sort, None)
+        return {'Attributes': old} if old and kwargs.get('ReturnValues') == 'ALL_OLD' else {}
+
+    def update_item(self, TableName, Key, UpdateExpression, ExpressionAttributeValues, **kwargs):
+        action, attribute, placeholder = UpdateExpression.split()
+        if action not in ('ADD', 'DELETE'):
+            raise NotImplementedError(UpdateExpression)
+        values = set(ExpressionAttributeValues[placeholder]['SS'])
+        with self.lock:
+            partition, sort = self._locate(TableName, Key)
+            item = partition.get(sort)
+            if item is None:
+                raise _client_error('ConditionalCheckFailedException', 'UpdateItem')
+            current = set(item.get(attribute, {}).get('SS', ()))
+            current = current | values if action == 'ADD' else current - values
+            if current:
+                item[attribute] = {'SS': sorted(current)}
+            else:
+                item.pop(attribute, None)
+            return {'Attributes': dict(item)}
+
+    def batch_write_item(self, RequestItems):
+        for table, requests in RequestItems.items():
+            for request in requests:
+                if 'PutRequest' in request:
+                    self.put_item(table, request['PutRequest']['Item'])
+                else:
+                    self.delete_item(table, request['DeleteRequest']['Key'])
+        return {'UnprocessedItems': {}}
+
+    def batch_get_item(self, RequestItems):
+        responses = {}
+        for table, request in RequestItems.items():
+            responses[table] = [
+                found['Item'] for found in (self.get_item(table, key) for key in request['Keys'])
+                if 'Item' in found
+            ]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def get_paginator(self, operation):
+        if operation != 'query':
+            raise NotImplementedError(operation)
+        return self._QueryPaginator(self)
+
+
+class StubManagementApi:
+    """
+    PostToConnection stand-in with injected latency; connections in
+    `vanished` answer 410 Gone like clients that dropped without $disconnect
+    """
+
+    def __init__(self, stats, latency_ms, jitter_ms, vanished):
+        self.stats = stats
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.vanished = vanished
+        self.random = random.Random()
+
+    def post_to_connection(self, ConnectionId, Data):
+        time.sleep(self.latency + self.random.random() * self.jitter)
+        if ConnectionId in self.vanished:
+            self.stats.record_gone()
+            raise _client_error('GoneException', 'PostToConnection')
+        received_at = time.time() * 1000
+        frame = json.loads(Data)
+        self.stats.record_frame(
+            len(Data), [received_at - update['lastSeen'] for update in frame['updates']]
+        )
+
+
+class PushStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames = self.gone = self.bytes = 0
+        self.latencies = []
+
+    def record_frame(self, size, latencies):
+        with self.lock:
+            self.frames += 1
+            self.bytes += size
+            self.latencies.extend(latencies)
+
+    def record_gone(self):
+        with self.lock:
+            self.gone += 1
+
+
+class LambdaContext:
+    def get_remaining_time_in_millis(self):
+        return 60000
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def report(label, latencies_ms):
+    """Handler calls per second of handler time (one caller), with latency percentiles"""
+    busy = sum(latencies_ms) / 1000
+    print(
+        f"{label:<24} {len(latencies_ms):>8,} ops  {len(latencies_ms) / busy:>10,.0f} ops/s  "
+        f"p50 {percentile(latencies_ms, 0.5):7.3f} ms  p99 {percentile(latencies_ms, 0.99):7.3f} ms"
+    )
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    response = func(*args)
+    return (time.perf_counter() - start) * 1000, response
+
+
+def make_tokens(users: int):
+    """Sign one ID token per user with a locally generated key"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public = json.loads(RSAAlgorithm.to_jwk(key.public_key()))
+    public.update(kid='bench', alg='RS256', use='sig')
+    now = int(time.time())
+    tokens = [
+        jwt.encode({
+            'sub': f'user-{i}', 'iss': ISSUER, 'aud': CLIENT_ID, 'token_use': 'id',
+            'iat': now, 'exp': now + 3600, 'custom:organizationId': ORGANIZATION_ID
+        }, key, algorithm='RS256', headers={'kid': 'bench'})
+        for i in range(users)
+    ]
+    return tokens, {'keys': [public]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=10000)
+    parser.add_argument('--devices', type=int, default=2000)
+    parser.add_argument('--subscriptions', type=int, default=10, help='devices per connection')
+    parser.add_argument('--users', type=int, default=500, help='distinct tokens shared by connections')
+    parser.add_argument('--rounds', type=int, default=10, help='stream batches of telemetry')
+    parser.add_argument('--updates', type=int, default=1000, help='device updates per batch')
+    parser.add_argument('--churn', type=float, default=0.02, help='connections replaced per round')
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--gone-rate', type=float, default=0.01,
+                        help='connections that vanish without $disconnect')
+    parser.add_argument('--max-fps', type=float, default=1.0, help='frames per connection per second')
+    parser.add_argument('--concurrency', type=int, default=settings.WEBSOCKET_POST_CONCURRENCY)
+    parser.add_argument('--tracemalloc', action='store_true', help='report Python heap peaks (slower)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    # Per-request handler logs would dominate the measurement
+    logger.setLevel(logging.WARNING)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    db = InMemoryDynamoDB({
+        settings.CONNECTIONS_TABLE: ('connectionId', None),
+        settings.SUBSCRIPTIONS_TABLE: ('deviceId', 'connectionId'),
+        settings.DEVICES_TABLE: ('deviceId', None)
+    })
+    connections = DynamoDBConnectionRepository(client=db)
+    devices = DynamoDBDeviceRepository(client=db)
+    connect._connection_repository = connections
+    disconnect._connection_repository = connections
+    subscribe._connection_repository = connections
+    subscribe._device_repository = devices
+    realtime_notifier._connection_repository = connections
+
+    stats = PushStats()
+    vanished = set()
+    realtime_notifier._broadcaster = WebSocketBroadcaster(
+        'https://stub', concurrency=args.concurrency,
+        client_factory=lambda: StubManagementApi(stats, args.latency_ms, args.jitter_ms, vanished)
+    )
+    realtime_notifier._conflator = UpdateConflator(max_frames_per_second=args.max_fps)
+    settings.WEBSOCKET_MAX_SUBSCRIPTIONS = max(settings.WEBSOCKET_MAX_SUBSCRIPTIONS, args.subscriptions)
+
+    tokens, jwks = make_tokens(args.users)
+    auth._token_verifier = TokenVerifier(issuer=ISSUER, client_id=CLIENT_ID, jwks_fetcher=lambda: jwks)
+
+    now = datetime.utcnow()
+    device_ids = [f'dev-{i:06d}' for i in range(args.devices)]
+    for device_id in device_ids:
+        devices.save(Device(
+            deviceId=device_id, organizationId=ORGANIZATION_ID, deviceType='temperature-sensor',
+            name=device_id, status=DeviceStatus.ONLINE,
+            location={'lat': 37.7, 'lon': -122.4, 'address': 'Building 1'},
+            connectivity={'type': 'wifi'}, createdAt=now, updatedAt=now
+        ))
+
+    timings = {'connect': [], 'subscribe': [], 'disconnect': []}
+    sequence = iter(range(1 << 62))
+
+    def open_connection():
+        connection_id = f'conn-{next(sequence):08d}'
+        elapsed, response = timed(connect.lambda_handler, {
+            'requestContext': {'connectionId': connection_id},
+            'queryStringParameters': {'token': rng.choice(tokens)}
+        }, None)
+        assert response['statusCode'] == 200, response
+        timings['connect'].append(elapsed)
+        elapsed, response = timed(subscribe.lambda_handler, {
+            'requestContext': {'connectionId': connection_id},
+            'body': json.dumps({
+                'action': 'subscribe',
+                'deviceIds': rng.sample(device_ids, args.subscriptions)
+            })
+        }, None)
+        assert response['statusCode'] == 200, response
+        timings['subscribe'].append(elapsed)
+        return connection_id
+
+    def close_connection(connection_id):
+        elapsed, response = timed(disconnect.lambda_handler, {
+            'requestContext': {'connectionId': connection_id}
+        }, None)
+        assert response['statusCode'] == 200, response
+        timings['disconnect'].append(elapsed)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    open_ids = [open_connection() for _ in range(args.connections)]
+    elapsed = time.perf_counter() - start
+    print(f"{args.connections:,} connections x {args.subscriptions} subscriptions "
+          f"over {args.devices:,} devices in {elapsed:.1f}s")
+    report('connect', timings['connect'])
+    report('subscribe', timings['subscribe'])
+
+    vanished.update(rng.sample(open_ids, int(len(open_ids) * args.gone_rate)))
+    churned = max(0, int(len(open_ids) * args.churn))
+    context = LambdaContext()
+    handler_ms = []
+    updates_in = 0
+    churn_elapsed = 0.0
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        churn_start = time.perf_counter()
+        for _ in range(churned):
+            index = rng.randrange(len(open_ids))
+            if open_ids[index] not in vanished:
+                close_connection(open_ids[index])
+                open_ids[index] = open_connection()
+        churn_elapsed += time.perf_counter() - churn_start
+
+        records = []
+        for sequence_number, device_id in enumerate(rng.sample(device_ids, min(args.updates, args.devices))):
+            old = {'deviceId': device_id, 'status': 'online', 'lastReading': {'temperature': 20.0}}
+            new = {
+                'deviceId': device_id,
+                'status': 'offline' if rng.random() < 0.01 else 'online',
+                'lastReading': {'temperature': round(rng.uniform(15, 30), 1), 'humidity': 40},
+                'lastSeen': int(time.time() * 1000)
+            }
+            records.append({'eventName': 'MODIFY', 'dynamodb': {
+                'SequenceNumber': str(sequence_number),
+                'NewImage': serialize_item(new),
+                'OldImage': serialize_item(old)
+            }})
+        updates_in += len(records)
+        elapsed, result = timed(realtime_notifier.lambda_handler, {'Records': records}, context)
+        assert not result['batchItemFailures'], result
+        handler_ms.append(elapsed)
+    fanout_elapsed = time.perf_counter() - start - churn_elapsed
+
+    print(f"\n{args.rounds} stream batches of {args.updates:,} device updates, "
+          f"max {args.max_fps:g} frames/s per connection, {args.concurrency} posting workers, "
+          f"stub latency {args.latency_ms:g}+{args.jitter_ms:g} ms")
+    if timings['disconnect']:
+        report('churn disconnect', timings['disconnect'])
+    print(f"{'notifier invocation':<24} p50 {percentile(handler_ms, 0.5):9.1f} ms  "
+          f"max {max(handler_ms):9.1f} ms")
+    delivered = len(stats.latencies)
+    print(f"{'frames posted':<24} {stats.frames:>8,}  {stats.frames / fanout_elapsed:>10,.0f} msgs/s  "
+          f"avg {stats.bytes / max(stats.frames, 1):,.0f} B")
+    print(f"{'device updates pushed':<24} {delivered:>8,}  {delivered / fanout_elapsed:>10,.0f} updates/s  "
+          f"({delivered / max(stats.frames, 1):.1f} per frame, from {updates_in:,} stream records)")
+    print(f"{'gone (pruned)':<24} {stats.gone:>8,}")
+    print(f"{'push latency':<24} p50 {percentile(stats.latencies, 0.5):7.1f} ms  "
+          f"p95 {percentile(stats.latencies, 0.95):7.1f} ms  p99 {percentile(stats.latencies, 0.99):7.1f} ms  "
+          f"max {max(stats.latencies, default=float('nan')):7.1f} ms")
+
+    # ru_maxrss is in KiB on Linux
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"\n{'max RSS':<24} {rss_after / 1024:8.1f} MiB  (+{(rss_after - rss_before) / 1024:.1f} MiB during run)")
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"{'Python heap':<24} {current / 2**20:8.1f} MiB current, {peak / 2**20:.1f} MiB peak")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ from .alert_rule import AlertRule
 from .user import User
 from .firmware import Firmware
 from .deployment import Deployment
+from .digest_entry import DigestEntry
 
 __all__ = [
     'Device',
@@ -12,5 +13,6 @@ __all__ = [
     'AlertRule',
     'User',
     'Firmware',
-    'Deployment'
+    'Deployment',
+    'DigestEntry'
 ]
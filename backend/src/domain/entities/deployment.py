@@ -1,6 +1,6 @@
 """Deployment Entity"""
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -12,25 +12,64 @@ class DeploymentBatch:
     status: str  # pending|in_progress|completed|failed
     success_count: int = 0
     failure_count: int = 0
+    # Kept when the devices are stored out of line and not loaded
+    device_count: int = None
+
+    def __post_init__(self):
+        if self.device_count is None:
+            self.device_count = len(self.devices)
 
     def calculate_success_rate(self) -> float:
         """Calculate batch success rate"""
         total = self.success_count + self.failure_count
         return (self.success_count / total * 100) if total > 0 else 0.0
 
-    def to_dict(self) -> Dict:
-        return {
+    def remaining_count(self) -> int:
+        """Devices of the batch without a result yet"""
+        return max(0, self.device_count - self.success_count - self.failure_count)
+
+    def threshold_met(self, success_threshold: float) -> bool:
+        """Whether enough of the batch's devices succeeded, whatever the others report"""
+        return self.success_count * 100 >= success_threshold * self.device_count
+
+    def threshold_unreachable(self, success_threshold: float) -> bool:
+        """Whether the batch cannot meet the threshold even if every remaining device succeeds"""
+        return (self.device_count - self.failure_count) * 100 < success_threshold * self.device_count
+
+    def to_dict(self, include_devices: bool = True) -> Dict:
+        data = {
             'batchId': self.batch_id,
-            'devices': self.devices,
+            'deviceCount': self.device_count,
             'status': self.status,
             'successCount': self.success_count,
             'failureCount': self.failure_count
         }
+        if include_devices:
+            data['devices'] = self.devices
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DeploymentBatch':
+        return cls(
+            batch_id=data['batchId'],
+            devices=data.get('devices', []),
+            status=data['status'],
+            success_count=data.get('successCount', 0),
+            failure_count=data.get('failureCount', 0),
+            device_count=data.get('deviceCount')
+        )
 
 
 @dataclass
 class Deployment:
-    """Deployment Entity"""
+    """
+    Deployment Entity
+
+    progress counts devices: succeeded and failed are results, inProgress
+    are devices of in-progress batches still without a result and pending
+    are devices of pending batches. record_results and set_batch_status
+    keep it current in O(1); update_progress recomputes it from the batches.
+    """
     deployment_id: str
     firmware_id: str
     strategy: str  # all-at-once|canary|staged
@@ -49,6 +88,12 @@ class Deployment:
     completed_at: datetime = None
     created_by: str = ""
     created_at: datetime = None
+    # Kept when the target devices are stored out of line and not loaded
+    target_count: int = None
+
+    def __post_init__(self):
+        if self.target_count is None:
+            self.target_count = len(self.target_devices)
 
     def can_proceed_to_next_batch(self, success_threshold: float = 95.0) -> bool:
         """Check if deployment can proceed to next batch"""
@@ -70,26 +115,65 @@ class Deployment:
         total = self.progress['succeeded'] + self.progress['failed']
         return (self.progress['succeeded'] / total * 100) if total > 0 else 0.0
 
-    def update_progress(self):
-        """Update deployment progress from batches"""
-        self.progress['total'] = len(self.target_devices)
-        self.progress['succeeded'] = sum(b.success_count for b in self.batches)
-        self.progress['failed'] = sum(b.failure_count for b in self.batches)
+    def get_batch(self, batch_id: int) -> Optional[DeploymentBatch]:
+        """Find a batch by ID"""
+        # Batches are numbered from 1 in order; fall back to a search otherwise
+        if 0 < batch_id <= len(self.batches) and self.batches[batch_id - 1].batch_id == batch_id:
+            return self.batches[batch_id - 1]
+        return next((b for b in self.batches if b.batch_id == batch_id), None)
+
+    def record_results(self, batch_id: int, succeeded: int = 0, failed: int = 0) -> DeploymentBatch:
+        """Count device results of a batch"""
+        batch = self.get_batch(batch_id)
+        if batch is None:
+            raise ValueError(f"Unknown batch {batch_id} of deployment {self.deployment_id}")
+        remaining = batch.remaining_count()
+        batch.success_count += succeeded
+        batch.failure_count += failed
+        self.progress['succeeded'] = self.progress.get('succeeded', 0) + succeeded
+        self.progress['failed'] = self.progress.get('failed', 0) + failed
+        if batch.status == 'in_progress':
+            self.progress['inProgress'] = (
+                self.progress.get('inProgress', 0) - remaining + batch.remaining_count()
+            )
+        return batch
+
+    def set_batch_status(self, batch_id: int, status: str) -> DeploymentBatch:
+        """Move a batch to another status"""
+        batch = self.get_batch(batch_id)
+        if batch is None:
+            raise ValueError(f"Unknown batch {batch_id} of deployment {self.deployment_id}")
+        self._count_batch(batch, -1)
+        batch.status = status
+        self._count_batch(batch, 1)
+        return batch
 
-        in_progress_batches = [b for b in self.batches if b.status == 'in_progress']
-        self.progress['inProgress'] = len(in_progress_batches)
+    def update_progress(self):
+        """Recompute deployment progress from batches"""
+        self.progress = {
+            'total': self.target_count,
+            'succeeded': sum(b.success_count for b in self.batches),
+            'failed': sum(b.failure_count for b in self.batches),
+            'inProgress': 0,
+            'pending': 0
+        }
+        for batch in self.batches:
+            self._count_batch(batch, 1)
 
-        pending_batches = [b for b in self.batches if b.status == 'pending']
-        self.progress['pending'] = sum(len(b.devices) for b in pending_batches)
+    def _count_batch(self, batch: DeploymentBatch, sign: int):
+        if batch.status == 'in_progress':
+            self.progress['inProgress'] = self.progress.get('inProgress', 0) + sign * batch.remaining_count()
+        elif batch.status == 'pending':
+            self.progress['pending'] = self.progress.get('pending', 0) + sign * batch.device_count
 
-    def to_dict(self) -> Dict:
-        return {
+    def to_dict(self, include_devices: bool = True) -> Dict:
+        data = {
             'deploymentId': self.deployment_id,
             'firmwareId': self.firmware_id,
             'strategy': self.strategy,
-            'targetDevices': self.target_devices,
+            'targetCount': self.target_count,
             'status': self.status,
-            'batches': [b.to_dict() for b in self.batches],
+            'batches': [b.to_dict(include_devices) for b in self.batches],
             'progress': self.progress,
             'scheduledAt': int(self.scheduled_at.timestamp() * 1000) if self.scheduled_at else None,
             'startedAt': int(self.started_at.timestamp() * 1000) if self.started_at else None,
@@ -97,6 +181,9 @@ class Deployment:
             'createdBy': self.created_by,
             'createdAt': int(self.created_at.timestamp() * 1000) if self.created_at else None
         }
+        if include_devices:
+            data['targetDevices'] = self.target_devices
+        return data
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'Deployment':
@@ -104,13 +191,14 @@ class Deployment:
             deployment_id=data['deploymentId'],
             firmware_id=data['firmwareId'],
             strategy=data['strategy'],
-            target_devices=data['targetDevices'],
+            target_devices=data.get('targetDevices', []),
             status=data['status'],
-            batches=[DeploymentBatch(**b) for b in data.get('batches', [])],
+            batches=[DeploymentBatch.from_dict(b) for b in data.get('batches', [])],
             progress=data.get('progress', {}),
             scheduled_at=datetime.fromtimestamp(data['scheduledAt'] / 1000) if data.get('scheduledAt') else None,
             started_at=datetime.fromtimestamp(data['startedAt'] / 1000) if data.get('startedAt') else None,
             completed_at=datetime.fromtimestamp(data['completedAt'] / 1000) if data.get('completedAt') else None,
             created_by=data.get('createdBy', ''),
-            created_at=datetime.fromtimestamp(data['createdAt'] / 1000) if data.get('createdAt') else None
+            created_at=datetime.fromtimestamp(data['createdAt'] / 1000) if data.get('createdAt') else None,
+            target_count=data.get('targetCount')
         )
@@ -1,10 +1,14 @@
 """Device Entity - Core business object representing an IoT device"""
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
 from enum import Enum
 
 
+# A device not seen for this long is considered offline
+OFFLINE_AFTER_SECONDS = 300
+
+
 class DeviceStatus(str, Enum):
     """Device status enumeration"""
     ONLINE = "online"
@@ -72,7 +76,7 @@ class Device(BaseModel):
 
         # Device is considered offline if not seen in last 5 minutes
         time_diff = (datetime.utcnow() - self.last_seen).total_seconds()
-        return time_diff < 300  # 5 minutes
+        return time_diff < OFFLINE_AFTER_SECONDS
 
     def needs_update(self, target_firmware_version: str) -> bool:
         """Check if device needs firmware update"""
@@ -107,6 +111,7 @@ class Device(BaseModel):
     @classmethod
     def from_dynamodb_item(cls, item: Dict) -> 'Device':
         """Create entity from DynamoDB item"""
+        item = dict(item)
         # Convert timestamps to datetime
         if item.get('lastSeen'):
             item['lastSeen'] = datetime.fromtimestamp(item['lastSeen'] / 1000)
@@ -115,3 +120,128 @@ class Device(BaseModel):
         if item.get('updatedAt'):
             item['updatedAt'] = datetime.fromtimestamp(item['updatedAt'] / 1000)
         return cls(**item)
+
+    def to_trusted_dynamodb_item(self) -> Dict:
+        """
+        Convert to DynamoDB item format without going through model_dump
+
+        Produces the same item as to_dynamodb_item() for a valid entity.
+        Nested dicts and lists are shallow-copied, not deep-copied.
+        """
+        location = self.location
+        connectivity = self.connectivity
+        return {
+            'deviceId': self.device_id,
+            'organizationId': self.organization_id,
+            'deviceType': self.device_type,
+            'name': self.name,
+            'status': self.status.value,
+            'location': {
+                'lat': location.lat,
+                'lon': location.lon,
+                'address': location.address
+            },
+            'connectivity': {
+                'type': connectivity.type,
+                'simId': connectivity.sim_id,
+                'ipAddress': connectivity.ip_address,
+                'signalStrength': connectivity.signal_strength
+            },
+            'firmwareVersion': self.firmware_version,
+            'lastSeen': _to_millis(self.last_seen),
+            'lastReading': dict(self.last_reading) if self.last_reading is not None else None,
+            'metadata': dict(self.metadata) if self.metadata is not None else None,
+            'tags': list(self.tags),
+            'createdAt': _to_millis(self.created_at),
+            'updatedAt': _to_millis(self.updated_at)
+        }
+
+    @classmethod
+    def from_trusted_dynamodb_item(cls, item: Dict) -> 'Device':
+        """
+        Create entity from a DynamoDB item written by this application
+
+        Skips pydantic validation and only performs the conversions
+        validation would have done: timestamps, enum, nested models and
+        numeric types coming back as Decimal. The input item is left
+        untouched. Use from_dynamodb_item() for untrusted input.
+        """
+        location = item['location']
+        connectivity = item['connectivity']
+        signal_strength = connectivity.get('signalStrength')
+        return _construct(cls, {
+            'device_id': item['deviceId'],
+            'organization_id': item['organizationId'],
+            'device_type': item['deviceType'],
+            'name': item['name'],
+            'status': _STATUS_BY_VALUE[item['status']],
+            'location': _construct(DeviceLocation, {
+                'lat': float(location['lat']),
+                'lon': float(location['lon']),
+                'address': location['address']
+            }, _LOCATION_FIELDS),
+            'connectivity': _construct(Connectivity, {
+                'type': connectivity['type'],
+                'sim_id': connectivity.get('simId'),
+                'ip_address': connectivity.get('ipAddress'),
+                'signal_strength': int(signal_strength) if signal_strength is not None else None
+            }, _CONNECTIVITY_FIELDS),
+            'firmware_version': item.get('firmwareVersion'),
+            'last_seen': _from_millis(item.get('lastSeen')),
+            'last_reading': _optional_dict(item, 'lastReading'),
+            'metadata': _optional_dict(item, 'metadata'),
+            'tags': list(item.get('tags') or ()),
+            'created_at': _from_millis(item.get('createdAt')),
+            'updated_at': _from_millis(item.get('updatedAt'))
+        }, _DEVICE_FIELDS)
+
+    @classmethod
+    def from_trusted_dynamodb_items(cls, items: Iterable[Dict]) -> List['Device']:
+        """Hydrate a batch of trusted DynamoDB items (see from_trusted_dynamodb_item)"""
+        construct = cls.from_trusted_dynamodb_item
+        return [construct(item) for item in items]
+
+    @staticmethod
+    def to_trusted_dynamodb_items(devices: Iterable['Device']) -> List[Dict]:
+        """Dehydrate a batch of devices (see to_trusted_dynamodb_item)"""
+        return [device.to_trusted_dynamodb_item() for device in devices]
+
+
+_STATUS_BY_VALUE = DeviceStatus._value2member_map_
+_DEVICE_FIELDS = frozenset(Device.model_fields)
+_LOCATION_FIELDS = frozenset(DeviceLocation.model_fields)
+_CONNECTIVITY_FIELDS = frozenset(Connectivity.model_fields)
+_object_new = object.__new__
+_object_setattr = object.__setattr__
+_fromtimestamp = datetime.fromtimestamp
+
+
+def _construct(model_cls, fields: Dict, fields_set: frozenset):
+    """
+    Build a model instance from a complete, already-converted field dict
+
+    Equivalent to model_cls.model_construct(**fields) when every field is
+    provided, without its per-field alias and default resolution loop.
+    """
+    instance = _object_new(model_cls)
+    _object_setattr(instance, '__dict__', fields)
+    _object_setattr(instance, '__pydantic_fields_set__', set(fields_set))
+    _object_setattr(instance, '__pydantic_extra__', None)
+    _object_setattr(instance, '__pydantic_private__', None)
+    return instance
+
+
+def _optional_dict(item: Dict, key: str) -> Optional[Dict]:
+    """Copy of an Optional[Dict] attribute: {} when absent, None when stored as null (as validation does)"""
+    value = item.get(key, ())
+    return dict(value) if value is not None else None
+
+
+def _to_millis(value: Optional[datetime]) -> Optional[int]:
+    """Convert datetime to epoch milliseconds as stored in DynamoDB"""
+    return int(value.timestamp() * 1000) if value else None
+
+
+def _from_millis(value) -> Optional[datetime]:
+    """Convert epoch milliseconds (int or Decimal) to datetime"""
+    return _fromtimestamp(int(value) / 1000) if value else None
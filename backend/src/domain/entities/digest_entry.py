@@ -0,0 +1,57 @@
+"""Digest Entry Entity - A non-critical alert waiting for a user's digest"""
+from dataclasses import dataclass
+from typing import Dict
+
+from .alert import Alert
+
+
+@dataclass
+class DigestEntry:
+    """
+    One alert buffered for one user and channel until its window ends
+
+    Windows are aligned to multiples of the user's window length and
+    picked from the alert timestamp, so a redelivered alert maps to the
+    same entry.
+    """
+    user_id: str
+    organization_id: str
+    channel: str
+    window_end: int  # epoch seconds
+    alert: Alert
+
+    @classmethod
+    def for_alert(cls, user_id: str, channel: str, alert: Alert, window_seconds: int) -> 'DigestEntry':
+        """Entry of an alert in the window containing its timestamp"""
+        timestamp = int(alert.timestamp.timestamp())
+        return cls(
+            user_id=user_id,
+            organization_id=alert.organization_id,
+            channel=channel,
+            window_end=(timestamp // window_seconds + 1) * window_seconds,
+            alert=alert
+        )
+
+    @property
+    def key(self) -> str:
+        """Unique per user; sorts by window"""
+        return f"{self.window_end:012d}#{self.channel}#{self.alert.alert_id}"
+
+    def to_dict(self) -> Dict:
+        return {
+            'userId': self.user_id,
+            'organizationId': self.organization_id,
+            'channel': self.channel,
+            'windowEnd': self.window_end,
+            'alert': self.alert.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DigestEntry':
+        return cls(
+            user_id=data['userId'],
+            organization_id=data['organizationId'],
+            channel=data['channel'],
+            window_end=int(data['windowEnd']),
+            alert=Alert.from_dict(data['alert'])
+        )
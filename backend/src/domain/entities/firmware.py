@@ -1,9 +1,11 @@
 """Firmware Entity"""
 from dataclasses import dataclass, field
-from typing import Dict, List
+from functools import total_ordering
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
+@total_ordering
 @dataclass
 class FirmwareVersion:
     """Firmware version value object"""
@@ -15,11 +17,20 @@ class FirmwareVersion:
         return (self.major, self.minor, self.patch) < (other.major, other.minor, other.patch)
 
     def __eq__(self, other) -> bool:
+        if not isinstance(other, FirmwareVersion):
+            return NotImplemented
         return (self.major, self.minor, self.patch) == (other.major, other.minor, other.patch)
 
+    def __hash__(self) -> int:
+        return hash((self.major, self.minor, self.patch))
+
     def __str__(self) -> str:
         return f"v{self.major}.{self.minor}.{self.patch}"
 
+    def sort_key(self) -> str:
+        """Fixed-width key that sorts as text like the version sorts (index sort keys)"""
+        return f"{self.major:06d}{self.minor:06d}{self.patch:06d}"
+
     @classmethod
     def from_string(cls, version_str: str) -> 'FirmwareVersion':
         """Parse version string like 'v2.1.0' or '2.1.0'"""
@@ -27,6 +38,16 @@ class FirmwareVersion:
         parts = version_str.split('.')
         return cls(int(parts[0]), int(parts[1]), int(parts[2]))
 
+    @classmethod
+    def parse(cls, version_str: Optional[str]) -> Optional['FirmwareVersion']:
+        """Parse a version string, None if missing or malformed"""
+        if not version_str:
+            return None
+        try:
+            return cls.from_string(version_str)
+        except (ValueError, IndexError):
+            return None
+
 
 @dataclass
 class Firmware:
@@ -38,7 +59,7 @@ class Firmware:
     s3_key: str
     checksum: str
     size: int
-    status: str  # available|deprecated|withdrawn
+    status: str  # pending|available|rejected|deprecated|withdrawn
     changelog: str = ""
     uploaded_by: str = ""
     uploaded_at: datetime = None
@@ -48,6 +69,39 @@ class Firmware:
         """Check if firmware is compatible with device type"""
         return device_type in self.device_types
 
+    def find_delta(self, firmware_version: Optional[str]) -> Optional[Dict]:
+        """Patch from a device's current firmware version to this one, if one was built"""
+        source = FirmwareVersion.parse(firmware_version)
+        if source is None:
+            return None
+        return self.metadata.get('deltas', {}).get(str(source))
+
+    def select_image(self, firmware_version: Optional[str]) -> Dict:
+        """
+        What a device on firmware_version downloads: a patch when one was
+        built from its version, the full image otherwise. imageChecksum is
+        the checksum of the installed result either way.
+        """
+        delta = self.find_delta(firmware_version)
+        if delta:
+            return {
+                'type': 'delta',
+                's3Key': delta['s3Key'],
+                'checksum': delta['checksum'],
+                'size': delta['size'],
+                'format': delta['format'],
+                'sourceVersion': delta['sourceVersion'],
+                'sourceChecksum': delta['sourceChecksum'],
+                'imageChecksum': self.checksum
+            }
+        return {
+            'type': 'full',
+            's3Key': self.s3_key,
+            'checksum': self.checksum,
+            'size': self.size,
+            'imageChecksum': self.checksum
+        }
+
     def to_dict(self) -> Dict:
         return {
             'firmwareId': self.firmware_id,
@@ -28,6 +28,11 @@ class UserPreferences:
         'timezone': 'UTC'
     })
     subscribed_devices: List[str] = field(default_factory=list)
+    # Opt-in: non-critical alerts are buffered and sent as one digest per window
+    digest: Dict = field(default_factory=lambda: {
+        'enabled': False,
+        'windowMinutes': 15
+    })
     dashboard_layout: Dict = field(default_factory=dict)
     theme: str = 'light'
     language: str = 'en'
@@ -37,6 +42,7 @@ class UserPreferences:
             'notifications': self.notifications,
             'quietHours': self.quiet_hours,
             'subscribedDevices': self.subscribed_devices,
+            'digest': self.digest,
             'dashboardLayout': self.dashboard_layout,
             'theme': self.theme,
             'language': self.language
@@ -48,6 +54,7 @@ class UserPreferences:
             notifications=data.get('notifications', {}),
             quiet_hours=data.get('quietHours', {}),
             subscribed_devices=data.get('subscribedDevices', []),
+            digest=data.get('digest', {'enabled': False, 'windowMinutes': 15}),
             dashboard_layout=data.get('dashboardLayout', {}),
             theme=data.get('theme', 'light'),
             language=data.get('language', 'en')
@@ -92,6 +99,16 @@ class User:
         """Check if user can receive notification on channel"""
         return self.preferences.notifications.get(channel, False)
 
+    def digest_window_seconds(self) -> int:
+        """Digest window for non-critical alerts, 0 when they are sent immediately"""
+        digest = self.preferences.digest or {}
+        if not digest.get('enabled'):
+            return 0
+        try:
+            return max(0, int(digest.get('windowMinutes', 0)) * 60)
+        except (TypeError, ValueError):
+            return 0
+
     def add_device_token(self, token: str):
         """Add device token for push notifications"""
         if token not in self.device_tokens:
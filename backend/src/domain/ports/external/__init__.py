@@ -0,0 +1,18 @@
+# External service interfaces
+from .i_iot_provider import IIoTProvider
+from .i_realtime_broadcaster import IRealtimeBroadcaster
+from .i_email_provider import IEmailProvider
+from .i_push_provider import IPushProvider
+from .i_rate_limiter import IRateLimiter
+from .i_firmware_storage import IFirmwareStorage
+from .i_delta_encoder import IDeltaEncoder
+
+__all__ = [
+    'IIoTProvider',
+    'IRealtimeBroadcaster',
+    'IEmailProvider',
+    'IPushProvider',
+    'IRateLimiter',
+    'IFirmwareStorage',
+    'IDeltaEncoder'
+]
@@ -0,0 +1,17 @@
+"""Delta Encoder Interface"""
+from abc import ABC, abstractmethod
+
+
+class IDeltaEncoder(ABC):
+    """
+    Interface for binary patch generation
+
+    `format` names the patch format; devices pick the patch tool by it.
+    """
+
+    format: str
+
+    @abstractmethod
+    def diff(self, source: bytes, target: bytes) -> bytes:
+        """Patch that turns source into target"""
+        pass
@@ -0,0 +1,23 @@
+"""Email Provider Interface - Port for outbound email"""
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+
+class IEmailProvider(ABC):
+    """Interface for sending templated email in bulk (Amazon SES)"""
+
+    @abstractmethod
+    def send_templated_bulk(self, template: str, destinations: List[Dict]) -> List[str]:
+        """
+        Send one templated email per destination
+
+        Args:
+            template: Name of the stored template
+            destinations: [{'email': str, 'data': dict}, ...]; data fills the template
+
+        Returns:
+            One status per destination, in order: 'sent', 'invalid' (rejected
+            for good, do not retry), 'throttled' (sending rate exceeded, retry
+            after backing off) or 'failed' (transient, retry later)
+        """
+        pass
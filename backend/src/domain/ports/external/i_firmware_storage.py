@@ -0,0 +1,30 @@
+"""Firmware Storage Interface"""
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+
+class IFirmwareStorage(ABC):
+    """Interface for firmware images and patches in object storage"""
+
+    @abstractmethod
+    def read(self, key: str) -> bytes:
+        """Read an object"""
+        pass
+
+    @abstractmethod
+    def write(self, key: str, data: bytes) -> None:
+        """Write an object, replacing any previous one"""
+        pass
+
+    @abstractmethod
+    def ingest(self, source_key: str, key: str, expected_checksum: str) -> Tuple[int, str]:
+        """
+        Copy an uploaded object to key, hashing it on the way
+
+        key is only created when the SHA-256 of the object matches
+        expected_checksum.
+
+        Returns:
+            (size in bytes, SHA-256 hex digest) of the uploaded object
+        """
+        pass
@@ -0,0 +1,54 @@
+"""IoT Provider Interface - Port for device connectivity services"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from ...entities.device import Device
+
+
+class IIoTProvider(ABC):
+    """Interface for IoT platform operations (AWS IoT Core)"""
+
+    @abstractmethod
+    def create_thing(self, device: Device) -> str:
+        """Create the IoT thing for a device, returns the thing ARN"""
+        pass
+
+    @abstractmethod
+    def create_certificates(self, device: Device, replace_existing: bool = False) -> Dict:
+        """
+        Create an active certificate and attach it to the device's thing;
+        with replace_existing, certificates already attached are revoked
+
+        Returns:
+            {
+                'certificateArn': str,
+                'certificatePem': str,
+                'privateKey': str
+            }
+        """
+        pass
+
+    @abstractmethod
+    def delete_thing(self, device_id: str) -> bool:
+        """Delete the IoT thing of a device, revoking (deactivating and deleting) its certificates"""
+        pass
+
+    @abstractmethod
+    def create_job(
+        self,
+        job_id: str,
+        device_ids: List[str],
+        document: Dict,
+        timeout_minutes: Optional[int] = None
+    ) -> bool:
+        """
+        Create a snapshot job running document on the things of device_ids
+
+        Returns:
+            False if a job with this ID already exists (the call is retried)
+        """
+        pass
+
+    @abstractmethod
+    def cancel_job(self, job_id: str) -> bool:
+        """Cancel the executions of a job that have not started; False if the job does not exist"""
+        pass
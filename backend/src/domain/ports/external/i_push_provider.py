@@ -0,0 +1,23 @@
+"""Push Provider Interface - Port for mobile push notifications"""
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+
+class IPushProvider(ABC):
+    """Interface for sending push notifications (Firebase Cloud Messaging)"""
+
+    @abstractmethod
+    def send_multicast(self, tokens: List[str], message: Dict) -> List[str]:
+        """
+        Send the same notification to many device tokens
+
+        Args:
+            tokens: Device registration tokens
+            message: {'title': str, 'body': str, 'data': {str: str}}
+
+        Returns:
+            One status per token, in order: 'sent', 'invalid' (token no
+            longer registered, remove it), 'throttled' (quota exceeded, retry
+            after backing off) or 'failed' (transient, retry later)
+        """
+        pass
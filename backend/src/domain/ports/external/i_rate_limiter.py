@@ -0,0 +1,22 @@
+"""Rate Limiter Interface - Port for token buckets shared across invocations"""
+from abc import ABC, abstractmethod
+
+
+class IRateLimiter(ABC):
+    """Interface for token-bucket rate limiting"""
+
+    @abstractmethod
+    def acquire(self, bucket: str, count: int, rate: float, burst: float) -> int:
+        """
+        Take up to count tokens from a bucket, without waiting
+
+        Args:
+            bucket: Bucket name, e.g. 'channel:email'
+            count: Tokens wanted
+            rate: Refill rate in tokens per second
+            burst: Bucket capacity
+
+        Returns:
+            Tokens granted, from 0 to count
+        """
+        pass
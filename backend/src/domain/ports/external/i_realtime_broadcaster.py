@@ -0,0 +1,18 @@
+"""Realtime Broadcaster Interface - Port for pushing messages to WebSocket clients"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+
+class IRealtimeBroadcaster(ABC):
+    """Interface for posting messages to connected WebSocket clients"""
+
+    @abstractmethod
+    def post(self, messages: List[Tuple[str, bytes]]) -> Dict[str, List[str]]:
+        """
+        Post (connectionId, payload) messages
+
+        Returns:
+            {'sent': [connectionId, ...], 'gone': [...], 'failed': [...]};
+            gone connections were closed and should be forgotten
+        """
+        pass
@@ -4,11 +4,21 @@ from .i_alert_repository import IAlertRepository
 from .i_user_repository import IUserRepository
 from .i_firmware_repository import IFirmwareRepository
 from .i_timeseries_repository import ITimeSeriesRepository
+from .i_fleet_stats_repository import IFleetStatsRepository
+from .i_device_search_index import IDeviceSearchIndex
+from .i_connection_repository import IConnectionRepository
+from .i_digest_repository import IDigestRepository
+from .i_deployment_repository import IDeploymentRepository
 
 __all__ = [
     'IDeviceRepository',
     'IAlertRepository',
     'IUserRepository',
     'IFirmwareRepository',
-    'ITimeSeriesRepository'
+    'ITimeSeriesRepository',
+    'IFleetStatsRepository',
+    'IDeviceSearchIndex',
+    'IConnectionRepository',
+    'IDigestRepository',
+    'IDeploymentRepository'
 ]
@@ -0,0 +1,53 @@
+"""Connection Repository Interface"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+
+class IConnectionRepository(ABC):
+    """Interface for WebSocket connections and their device subscriptions"""
+
+    @abstractmethod
+    def save(self, connection_id: str, user_id: Optional[str], organization_id: Optional[str]) -> Dict:
+        """Register a new connection"""
+        pass
+
+    @abstractmethod
+    def find_by_id(self, connection_id: str) -> Optional[Dict]:
+        """
+        Get a connection
+
+        Returns:
+            {'connectionId', 'userId', 'organizationId', 'connectedAt',
+             'subscribedDevices': set} or None
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, connection_id: str) -> bool:
+        """Remove a connection and all of its subscriptions"""
+        pass
+
+    @abstractmethod
+    def subscribe(self, connection_id: str, device_ids: List[str]) -> List[str]:
+        """
+        Subscribe a connection to devices
+
+        Returns:
+            Every device the connection is subscribed to afterwards
+        """
+        pass
+
+    @abstractmethod
+    def unsubscribe(self, connection_id: str, device_ids: List[str]) -> List[str]:
+        """
+        Unsubscribe a connection from devices
+
+        Returns:
+            Every device the connection is still subscribed to
+        """
+        pass
+
+    @abstractmethod
+    def find_subscribers(self, device_id: str) -> List[str]:
+        """Connection IDs subscribed to a device"""
+        pass
@@ -0,0 +1,97 @@
+"""Deployment Repository Interface"""
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ...entities.deployment import Deployment, DeploymentBatch
+
+
+class IDeploymentRepository(ABC):
+    """
+    Interface for firmware deployments and their progress
+
+    Target device lists can hold 100k+ IDs, so they are stored apart from
+    the deployment and only read through find_target_devices; deployments
+    are returned with target_count and per-batch device_count instead.
+    """
+
+    @abstractmethod
+    def save(self, deployment: Deployment) -> Deployment:
+        """Save a new deployment with its batches and target devices"""
+        pass
+
+    @abstractmethod
+    def find_by_id(self, deployment_id: str) -> Optional[Deployment]:
+        """Find a deployment with its batch counters and progress, without device lists"""
+        pass
+
+    @abstractmethod
+    def find_by_firmware(self, firmware_id: str) -> List[Deployment]:
+        """Find all deployments of a firmware, without device lists"""
+        pass
+
+    @abstractmethod
+    def find_target_devices(self, deployment_id: str, batch_id: Optional[int] = None) -> Iterator[str]:
+        """Stream the target device IDs of a deployment, or of one of its batches"""
+        pass
+
+    @abstractmethod
+    def find_reported_devices(self, deployment_id: str, batch_id: int) -> Set[str]:
+        """IDs of the batch's devices whose result was counted"""
+        pass
+
+    @abstractmethod
+    def find_batches_started_before(self, started_before: int) -> List[Tuple[str, int]]:
+        """(deploymentId, batchId) of in-progress batches started before a time (epoch ms)"""
+        pass
+
+    @abstractmethod
+    def record_results(
+        self,
+        deployment_id: str,
+        batch_id: int,
+        succeeded: int = 0,
+        failed: int = 0
+    ) -> Optional[DeploymentBatch]:
+        """Atomically add device results to a batch; None if the batch does not exist"""
+        pass
+
+    @abstractmethod
+    def record_device_results(
+        self,
+        deployment_id: str,
+        batch_id: int,
+        results: Dict[str, bool]
+    ) -> Optional[DeploymentBatch]:
+        """
+        Count the results of a batch's devices (device ID -> succeeded),
+        each device at most once however often it is reported
+
+        Returns:
+            The batch with its counters after the update, or None if the
+            batch does not exist
+        """
+        pass
+
+    @abstractmethod
+    def update_batch_status(
+        self,
+        deployment_id: str,
+        batch_id: int,
+        status: str,
+        expected_status: Optional[str] = None
+    ) -> bool:
+        """
+        Set a batch's status, if it is still expected_status; whether it
+        was set. Moving a batch to in_progress records when it started.
+        """
+        pass
+
+    @abstractmethod
+    def update_status(
+        self,
+        deployment_id: str,
+        status: str,
+        expected_status: Optional[str] = None
+    ) -> bool:
+        """Set a deployment's status, if it is still expected_status; whether it was set"""
+        pass
@@ -1,7 +1,7 @@
 """Device Repository Interface - Port for hexagonal architecture"""
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict
-from ...entities.device import Device
+from ...entities.device import Device, DeviceStatus
 
 
 class IDeviceRepository(ABC):
@@ -12,11 +12,26 @@ class IDeviceRepository(ABC):
         """Save device to storage"""
         pass
 
+    @abstractmethod
+    def save_batch(self, devices: List[Device]) -> List[str]:
+        """
+        Save many devices using batched writes
+
+        Returns:
+            IDs of devices that could not be written after retries
+        """
+        pass
+
     @abstractmethod
     def find_by_id(self, device_id: str) -> Optional[Device]:
         """Find device by ID"""
         pass
 
+    @abstractmethod
+    def find_by_ids(self, device_ids: List[str]) -> List[Device]:
+        """Find devices by ID in the given order, skipping unknown IDs"""
+        pass
+
     @abstractmethod
     def find_by_organization(
         self,
@@ -46,6 +61,16 @@ class IDeviceRepository(ABC):
         """Update device attributes"""
         pass
 
+    @abstractmethod
+    def update_status(self, device_id: str, status: DeviceStatus) -> Optional[DeviceStatus]:
+        """
+        Set device status if it differs from the stored one
+
+        Returns:
+            The previous status on a transition, None if unchanged
+        """
+        pass
+
     @abstractmethod
     def delete(self, device_id: str) -> bool:
         """Delete device"""
@@ -0,0 +1,54 @@
+"""Device Search Index Interface"""
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+from ...entities.device import Device
+from ...entities.firmware import FirmwareVersion
+
+
+class IDeviceSearchIndex(ABC):
+    """
+    Interface for a secondary device index answering filtered fleet queries
+
+    Supported filters (all optional, combined with AND):
+        {
+            'status': str,
+            'deviceType': str,
+            'tags': List[str],
+            'near': {'lat': float, 'lon': float, 'radiusMeters': float},
+            'bbox': {'minLat': float, 'minLon': float, 'maxLat': float, 'maxLon': float}
+        }
+    """
+
+    @abstractmethod
+    def index_device(self, old: Optional[Device], new: Optional[Device]):
+        """Update postings for a device change (None = absent)"""
+        pass
+
+    @abstractmethod
+    def index_devices(self, devices: List[Device]):
+        """Add postings for newly created devices"""
+        pass
+
+    @abstractmethod
+    def search(self, organization_id: str, filters: Dict) -> Optional[List[str]]:
+        """
+        Resolve filters to matching device IDs, sorted
+
+        Returns None when the filters cannot be answered from the index
+        and the caller has to fall back to scanning.
+        """
+        pass
+
+    @abstractmethod
+    def find_by_firmware(
+        self,
+        device_type: str,
+        below: Optional[FirmwareVersion] = None,
+        organization_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Stream the IDs of devices of a type, across organizations unless
+        one is given, whose firmware version is below `below` (any version
+        if None). Devices without a parseable version are included.
+        """
+        pass
@@ -0,0 +1,47 @@
+"""Digest Repository Interface"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set, Tuple
+
+from ...entities.digest_entry import DigestEntry
+
+
+class IDigestRepository(ABC):
+    """Interface for alerts buffered for notification digests"""
+
+    @abstractmethod
+    def add_entries(self, entries: List[DigestEntry]) -> None:
+        """Buffer entries; adding an entry again is a no-op"""
+        pass
+
+    @abstractmethod
+    def find_due(
+        self,
+        now: int,
+        limit: int,
+        cursor: Optional[Dict] = None
+    ) -> Tuple[List[DigestEntry], Optional[Dict]]:
+        """
+        Up to limit entries due at or before now (epoch seconds), after
+        cursor, and the cursor to continue from (None once all were listed)
+        """
+        pass
+
+    @abstractmethod
+    def defer_entries(self, entries: List[DigestEntry], due_at: int) -> None:
+        """Make entries due again at due_at (epoch seconds) instead of now"""
+        pass
+
+    @abstractmethod
+    def find_sent_keys(self, user_id: str) -> Set[str]:
+        """Keys of a user's entries that were sent recently"""
+        pass
+
+    @abstractmethod
+    def mark_sent(self, user_id: str, entries: List[DigestEntry]) -> None:
+        """Record entries as sent, so entries added again are not sent twice"""
+        pass
+
+    @abstractmethod
+    def delete_entries(self, entries: List[DigestEntry]) -> None:
+        """Remove entries from the buffer"""
+        pass
@@ -1,12 +1,11 @@
 """Firmware Repository Interface"""
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional
 from ...entities.firmware import Firmware
-from ...entities.deployment import Deployment
 
 
 class IFirmwareRepository(ABC):
-    """Interface for firmware data access"""
+    """Interface for firmware data access (deployments: IDeploymentRepository)"""
 
     @abstractmethod
     def save_firmware(self, firmware: Firmware) -> Firmware:
@@ -24,21 +23,6 @@ class IFirmwareRepository(ABC):
         pass
 
     @abstractmethod
-    def save_deployment(self, deployment: Deployment) -> Deployment:
-        """Save deployment"""
-        pass
-
-    @abstractmethod
-    def find_deployment_by_id(self, deployment_id: str) -> Optional[Deployment]:
-        """Find deployment by ID"""
-        pass
-
-    @abstractmethod
-    def find_deployments_by_firmware(self, firmware_id: str) -> List[Deployment]:
-        """Find all deployments for a firmware"""
-        pass
-
-    @abstractmethod
-    def update_deployment(self, deployment_id: str, updates: dict) -> Deployment:
-        """Update deployment"""
+    def update_firmware(self, firmware_id: str, updates: Dict) -> Optional[Firmware]:
+        """Update attributes of a firmware (to_dict names); None if it does not exist"""
         pass
@@ -0,0 +1,63 @@
+"""Fleet Stats Repository Interface"""
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+
+class IFleetStatsRepository(ABC):
+    """Interface for per-organization device counters (dashboard stats)"""
+
+    @abstractmethod
+    def record_added(self, organization_id: str, device_type: str, status: str, count: int = 1):
+        """Count devices added to the fleet"""
+        pass
+
+    @abstractmethod
+    def record_removed(self, organization_id: str, device_type: str, status: str):
+        """Count a device removed from the fleet"""
+        pass
+
+    @abstractmethod
+    def record_transition(
+        self,
+        organization_id: str,
+        device_type: str,
+        old_status: str,
+        new_status: str
+    ):
+        """Move a device from one status counter to another"""
+        pass
+
+    @abstractmethod
+    def get_stats(self, organization_id: str) -> Optional[Dict]:
+        """
+        Read the counters of an organization
+
+        Returns:
+            {
+                'totalDevices': int,
+                'byStatus': Dict[str, int],
+                'byType': Dict[str, int],
+                'reconciledAt': Optional[int]
+            }
+        """
+        pass
+
+    @abstractmethod
+    def snapshot_counters(self) -> Dict[str, Dict[str, int]]:
+        """Raw counters of every organization, read before a reconciliation"""
+        pass
+
+    @abstractmethod
+    def reconcile_stats(
+        self,
+        organization_id: str,
+        by_status: Dict[str, int],
+        by_type: Dict[str, int],
+        baseline: Dict[str, int]
+    ):
+        """
+        Correct the counters of an organization by the difference between
+        the recounted values and baseline (its snapshot_counters entry),
+        without overwriting concurrent increments
+        """
+        pass
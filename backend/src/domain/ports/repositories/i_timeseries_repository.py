@@ -1,8 +1,10 @@
 """Time Series Repository Interface"""
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 from datetime import datetime
 
+from ....shared.utils.ddsketch import DDSketch
+
 
 class ITimeSeriesRepository(ABC):
     """Interface for time-series data access (Timestream)"""
@@ -22,6 +24,22 @@ class ITimeSeriesRepository(ABC):
         """Query recent sensor data"""
         pass
 
+    @abstractmethod
+    def query_raw_series(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[Tuple[int, float]]:
+        """
+        Stream raw points of one metric in time order
+
+        Yields:
+            (timestamp in epoch milliseconds, value)
+        """
+        pass
+
     @abstractmethod
     def query_aggregated_data(
         self,
@@ -42,5 +60,29 @@ class ITimeSeriesRepository(ABC):
         start_time: datetime,
         end_time: datetime
     ) -> Dict:
-        """Query data for multiple devices"""
+        """
+        Query raw data for multiple devices
+
+        Returns:
+            Per-device columns aligned on timestamps:
+            {deviceId: {'timestamps': [epoch ms, ...], '<metric>': [float|None, ...]}}
+        """
+        pass
+
+    @abstractmethod
+    def query_bucket_sketches(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime,
+        aggregation_interval: str = '1h'
+    ) -> Dict[int, DDSketch]:
+        """
+        Quantile sketches of one metric per epoch-aligned interval
+
+        Returns:
+            {bucket start in epoch ms: DDSketch} for buckets with data;
+            sketches merge across buckets and devices
+        """
         pass
@@ -1,6 +1,6 @@
 """User Repository Interface"""
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from ...entities.user import User
 
 
@@ -46,3 +46,11 @@ class IUserRepository(ABC):
     def remove_device_token(self, user_id: str, token: str) -> bool:
         """Remove device token"""
         pass
+
+    @abstractmethod
+    def get_organization_version(self, organization_id: str) -> Tuple[int, int]:
+        """
+        Version of an organization's users, incremented by every change to
+        one of them, and the time of the last change (epoch ms, 0 if unknown)
+        """
+        pass
@@ -0,0 +1,22 @@
+# Domain services
+from .device_provisioning_service import DeviceProvisioningService
+from .update_conflator import UpdateConflator
+from .recipient_resolver import RecipientResolver
+from .notification_dispatch_service import NotificationDispatchService
+from .firmware_delta_service import FirmwareDeltaService
+from .firmware_ingestion_service import FirmwareIngestionService
+from .firmware_catalog import FirmwareCatalog
+from .deployment_planner import DeploymentPlanner
+from .deployment_monitor import DeploymentMonitor
+
+__all__ = [
+    'DeviceProvisioningService',
+    'UpdateConflator',
+    'RecipientResolver',
+    'NotificationDispatchService',
+    'FirmwareDeltaService',
+    'FirmwareIngestionService',
+    'FirmwareCatalog',
+    'DeploymentPlanner',
+    'DeploymentMonitor'
+]
@@ -0,0 +1,317 @@
+"""Deployment Monitor - Gate firmware rollout batches on job execution events"""
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..entities.deployment import Deployment, DeploymentBatch
+from ..entities.firmware import Firmware
+from ..ports.external.i_iot_provider import IIoTProvider
+from ..ports.repositories.i_deployment_repository import IDeploymentRepository
+from ..ports.repositories.i_device_repository import IDeviceRepository
+from ..ports.repositories.i_firmware_repository import IFirmwareRepository
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+
+# Things per CreateJob call
+JOB_MAX_TARGETS = 100
+DEVICE_READ_SIZE = 100
+DEPLOYABLE_STATUSES = ('available', 'deprecated')
+# Terminal job execution statuses; CANCELED and REMOVED executions were
+# stopped by a halt or an operator and are not counted
+EXECUTION_RESULTS = {
+    'SUCCEEDED': True,
+    'FAILED': False,
+    'TIMED_OUT': False,
+    'REJECTED': False
+}
+
+
+def job_id(deployment_id: str, batch_id: int, index: int) -> str:
+    """ID of the index-th IoT job of a deployment batch"""
+    return f"{deployment_id}_b{batch_id}_{index}"
+
+
+def parse_job_id(value: str) -> Optional[Tuple[str, int]]:
+    """(deploymentId, batchId) of a job created by the monitor, None for other jobs"""
+    parts = value.rsplit('_', 2)
+    if len(parts) != 3 or not parts[1].startswith('b') or not parts[1][1:].isdigit() or not parts[2].isdigit():
+        return None
+    return parts[0], int(parts[1][1:])
+
+
+def parse_execution_event(event: Dict) -> Optional[Tuple[str, int, str, bool]]:
+    """
+    (deploymentId, batchId, deviceId, succeeded) of a terminal job
+    execution event ($aws/events/jobExecution/<jobId>/<operation>), None
+    for any other event
+    """
+    if event.get('eventType') != 'JOB_EXECUTION':
+        return None
+    succeeded = EXECUTION_RESULTS.get(event.get('status'))
+    job = parse_job_id(event.get('jobId', ''))
+    thing_arn = event.get('thingArn', '')
+    if succeeded is None or job is None or '/' not in thing_arn:
+        return None
+    return job[0], job[1], thing_arn.rsplit('/', 1)[1], succeeded
+
+
+class DeploymentMonitor:
+    """
+    Drives deployments batch by batch from job execution events
+
+    Each batch is rolled out as IoT jobs named <deploymentId>_b<batch>_<n>,
+    one per image (full or delta) and JOB_MAX_TARGETS things, so an event
+    names its deployment and batch without any lookup. The events of a
+    delivery are counted with one atomic repository update per batch, and
+    the returned counters decide at once, without reading the deployment:
+    - threshold unreachable (too many failures even if every remaining
+      device succeeds): the batch's jobs are cancelled and the batch and
+      deployment fail; later batches never start
+    - threshold met (enough successes whatever the rest report): the next
+      pending batch starts, or the deployment completes after the last one
+
+    So a batch advances as soon as enough devices have updated, without
+    waiting for stragglers or for a polling interval. Devices that never
+    report (offline, their execution stays queued) would keep a batch from
+    being decided, so expire_batches() counts them as failed once the batch
+    is older than the batch deadline. Every step is safe to
+    repeat: results are counted once per device, job IDs are deterministic
+    and existing jobs are skipped, and status changes are conditional, so
+    redelivered events and concurrent consumers cannot start a batch twice.
+    """
+
+    def __init__(
+        self,
+        deployment_repository: IDeploymentRepository,
+        firmware_repository: IFirmwareRepository,
+        device_repository: IDeviceRepository,
+        iot_provider: IIoTProvider,
+        success_threshold: Optional[float] = None,
+        job_timeout_minutes: Optional[int] = None,
+        batch_deadline_minutes: Optional[int] = None
+    ):
+        self.deployment_repository = deployment_repository
+        self.firmware_repository = firmware_repository
+        self.device_repository = device_repository
+        self.iot_provider = iot_provider
+        self.success_threshold = (
+            settings.DEPLOYMENT_SUCCESS_THRESHOLD if success_threshold is None else success_threshold
+        )
+        self.job_timeout_minutes = job_timeout_minutes or settings.DEPLOYMENT_JOB_TIMEOUT_MINUTES
+        self.batch_deadline_minutes = batch_deadline_minutes or settings.DEPLOYMENT_BATCH_DEADLINE_MINUTES
+
+    def start(self, deployment_id: str) -> bool:
+        """
+        Start a scheduled deployment with its first batch
+
+        Returns:
+            False if the deployment does not exist or was already started
+        """
+        deployment = self.deployment_repository.find_by_id(deployment_id)
+        if deployment is None or deployment.status not in ('scheduled', 'in_progress'):
+            return False
+        if any(batch.status != 'pending' for batch in deployment.batches):
+            return False
+        # Set first, so results of the first devices find it in progress; a
+        # failed start leaves the first batch pending and can be repeated
+        if deployment.status == 'scheduled':
+            self.deployment_repository.update_status(deployment_id, 'in_progress', 'scheduled')
+            deployment.status = 'in_progress'
+        if not deployment.batches:
+            self.deployment_repository.update_status(deployment_id, 'completed', 'in_progress')
+            return True
+        self._start_batch(deployment, deployment.batches[0])
+        return True
+
+    def process(self, events: Dict[str, Dict]) -> Set[str]:
+        """
+        Count job execution events and act on the batches they complete
+
+        Args:
+            events: Event ID (e.g. SQS message ID) -> job execution event
+
+        Returns:
+            IDs of the events to retry; all events of a batch are retried
+            together, which is safe as results are counted once per device
+        """
+        groups: Dict[Tuple[str, int], Dict[str, bool]] = {}
+        event_ids: Dict[Tuple[str, int], List[str]] = {}
+        for event_id, event in events.items():
+            parsed = parse_execution_event(event)
+            if parsed is None:
+                continue
+            deployment_id, batch_id, device_id, succeeded = parsed
+            groups.setdefault((deployment_id, batch_id), {})[device_id] = succeeded
+            event_ids.setdefault((deployment_id, batch_id), []).append(event_id)
+
+        failed: Set[str] = set()
+        for (deployment_id, batch_id), results in groups.items():
+            try:
+                self.record(deployment_id, batch_id, results)
+            except Exception as e:
+                logger.error(
+                    f"Failed to process results of deployment {deployment_id} batch {batch_id}: {str(e)}",
+                    exc_info=True
+                )
+                failed.update(event_ids[(deployment_id, batch_id)])
+        return failed
+
+    def expire_batches(self, now: Optional[int] = None) -> int:
+        """
+        Decide the in-progress batches started more than the batch deadline
+        before now (epoch ms)
+
+        The batch's jobs are cancelled first, so no queued execution starts
+        afterwards, then its devices without a result are counted as failed
+        and the batch is evaluated like any other: the deployment halts or
+        advances. A device that reports in between keeps its own result.
+
+        Returns:
+            Number of batches expired
+        """
+        now = now or int(time.time() * 1000)
+        started_before = now - self.batch_deadline_minutes * 60 * 1000
+        expired = 0
+        for deployment_id, batch_id in self.deployment_repository.find_batches_started_before(started_before):
+            self._cancel_jobs(deployment_id, batch_id)
+            reported = self.deployment_repository.find_reported_devices(deployment_id, batch_id)
+            unreported = {
+                device_id: False
+                for device_id in self.deployment_repository.find_target_devices(deployment_id, batch_id)
+                if device_id not in reported
+            }
+            logger.warning(
+                f"Deployment {deployment_id} batch {batch_id} passed its deadline: "
+                f"{len(unreported)} devices without a result count as failed"
+            )
+            self.record(deployment_id, batch_id, unreported)
+            expired += 1
+        return expired
+
+    def record(self, deployment_id: str, batch_id: int, results: Dict[str, bool]) -> Optional[DeploymentBatch]:
+        """Count device results of a batch (device ID -> succeeded), then gate the deployment on them"""
+        batch = self.deployment_repository.record_device_results(deployment_id, batch_id, results)
+        if batch is None:
+            logger.warning(f"Results for unknown batch {batch_id} of deployment {deployment_id}")
+            return None
+        self._evaluate(deployment_id, batch)
+        return batch
+
+    def _evaluate(self, deployment_id: str, batch: DeploymentBatch):
+        # Results that arrive after a batch was decided are only counted
+        if batch.status != 'in_progress':
+            return
+        if batch.threshold_unreachable(self.success_threshold):
+            self._halt(deployment_id, batch)
+        elif batch.threshold_met(self.success_threshold):
+            self._advance(deployment_id, batch)
+
+    def _halt(self, deployment_id: str, batch: DeploymentBatch):
+        # Cancelled before the status change, so a failed cancel is retried
+        self._cancel_jobs(deployment_id, batch.batch_id)
+        if self.deployment_repository.update_batch_status(deployment_id, batch.batch_id, 'failed', 'in_progress'):
+            self.deployment_repository.update_status(deployment_id, 'failed', 'in_progress')
+            logger.warning(
+                f"Halted deployment {deployment_id}: batch {batch.batch_id} cannot reach "
+                f"{self.success_threshold}% ({batch.failure_count} of {batch.device_count} failed)"
+            )
+
+    def _advance(self, deployment_id: str, batch: DeploymentBatch):
+        deployment = self.deployment_repository.find_by_id(deployment_id)
+        if deployment is None or deployment.status != 'in_progress':
+            return
+        next_batch = next(
+            (b for b in deployment.batches if b.batch_id > batch.batch_id and b.status == 'pending'), None
+        )
+        # The next batch starts before this one is completed, so a failed
+        # start is retried with the events that met the threshold
+        if next_batch is not None:
+            self._start_batch(deployment, next_batch)
+        if self.deployment_repository.update_batch_status(deployment_id, batch.batch_id, 'completed', 'in_progress'):
+            logger.info(
+                f"Deployment {deployment_id} batch {batch.batch_id} met {self.success_threshold}% "
+                f"({batch.success_count} of {batch.device_count} succeeded)"
+            )
+            if next_batch is None:
+                self.deployment_repository.update_status(deployment_id, 'completed', 'in_progress')
+                logger.info(f"Deployment {deployment_id} completed")
+
+    def _cancel_jobs(self, deployment_id: str, batch_id: int):
+        """Cancel the queued executions of a batch's jobs, numbered from 0 without gaps"""
+        index = 0
+        while self.iot_provider.cancel_job(job_id(deployment_id, batch_id, index)):
+            index += 1
+
+    def _start_batch(self, deployment: Deployment, batch: DeploymentBatch):
+        """Create the IoT jobs of a batch; existing jobs are skipped"""
+        firmware = self.firmware_repository.find_firmware_by_id(deployment.firmware_id)
+        if firmware is None or firmware.status not in DEPLOYABLE_STATUSES:
+            logger.error(f"Firmware {deployment.firmware_id} of deployment {deployment.deployment_id} is not deployable")
+            self.deployment_repository.update_status(deployment.deployment_id, 'failed', 'in_progress')
+            return
+
+        groups, missing = self._group_by_image(firmware, deployment.deployment_id, batch.batch_id)
+        index = 0
+        for image, device_ids in groups:
+            document = self._job_document(deployment, firmware, image)
+            for start in range(0, len(device_ids), JOB_MAX_TARGETS):
+                self.iot_provider.create_job(
+                    job_id(deployment.deployment_id, batch.batch_id, index),
+                    device_ids[start:start + JOB_MAX_TARGETS],
+                    document,
+                    self.job_timeout_minutes
+                )
+                index += 1
+        if self.deployment_repository.update_batch_status(
+            deployment.deployment_id, batch.batch_id, 'in_progress', 'pending'
+        ):
+            logger.info(
+                f"Started deployment {deployment.deployment_id} batch {batch.batch_id}: "
+                f"{batch.device_count} devices in {index} jobs"
+            )
+
+        # Devices deleted since planning never report and count as failed.
+        # Evaluated again in any case: results that arrived while the batch
+        # was still pending were counted but not acted on, and a batch
+        # without jobs is decided right away.
+        self.record(deployment.deployment_id, batch.batch_id, {device_id: False for device_id in missing})
+
+    def _group_by_image(
+        self,
+        firmware: Firmware,
+        deployment_id: str,
+        batch_id: int
+    ) -> Tuple[List[Tuple[Dict, List[str]]], List[str]]:
+        """Batch devices grouped by the image they download, in a stable order, and unknown device IDs"""
+        groups: Dict[str, Tuple[Dict, List[str]]] = {}
+        missing: List[str] = []
+        chunk: List[str] = []
+
+        def read(device_ids: List[str]):
+            devices = self.device_repository.find_by_ids(device_ids)
+            found = set()
+            for device in devices:
+                image = firmware.select_image(device.firmware_version)
+                groups.setdefault(image['s3Key'], (image, []))[1].append(device.device_id)
+                found.add(device.device_id)
+            missing.extend(device_id for device_id in device_ids if device_id not in found)
+
+        for device_id in self.deployment_repository.find_target_devices(deployment_id, batch_id):
+            chunk.append(device_id)
+            if len(chunk) == DEVICE_READ_SIZE:
+                read(chunk)
+                chunk = []
+        if chunk:
+            read(chunk)
+        ordered = sorted(groups.values(), key=lambda group: (group[0]['type'] != 'full', group[0]['s3Key']))
+        return ordered, missing
+
+    def _job_document(self, deployment: Deployment, firmware: Firmware, image: Dict) -> Dict:
+        url = f"https://s3.amazonaws.com/{firmware.s3_bucket}/{image['s3Key']}"
+        return {
+            'operation': 'firmware_update',
+            'deploymentId': deployment.deployment_id,
+            'firmwareId': firmware.firmware_id,
+            'firmwareVersion': str(firmware.version),
+            'image': {**image, 'url': f"${{aws:iot:s3-presigned-url:{url}}}"}
+        }
+
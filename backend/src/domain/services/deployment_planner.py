@@ -0,0 +1,85 @@
+"""Deployment Planner - Resolve firmware rollout targets from the device index"""
+import uuid
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from ..entities.deployment import Deployment, DeploymentBatch
+from ..entities.firmware import Firmware
+from ..ports.repositories.i_deployment_repository import IDeploymentRepository
+from ..ports.repositories.i_device_search_index import IDeviceSearchIndex
+from ...shared.exceptions.base import ValidationError
+
+DEFAULT_BATCH_SIZE = 1000
+# Share of the targets in the first batch of a canary deployment
+CANARY_PERCENT = 1
+STRATEGIES = ('all-at-once', 'canary', 'staged')
+
+
+class DeploymentPlanner:
+    """
+    Plans firmware deployments without loading devices
+
+    Targets are the devices of the firmware's device types running an
+    older (or unknown) version, streamed from the firmware postings of the
+    device index; no device item is read. They are then split into batches
+    by strategy:
+    - all-at-once: a single batch
+    - canary: CANARY_PERCENT of the targets first, then batch_size batches
+    - staged: batch_size batches
+    """
+
+    def __init__(self, search_index: IDeviceSearchIndex, deployment_repository: IDeploymentRepository):
+        self.search_index = search_index
+        self.deployment_repository = deployment_repository
+
+    def resolve_targets(self, firmware: Firmware, organization_id: Optional[str] = None) -> Iterator[str]:
+        """Stream the IDs of the devices a firmware would update"""
+        for device_type in firmware.device_types:
+            yield from self.search_index.find_by_firmware(
+                device_type, below=firmware.version, organization_id=organization_id
+            )
+
+    def plan(
+        self,
+        firmware: Firmware,
+        strategy: str,
+        created_by: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        organization_id: Optional[str] = None,
+        scheduled_at: Optional[datetime] = None
+    ) -> Deployment:
+        """Create and save a scheduled deployment of a firmware to its targets"""
+        if strategy not in STRATEGIES:
+            raise ValidationError(f"Unknown deployment strategy {strategy}", field='strategy')
+        if batch_size < 1:
+            raise ValidationError("Batch size must be positive", field='batchSize')
+
+        targets = list(self.resolve_targets(firmware, organization_id))
+        deployment = Deployment(
+            deployment_id=f"dep-{uuid.uuid4().hex[:12]}",
+            firmware_id=firmware.firmware_id,
+            strategy=strategy,
+            target_devices=targets,
+            status='scheduled',
+            batches=_split(targets, strategy, batch_size),
+            scheduled_at=scheduled_at,
+            created_by=created_by,
+            created_at=datetime.utcnow()
+        )
+        return self.deployment_repository.save(deployment)
+
+
+def _split(targets: List[str], strategy: str, batch_size: int) -> List[DeploymentBatch]:
+    if not targets:
+        return []
+    if strategy == 'all-at-once':
+        return [DeploymentBatch(batch_id=1, devices=targets, status='pending')]
+
+    batches = []
+    start = 0
+    size = max(1, len(targets) * CANARY_PERCENT // 100) if strategy == 'canary' else batch_size
+    while start < len(targets):
+        batches.append(DeploymentBatch(batch_id=len(batches) + 1, devices=targets[start:start + size], status='pending'))
+        start += size
+        size = batch_size
+    return batches
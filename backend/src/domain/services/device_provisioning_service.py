@@ -0,0 +1,176 @@
+"""Device Provisioning Service - Bulk device onboarding"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pydantic import ValidationError as PydanticValidationError
+
+from ..entities.device import Device, DeviceStatus
+from ..ports.external.i_iot_provider import IIoTProvider
+from ..ports.repositories.i_device_repository import IDeviceRepository
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...shared.schemas.device_schemas import RegisterDeviceRequest
+
+
+class DeviceProvisioningService:
+    """
+    Registers devices in bulk
+
+    Rows are processed in windows: every row of a window is validated with
+    RegisterDeviceRequest, valid devices are written with batched writes,
+    then IoT things and certificates are created on a bounded thread pool.
+    Results are yielded per row, in input order, as each window completes,
+    so memory stays proportional to the window size, not the shipment.
+
+    With an id_seed, device IDs are derived from the seed and the row
+    number, so an interrupted import can process its last rows again:
+    devices that already exist are not written twice, and their things get
+    a new certificate in place of the one whose credentials were lost.
+    """
+
+    def __init__(
+        self,
+        device_repository: IDeviceRepository,
+        iot_provider: IIoTProvider,
+        max_workers: Optional[int] = None,
+        window_size: int = 200
+    ):
+        self.device_repository = device_repository
+        self.iot_provider = iot_provider
+        self.max_workers = max_workers or settings.IOT_PROVISIONING_CONCURRENCY
+        self.window_size = window_size
+
+    def register_bulk(
+        self,
+        rows: Iterable[Dict],
+        organization_id: str,
+        id_seed: Optional[str] = None,
+        first_row: int = 1
+    ) -> Iterator[Dict]:
+        """
+        Register one device per row
+
+        A row may also be an Exception raised while parsing it, which is
+        reported as invalid. first_row numbers the first of rows when an
+        import resumes part way through.
+
+        Yields one result per row:
+            {'row': int, 'status': 'created', 'deviceId': str, ...credentials}
+            {'row': int, 'status': 'invalid', 'errors': [...]}
+            {'row': int, 'status': 'failed', 'deviceId': str, 'error': str}
+        """
+        window = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for row_number, row in enumerate(rows, start=first_row):
+                window.append(self._build_device(row_number, row, organization_id, id_seed))
+                if len(window) >= self.window_size:
+                    yield from self._provision_window(window, pool)
+                    window = []
+            if window:
+                yield from self._provision_window(window, pool)
+
+    def _build_device(self, row_number: int, row: Dict, organization_id: str, id_seed: Optional[str]) -> Dict:
+        """Validate a row and create its Device entity"""
+        if isinstance(row, Exception):
+            return {'row': row_number, 'status': 'invalid', 'errors': _format_errors(row)}
+        try:
+            request = RegisterDeviceRequest(**row)
+        except (PydanticValidationError, TypeError) as e:
+            return {'row': row_number, 'status': 'invalid', 'errors': _format_errors(e)}
+
+        now = datetime.utcnow()
+        device = Device(
+            deviceId=_device_id(id_seed, row_number),
+            organizationId=organization_id,
+            deviceType=request.device_type,
+            name=request.name,
+            status=DeviceStatus.REGISTERED,
+            location=request.location,
+            connectivity=request.connectivity,
+            metadata=request.metadata,
+            tags=request.tags,
+            createdAt=now,
+            updatedAt=now
+        )
+        return {'row': row_number, 'status': 'pending', 'device': device}
+
+    def _provision_window(self, window: List[Dict], pool: ThreadPoolExecutor) -> Iterator[Dict]:
+        """Persist a window of devices, then provision them in IoT Core"""
+        devices = [entry['device'] for entry in window if entry['status'] == 'pending']
+        existing = {
+            device.device_id for device in self.device_repository.find_by_ids([d.device_id for d in devices])
+        } if devices else set()
+        new_devices = [device for device in devices if device.device_id not in existing]
+        unwritten = set(self.device_repository.save_batch(new_devices)) if new_devices else set()
+
+        futures = {
+            device.device_id: pool.submit(self._provision_thing, device, device.device_id in existing)
+            for device in devices if device.device_id not in unwritten
+        }
+
+        for entry in window:
+            if entry['status'] != 'pending':
+                yield entry
+                continue
+            device = entry['device']
+            if device.device_id in unwritten:
+                yield {
+                    'row': entry['row'],
+                    'status': 'failed',
+                    'deviceId': device.device_id,
+                    'error': 'Device could not be saved'
+                }
+                continue
+            yield {'row': entry['row'], **futures[device.device_id].result()}
+
+    def _provision_thing(self, device: Device, existing: bool = False) -> Dict:
+        """Create the IoT thing and certificate, rolling the device back on failure"""
+        try:
+            # CreateThing returns the existing thing when called again
+            thing_arn = self.iot_provider.create_thing(device)
+            credentials = self.iot_provider.create_certificates(device, replace_existing=existing)
+        except Exception as e:
+            logger.warning(f"IoT provisioning failed for {device.device_id}: {str(e)}")
+            self._rollback(device)
+            return {'status': 'failed', 'deviceId': device.device_id, 'error': str(e)}
+
+        return {
+            'status': 'created',
+            'deviceId': device.device_id,
+            'name': device.name,
+            'thingArn': thing_arn,
+            'provisioningCredentials': {
+                'endpoint': settings.IOT_ENDPOINT,
+                **credentials
+            }
+        }
+
+    def _rollback(self, device: Device):
+        """Best-effort removal of a partially provisioned device"""
+        try:
+            self.iot_provider.delete_thing(device.device_id)
+        except Exception as e:
+            logger.warning(f"Failed to delete thing {device.device_id}: {str(e)}")
+        try:
+            self.device_repository.delete(device.device_id)
+        except Exception as e:
+            logger.error(f"Failed to roll back device {device.device_id}: {str(e)}")
+
+
+def _device_id(id_seed: Optional[str], row_number: int) -> str:
+    """Random device ID, or one derived from the import and row when seeded"""
+    if id_seed is None:
+        return f"dev-{uuid.uuid4().hex[:12]}"
+    return f"dev-{uuid.uuid5(uuid.NAMESPACE_URL, f'{id_seed}#{row_number}').hex[:12]}"
+
+
+def _format_errors(error: Exception) -> List[Dict]:
+    """Flatten pydantic validation errors into field/message pairs"""
+    if isinstance(error, PydanticValidationError):
+        return [
+            {'field': '.'.join(str(part) for part in e['loc']), 'message': e['msg']}
+            for e in error.errors()
+        ]
+    return [{'field': None, 'message': str(error)}]
@@ -0,0 +1,58 @@
+"""Firmware Catalog - Firmware releases by device type and version"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..entities.firmware import Firmware, FirmwareVersion
+from ..ports.repositories.i_firmware_repository import IFirmwareRepository
+
+
+class FirmwareCatalog:
+    """
+    Firmware releases indexed by device type and parsed version
+
+    Loaded with one read of the firmware table. A (device type, version)
+    lookup is a dict read and version ranges are bisections of the
+    releases of a device type, which are kept sorted by version.
+    """
+
+    def __init__(self, firmware: Iterable[Firmware]):
+        self._releases: Dict[str, List[Firmware]] = {}
+        self._by_version: Dict[Tuple[str, FirmwareVersion], List[Firmware]] = {}
+        for release in firmware:
+            for device_type in release.device_types:
+                self._releases.setdefault(device_type, []).append(release)
+                self._by_version.setdefault((device_type, release.version), []).append(release)
+        for releases in self._releases.values():
+            releases.sort(key=lambda release: release.version)
+        self._versions = {
+            device_type: [release.version for release in releases]
+            for device_type, releases in self._releases.items()
+        }
+
+    @classmethod
+    def load(cls, firmware_repository: IFirmwareRepository) -> 'FirmwareCatalog':
+        """Build the catalog from every firmware in the repository"""
+        return cls(firmware_repository.find_all_firmware())
+
+    def find(self, device_type: str, version: FirmwareVersion) -> List[Firmware]:
+        """Releases of a version for a device type"""
+        return list(self._by_version.get((device_type, version), ()))
+
+    def releases(
+        self,
+        device_type: str,
+        below: Optional[FirmwareVersion] = None,
+        status: Optional[str] = None
+    ) -> List[Firmware]:
+        """Releases for a device type, oldest first, optionally below a version or with a status"""
+        releases = self._releases.get(device_type, [])
+        if below is not None:
+            releases = releases[:bisect_left(self._versions[device_type], below)]
+        if status is not None:
+            releases = [release for release in releases if release.status == status]
+        return list(releases)
+
+    def latest(self, device_type: str, status: Optional[str] = 'available') -> Optional[Firmware]:
+        """Newest release for a device type"""
+        releases = self.releases(device_type, status=status)
+        return releases[-1] if releases else None
@@ -0,0 +1,109 @@
+"""Firmware Delta Service - Binary patches between firmware releases"""
+import hashlib
+from typing import Dict, List, Optional
+
+from ..entities.firmware import Firmware
+from ..ports.external.i_delta_encoder import IDeltaEncoder
+from ..ports.external.i_firmware_storage import IFirmwareStorage
+from ..ports.repositories.i_firmware_repository import IFirmwareRepository
+from .firmware_catalog import FirmwareCatalog
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+
+DELTA_KEY_PREFIX = 'deltas/'
+
+
+class FirmwareDeltaService:
+    """
+    Builds patches to a new firmware release
+
+    When a release is uploaded, patches are built from the newest earlier
+    available releases sharing one of its device types (the versions most
+    of the fleet is on) and recorded in the release's metadata:
+
+        metadata['deltas'] = {
+            'v1.2.0': {'sourceFirmwareId', 'sourceVersion', 'sourceChecksum',
+                       's3Key', 'checksum', 'size', 'format'},
+            ...
+        }
+
+    Patches that save too little over the full image are not kept.
+    Deployments then send each device the patch from its firmware_version,
+    or the full image when there is none (Firmware.select_image).
+    """
+
+    def __init__(
+        self,
+        firmware_repository: IFirmwareRepository,
+        storage: IFirmwareStorage,
+        encoder: IDeltaEncoder,
+        source_count: Optional[int] = None,
+        max_ratio: Optional[float] = None
+    ):
+        self.firmware_repository = firmware_repository
+        self.storage = storage
+        self.encoder = encoder
+        self.source_count = source_count or settings.FIRMWARE_DELTA_SOURCES
+        self.max_ratio = max_ratio or settings.FIRMWARE_DELTA_MAX_RATIO
+
+    def select_sources(self, firmware: Firmware) -> List[Firmware]:
+        """Newest earlier available releases for the device types of a firmware"""
+        catalog = FirmwareCatalog.load(self.firmware_repository)
+        candidates: Dict[str, Firmware] = {}
+        for device_type in firmware.device_types:
+            for source in catalog.releases(device_type, below=firmware.version, status='available'):
+                candidates[source.firmware_id] = source
+        by_version: Dict[str, List[Firmware]] = {}
+        for source in candidates.values():
+            by_version.setdefault(str(source.version), []).append(source)
+        # Devices only report a version, so it must identify a single image
+        sources = [releases[0] for releases in by_version.values()
+                   if len({release.checksum for release in releases}) == 1]
+        sources.sort(key=lambda source: source.version, reverse=True)
+        return sources[:self.source_count]
+
+    def generate_deltas(self, firmware: Firmware) -> Firmware:
+        """
+        Build and store the missing patches to a firmware and record them
+
+        A source that fails is logged and skipped, so the others still get
+        their patch; generating again only builds the missing ones.
+        """
+        deltas = dict(firmware.metadata.get('deltas', {}))
+        sources = [s for s in self.select_sources(firmware) if str(s.version) not in deltas]
+        if not sources:
+            return firmware
+
+        target = self.storage.read(firmware.s3_key)
+        for source in sources:
+            try:
+                patch = self.encoder.diff(self.storage.read(source.s3_key), target)
+            except Exception as e:
+                logger.error(f"Failed to diff {source.firmware_id} -> {firmware.firmware_id}: {str(e)}")
+                continue
+            if len(patch) > len(target) * self.max_ratio:
+                logger.info(
+                    f"Skipping patch {source.version} -> {firmware.version}: "
+                    f"{len(patch)} of {len(target)} bytes"
+                )
+                continue
+            key = f"{DELTA_KEY_PREFIX}{firmware.firmware_id}/{source.firmware_id}.{self.encoder.format}"
+            self.storage.write(key, patch)
+            deltas[str(source.version)] = {
+                'sourceFirmwareId': source.firmware_id,
+                'sourceVersion': str(source.version),
+                'sourceChecksum': source.checksum,
+                's3Key': key,
+                'checksum': hashlib.sha256(patch).hexdigest(),
+                'size': len(patch),
+                'format': self.encoder.format
+            }
+            logger.info(
+                f"Built patch {source.version} -> {firmware.version}: "
+                f"{len(patch)} of {len(target)} bytes"
+            )
+
+        firmware.metadata = {**firmware.metadata, 'deltas': deltas}
+        # Only the metadata: ingestion may be updating the status meanwhile
+        updated = self.firmware_repository.update_firmware(firmware.firmware_id, {'metadata': firmware.metadata})
+        return updated or firmware
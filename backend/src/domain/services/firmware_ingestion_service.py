@@ -0,0 +1,58 @@
+"""Firmware Ingestion Service - Verify and publish uploaded firmware images"""
+from typing import Optional
+
+from ..entities.firmware import Firmware
+from ..ports.external.i_firmware_storage import IFirmwareStorage
+from ..ports.repositories.i_firmware_repository import IFirmwareRepository
+from ...shared.middleware.logger import logger
+
+UPLOAD_KEY_PREFIX = 'uploads/'
+
+
+class FirmwareIngestionService:
+    """
+    Verifies uploaded firmware images and publishes them
+
+    A firmware is saved as pending (save_firmware), holding the SHA-256
+    the client declared in `checksum`, and its image is uploaded to
+    uploads/<firmwareId>.bin. ingest() streams that upload to the
+    firmware's s3_key while hashing it, in a single read:
+    - digest matches: size and checksum are filled in and the firmware
+      becomes available
+    - digest differs: the image is never written to s3_key and the
+      firmware is rejected, with what was received in its metadata
+    """
+
+    def __init__(self, firmware_repository: IFirmwareRepository, storage: IFirmwareStorage):
+        self.firmware_repository = firmware_repository
+        self.storage = storage
+
+    def ingest(self, firmware_id: str, source_key: str) -> Optional[Firmware]:
+        """
+        Verify and publish the uploaded image of a pending firmware
+
+        Returns:
+            The updated firmware, or None if it does not exist or is no
+            longer pending (a repeated event)
+        """
+        firmware = self.firmware_repository.find_firmware_by_id(firmware_id)
+        if firmware is None:
+            logger.warning(f"No firmware record for upload {source_key}")
+            return None
+        if firmware.status != 'pending':
+            logger.info(f"Firmware {firmware_id} is {firmware.status}, ignoring upload {source_key}")
+            return None
+
+        size, checksum = self.storage.ingest(source_key, firmware.s3_key, firmware.checksum)
+        if checksum != firmware.checksum.lower():
+            logger.warning(
+                f"Rejecting firmware {firmware_id}: SHA-256 {checksum} does not match {firmware.checksum}"
+            )
+            updates = {
+                'status': 'rejected',
+                'metadata': {**firmware.metadata, 'receivedChecksum': checksum, 'receivedSize': size}
+            }
+        else:
+            logger.info(f"Published firmware {firmware_id} ({firmware.version}): {size} bytes")
+            updates = {'status': 'available', 'size': size, 'checksum': checksum}
+        return self.firmware_repository.update_firmware(firmware_id, updates)
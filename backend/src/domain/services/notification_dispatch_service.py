@@ -0,0 +1,504 @@
+"""Notification Dispatch Service - Batched multi-channel alert notifications"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..entities.alert import Alert, AlertSeverity
+from ..entities.digest_entry import DigestEntry
+from ..entities.user import User
+from ..ports.external.i_email_provider import IEmailProvider
+from ..ports.external.i_push_provider import IPushProvider
+from ..ports.external.i_rate_limiter import IRateLimiter
+from ..ports.repositories.i_digest_repository import IDigestRepository
+from ..ports.repositories.i_user_repository import IUserRepository
+from .recipient_resolver import RecipientResolver
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+
+# Channels per severity; critical alerts also ignore quiet hours
+SEVERITY_CHANNELS = {
+    AlertSeverity.CRITICAL: ('email', 'push'),
+    AlertSeverity.WARNING: ('email', 'push'),
+    AlertSeverity.INFO: ('email',)
+}
+# Alerts listed in one digest email; the count covers all of them
+MAX_DIGEST_ALERTS_LISTED = 50
+# Digest window for notifications over a recipient's rate when the user
+# has no digest window of its own
+DEFAULT_OVERFLOW_DIGEST_SECONDS = 15 * 60
+# Time spent waiting for channel quota when the caller sets no deadline
+DEFAULT_THROTTLE_WAIT_SECONDS = 10
+# Digest entries that could not be sent are due again after their age,
+# within these bounds, so retries back off instead of blocking later entries
+DIGEST_RETRY_MIN_SECONDS = 60
+DIGEST_RETRY_MAX_SECONDS = 60 * 60
+
+
+class NotificationDispatchService:
+    """
+    Sends the notifications for a batch of alerts
+
+    Each alert is routed to users and channels by severity, then through
+    the organization's cached routing table (channel preferences, device
+    subscriptions, quiet hours; see RecipientResolver), which is validated
+    once per organization per batch. Deliveries are then grouped by recipient
+    and channel across the whole batch:
+    - email: one templated email per user listing all of its alerts, sent
+      in bulk (SES SendBulkTemplatedEmail)
+    - push: one notification per distinct set of alerts, multicast to the
+      tokens of every user that shares it (FCM, 500 tokens per call)
+    The channels are sent concurrently. Tokens FCM reports as unregistered
+    are removed from their users afterwards.
+
+    With a digest repository, non-critical alerts of users with a digest
+    window are buffered instead and sent by flush_digests() as one email
+    and one push per user once the window ends. Critical alerts are
+    always sent immediately.
+
+    With a rate limiter, sends are held to shared token buckets:
+    - per recipient and channel: non-critical notifications over the
+      user's rate go to the user's digest
+    - per channel (SES and FCM quotas): deliveries are sent in chunks as
+      tokens become available, critical ones first, until the deadline.
+      The messages of deliveries still unsent then are returned as
+      throttled so the caller can redeliver them later; like provider
+      throttling errors, which are reported the same way.
+
+    Delivery is at least once: a message is retried when one of its
+    recipients could not be reached for a transient reason, which sends it
+    again to the recipients that did get it.
+    """
+
+    def __init__(
+        self,
+        user_repository: IUserRepository,
+        email_provider: IEmailProvider,
+        push_provider: IPushProvider,
+        email_template: Optional[str] = None,
+        dashboard_url: Optional[str] = None,
+        recipient_resolver: Optional[RecipientResolver] = None,
+        digest_repository: Optional[IDigestRepository] = None,
+        rate_limiter: Optional[IRateLimiter] = None
+    ):
+        self.user_repository = user_repository
+        self.digest_repository = digest_repository
+        self.rate_limiter = rate_limiter
+        self.recipient_resolver = recipient_resolver or RecipientResolver(user_repository)
+        self.email_provider = email_provider
+        self.push_provider = push_provider
+        self.email_template = email_template or settings.SES_ALERT_TEMPLATE
+        self.dashboard_url = (dashboard_url if dashboard_url is not None else settings.DASHBOARD_URL).rstrip('/')
+
+    def dispatch(
+        self,
+        alerts: Dict[str, Alert],
+        now: Optional[datetime] = None,
+        deadline: Optional[float] = None
+    ) -> Tuple[Set[str], Set[str]]:
+        """
+        Notify the recipients of alerts keyed by message ID
+
+        Sends wait for channel quota until deadline (epoch seconds).
+
+        Returns:
+            (failed, throttled): message IDs to retry after a transient
+            failure, and message IDs held back by a rate limit
+        """
+        now = now or datetime.utcnow()
+        deadline = deadline or time.time() + DEFAULT_THROTTLE_WAIT_SECONDS
+        failed: Set[str] = set()
+
+        unavailable: Set[str] = set()
+        for organization_id in {alert.organization_id for alert in alerts.values()}:
+            try:
+                self.recipient_resolver.refresh(organization_id, now)
+            except Exception as e:
+                logger.error(f"Failed to load users of {organization_id}: {str(e)}", exc_info=True)
+                unavailable.add(organization_id)
+
+        # channel -> userId -> (user, message IDs)
+        deliveries: Dict[str, Dict[str, Tuple[User, List[str]]]] = {'email': {}, 'push': {}}
+        digest_entries: List[Tuple[str, DigestEntry]] = []
+        for message_id, alert in alerts.items():
+            if alert.organization_id in unavailable:
+                failed.add(message_id)
+                continue
+            critical = alert.severity == AlertSeverity.CRITICAL
+            recipients = self.recipient_resolver.resolve(
+                alert,
+                SEVERITY_CHANNELS[alert.severity],
+                now,
+                ignore_quiet_hours=critical
+            )
+            for channel, users in recipients.items():
+                for user in users:
+                    window = 0 if critical or not self.digest_repository else user.digest_window_seconds()
+                    if window:
+                        digest_entries.append(
+                            (message_id, DigestEntry.for_alert(user.user_id, channel, alert, window))
+                        )
+                    else:
+                        deliveries[channel].setdefault(user.user_id, (user, []))[1].append(message_id)
+
+        throttled: Set[str] = set()
+        if self.rate_limiter:
+            throttled.update(self._limit_recipients(deliveries, alerts, digest_entries))
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [
+                pool.submit(self._send_emails, deliveries['email'], alerts, deadline),
+                pool.submit(self._send_pushes, deliveries['push'], alerts, deadline)
+            ]
+            buffered = pool.submit(self._buffer_digests, digest_entries)
+            for future in futures:
+                channel_failed, channel_throttled = future.result()
+                failed.update(channel_failed)
+                throttled.update(channel_throttled)
+            failed.update(buffered.result())
+
+        throttled -= failed
+        logger.info(
+            f"Dispatched {len(alerts)} alerts: {len(deliveries['email'])} emails, "
+            f"{len(deliveries['push'])} push recipients, {len(digest_entries)} digest entries, "
+            f"{len(failed)} messages to retry, {len(throttled)} throttled"
+        )
+        return failed, throttled
+
+    def flush_digests(
+        self,
+        limit: int,
+        now: Optional[int] = None,
+        deadline: Optional[float] = None,
+        cursor: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Send the digests of up to limit due entries, listed after cursor
+
+        Entries already recorded as sent (the alert was redelivered after
+        its digest went out) and entries whose user or channel is gone are
+        dropped. Entries of users in quiet hours become due when the quiet
+        hours end; entries of failed sends, and not sent for lack of channel
+        quota by deadline, become due again after a backoff. Either way they
+        stay buffered but no longer come first in the due listing.
+
+        Returns:
+            {'due': entries found, 'done': sent or dropped, 'deferred':
+            entries made due later, 'cursor': cursor of the next round,
+            None once all due entries were listed}
+        """
+        now = now or int(time.time())
+        deadline = deadline or time.time() + DEFAULT_THROTTLE_WAIT_SECONDS
+        now_utc = datetime.utcfromtimestamp(now)
+        due, next_cursor = self.digest_repository.find_due(now, limit, cursor)
+
+        by_user: Dict[str, List[DigestEntry]] = {}
+        for entry in due:
+            by_user.setdefault(entry.user_id, []).append(entry)
+
+        tables = {}
+        for organization_id in {entry.organization_id for entry in due}:
+            try:
+                tables[organization_id] = self.recipient_resolver.refresh(organization_id, now_utc)
+            except Exception as e:
+                logger.error(f"Failed to load users of {organization_id}: {str(e)}", exc_info=True)
+
+        # Digest "messages" are entries, keyed by user and entry key
+        deliveries: Dict[str, Dict[str, Tuple[User, List[str]]]] = {'email': {}, 'push': {}}
+        entries: Dict[str, DigestEntry] = {}
+        dropped: List[DigestEntry] = []
+        retry: List[DigestEntry] = []
+        deferred: Dict[int, List[DigestEntry]] = {}
+        for user_id, user_entries in by_user.items():
+            table = tables.get(user_entries[0].organization_id)
+            if table is None:
+                retry.extend(user_entries)
+                continue
+            user = table.users.get(user_id)
+            if user is None:
+                dropped.extend(user_entries)
+                continue
+            quiet_seconds = table.quiet_seconds_left(user_id, now_utc)
+            if quiet_seconds:
+                deferred.setdefault(now + quiet_seconds, []).extend(user_entries)
+                continue
+            try:
+                sent = self.digest_repository.find_sent_keys(user_id)
+            except Exception as e:
+                logger.error(f"Failed to read sent digests of {user_id}: {str(e)}")
+                retry.extend(user_entries)
+                continue
+            for entry in user_entries:
+                if entry.key in sent or user_id not in table.channels.get(entry.channel, ()):
+                    dropped.append(entry)
+                    continue
+                key = f"{user_id}/{entry.key}"
+                entries[key] = entry
+                deliveries[entry.channel].setdefault(user_id, (user, []))[1].append(key)
+
+        alerts = {key: entry.alert for key, entry in entries.items()}
+        failed: Set[str] = set()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [
+                pool.submit(self._send_emails, deliveries['email'], alerts, deadline, True),
+                pool.submit(self._send_pushes, deliveries['push'], alerts, deadline)
+            ]
+            for future in futures:
+                channel_failed, channel_throttled = future.result()
+                failed.update(channel_failed)
+                failed.update(channel_throttled)
+
+        delivered: Dict[str, List[DigestEntry]] = {}
+        for key, entry in entries.items():
+            if key in failed:
+                retry.append(entry)
+            else:
+                delivered.setdefault(entry.user_id, []).append(entry)
+        done = list(dropped)
+        for user_id, user_entries in delivered.items():
+            try:
+                self.digest_repository.mark_sent(user_id, user_entries)
+            except Exception as e:
+                # Deleting them now could not stop a redelivered alert
+                # from being sent again
+                logger.error(f"Failed to mark digest of {user_id} sent: {str(e)}")
+                retry.extend(user_entries)
+                continue
+            done.extend(user_entries)
+        if done:
+            self.digest_repository.delete_entries(done)
+
+        for entry in retry:
+            backoff = min(max(now - entry.window_end, DIGEST_RETRY_MIN_SECONDS), DIGEST_RETRY_MAX_SECONDS)
+            deferred.setdefault(now + backoff, []).append(entry)
+        deferred_count = 0
+        for due_at, deferred_entries in deferred.items():
+            try:
+                self.digest_repository.defer_entries(deferred_entries, due_at)
+                deferred_count += len(deferred_entries)
+            except Exception as e:
+                logger.error(f"Failed to defer {len(deferred_entries)} digest entries: {str(e)}")
+
+        logger.info(
+            f"Flushed digests of {len(delivered)} users: {len(due)} due entries, "
+            f"{len(done)} done, {len(retry)} to retry, {deferred_count} deferred"
+        )
+        return {'due': len(due), 'done': len(done), 'deferred': deferred_count, 'cursor': next_cursor}
+
+    def _limit_recipients(
+        self,
+        deliveries: Dict[str, Dict[str, Tuple[User, List[str]]]],
+        alerts: Dict[str, Alert],
+        digest_entries: List[Tuple[str, DigestEntry]]
+    ) -> Set[str]:
+        """Move non-critical notifications over a user's rate to its digest"""
+        rate = settings.RECIPIENT_MAX_NOTIFICATIONS_PER_MINUTE / 60
+        burst = settings.RECIPIENT_NOTIFICATION_BURST
+        throttled: Set[str] = set()
+        for channel, recipients in deliveries.items():
+            for user_id, (user, message_ids) in list(recipients.items()):
+                deferrable = [m for m in message_ids if alerts[m].severity != AlertSeverity.CRITICAL]
+                if not deferrable or self._acquire(f"recipient:{channel}:{user_id}", 1, rate, burst):
+                    continue
+                if self.digest_repository:
+                    window = user.digest_window_seconds() or DEFAULT_OVERFLOW_DIGEST_SECONDS
+                    digest_entries.extend(
+                        (m, DigestEntry.for_alert(user_id, channel, alerts[m], window)) for m in deferrable
+                    )
+                else:
+                    throttled.update(deferrable)
+                kept = [m for m in message_ids if m not in deferrable]
+                if kept:
+                    recipients[user_id] = (user, kept)
+                else:
+                    del recipients[user_id]
+        return throttled
+
+    def _wait_for_quota(self, channel: str, count: int, deadline: float) -> int:
+        """Take up to count tokens of a channel's quota, waiting for them until deadline"""
+        if not self.rate_limiter:
+            return count
+        rate = {'email': settings.SES_MAX_SEND_RATE, 'push': settings.FCM_MAX_SEND_RATE}[channel]
+        while True:
+            granted = self._acquire(f"channel:{channel}", count, rate, max(rate, 1))
+            remaining = deadline - time.time()
+            if granted or remaining <= 0:
+                return granted
+            # Jittered so waiting containers do not poll the bucket in step
+            time.sleep(min(remaining, max(1 / rate, 0.1)) * random.uniform(0.5, 1.0))
+
+    def _acquire(self, bucket: str, count: int, rate: float, burst: float) -> int:
+        try:
+            return self.rate_limiter.acquire(bucket, count, rate, burst)
+        except Exception as e:
+            # Providers still throttle on their side; failing open keeps
+            # notifications flowing while the limiter table is unavailable
+            logger.warning(f"Rate limiter unavailable for {bucket}: {str(e)}")
+            return count
+
+    def _buffer_digests(self, digest_entries: List[Tuple[str, DigestEntry]]) -> Set[str]:
+        if not digest_entries:
+            return set()
+        try:
+            self.digest_repository.add_entries([entry for _, entry in digest_entries])
+        except Exception as e:
+            logger.error(f"Failed to buffer digest entries: {str(e)}", exc_info=True)
+            return {message_id for message_id, _ in digest_entries}
+        return set()
+
+    def _send_emails(
+        self,
+        recipients: Dict[str, Tuple[User, List[str]]],
+        alerts: Dict[str, Alert],
+        deadline: float,
+        digest: bool = False
+    ) -> Tuple[Set[str], Set[str]]:
+        """Returns (failed, throttled) message IDs"""
+        failed: Set[str] = set()
+        throttled: Set[str] = set()
+        pending = sorted(recipients.values(), key=lambda entry: not _has_critical(entry[1], alerts))
+        while pending:
+            granted = self._wait_for_quota('email', len(pending), deadline)
+            if not granted:
+                for _, message_ids in pending:
+                    throttled.update(message_ids)
+                break
+            entries, pending = pending[:granted], pending[granted:]
+            destinations = [
+                {'email': user.email, 'data': self._email_data(user, [alerts[m] for m in message_ids], digest)}
+                for user, message_ids in entries
+            ]
+            try:
+                statuses = self.email_provider.send_templated_bulk(self.email_template, destinations)
+            except Exception as e:
+                logger.error(f"Email delivery failed: {str(e)}", exc_info=True)
+                statuses = ['failed'] * len(entries)
+
+            for (user, message_ids), status in zip(entries, statuses):
+                if status == 'failed':
+                    failed.update(message_ids)
+                elif status == 'throttled':
+                    throttled.update(message_ids)
+                elif status == 'invalid':
+                    logger.warning(f"Email to user {user.user_id} rejected")
+        return failed, throttled
+
+    def _send_pushes(
+        self,
+        recipients: Dict[str, Tuple[User, List[str]]],
+        alerts: Dict[str, Alert],
+        deadline: float
+    ) -> Tuple[Set[str], Set[str]]:
+        """Returns (failed, throttled) message IDs"""
+        # Users notified of the same alerts share one multicast
+        groups: Dict[Tuple[str, ...], List[Tuple[User, str]]] = {}
+        for user, message_ids in recipients.values():
+            key = tuple(message_ids)
+            groups.setdefault(key, []).extend((user, token) for token in user.device_tokens)
+
+        failed: Set[str] = set()
+        throttled: Set[str] = set()
+        invalid: Set[Tuple[str, str]] = set()
+        for message_ids in sorted(groups, key=lambda ids: not _has_critical(ids, alerts)):
+            targets = groups[message_ids]
+            message = self._push_message([alerts[m] for m in message_ids])
+            statuses: List[str] = []
+            while len(statuses) < len(targets):
+                granted = self._wait_for_quota('push', len(targets) - len(statuses), deadline)
+                if not granted:
+                    statuses.extend(['throttled'] * (len(targets) - len(statuses)))
+                    break
+                chunk = targets[len(statuses):len(statuses) + granted]
+                try:
+                    statuses.extend(self.push_provider.send_multicast([token for _, token in chunk], message))
+                except Exception as e:
+                    logger.error(f"Push delivery failed: {str(e)}", exc_info=True)
+                    statuses.extend(['failed'] * len(chunk))
+
+            reached: Set[str] = set()
+            unreached: Dict[str, str] = {}
+            for (user, token), status in zip(targets, statuses):
+                if status == 'sent':
+                    reached.add(user.user_id)
+                elif status == 'invalid':
+                    invalid.add((user.user_id, token))
+                elif unreached.get(user.user_id) != 'failed':
+                    unreached[user.user_id] = status
+            # A user is reached if any of its devices got the notification
+            missed = {status for user_id, status in unreached.items() if user_id not in reached}
+            if 'failed' in missed:
+                failed.update(message_ids)
+            elif missed:
+                throttled.update(message_ids)
+
+        for user_id, token in invalid:
+            try:
+                self.user_repository.remove_device_token(user_id, token)
+            except Exception as e:
+                logger.warning(f"Failed to remove device token of {user_id}: {str(e)}")
+        if invalid:
+            logger.info(f"Removed {len(invalid)} unregistered device tokens")
+        return failed, throttled
+
+    def _email_data(self, user: User, alerts: List[Alert], digest: bool = False) -> Dict:
+        critical = sum(1 for alert in alerts if alert.severity == AlertSeverity.CRITICAL)
+        count = len(alerts)
+        if digest:
+            subject = f"Alert digest - {count} new alert{'s' if count > 1 else ''}"
+            alerts = sorted(alerts, key=lambda alert: alert.timestamp)[-MAX_DIGEST_ALERTS_LISTED:]
+        elif count == 1:
+            alert = alerts[0]
+            subject = f"[{alert.severity.value.upper()}] {alert.condition} - {alert.device_id}"
+        else:
+            subject = f"{count} new alerts" + (f" ({critical} critical)" if critical else '')
+        return {
+            'userName': user.name or user.email,
+            'subject': subject,
+            'alertCount': count,
+            'alerts': [
+                {
+                    'alertId': alert.alert_id,
+                    'severity': alert.severity.value.upper(),
+                    'deviceId': alert.device_id,
+                    'condition': alert.condition,
+                    'actualValue': alert.actual_value,
+                    'threshold': alert.threshold,
+                    'time': alert.timestamp.strftime('%Y-%m-%d %H:%M UTC'),
+                    'alertUrl': f"{self.dashboard_url}/alerts/{alert.alert_id}",
+                    'deviceUrl': f"{self.dashboard_url}/devices/{alert.device_id}"
+                }
+                for alert in alerts
+            ],
+            'preferencesUrl': f"{self.dashboard_url}/settings/notifications"
+        }
+
+    def _push_message(self, alerts: List[Alert]) -> Dict:
+        if len(alerts) == 1:
+            alert = alerts[0]
+            return {
+                'title': f"{alert.severity.value.capitalize()} alert - {alert.device_id}",
+                'body': f"{alert.condition}: {alert.actual_value} (threshold {alert.threshold})",
+                'data': {
+                    'type': 'alert',
+                    'alertId': alert.alert_id,
+                    'deviceId': alert.device_id,
+                    'severity': alert.severity.value,
+                    'route': f"/alerts/{alert.alert_id}"
+                }
+            }
+        devices = list(dict.fromkeys(alert.device_id for alert in alerts))
+        shown = ', '.join(devices[:3]) + (f" and {len(devices) - 3} more" if len(devices) > 3 else '')
+        return {
+            'title': f"{len(alerts)} new alerts",
+            'body': f"Devices: {shown}",
+            'data': {
+                'type': 'alerts',
+                'alertIds': ','.join(alert.alert_id for alert in alerts),
+                'route': '/alerts'
+            }
+        }
+
+
+def _has_critical(message_ids, alerts: Dict[str, Alert]) -> bool:
+    return any(alerts[m].severity == AlertSeverity.CRITICAL for m in message_ids)
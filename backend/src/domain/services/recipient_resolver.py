@@ -0,0 +1,210 @@
+"""Recipient Resolver - Cached per-organization notification routing tables"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from ..entities.alert import Alert
+from ..entities.user import User
+from ..ports.repositories.i_user_repository import IUserRepository
+from ...shared.middleware.logger import logger
+
+CHANNELS = ('email', 'push')
+MINUTES_PER_DAY = 24 * 60
+# Bounds memory when one container serves many organizations
+MAX_CACHED_ORGANIZATIONS = 1000
+# Users are listed from a GSI, which can lag behind the consistently read
+# version; a table compiled this soon after a change is compiled again
+INDEX_SETTLE_MILLIS = 10 * 1000
+
+
+class RoutingTable:
+    """
+    Precompiled notification routing for the users of one organization
+
+    Built once from the users, so routing an alert is set arithmetic:
+    - channels: user IDs that accept each channel (push also needs tokens)
+    - all_devices / by_device: users without device subscriptions, and the
+      subscribers of each device
+    - quiet_windows: quiet hours as [start, end) minute-of-day ranges in
+      UTC, computed with the UTC offsets in zone_offsets
+    """
+
+    def __init__(self, users: List[User], version: int, now: datetime, settles_at: Optional[int] = None):
+        self.version = version
+        # Set while the users may predate the version (index lag), epoch ms
+        self.settles_at = settles_at
+        self.users: Dict[str, User] = {user.user_id: user for user in users}
+        self.channels: Dict[str, FrozenSet[str]] = {
+            channel: frozenset(
+                user.user_id for user in users
+                if user.can_receive_notification(channel) and (channel != 'push' or user.device_tokens)
+            )
+            for channel in CHANNELS
+        }
+
+        all_devices = set()
+        by_device: Dict[str, set] = {}
+        for user in users:
+            if not user.preferences.subscribed_devices:
+                all_devices.add(user.user_id)
+            for device_id in user.preferences.subscribed_devices:
+                by_device.setdefault(device_id, set()).add(user.user_id)
+        self.all_devices = frozenset(all_devices)
+        self.by_device = {device_id: frozenset(ids) for device_id, ids in by_device.items()}
+
+        self.zone_offsets: Dict[str, timedelta] = {}
+        self.quiet_windows: Dict[str, List[Tuple[int, int]]] = {}
+        for user in users:
+            windows = self._compile_quiet_hours(user.preferences.quiet_hours, now)
+            if windows:
+                self.quiet_windows[user.user_id] = windows
+
+        self._eligible: Dict[Tuple[str, str], FrozenSet[str]] = {}
+        self._quiet_minute: Optional[int] = None
+        self._quiet_users: FrozenSet[str] = frozenset()
+
+    def recipients(self, device_id: str, channel: str, now: datetime, ignore_quiet_hours: bool) -> FrozenSet[str]:
+        """IDs of the users notified of a device's alert on a channel"""
+        key = (device_id, channel)
+        eligible = self._eligible.get(key)
+        if eligible is None:
+            eligible = self.channels.get(channel, frozenset()) & (
+                self.all_devices | self.by_device.get(device_id, frozenset())
+            )
+            self._eligible[key] = eligible
+        if ignore_quiet_hours or not self.quiet_windows:
+            return eligible
+        return eligible - self._quiet_at(now.hour * 60 + now.minute)
+
+    def quiet_seconds_left(self, user_id: str, now: datetime) -> int:
+        """Seconds until a user's current quiet hours end, 0 outside quiet hours"""
+        minute = now.hour * 60 + now.minute
+        windows = self.quiet_windows.get(user_id, ())
+        for start, end in windows:
+            if start <= minute < end:
+                if end == MINUTES_PER_DAY:
+                    # Continued by the part after midnight UTC, if any
+                    end += next((e for s, e in windows if s == 0), 0)
+                return (end - minute) * 60 - now.second
+        return 0
+
+    def index_lag_passed(self, now: datetime) -> bool:
+        """Whether the table was compiled while the users index could lag, and that lag has passed"""
+        return self.settles_at is not None and _millis(now) >= self.settles_at
+
+    def offsets_current(self, now: datetime) -> bool:
+        """Whether no quiet-hours timezone changed its UTC offset (DST) since compilation"""
+        aware = now.replace(tzinfo=timezone.utc)
+        return all(aware.astimezone(ZoneInfo(zone)).utcoffset() == offset
+                   for zone, offset in self.zone_offsets.items())
+
+    def _quiet_at(self, minute: int) -> FrozenSet[str]:
+        # Alerts of one batch share the same few minutes
+        if minute != self._quiet_minute:
+            self._quiet_users = frozenset(
+                user_id for user_id, windows in self.quiet_windows.items()
+                if any(start <= minute < end for start, end in windows)
+            )
+            self._quiet_minute = minute
+        return self._quiet_users
+
+    def _compile_quiet_hours(self, quiet_hours: Dict, now: datetime) -> List[Tuple[int, int]]:
+        if not quiet_hours or not quiet_hours.get('enabled'):
+            return []
+        try:
+            zone_name = quiet_hours.get('timezone') or 'UTC'
+            offset = now.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(zone_name)).utcoffset()
+            start = _minutes(quiet_hours['start'])
+            end = _minutes(quiet_hours['end'])
+        except (KeyError, ValueError, ZoneInfoNotFoundError):
+            return []
+        if start == end:
+            return []
+        self.zone_offsets[zone_name] = offset
+        shift = int(offset.total_seconds() // 60)
+        start = (start - shift) % MINUTES_PER_DAY
+        end = (end - shift) % MINUTES_PER_DAY
+        if start < end:
+            return [(start, end)]
+        # Wraps past midnight UTC
+        return [(start, MINUTES_PER_DAY), (0, end)] if end else [(start, MINUTES_PER_DAY)]
+
+
+class RecipientResolver:
+    """
+    Resolves alert recipients from cached per-organization routing tables
+
+    A table is compiled from find_by_organization once and reused until the
+    organization's users version changes (every user write bumps it) or a
+    quiet-hours timezone changes offset. refresh() checks the version with
+    a single read, so a warm container routes alerts without querying the
+    users table. The users come from a GSI that can lag behind the version,
+    so a table compiled within INDEX_SETTLE_MILLIS of the last change is
+    compiled once more after that.
+    """
+
+    def __init__(self, user_repository: IUserRepository):
+        self.user_repository = user_repository
+        self._tables: OrderedDict = OrderedDict()
+
+    def refresh(self, organization_id: str, now: Optional[datetime] = None) -> RoutingTable:
+        """
+        Bring an organization's routing table up to date
+
+        Raises:
+            DatabaseError: if the users cannot be read and no table is cached
+        """
+        now = now or datetime.utcnow()
+        table = self._tables.get(organization_id)
+        try:
+            version, changed_at = self.user_repository.get_organization_version(organization_id)
+        except Exception as e:
+            if table is None:
+                raise
+            logger.warning(f"Using cached recipients of {organization_id}: {str(e)}")
+            return table
+
+        if (table is None or table.version != version or table.index_lag_passed(now)
+                or not table.offsets_current(now)):
+            settles_at = changed_at + INDEX_SETTLE_MILLIS
+            table = RoutingTable(
+                self.user_repository.find_by_organization(organization_id), version, now,
+                settles_at if settles_at > _millis(now) else None
+            )
+            logger.info(f"Compiled routing table of {organization_id}: {len(table.users)} users")
+        self._tables[organization_id] = table
+        self._tables.move_to_end(organization_id)
+        while len(self._tables) > MAX_CACHED_ORGANIZATIONS:
+            self._tables.popitem(last=False)
+        return table
+
+    def resolve(
+        self,
+        alert: Alert,
+        channels: Iterable[str],
+        now: Optional[datetime] = None,
+        ignore_quiet_hours: bool = False
+    ) -> Dict[str, List[User]]:
+        """Users to notify of an alert, per channel"""
+        now = now or datetime.utcnow()
+        table = self._tables.get(alert.organization_id) or self.refresh(alert.organization_id, now)
+        resolved = {}
+        for channel in channels:
+            user_ids = table.recipients(alert.device_id, channel, now, ignore_quiet_hours)
+            if user_ids:
+                resolved[channel] = [table.users[user_id] for user_id in user_ids]
+        return resolved
+
+    def invalidate(self, organization_id: str):
+        """Drop an organization's table so the next refresh recompiles it"""
+        self._tables.pop(organization_id, None)
+
+
+def _millis(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
@@ -0,0 +1,137 @@
+"""Update Conflator - Rate-limited, delta-encoded device updates per connection"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ...shared.config.settings import settings
+
+MAX_TRACKED_CONNECTIONS = 10000
+_MISSING = object()
+
+
+class _ConnectionState:
+    __slots__ = ('last_frame_at', 'pending', 'sent')
+
+    def __init__(self):
+        self.last_frame_at = float('-inf')
+        # deviceId -> {'state': latest device image, 'statusChanges': [...]}
+        self.pending: Dict[str, Dict] = {}
+        # deviceId -> {'status', 'reading', 'keyframeAt'} as last sent
+        self.sent: Dict[str, Dict] = {}
+
+
+class UpdateConflator:
+    """
+    Conflates device updates into at most `max_frames_per_second` frames
+    per connection
+
+    Updates offered for a connection are held until its window opens; only
+    the latest state of each device is kept, so a device reporting every
+    second costs one entry per frame whatever its rate. Status transitions
+    are recorded as they are offered, so a change that is reverted inside
+    one window still reaches the client (statusChanges).
+
+    Each frame lists every pending device of the connection. A device is
+    sent in full the first time and every `keyframe_seconds`; in between,
+    only metrics that differ from what this conflator last sent are
+    included (reading), with metrics that disappeared in `removed`. The
+    keyframes bound any drift when another container served the same
+    connection in between.
+
+    State lives in memory and is bounded to MAX_TRACKED_CONNECTIONS
+    connections (least recently updated evicted, which only costs a full
+    update). Not thread-safe; one instance serves one handler container.
+    """
+
+    def __init__(
+        self,
+        max_frames_per_second: Optional[float] = None,
+        keyframe_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        rate = max_frames_per_second or settings.WEBSOCKET_MAX_FRAMES_PER_SECOND
+        self.min_interval = 1.0 / rate
+        self.keyframe_seconds = keyframe_seconds or settings.WEBSOCKET_KEYFRAME_SECONDS
+        self.clock = clock
+        self._connections: OrderedDict = OrderedDict()
+
+    def offer(self, connection_id: str, device: Dict):
+        """Queue the latest image of a device (deviceId, status, lastReading, lastSeen)"""
+        connection = self._connections.get(connection_id)
+        if connection is None:
+            connection = self._connections[connection_id] = _ConnectionState()
+            while len(self._connections) > MAX_TRACKED_CONNECTIONS:
+                self._connections.popitem(last=False)
+        self._connections.move_to_end(connection_id)
+
+        device_id = device['deviceId']
+        pending = connection.pending.get(device_id)
+        if pending is not None:
+            previous_status = pending['state'].get('status')
+        else:
+            previous_status = connection.sent.get(device_id, {}).get('status', _MISSING)
+            pending = connection.pending[device_id] = {'statusChanges': []}
+        status = device.get('status')
+        if previous_status is not _MISSING and status != previous_status:
+            pending['statusChanges'].append({'status': status, 'at': device.get('updatedAt')})
+        pending['state'] = device
+
+    def drain(self) -> List[Tuple[str, List[Dict]]]:
+        """
+        Take the frames of every connection whose window is open
+
+        Returns:
+            [(connectionId, [device update, ...]), ...]
+        """
+        now = self.clock()
+        frames = []
+        for connection_id, connection in self._connections.items():
+            if connection.pending and now - connection.last_frame_at >= self.min_interval:
+                frames.append((connection_id, [
+                    self._update(connection, device_id, pending, now)
+                    for device_id, pending in connection.pending.items()
+                ]))
+                connection.pending = {}
+                connection.last_frame_at = now
+        return frames
+
+    def next_due(self) -> Optional[float]:
+        """Clock time at which the next pending frame may be sent, or None"""
+        due = [
+            connection.last_frame_at + self.min_interval
+            for connection in self._connections.values() if connection.pending
+        ]
+        return min(due) if due else None
+
+    def forget(self, connection_id: str):
+        """Drop a connection's state; its next frame is sent in full"""
+        self._connections.pop(connection_id, None)
+
+    def _update(self, connection: _ConnectionState, device_id: str, pending: Dict, now: float) -> Dict:
+        state = pending['state']
+        status = state.get('status')
+        reading = state.get('lastReading') or {}
+        sent = connection.sent.get(device_id)
+        update = {'deviceId': device_id, 'lastSeen': state.get('lastSeen')}
+
+        if sent is None or now - sent['keyframeAt'] >= self.keyframe_seconds:
+            update.update({'full': True, 'status': status, 'reading': reading})
+            sent = connection.sent[device_id] = {'keyframeAt': now}
+        else:
+            changed = {
+                metric: value for metric, value in reading.items()
+                if sent['reading'].get(metric, _MISSING) != value
+            }
+            removed = [metric for metric in sent['reading'] if metric not in reading]
+            if status != sent['status'] or pending['statusChanges']:
+                update['status'] = status
+            if changed:
+                update['reading'] = changed
+            if removed:
+                update['removed'] = sorted(removed)
+        # A single transition is carried by status; a flap needs the sequence
+        if len(pending['statusChanges']) > 1:
+            update['statusChanges'] = pending['statusChanges']
+        sent['status'] = status
+        sent['reading'] = dict(reading)
+        return update
@@ -2,6 +2,7 @@
 from typing import Dict, Any
 
 from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
 from ...shared.utils.response import success_response, error_response
 
 
@@ -16,7 +17,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         page_size = int(query_params.get('pageSize', 25))
 
         # Extract user context
-        user_context = event.get('requestContext', {}).get('authorizer', {}).get('claims', {})
+        user_context = get_claims(event)
         organization_id = user_context.get('custom:organizationId')
 
         # In production: fetch alerts from repository
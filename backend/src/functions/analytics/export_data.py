@@ -0,0 +1,313 @@
+"""Export Data Lambda Handler"""
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
+from ...shared.exceptions.base import ValidationError, UnauthorizedError
+from ...shared.utils.export_encoders import ENCODERS, EXPORT_FORMATS, format_available
+from ...shared.utils.response import success_response, error_response
+from ...domain.ports.repositories.i_timeseries_repository import ITimeSeriesRepository
+from ...infrastructure.external.s3_multipart_writer import S3MultipartWriter
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.mmap_timeseries_repository import MmapTimeSeriesRepository
+from ...infrastructure.repositories.timestream_repository import TimestreamRepository
+
+MAX_EXPORT_DEVICES = 500
+DOWNLOAD_URL_EXPIRES_SECONDS = 3600
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for POST /analytics/export and GET /analytics/export/{exportId}
+
+    POST body:
+        {"deviceIds": [...], "metrics": [...], "startDate": ISO 8601,
+         "endDate": ISO 8601, "format": "csv"|"ndjson"|"parquet"}
+    Starts an asynchronous export to DATA_EXPORT_BUCKET and returns its ID
+    (202); "parquet" is rejected (400) unless pyarrow is deployed. GET returns the export progress and, once completed, a
+    pre-signed download URL.
+
+    The export worker pages through the time series one group of
+    TIMESTREAM_QUERY_GROUP_SIZE devices and one EXPORT_WINDOW_HOURS window
+    at a time (one query per group and window), encodes each window as it
+    arrives and streams it to S3 with a multipart upload, so memory is
+    bounded by one group window plus one part. Rows are ordered by device
+    group, window and device. Progress (cursor, uploaded parts) is
+    checkpointed in the export manifest after whole group windows; when
+    the invocation runs out of time, CSV/NDJSON exports continue from the
+    last checkpoint in a new invocation.
+    """
+    if 'dataExport' in event:
+        return _run_export(event['dataExport'], context)
+
+    try:
+        user_context = get_claims(event)
+        organization_id = user_context.get('custom:organizationId')
+        if not organization_id:
+            raise UnauthorizedError("Organization ID not found in token")
+
+        export_id = (event.get('pathParameters') or {}).get('exportId')
+        if export_id:
+            return _get_export_status(organization_id, export_id)
+
+        request = json.loads(event.get('body') or '{}')
+        job = _build_job(request, organization_id)
+
+        s3 = boto3.client('s3', region_name=settings.REGION)
+        _save_manifest(s3, job, {'status': 'queued', 'rowsWritten': 0, 'bytesWritten': 0})
+        _continue_in_new_invocation(job, context)
+
+        logger.info(f"Export {job['exportId']} queued for organization: {organization_id}")
+        return success_response(
+            {'exportId': job['exportId'], 'status': 'queued'},
+            message='Export started',
+            status_code=202
+        )
+
+    except (ValidationError, json.JSONDecodeError) as e:
+        message = getattr(e, 'message', str(e))
+        logger.warning(f"Validation error: {message}")
+        return error_response('VALIDATION_ERROR', message, status_code=400)
+
+    except UnauthorizedError as e:
+        logger.warning(f"Unauthorized: {e.message}")
+        return error_response(e.code, e.message, status_code=403)
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        return error_response('INTERNAL_ERROR', 'Internal server error', status_code=500)
+
+
+def _build_job(request: Dict, organization_id: str) -> Dict:
+    """Validate an export request and describe the job"""
+    data_format = request.get('format', 'csv')
+    if data_format not in EXPORT_FORMATS:
+        raise ValidationError(f"format must be one of {', '.join(EXPORT_FORMATS)}", field='format')
+    if not format_available(data_format):
+        raise ValidationError(f"{data_format} export is not available in this deployment", field='format')
+
+    device_ids = list(dict.fromkeys(request.get('deviceIds') or []))
+    if not device_ids or len(device_ids) > MAX_EXPORT_DEVICES:
+        raise ValidationError(f"deviceIds must contain 1 to {MAX_EXPORT_DEVICES} devices", field='deviceIds')
+    metrics = list(dict.fromkeys(request.get('metrics') or []))
+    if not metrics:
+        raise ValidationError("metrics is required", field='metrics')
+
+    start = _parse_date(request.get('startDate'), 'startDate')
+    end = _parse_date(request.get('endDate'), 'endDate')
+    if start >= end:
+        raise ValidationError("startDate must be before endDate", field='startDate')
+
+    owned = {
+        device.device_id
+        for device in DynamoDBDeviceRepository().find_by_ids(device_ids)
+        if device.organization_id == organization_id
+    }
+    unknown = [device_id for device_id in device_ids if device_id not in owned]
+    if unknown:
+        raise ValidationError(f"Unknown devices: {', '.join(unknown[:10])}", field='deviceIds')
+
+    export_id = f"exp-{uuid.uuid4().hex[:12]}"
+    prefix = f"exports/{organization_id}/{export_id}"
+    return {
+        'exportId': export_id,
+        'organizationId': organization_id,
+        'deviceIds': device_ids,
+        'metrics': metrics,
+        'start': start,
+        'end': end,
+        'format': data_format,
+        's3Bucket': settings.DATA_EXPORT_BUCKET,
+        'dataKey': f"{prefix}/data.{ENCODERS[data_format].extension}",
+        'manifestKey': f"{prefix}/manifest.json"
+    }
+
+
+def _run_export(job: Dict, context: Any) -> Dict:
+    """Stream the export to S3, resuming from the manifest checkpoint if any"""
+    s3 = boto3.client('s3', region_name=settings.REGION)
+    manifest = _load_manifest(s3, job['s3Bucket'], job['manifestKey']) or {}
+    encoder_class = ENCODERS[job['format']]
+
+    checkpoint = manifest.get('checkpoint')
+    if checkpoint and not encoder_class.resumable:
+        _abort_upload(s3, job, checkpoint['upload'])
+        checkpoint = None
+
+    writer = None
+    try:
+        writer = S3MultipartWriter(
+            s3, job['s3Bucket'], job['dataKey'],
+            part_size=settings.EXPORT_PART_SIZE_BYTES,
+            content_type=encoder_class.content_type,
+            resume_state=checkpoint['upload'] if checkpoint else None
+        )
+        encoder = encoder_class(writer, job['metrics'], resume=bool(checkpoint))
+        cursor = checkpoint['cursor'] if checkpoint else {'deviceIndex': 0, 'windowStart': job['start']}
+        rows = checkpoint['rowsWritten'] if checkpoint else 0
+        # Continuing without a new checkpoint would redo the same work forever
+        checkpointed = False
+        _save_manifest(s3, job, {'status': 'running', 'rowsWritten': rows, 'checkpoint': checkpoint})
+
+        for device_id, columns, next_cursor in _iterate_windows(_get_timeseries_repository(), job, cursor):
+            encoder.write_block(device_id, columns)
+            rows += len(columns['timestamps'])
+            # Checkpoints fall between group windows only
+            if next_cursor is None:
+                continue
+
+            if encoder_class.resumable and writer.upload_buffered():
+                checkpoint = {'cursor': next_cursor, 'rowsWritten': rows, 'upload': writer.state()}
+                checkpointed = True
+                _save_manifest(s3, job, {
+                    'status': 'running',
+                    'rowsWritten': rows,
+                    'bytesWritten': writer.tell(),
+                    'checkpoint': checkpoint
+                })
+
+            if context and context.get_remaining_time_in_millis() < settings.EXPORT_RESUME_MARGIN_SECONDS * 1000:
+                if not checkpointed:
+                    raise TimeoutError("Export did not reach a checkpoint before the time limit")
+                logger.info(f"Export {job['exportId']} continues from device {checkpoint['cursor']['deviceIndex']}")
+                _continue_in_new_invocation(job, context)
+                return {'status': 'continued', 'rowsWritten': checkpoint['rowsWritten']}
+
+        encoder.close()
+        writer.complete()
+
+    except Exception as e:
+        logger.error(f"Export {job['exportId']} failed: {str(e)}", exc_info=True)
+        if writer and not writer.closed:
+            _abort_upload(s3, job, writer.state())
+        _save_manifest(s3, job, {'status': 'failed', 'error': str(e)})
+        return {'status': 'failed'}
+
+    summary = {
+        'status': 'completed',
+        'rowsWritten': rows,
+        'bytesWritten': writer.tell(),
+        'completedAt': datetime.utcnow().isoformat() + 'Z'
+    }
+    _save_manifest(s3, job, summary)
+    logger.info(f"Export {job['exportId']} completed: {rows} rows, {summary['bytesWritten']} bytes")
+    return summary
+
+
+def _iterate_windows(
+    repository: ITimeSeriesRepository,
+    job: Dict,
+    cursor: Dict
+) -> Iterator[Tuple[str, Dict, Optional[Dict]]]:
+    """
+    Yield (deviceId, columns, cursor) from the cursor on; the cursor after
+    a group window comes with its last device, the others have None
+    """
+    window = settings.EXPORT_WINDOW_HOURS * 3600 * 1000
+    group_size = settings.TIMESTREAM_QUERY_GROUP_SIZE
+    device_ids = job['deviceIds']
+    for group_index in range(cursor['deviceIndex'], len(device_ids), group_size):
+        group = device_ids[group_index:group_index + group_size]
+        window_start = cursor['windowStart'] if group_index == cursor['deviceIndex'] else job['start']
+        while window_start <= job['end']:
+            window_end = min(window_start + window - 1, job['end'])
+            result = repository.query_multiple_devices(
+                group, job['metrics'], _datetime(window_start), _datetime(window_end)
+            )
+            window_start = window_end + 1
+            if window_start <= job['end']:
+                next_cursor = {'deviceIndex': group_index, 'windowStart': window_start}
+            else:
+                next_cursor = {'deviceIndex': group_index + len(group), 'windowStart': job['start']}
+            for device_id in group[:-1]:
+                yield device_id, result[device_id], None
+            yield group[-1], result[group[-1]], next_cursor
+
+
+def _get_export_status(organization_id: str, export_id: str) -> Dict[str, Any]:
+    s3 = boto3.client('s3', region_name=settings.REGION)
+    key = f"exports/{organization_id}/{export_id}/manifest.json"
+    manifest = _load_manifest(s3, settings.DATA_EXPORT_BUCKET, key)
+    if manifest is None:
+        return error_response('EXPORT_NOT_FOUND', f"Export {export_id} not found", status_code=404)
+
+    status = {
+        key: manifest.get(key)
+        for key in ('exportId', 'status', 'format', 'rowsWritten', 'bytesWritten', 'completedAt', 'error')
+        if manifest.get(key) is not None
+    }
+    if manifest['status'] == 'completed':
+        status['downloadUrl'] = s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': manifest['s3Bucket'], 'Key': manifest['dataKey']},
+            ExpiresIn=DOWNLOAD_URL_EXPIRES_SECONDS
+        )
+    return success_response(status)
+
+
+def _get_timeseries_repository() -> ITimeSeriesRepository:
+    if settings.TIMESERIES_STORE == 'local':
+        return MmapTimeSeriesRepository()
+    return TimestreamRepository()
+
+
+def _continue_in_new_invocation(job: Dict, context: Any):
+    boto3.client('lambda', region_name=settings.REGION).invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps({'dataExport': job}).encode('utf-8')
+    )
+
+
+def _load_manifest(s3, bucket: str, key: str) -> Optional[Dict]:
+    try:
+        return json.loads(s3.get_object(Bucket=bucket, Key=key)['Body'].read())
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+
+
+def _save_manifest(s3, job: Dict, progress: Dict):
+    manifest = {
+        **job,
+        'updatedAt': datetime.utcnow().isoformat() + 'Z',
+        **progress
+    }
+    s3.put_object(
+        Bucket=job['s3Bucket'],
+        Key=job['manifestKey'],
+        Body=json.dumps(manifest).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def _abort_upload(s3, job: Dict, upload_state: Dict):
+    try:
+        s3.abort_multipart_upload(Bucket=job['s3Bucket'], Key=job['dataKey'], UploadId=upload_state['uploadId'])
+    except ClientError as e:
+        logger.warning(f"Failed to abort upload of export {job['exportId']}: {e}")
+
+
+def _parse_date(value: Optional[str], field: str) -> int:
+    """Parse an ISO 8601 date into epoch milliseconds"""
+    if not value:
+        raise ValidationError(f"{field} is required", field=field)
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValidationError(f"{field} must be an ISO 8601 date", field=field)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def _datetime(millis: int) -> datetime:
+    return datetime.fromtimestamp(millis / 1000)
@@ -0,0 +1,57 @@
+"""Get Dashboard Stats Lambda Handler"""
+from typing import Dict, Any
+
+from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
+from ...shared.utils.response import success_response, error_response
+from ...infrastructure.repositories.dynamodb_fleet_stats_repository import DynamoDBFleetStatsRepository
+
+_stats_repository = None
+
+
+def _get_stats_repository() -> DynamoDBFleetStatsRepository:
+    """Reuse the repository (and its boto3 client) across warm invocations"""
+    global _stats_repository
+    if _stats_repository is None:
+        _stats_repository = DynamoDBFleetStatsRepository()
+    return _stats_repository
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for GET /analytics/dashboard
+
+    Reads the organization's fleet counters with a single GetItem, so the
+    cost does not depend on fleet size.
+    """
+    try:
+        user_context = get_claims(event)
+        organization_id = user_context.get('custom:organizationId')
+        if not organization_id:
+            return error_response('UNAUTHORIZED', 'Organization ID not found in token', status_code=403)
+
+        stats = _get_stats_repository().get_stats(organization_id) or {
+            'totalDevices': 0,
+            'byStatus': {},
+            'byType': {},
+            'reconciledAt': None
+        }
+        by_status = stats['byStatus']
+
+        logger.info(f"Dashboard stats for organization: {organization_id}")
+
+        return success_response({
+            'devices': {
+                'total': stats['totalDevices'],
+                'online': by_status.get('online', 0),
+                'offline': by_status.get('offline', 0),
+                'maintenance': by_status.get('maintenance', 0),
+                'registered': by_status.get('registered', 0),
+                'byType': stats['byType']
+            },
+            'reconciledAt': stats['reconciledAt']
+        })
+
+    except Exception as e:
+        logger.error(f"Error: {str(e)}", exc_info=True)
+        return error_response('INTERNAL_ERROR', 'Internal server error', status_code=500)
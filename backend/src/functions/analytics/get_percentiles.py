@@ -0,0 +1,224 @@
+"""Get Percentiles Lambda Handler"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
+from ...shared.exceptions.base import UnauthorizedError, ValidationError
+from ...shared.utils.ddsketch import DDSketch
+from ...shared.utils.response import success_response, error_response
+from ...domain.ports.repositories.i_timeseries_repository import ITimeSeriesRepository
+from ...infrastructure.repositories.cached_timeseries_repository import CachedTimeSeriesRepository
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_device_search_index import DynamoDBDeviceSearchIndex
+from ...infrastructure.repositories.mmap_timeseries_repository import MmapTimeSeriesRepository
+from ...infrastructure.repositories.timestream_repository import TimestreamRepository, interval_to_millis
+
+INTERVALS = ('5m', '15m', '1h', '6h', '1d')
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+DEFAULT_RANGE = timedelta(days=7)
+MAX_RANGE = timedelta(days=90)
+MAX_DEVICES = 200
+MAX_BUCKETS = 5000
+METRIC_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+_device_repository = None
+_timeseries_repository = None
+
+
+def _get_device_repository() -> DynamoDBDeviceRepository:
+    """Reuse the repository (and its boto3 client) across warm invocations"""
+    global _device_repository
+    if _device_repository is None:
+        _device_repository = DynamoDBDeviceRepository(search_index=DynamoDBDeviceSearchIndex())
+    return _device_repository
+
+
+def _get_timeseries_repository() -> ITimeSeriesRepository:
+    """Reuse the repository (and its clients) across warm invocations"""
+    global _timeseries_repository
+    if _timeseries_repository is None:
+        if settings.TIMESERIES_STORE == 'local':
+            _timeseries_repository = MmapTimeSeriesRepository()
+        else:
+            _timeseries_repository = CachedTimeSeriesRepository(TimestreamRepository())
+    return _timeseries_repository
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for GET /analytics/percentiles
+
+    Query parameters:
+    - metric (required)
+    - deviceIds: comma-separated, or tags / deviceType to select devices
+      through the search index (at most 200 devices)
+    - startDate, endDate (ISO 8601, default: last 7 days)
+    - interval: 5m|15m|1h|6h|1d bucket width of the series (default: 1h)
+    - quantiles: comma-separated in [0, 1] (default: 0.5,0.9,0.95,0.99)
+
+    Percentiles come from per-device, per-bucket DDSketch rollups merged
+    across buckets and devices, so they are within 1% (relative) of the
+    exact values while closed buckets are read from the rollup cache
+    instead of raw points. Like aggregated history, the range is widened
+    to whole buckets.
+    """
+    try:
+        user_context = get_claims(event)
+        organization_id = user_context.get('custom:organizationId')
+        if not organization_id:
+            raise UnauthorizedError("Organization ID not found in token")
+
+        query_params = event.get('queryStringParameters') or {}
+        metric = query_params.get('metric')
+        if not metric or not METRIC_PATTERN.match(metric):
+            raise ValidationError("A valid metric is required", field='metric')
+
+        end_time = _parse_date(query_params.get('endDate'), 'endDate') or datetime.utcnow()
+        start_time = _parse_date(query_params.get('startDate'), 'startDate') or end_time - DEFAULT_RANGE
+        if start_time >= end_time:
+            raise ValidationError("startDate must be before endDate", field='startDate')
+        if end_time - start_time > MAX_RANGE:
+            raise ValidationError("Percentiles are limited to 90 days", field='startDate')
+
+        interval = query_params.get('interval', '1h')
+        if interval not in INTERVALS:
+            raise ValidationError(f"interval must be one of {', '.join(INTERVALS)}", field='interval')
+        width = interval_to_millis(interval)
+        if (end_time - start_time).total_seconds() * 1000 / width > MAX_BUCKETS:
+            raise ValidationError(f"At most {MAX_BUCKETS} buckets per query", field='interval')
+
+        quantiles = _parse_quantiles(query_params.get('quantiles'))
+        device_ids = _select_devices(organization_id, query_params)
+
+        repository = _get_timeseries_repository()
+        workers = max(1, min(settings.TIMESTREAM_QUERY_CONCURRENCY, len(device_ids)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            per_device = dict(zip(device_ids, pool.map(
+                lambda device_id: repository.query_bucket_sketches(
+                    device_id, metric, start_time, end_time, interval
+                ),
+                device_ids
+            )))
+
+        overall = DDSketch()
+        by_bucket: Dict[int, DDSketch] = {}
+        by_device = {}
+        for device_id, sketches in per_device.items():
+            device_sketch = DDSketch()
+            for bucket, sketch in sketches.items():
+                device_sketch.merge(sketch)
+                by_bucket.setdefault(bucket, DDSketch()).merge(sketch)
+            overall.merge(device_sketch)
+            by_device[device_id] = _summary(device_sketch, quantiles)
+
+        buckets = sorted(by_bucket)
+        series = {'timestamps': buckets, 'count': [by_bucket[b].count for b in buckets]}
+        for q in quantiles:
+            series[_label(q)] = [by_bucket[b].quantile(q) for b in buckets]
+
+        logger.info(
+            f"Percentiles of {metric} for {len(device_ids)} devices, "
+            f"{len(buckets)} buckets, {overall.count} points"
+        )
+
+        return success_response({
+            'metric': metric,
+            'timeRange': {
+                'start': start_time.isoformat() + 'Z',
+                'end': end_time.isoformat() + 'Z'
+            },
+            'interval': interval,
+            'quantiles': quantiles,
+            'relativeAccuracy': overall.relative_accuracy,
+            'overall': _summary(overall, quantiles),
+            'series': series,
+            'byDevice': by_device
+        })
+
+    except (ValidationError, ValueError) as e:
+        message = getattr(e, 'message', str(e))
+        logger.warning(f"Validation error: {message}")
+        return error_response('VALIDATION_ERROR', message, status_code=400)
+
+    except UnauthorizedError as e:
+        logger.warning(f"Unauthorized: {e.message}")
+        return error_response(e.code, e.message, status_code=403)
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        return error_response('INTERNAL_ERROR', 'Internal server error', status_code=500)
+
+
+def _select_devices(organization_id: str, query_params: Dict) -> List[str]:
+    """Devices of the organization named in deviceIds or matching tags/deviceType"""
+    repository = _get_device_repository()
+    requested = [d.strip() for d in (query_params.get('deviceIds') or '').split(',') if d.strip()]
+    if requested:
+        requested = list(dict.fromkeys(requested))
+        if len(requested) > MAX_DEVICES:
+            raise ValidationError(f"At most {MAX_DEVICES} devices per query", field='deviceIds')
+        owned = {
+            device.device_id for device in repository.find_by_ids(requested)
+            if device.organization_id == organization_id
+        }
+        unknown = [device_id for device_id in requested if device_id not in owned]
+        if unknown:
+            raise ValidationError(f"Unknown devices: {', '.join(unknown[:10])}", field='deviceIds')
+        return requested
+
+    filters = {
+        'tags': [t.strip() for t in (query_params.get('tags') or '').split(',') if t.strip()],
+        'deviceType': query_params.get('deviceType')
+    }
+    if not any(filters.values()):
+        raise ValidationError("deviceIds, tags or deviceType is required", field='deviceIds')
+    result = repository.find_by_organization(organization_id, filters, page=1, page_size=MAX_DEVICES)
+    if result['pagination']['totalItems'] > MAX_DEVICES:
+        raise ValidationError(f"More than {MAX_DEVICES} devices match; narrow the filters", field='tags')
+    return [device.device_id for device in result['items']]
+
+
+def _summary(sketch: DDSketch, quantiles: List[float]) -> Dict:
+    summary = {
+        'count': sketch.count,
+        'min': sketch.min if sketch.count else None,
+        'max': sketch.max if sketch.count else None,
+        'avg': sketch.avg
+    }
+    for q in quantiles:
+        summary[_label(q)] = sketch.quantile(q)
+    return summary
+
+
+def _label(q: float) -> str:
+    """0.95 -> 'p95', 0.999 -> 'p99.9'"""
+    return f"p{round(q * 100, 6):g}"
+
+
+def _parse_quantiles(value: Optional[str]) -> List[float]:
+    if not value:
+        return list(DEFAULT_QUANTILES)
+    try:
+        quantiles = sorted({float(q) for q in value.split(',') if q.strip()})
+    except ValueError:
+        raise ValidationError("quantiles must be numbers between 0 and 1", field='quantiles')
+    if not quantiles or len(quantiles) > 10 or not all(0 <= q <= 1 for q in quantiles):
+        raise ValidationError("quantiles must be 1 to 10 numbers between 0 and 1", field='quantiles')
+    return quantiles
+
+
+def _parse_date(value: Optional[str], field: str) -> Optional[datetime]:
+    """Parse an ISO 8601 date into a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValidationError(f"{field} must be an ISO 8601 date", field=field)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -0,0 +1,367 @@
+"""Bulk Register Devices Lambda Handler"""
+import base64
+import codecs
+import csv
+import itertools
+import json
+import re
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
+from ...shared.exceptions.base import ValidationError, UnauthorizedError
+from ...shared.utils.response import success_response, error_response
+from ...domain.services.device_provisioning_service import DeviceProvisioningService
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_fleet_stats_repository import DynamoDBFleetStatsRepository
+from ...infrastructure.repositories.dynamodb_device_search_index import DynamoDBDeviceSearchIndex
+from ...infrastructure.external.iot_core_provider import IoTCoreProvider
+
+FORMATS_BY_CONTENT_TYPE = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson'
+}
+# Results are spooled in memory up to this size before spilling to /tmp
+RESULTS_SPOOL_BYTES = 8 * 1024 * 1024
+# Uploads and results live under imports/<organizationId>/<importId>/ in
+# DATA_EXPORT_BUCKET, never in a bucket named by the caller
+IMPORT_PREFIX = 'imports/'
+IMPORT_ID_PATTERN = re.compile(r'imp-[0-9a-f]{12}')
+UPLOAD_URL_EXPIRES_SECONDS = 3600
+DOWNLOAD_URL_EXPIRES_SECONDS = 3600
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for POST /devices/bulk and GET /devices/bulk/{importId}
+
+    Accepted POST requests:
+    - Content-Type text/csv or application/x-ndjson: rows inline in the body.
+      Results are returned as NDJSON, one line per input row.
+    - Content-Type application/json {"format": "csv"|"ndjson"}: returns an
+      importId, its s3Key and a pre-signed uploadUrl to PUT the rows to.
+    - Content-Type application/json {"format": ..., "s3Key": ...} with a
+      key returned above: the import runs asynchronously (202).
+
+    GET returns the import progress and, once completed, pre-signed URLs
+    of the NDJSON results, which hold the devices' private keys and are
+    stored encrypted next to the upload.
+
+    The import worker checkpoints every BULK_IMPORT_SEGMENT_ROWS rows (a
+    results segment and the row count, in the import manifest) and
+    continues from the last checkpoint in a new invocation when it runs
+    out of time or is retried. Device IDs derive from the import and row,
+    so rows processed again after an interruption are not duplicated.
+
+    CSV columns use dotted names for nested fields (location.lat,
+    connectivity.type, metadata.serialNumber, ...); tags are ';'-separated.
+    """
+    if 'bulkRegistration' in event:
+        return _run_s3_import(event['bulkRegistration'], context)
+
+    try:
+        user_context = get_claims(event)
+        organization_id = user_context.get('custom:organizationId')
+        if not organization_id:
+            raise UnauthorizedError("Organization ID not found in token")
+
+        import_id = (event.get('pathParameters') or {}).get('importId')
+        if import_id:
+            return _get_import_status(organization_id, import_id)
+
+        headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        content_type = headers.get('content-type', 'application/json').split(';')[0].strip()
+        body = event.get('body') or ''
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body).decode('utf-8')
+
+        if content_type in FORMATS_BY_CONTENT_TYPE:
+            return _run_inline_import(body, FORMATS_BY_CONTENT_TYPE[content_type], organization_id)
+
+        request = json.loads(body or '{}')
+        data_format = request.get('format')
+        if data_format not in ('csv', 'ndjson'):
+            raise ValidationError("format must be 'csv' or 'ndjson'", field='format')
+
+        s3 = boto3.client('s3', region_name=settings.REGION)
+        if not request.get('s3Key'):
+            return _create_upload(s3, organization_id, data_format)
+
+        job = _build_job(s3, organization_id, data_format, request['s3Key'])
+        _save_manifest(s3, job, {'status': 'queued'})
+        _continue_in_new_invocation(job, context)
+
+        logger.info(f"Bulk registration {job['importId']} queued for organization: {organization_id}")
+        return success_response(
+            {'importId': job['importId'], 'status': 'queued'},
+            message='Bulk registration started',
+            status_code=202
+        )
+
+    except (ValidationError, json.JSONDecodeError) as e:
+        message = getattr(e, 'message', str(e))
+        logger.warning(f"Validation error: {message}")
+        return error_response('VALIDATION_ERROR', message, status_code=400)
+
+    except UnauthorizedError as e:
+        logger.warning(f"Unauthorized: {e.message}")
+        return error_response(e.code, e.message, status_code=403)
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        return error_response('INTERNAL_ERROR', 'Internal server error', status_code=500)
+
+
+def _build_service() -> DeviceProvisioningService:
+    device_repository = DynamoDBDeviceRepository(
+        stats_repository=DynamoDBFleetStatsRepository(),
+        search_index=DynamoDBDeviceSearchIndex()
+    )
+    return DeviceProvisioningService(device_repository, IoTCoreProvider())
+
+
+def _run_inline_import(body: str, data_format: str, organization_id: str) -> Dict[str, Any]:
+    """Provision rows from the request body and return NDJSON results"""
+    rows = read_rows(body.splitlines(), data_format)
+    lines = [
+        json.dumps(result, default=str)
+        for result in _build_service().register_bulk(rows, organization_id)
+    ]
+    logger.info(f"Bulk registration processed {len(lines)} rows for organization: {organization_id}")
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/x-ndjson', 'Access-Control-Allow-Origin': '*'},
+        'body': '\n'.join(lines) + ('\n' if lines else '')
+    }
+
+
+def _create_upload(s3, organization_id: str, data_format: str) -> Dict[str, Any]:
+    """Reserve an import and return where to upload its rows"""
+    import_id = f"imp-{uuid.uuid4().hex[:12]}"
+    key = f"{_import_prefix(organization_id, import_id)}rows.{data_format}"
+    upload_url = s3.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': settings.DATA_EXPORT_BUCKET, 'Key': key},
+        ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS
+    )
+    return success_response({'importId': import_id, 's3Key': key, 'uploadUrl': upload_url})
+
+
+def _build_job(s3, organization_id: str, data_format: str, s3_key: str) -> Dict:
+    """Validate that s3_key is an uploaded import of the caller's organization"""
+    parts = s3_key.split('/')
+    if (
+        len(parts) != 4 or f"{parts[0]}/" != IMPORT_PREFIX or parts[1] != organization_id
+        or not IMPORT_ID_PATTERN.fullmatch(parts[2]) or parts[3] != f"rows.{data_format}"
+    ):
+        raise ValidationError("s3Key must be an upload key returned by this endpoint", field='s3Key')
+    try:
+        s3.head_object(Bucket=settings.DATA_EXPORT_BUCKET, Key=s3_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            raise ValidationError("Nothing was uploaded to s3Key", field='s3Key')
+        raise
+
+    prefix = _import_prefix(organization_id, parts[2])
+    return {
+        'importId': parts[2],
+        'organizationId': organization_id,
+        'format': data_format,
+        's3Bucket': settings.DATA_EXPORT_BUCKET,
+        's3Key': s3_key,
+        'manifestKey': f"{prefix}manifest.json",
+        'resultsPrefix': f"{prefix}results/"
+    }
+
+
+def _run_s3_import(job: Dict, context: Any) -> Dict[str, Any]:
+    """Stream rows from S3, resuming after the manifest checkpoint if any"""
+    s3 = boto3.client('s3', region_name=settings.REGION)
+    manifest = _load_manifest(s3, job['s3Bucket'], job['manifestKey']) or {}
+    if manifest.get('status') == 'completed':
+        return manifest['summary']
+    checkpoint = manifest.get('checkpoint') or {
+        'rowsDone': 0,
+        'resultKeys': [],
+        'summary': {'created': 0, 'invalid': 0, 'failed': 0}
+    }
+
+    try:
+        _save_manifest(s3, job, {'status': 'running', 'checkpoint': checkpoint})
+        source = s3.get_object(Bucket=job['s3Bucket'], Key=job['s3Key'])['Body']
+        first_row = checkpoint['rowsDone'] + 1
+        rows = itertools.islice(read_rows(codecs.getreader('utf-8')(source), job['format']), first_row - 1, None)
+        service = _build_service()
+        results = service.register_bulk(
+            rows, job['organizationId'],
+            id_seed=f"{job['organizationId']}/{job['importId']}",
+            first_row=first_row
+        )
+
+        summary = dict(checkpoint['summary'])
+        segment = tempfile.SpooledTemporaryFile(max_size=RESULTS_SPOOL_BYTES)
+        segment_rows = 0
+        try:
+            for result in results:
+                summary[result['status']] += 1
+                segment.write(json.dumps(result, default=str).encode('utf-8') + b'\n')
+                segment_rows += 1
+                # Results arrive a window at a time; only stop between windows
+                if (result['row'] - first_row + 1) % service.window_size:
+                    continue
+                out_of_time = bool(context) and (
+                    context.get_remaining_time_in_millis() < settings.BULK_IMPORT_RESUME_MARGIN_SECONDS * 1000
+                )
+                if segment_rows >= settings.BULK_IMPORT_SEGMENT_ROWS or out_of_time:
+                    checkpoint = _save_segment(s3, job, segment, checkpoint, result['row'], summary)
+                    segment.close()
+                    segment = tempfile.SpooledTemporaryFile(max_size=RESULTS_SPOOL_BYTES)
+                    segment_rows = 0
+                if out_of_time:
+                    results.close()
+                    logger.info(f"Bulk registration {job['importId']} continues after row {checkpoint['rowsDone']}")
+                    _continue_in_new_invocation(job, context)
+                    return {'status': 'continued', **checkpoint['summary']}
+            if segment_rows or not checkpoint['resultKeys']:
+                rows_done = checkpoint['rowsDone'] + segment_rows
+                checkpoint = _save_segment(s3, job, segment, checkpoint, rows_done, summary)
+        finally:
+            segment.close()
+
+    except Exception as e:
+        # Async invocations are retried and resume from the checkpoint
+        logger.error(f"Bulk registration {job['importId']} failed: {str(e)}", exc_info=True)
+        _save_manifest(s3, job, {'status': 'failed', 'error': str(e), 'checkpoint': checkpoint})
+        raise
+
+    _save_manifest(s3, job, {
+        'status': 'completed',
+        'summary': checkpoint['summary'],
+        'resultKeys': checkpoint['resultKeys'],
+        'completedAt': datetime.utcnow().isoformat() + 'Z'
+    })
+    logger.info(f"Bulk registration {job['importId']} finished: {checkpoint['summary']}")
+    return checkpoint['summary']
+
+
+def _save_segment(s3, job: Dict, segment, checkpoint: Dict, rows_done: int, summary: Dict) -> Dict:
+    """Upload a results segment (encrypted: it holds private keys) and checkpoint after it"""
+    key = f"{job['resultsPrefix']}{len(checkpoint['resultKeys']):05d}.ndjson"
+    segment.seek(0)
+    s3.upload_fileobj(
+        segment, job['s3Bucket'], key,
+        ExtraArgs={'ContentType': 'application/x-ndjson', 'ServerSideEncryption': 'aws:kms'}
+    )
+    checkpoint = {
+        'rowsDone': rows_done,
+        'resultKeys': checkpoint['resultKeys'] + [key],
+        'summary': dict(summary)
+    }
+    _save_manifest(s3, job, {'status': 'running', 'checkpoint': checkpoint})
+    return checkpoint
+
+
+def _get_import_status(organization_id: str, import_id: str) -> Dict[str, Any]:
+    if not IMPORT_ID_PATTERN.fullmatch(import_id):
+        return error_response('IMPORT_NOT_FOUND', f"Import {import_id} not found", status_code=404)
+    s3 = boto3.client('s3', region_name=settings.REGION)
+    key = f"{_import_prefix(organization_id, import_id)}manifest.json"
+    manifest = _load_manifest(s3, settings.DATA_EXPORT_BUCKET, key)
+    if manifest is None:
+        return error_response('IMPORT_NOT_FOUND', f"Import {import_id} not found", status_code=404)
+
+    summary = manifest.get('summary') or (manifest.get('checkpoint') or {}).get('summary')
+    status = {'importId': import_id, 'status': manifest['status']}
+    if summary:
+        status['summary'] = summary
+    for field in ('completedAt', 'error'):
+        if manifest.get(field):
+            status[field] = manifest[field]
+    if manifest['status'] == 'completed':
+        status['results'] = [
+            s3.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': manifest['s3Bucket'], 'Key': result_key},
+                ExpiresIn=DOWNLOAD_URL_EXPIRES_SECONDS
+            )
+            for result_key in manifest['resultKeys']
+        ]
+    return success_response(status)
+
+
+def _import_prefix(organization_id: str, import_id: str) -> str:
+    return f"{IMPORT_PREFIX}{organization_id}/{import_id}/"
+
+
+def _continue_in_new_invocation(job: Dict, context: Any):
+    boto3.client('lambda', region_name=settings.REGION).invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps({'bulkRegistration': job}).encode('utf-8')
+    )
+
+
+def _load_manifest(s3, bucket: str, key: str) -> Optional[Dict]:
+    try:
+        return json.loads(s3.get_object(Bucket=bucket, Key=key)['Body'].read())
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+
+
+def _save_manifest(s3, job: Dict, progress: Dict):
+    manifest = {**job, 'updatedAt': datetime.utcnow().isoformat() + 'Z', **progress}
+    s3.put_object(
+        Bucket=job['s3Bucket'],
+        Key=job['manifestKey'],
+        Body=json.dumps(manifest).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def read_rows(lines: Iterable[str], data_format: str) -> Iterator[Any]:
+    """
+    Parse CSV or NDJSON lines into row dicts
+
+    Rows that cannot be parsed are yielded as ValueError instances so they
+    still produce a per-row result.
+    """
+    if data_format == 'csv':
+        for row in csv.DictReader(lines):
+            yield _unflatten_csv_row(row)
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield ValueError(f"Invalid JSON: {e.msg}")
+
+
+def _unflatten_csv_row(row: Dict[str, str]) -> Dict:
+    """Turn dotted CSV columns into the nested RegisterDeviceRequest shape"""
+    nested: Dict[str, Any] = {}
+    for column, value in row.items():
+        if column is None or value is None or value == '':
+            continue
+        if column == 'tags':
+            nested['tags'] = [tag.strip() for tag in value.split(';') if tag.strip()]
+            continue
+        target = nested
+        *parents, leaf = column.split('.')
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = value
+    return nested
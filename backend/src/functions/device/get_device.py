@@ -3,6 +3,7 @@ import json
 from typing import Dict, Any
 
 from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
 from ...shared.exceptions.base import DeviceNotFoundError, UnauthorizedError
 
 
@@ -16,7 +17,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             raise ValueError("Device ID is required")
 
         # Extract user context
-        user_context = event.get('requestContext', {}).get('authorizer', {}).get('claims', {})
+        user_context = get_claims(event)
         organization_id = user_context.get('custom:organizationId')
 
         # In production: fetch device from repository
@@ -0,0 +1,289 @@
+"""Get Device History Lambda Handler"""
+import re
+import time
+from itertools import chain
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
+from ...shared.exceptions.base import DeviceNotFoundError, UnauthorizedError, ValidationError
+from ...shared.utils.downsampling import lttb, min_max
+from ...shared.utils.response import success_response, error_response
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.timestream_repository import TimestreamRepository
+from ...infrastructure.repositories.cached_timeseries_repository import CachedTimeSeriesRepository
+from ...infrastructure.repositories.mmap_timeseries_repository import MmapTimeSeriesRepository
+from ...infrastructure.repositories.s3_archive_repository import S3ArchiveRepository
+from ...domain.ports.repositories.i_timeseries_repository import ITimeSeriesRepository
+
+AGGREGATIONS = ('raw', '1m', '5m', '15m', '1h', '1d')
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': min_max}
+DEFAULT_MAX_POINTS = 1000
+MAX_POINTS_LIMIT = 10000
+MAX_RAW_RANGE = timedelta(days=90)
+DEFAULT_RANGE = timedelta(hours=24)
+METRIC_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+# Days not archived yet are checked again after this long
+ARCHIVE_MISS_TTL_SECONDS = 300
+
+_device_repository = None
+_timeseries_repository = None
+_archive_repository = None
+# Days known to be archived; archival markers are never removed
+_archived_days: Set[date] = set()
+# Days found not archived (late or failed runs): {day: monotonic expiry}
+_unarchived_days: Dict[date, float] = {}
+
+
+def _get_device_repository() -> DynamoDBDeviceRepository:
+    """Reuse the repository (and its boto3 client) across warm invocations"""
+    global _device_repository
+    if _device_repository is None:
+        _device_repository = DynamoDBDeviceRepository()
+    return _device_repository
+
+
+def _get_timeseries_repository() -> ITimeSeriesRepository:
+    """Reuse the repository (and its clients) across warm invocations"""
+    global _timeseries_repository
+    if _timeseries_repository is None:
+        if settings.TIMESERIES_STORE == 'local':
+            _timeseries_repository = MmapTimeSeriesRepository()
+        else:
+            _timeseries_repository = CachedTimeSeriesRepository(TimestreamRepository())
+    return _timeseries_repository
+
+
+def _get_archive_repository() -> S3ArchiveRepository:
+    global _archive_repository
+    if _archive_repository is None:
+        _archive_repository = S3ArchiveRepository()
+    return _archive_repository
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for GET /devices/{deviceId}/history
+
+    Query parameters:
+    - startDate, endDate (ISO 8601, default: last 24 hours)
+    - metrics: comma-separated (default: metrics of the last reading)
+    - aggregation: raw|1m|5m|15m|1h|1d (default: raw)
+    - maxPoints: points per metric (default 1000, max 10000)
+    - downsample: lttb|minmax (default: lttb)
+
+    Each metric is streamed from Timestream and downsampled in one pass,
+    so at most `maxPoints` points per metric are returned whatever the
+    range. Raw points of days already archived (see data_archival) are
+    read from the archive instead. Series are columnar:
+        {"series": {"temperature": {"timestamps": [ms, ...], "values": [...],
+                                    "rawPoints": 43200}}}
+    """
+    try:
+        device_id = (event.get('pathParameters') or {}).get('deviceId')
+        if not device_id:
+            raise ValidationError("Device ID is required", field='deviceId')
+
+        user_context = get_claims(event)
+        organization_id = user_context.get('custom:organizationId')
+        if not organization_id:
+            raise UnauthorizedError("Organization ID not found in token")
+
+        query_params = event.get('queryStringParameters') or {}
+        end_time = _parse_date(query_params.get('endDate'), 'endDate') or datetime.utcnow()
+        start_time = _parse_date(query_params.get('startDate'), 'startDate') or end_time - DEFAULT_RANGE
+        if start_time >= end_time:
+            raise ValidationError("startDate must be before endDate", field='startDate')
+
+        aggregation = query_params.get('aggregation', 'raw')
+        if aggregation not in AGGREGATIONS:
+            raise ValidationError(f"aggregation must be one of {', '.join(AGGREGATIONS)}", field='aggregation')
+        if aggregation == 'raw' and end_time - start_time > MAX_RAW_RANGE:
+            raise ValidationError("Raw data is limited to 90 days", field='startDate')
+
+        downsample = query_params.get('downsample', 'lttb')
+        if downsample not in DOWNSAMPLERS:
+            raise ValidationError("downsample must be 'lttb' or 'minmax'", field='downsample')
+        max_points = int(query_params.get('maxPoints', DEFAULT_MAX_POINTS))
+        if not 10 <= max_points <= MAX_POINTS_LIMIT:
+            raise ValidationError(f"maxPoints must be between 10 and {MAX_POINTS_LIMIT}", field='maxPoints')
+
+        device = _get_device_repository().find_by_id(device_id)
+        if device is None or device.organization_id != organization_id:
+            raise DeviceNotFoundError(device_id)
+
+        metrics = _parse_metrics(query_params.get('metrics')) or sorted(device.last_reading or {})
+
+        series = _load_series(
+            device_id, metrics, start_time, end_time, aggregation,
+            max_points, DOWNSAMPLERS[downsample]
+        )
+
+        logger.info(
+            f"History for device {device_id}: {len(metrics)} metrics, "
+            f"{sum(s['rawPoints'] for s in series.values())} raw points"
+        )
+
+        return success_response({
+            'deviceId': device_id,
+            'timeRange': {
+                'start': start_time.isoformat() + 'Z',
+                'end': end_time.isoformat() + 'Z'
+            },
+            'metrics': metrics,
+            'aggregation': aggregation,
+            'downsample': downsample,
+            'maxPoints': max_points,
+            'series': series
+        })
+
+    except (ValidationError, ValueError) as e:
+        message = getattr(e, 'message', str(e))
+        logger.warning(f"Validation error: {message}")
+        return error_response('VALIDATION_ERROR', message, status_code=400)
+
+    except UnauthorizedError as e:
+        logger.warning(f"Unauthorized: {e.message}")
+        return error_response(e.code, e.message, status_code=403)
+
+    except DeviceNotFoundError as e:
+        return error_response(e.code, e.message, status_code=404)
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        return error_response('INTERNAL_ERROR', 'Internal server error', status_code=500)
+
+
+def _load_series(
+    device_id: str,
+    metrics: List[str],
+    start_time: datetime,
+    end_time: datetime,
+    aggregation: str,
+    max_points: int,
+    downsampler
+) -> Dict[str, Dict]:
+    """Fetch and downsample every metric into timestamp/value columns"""
+    repository = _get_timeseries_repository()
+    start_ms = int(start_time.timestamp() * 1000)
+    end_ms = int(end_time.timestamp() * 1000)
+
+    if aggregation == 'raw':
+        sources = {
+            metric: _raw_series(repository, device_id, metric, start_time, end_time)
+            for metric in metrics
+        }
+    else:
+        rows = repository.query_aggregated_data(device_id, metrics, start_time, end_time, aggregation)
+        sources = {
+            metric: [(row['timestamp'], row[metric]) for row in rows if row.get(metric) is not None]
+            for metric in metrics
+        }
+
+    series = {}
+    for metric, points in sources.items():
+        counter = _Counter(points)
+        selected = downsampler(counter, max_points, start_ms, end_ms)
+        series[metric] = {
+            'timestamps': [point[0] for point in selected],
+            'values': [point[1] for point in selected],
+            'rawPoints': counter.count
+        }
+    return series
+
+
+def _raw_series(
+    repository: ITimeSeriesRepository,
+    device_id: str,
+    metric: str,
+    start_time: datetime,
+    end_time: datetime
+):
+    """
+    Raw points; days before the archival cutoff come from the archive once
+    data_archival marked them archived, every other day from the hot store
+    """
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    # One day later than data_archival archives, so a late run is covered
+    cutoff = today - timedelta(days=settings.ARCHIVE_AFTER_DAYS + 1)
+    if settings.TIMESERIES_STORE == 'local' or start_time >= cutoff:
+        return repository.query_raw_series(device_id, metric, start_time, end_time)
+
+    # (archived, start, end), consecutive days of the same source merged;
+    # days not archived yet (failed or late archival runs) are still hot
+    segments = []
+    day = start_time.date()
+    day_start = datetime(day.year, day.month, day.day)
+    while day_start < cutoff and day_start <= end_time:
+        archived = _is_day_archived(day)
+        segment_end = min(end_time, day_start + timedelta(days=1) - timedelta(milliseconds=1))
+        if segments and segments[-1][0] == archived:
+            segments[-1] = (archived, segments[-1][1], segment_end)
+        else:
+            segments.append((archived, max(start_time, day_start), segment_end))
+        day += timedelta(days=1)
+        day_start += timedelta(days=1)
+    if end_time >= cutoff:
+        if segments and not segments[-1][0]:
+            segments[-1] = (False, segments[-1][1], end_time)
+        else:
+            segments.append((False, cutoff, end_time))
+
+    archive = _get_archive_repository()
+    return chain.from_iterable(
+        (archive if archived else repository).query_raw_series(device_id, metric, segment_start, segment_end)
+        for archived, segment_start, segment_end in segments
+    )
+
+
+def _is_day_archived(day: date) -> bool:
+    if day in _archived_days:
+        return True
+    now = time.monotonic()
+    if _unarchived_days.get(day, 0) > now:
+        return False
+    if _get_archive_repository().is_day_archived(day):
+        _archived_days.add(day)
+        _unarchived_days.pop(day, None)
+        return True
+    _unarchived_days[day] = now + ARCHIVE_MISS_TTL_SECONDS
+    return False
+
+
+class _Counter:
+    """Iterator wrapper counting the points that went through it"""
+
+    def __init__(self, points):
+        self._points = iter(points)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        point = next(self._points)
+        self.count += 1
+        return point
+
+
+def _parse_date(value: Optional[str], field: str) -> Optional[datetime]:
+    """Parse an ISO 8601 date into a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValidationError(f"{field} must be an ISO 8601 date", field=field)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_metrics(value: Optional[str]) -> List[str]:
+    metrics = [metric.strip() for metric in (value or '').split(',') if metric.strip()]
+    for metric in metrics:
+        if not METRIC_PATTERN.match(metric):
+            raise ValidationError(f"Invalid metric name: {metric}", field='metrics')
+    return metrics
@@ -1,112 +1,107 @@
 """List Devices Lambda Handler"""
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
 from ...shared.config.settings import settings
+from ...shared.exceptions.base import ValidationError
 from ...shared.utils.response import success_response, error_response
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_device_search_index import DynamoDBDeviceSearchIndex
+
+_device_repository = None
+
+
+def _get_device_repository() -> DynamoDBDeviceRepository:
+    """Reuse the repository (and its boto3 clients) across warm invocations"""
+    global _device_repository
+    if _device_repository is None:
+        _device_repository = DynamoDBDeviceRepository(search_index=DynamoDBDeviceSearchIndex())
+    return _device_repository
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    """Lambda handler for GET /devices"""
+    """
+    Lambda handler for GET /devices
+
+    Query parameters:
+    - page, pageSize
+    - status, deviceType
+    - tags: comma-separated, devices must carry all of them
+    - near: 'lat,lon,radiusMeters'
+    - bbox: 'minLat,minLon,maxLat,maxLon'
+    """
     try:
         # Extract query parameters
         query_params = event.get('queryStringParameters') or {}
         page = int(query_params.get('page', 1))
-        page_size = int(query_params.get('pageSize', settings.PAGE_SIZE_DEFAULT))
+        page_size = min(
+            int(query_params.get('pageSize', settings.PAGE_SIZE_DEFAULT)),
+            settings.PAGE_SIZE_MAX
+        )
+        filters = _parse_filters(query_params)
 
         # Extract user context
-        user_context = event.get('requestContext', {}).get('authorizer', {}).get('claims', {})
+        user_context = get_claims(event)
         organization_id = user_context.get('custom:organizationId')
+        if not organization_id:
+            return error_response('UNAUTHORIZED', 'Organization ID not found in token', status_code=403)
+
+        result = _get_device_repository().find_by_organization(
+            organization_id, filters, page, page_size
+        )
+        pagination = result['pagination']
 
-        # In production: fetch devices from repository
-        # devices = device_repository.find_by_organization(organization_id, filters, page, page_size)
-
-        # Mock data for testing
-        mock_devices = [
-            {
-                'deviceId': 'device-001',
-                'organizationId': organization_id or 'org-001',
-                'deviceType': 'temperature-sensor',
-                'name': 'Office Temperature Sensor',
-                'description': 'Main office temperature monitoring',
-                'status': 'online',
-                'location': {
-                    'lat': 37.7749,
-                    'lon': -122.4194,
-                    'address': '123 Main St',
-                    'building': 'Building A',
-                    'floor': '2',
-                    'room': '201'
-                },
-                'connectivity': {
-                    'type': 'wifi',
-                    'rssi': -45,
-                    'quality': 95,
-                    'lastSeen': '2025-11-15T10:30:00Z'
-                },
-                'metadata': {
-                    'manufacturer': 'IoT Sensors Inc',
-                    'model': 'TS-2000',
-                    'serialNumber': 'SN-001234',
-                    'firmwareVersion': '1.2.3',
-                    'hardwareVersion': '2.0'
-                },
-                'tags': ['critical', 'office'],
-                'batteryLevel': 85,
-                'lastHeartbeat': '2025-11-15T10:30:00Z',
-                'createdAt': '2025-11-01T00:00:00Z',
-                'updatedAt': '2025-11-15T10:30:00Z'
-            },
-            {
-                'deviceId': 'device-002',
-                'organizationId': organization_id or 'org-001',
-                'deviceType': 'humidity-sensor',
-                'name': 'Warehouse Humidity Sensor',
-                'description': 'Warehouse humidity monitoring',
-                'status': 'warning',
-                'location': {
-                    'lat': 37.7750,
-                    'lon': -122.4195,
-                    'address': '456 Storage Ave',
-                    'building': 'Warehouse 1',
-                    'floor': '1',
-                    'room': 'Zone A'
-                },
-                'connectivity': {
-                    'type': 'cellular',
-                    'rssi': -75,
-                    'quality': 60,
-                    'lastSeen': '2025-11-15T10:25:00Z'
-                },
-                'metadata': {
-                    'manufacturer': 'IoT Sensors Inc',
-                    'model': 'HS-3000',
-                    'serialNumber': 'SN-001235',
-                    'firmwareVersion': '1.1.0',
-                    'hardwareVersion': '1.5'
-                },
-                'tags': ['warehouse'],
-                'batteryLevel': 45,
-                'lastHeartbeat': '2025-11-15T10:25:00Z',
-                'createdAt': '2025-11-02T00:00:00Z',
-                'updatedAt': '2025-11-15T10:25:00Z'
-            }
-        ]
-
-        logger.info(f"Listed {len(mock_devices)} devices for organization: {organization_id}")
+        logger.info(f"Listed {len(result['items'])} devices for organization: {organization_id}")
 
         response_data = {
-            'items': mock_devices,
-            'total': len(mock_devices),
+            'items': [device.model_dump(mode='json', by_alias=True) for device in result['items']],
+            'total': pagination['totalItems'],
             'page': page,
             'pageSize': page_size,
-            'totalPages': 1,
-            'hasNext': False,
-            'hasPrevious': False
+            'totalPages': pagination['totalPages'],
+            'hasNext': page < pagination['totalPages'],
+            'hasPrevious': page > 1
         }
 
         return success_response(response_data)
 
+    except (ValidationError, ValueError) as e:
+        message = getattr(e, 'message', str(e))
+        logger.warning(f"Validation error: {message}")
+        return error_response('VALIDATION_ERROR', message, status_code=400)
+
     except Exception as e:
         logger.error(f"Error: {str(e)}", exc_info=True)
         return error_response('INTERNAL_ERROR', 'Internal server error', status_code=500)
+
+
+def _parse_filters(query_params: Dict[str, str]) -> Dict:
+    """Translate query parameters into repository filters"""
+    filters: Dict[str, Any] = {}
+    if query_params.get('status'):
+        filters['status'] = query_params['status']
+    if query_params.get('deviceType'):
+        filters['deviceType'] = query_params['deviceType']
+    if query_params.get('tags'):
+        filters['tags'] = [tag.strip() for tag in query_params['tags'].split(',') if tag.strip()]
+
+    near = _parse_floats(query_params.get('near'), 3, 'near')
+    if near:
+        filters['near'] = {'lat': near[0], 'lon': near[1], 'radiusMeters': near[2]}
+    bbox = _parse_floats(query_params.get('bbox'), 4, 'bbox')
+    if bbox:
+        filters['bbox'] = {'minLat': bbox[0], 'minLon': bbox[1], 'maxLat': bbox[2], 'maxLon': bbox[3]}
+    return filters
+
+
+def _parse_floats(value: Optional[str], count: int, field: str):
+    if not value:
+        return None
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise ValidationError(f"{field} must be {count} comma-separated numbers", field=field)
+    return numbers
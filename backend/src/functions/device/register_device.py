@@ -3,25 +3,12 @@ import json
 import uuid
 from datetime import datetime
 from typing import Dict, Any
-from pydantic import BaseModel, Field
 
 from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_claims
 from ...shared.exceptions.base import ValidationError, UnauthorizedError
-from ...domain.entities.device import Device, DeviceLocation, Connectivity, DeviceStatus
-
-
-# Request/Response Schemas
-class RegisterDeviceRequest(BaseModel):
-    """Request schema for device registration"""
-    device_type: str = Field(..., alias='deviceType')
-    name: str
-    location: DeviceLocation
-    connectivity: Connectivity
-    metadata: Dict = Field(default_factory=dict)
-    tags: list = Field(default_factory=list)
-
-    class Config:
-        populate_by_name = True
+from ...shared.schemas.device_schemas import RegisterDeviceRequest
+from ...domain.entities.device import Device, DeviceStatus
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -40,7 +27,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         request_data = RegisterDeviceRequest(**body)
 
         # 2. Extract user context from authorizer
-        user_context = event.get('requestContext', {}).get('authorizer', {}).get('claims', {})
+        user_context = get_claims(event)
         user_id = user_context.get('sub')
         organization_id = user_context.get('custom:organizationId')
 
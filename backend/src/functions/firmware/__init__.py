@@ -0,0 +1 @@
+# Firmware Lambda handlers
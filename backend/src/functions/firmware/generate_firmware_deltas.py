@@ -0,0 +1,58 @@
+"""Generate Firmware Deltas Lambda Handler - Patches to newly uploaded firmware"""
+import posixpath
+from typing import Any, Dict
+from urllib.parse import unquote_plus
+
+from ...shared.middleware.logger import logger
+from ...domain.services.firmware_delta_service import FirmwareDeltaService
+from ...infrastructure.external.bsdiff_delta_encoder import BsdiffDeltaEncoder
+from ...infrastructure.external.s3_firmware_storage import S3FirmwareStorage
+from ...infrastructure.repositories.dynamodb_firmware_repository import DynamoDBFirmwareRepository
+
+_delta_service = None
+
+
+def _get_delta_service() -> FirmwareDeltaService:
+    """Reuse the service and its clients across warm invocations"""
+    global _delta_service
+    if _delta_service is None:
+        _delta_service = FirmwareDeltaService(
+            firmware_repository=DynamoDBFirmwareRepository(),
+            storage=S3FirmwareStorage(),
+            encoder=BsdiffDeltaEncoder()
+        )
+    return _delta_service
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Build delta patches when a firmware image lands in FIRMWARE_BUCKET
+
+    Processing Steps:
+    1. Map each uploaded key (firmware/<firmwareId>.bin) to its firmware
+    2. Pick the newest earlier releases of its device types as sources
+    3. Diff every source image against the new one; store the patches
+       under deltas/<firmwareId>/ (outside the trigger prefix)
+    4. Record checksum and size of each patch in the firmware's metadata
+
+    Images whose firmware record is missing are skipped. Only missing
+    patches are built, so a retried event does not redo the others.
+    """
+    service = _get_delta_service()
+    deltas = 0
+    failed = 0
+    for record in event.get('Records', []):
+        key = unquote_plus(record['s3']['object']['key'])
+        firmware_id = posixpath.splitext(posixpath.basename(key))[0]
+        try:
+            firmware = service.firmware_repository.find_firmware_by_id(firmware_id)
+            if firmware is None or firmware.s3_key != key:
+                logger.warning(f"No firmware record for uploaded image {key}")
+                continue
+            firmware = service.generate_deltas(firmware)
+            deltas += len(firmware.metadata.get('deltas', {}))
+        except Exception as e:
+            logger.error(f"Failed to generate deltas for {key}: {str(e)}", exc_info=True)
+            failed += 1
+
+    return {'deltas': deltas, 'failed': failed}
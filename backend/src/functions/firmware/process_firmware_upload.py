@@ -0,0 +1,57 @@
+"""Process Firmware Upload Lambda Handler - Verify and publish uploaded images"""
+import posixpath
+from typing import Any, Dict
+from urllib.parse import unquote_plus
+
+from ...shared.middleware.logger import logger
+from ...domain.services.firmware_ingestion_service import FirmwareIngestionService
+from ...infrastructure.external.s3_firmware_storage import S3FirmwareStorage
+from ...infrastructure.repositories.dynamodb_firmware_repository import DynamoDBFirmwareRepository
+
+_ingestion_service = None
+
+
+def _get_ingestion_service() -> FirmwareIngestionService:
+    """Reuse the service and its clients across warm invocations"""
+    global _ingestion_service
+    if _ingestion_service is None:
+        _ingestion_service = FirmwareIngestionService(
+            firmware_repository=DynamoDBFirmwareRepository(),
+            storage=S3FirmwareStorage()
+        )
+    return _ingestion_service
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Verify firmware images uploaded to FIRMWARE_BUCKET and publish them
+
+    Processing Steps:
+    1. Map each uploaded key (uploads/<firmwareId>.bin) to its pending firmware
+    2. Stream the upload through SHA-256 into a multipart upload of the
+       firmware's s3_key, parts sent concurrently
+    3. Complete the upload if the digest matches the one the client
+       declared, abort it otherwise
+    4. Fill in size and checksum and mark the firmware available, or mark
+       it rejected
+
+    Publishing the image triggers generate_firmware_deltas. Errors are
+    raised so the event is retried; uploads expire through the bucket
+    lifecycle rules.
+    """
+    service = _get_ingestion_service()
+    published = 0
+    rejected = 0
+    for record in event.get('Records', []):
+        key = unquote_plus(record['s3']['object']['key'])
+        firmware_id = posixpath.splitext(posixpath.basename(key))[0]
+        firmware = service.ingest(firmware_id, key)
+        if firmware is None:
+            continue
+        if firmware.status == 'available':
+            published += 1
+        elif firmware.status == 'rejected':
+            rejected += 1
+            logger.warning(f"Firmware upload {key} rejected")
+
+    return {'published': published, 'rejected': rejected}
@@ -0,0 +1,45 @@
+"""Start Deployment Lambda Handler - Roll out the first batch of a scheduled deployment"""
+from typing import Any, Dict
+
+from ...shared.middleware.logger import logger
+from ...domain.services.deployment_monitor import DeploymentMonitor
+from ...infrastructure.external.iot_core_provider import IoTCoreProvider
+from ...infrastructure.repositories.dynamodb_deployment_repository import DynamoDBDeploymentRepository
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_firmware_repository import DynamoDBFirmwareRepository
+
+_monitor = None
+
+
+def _get_monitor() -> DeploymentMonitor:
+    """Reuse the monitor and its clients across warm invocations"""
+    global _monitor
+    if _monitor is None:
+        _monitor = DeploymentMonitor(
+            deployment_repository=DynamoDBDeploymentRepository(),
+            firmware_repository=DynamoDBFirmwareRepository(),
+            device_repository=DynamoDBDeviceRepository(),
+            iot_provider=IoTCoreProvider()
+        )
+    return _monitor
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Start a deployment at its scheduled time ({"deploymentId": ...}, the
+    input of its one-time EventBridge schedule)
+
+    Processing Steps:
+    1. Move the deployment from scheduled to in_progress
+    2. Create the IoT jobs of its first batch, one per image and
+       JOB_MAX_TARGETS devices
+
+    Later batches are started by the deployment monitor as results come
+    in. Errors are raised so the invocation is retried; jobs that already
+    exist are skipped.
+    """
+    deployment_id = event['deploymentId']
+    started = _get_monitor().start(deployment_id)
+    if not started:
+        logger.warning(f"Deployment {deployment_id} does not exist or was already started")
+    return {'deploymentId': deployment_id, 'started': started}
@@ -0,0 +1 @@
+# Scheduled Lambda handlers
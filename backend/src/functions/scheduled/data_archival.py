@@ -0,0 +1,131 @@
+"""Data Archival Lambda Handler - Scheduled"""
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.s3_archive_repository import S3ArchiveRepository
+from ...infrastructure.repositories.timestream_repository import TimestreamRepository
+
+# Stop taking new device groups when less time than this remains
+CONTINUE_MARGIN_MILLIS = 120 * 1000
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Archive sensor data older than ARCHIVE_AFTER_DAYS to DATA_ARCHIVE_BUCKET
+
+    Processing Steps:
+    1. Pick the days due for archival that have no completion marker
+       (up to ARCHIVE_CATCHUP_DAYS back, so missed runs catch up)
+    2. Stream each group of TIMESTREAM_QUERY_GROUP_SIZE devices from
+       Timestream, one series at a time
+    3. Write one Gorilla-compressed object per device-day
+    4. Mark the day archived and log archival stats
+
+    Timestream has no deletes: archived data leaves the hot store through
+    the table's magnetic retention, which must be longer than
+    ARCHIVE_AFTER_DAYS. When time runs short the job continues in a new
+    invocation after the last archived device group.
+    """
+    state = event.get('dataArchival') or {}
+    device_repository = DynamoDBDeviceRepository()
+    timeseries_repository = TimestreamRepository()
+    archive_repository = S3ArchiveRepository()
+
+    days = _days_due(archive_repository)
+    if state.get('day'):
+        continued = date.fromisoformat(state['day'])
+        days = [continued] + [day for day in days if day != continued]
+    device_ids = sorted(item['deviceId'] for item in device_repository.scan_status_summary())
+    completed = []
+
+    for day in days:
+        after = state.get('after') if state.get('day') == day.isoformat() else None
+        stats = state.get('stats') if after else None
+        result = _archive_day(
+            day, device_ids, after, stats or {'devices': 0, 'points': 0, 'bytes': 0},
+            timeseries_repository, archive_repository, context
+        )
+        if result is None:
+            return {'status': 'continued', 'day': day.isoformat(), 'archivedDays': completed}
+        archive_repository.mark_day_archived(day, {
+            **result, 'archivedAt': datetime.utcnow().isoformat() + 'Z'
+        })
+        logger.info(
+            f"Archived {day}: {result['devices']} devices, {result['points']} points, "
+            f"{result['bytes']} bytes ({result['bytes'] / max(result['points'], 1):.2f} bytes/point)"
+        )
+        completed.append(day.isoformat())
+
+    return {'status': 'completed', 'archivedDays': completed}
+
+
+def _days_due(archive_repository: S3ArchiveRepository) -> List[date]:
+    """Days old enough to archive that were not archived yet, oldest first"""
+    last = datetime.utcnow().date() - timedelta(days=settings.ARCHIVE_AFTER_DAYS + 1)
+    candidates = [last - timedelta(days=offset) for offset in range(settings.ARCHIVE_CATCHUP_DAYS)]
+    return [day for day in reversed(candidates) if not archive_repository.is_day_archived(day)]
+
+
+def _archive_day(
+    day: date,
+    device_ids: List[str],
+    after: Optional[str],
+    stats: Dict[str, int],
+    timeseries_repository: TimestreamRepository,
+    archive_repository: S3ArchiveRepository,
+    context: Any
+) -> Optional[Dict[str, int]]:
+    """
+    Archive every device for one day
+
+    Returns the day's stats, or None when the rest of the day was handed to
+    a new invocation.
+    """
+    start_time = datetime(day.year, day.month, day.day)
+    end_time = start_time + timedelta(days=1) - timedelta(milliseconds=1)
+    pending = [device_id for device_id in device_ids if after is None or device_id > after]
+    group_size = settings.TIMESTREAM_QUERY_GROUP_SIZE
+
+    for first in range(0, len(pending), group_size):
+        if first and context.get_remaining_time_in_millis() < CONTINUE_MARGIN_MILLIS:
+            _continue_in_new_invocation(
+                {'day': day.isoformat(), 'after': pending[first - 1], 'stats': stats}, context
+            )
+            return None
+
+        group = pending[first:first + group_size]
+        series_stream = timeseries_repository.query_device_series(group, start_time, end_time)
+        for device_id, series in _group_by_device(series_stream):
+            stats['bytes'] += archive_repository.write_day(device_id, day, series)
+            stats['points'] += sum(len(timestamps) for timestamps, _ in series.values())
+            stats['devices'] += 1
+
+    return stats
+
+
+def _group_by_device(series_stream):
+    """Collect consecutive (deviceId, metric, timestamps, values) into per-device dicts"""
+    current: Optional[str] = None
+    series: Dict[str, Tuple[List[int], List[float]]] = {}
+    for device_id, metric, timestamps, values in series_stream:
+        if device_id != current:
+            if series:
+                yield current, series
+            current, series = device_id, {}
+        series[metric] = (timestamps, values)
+    if series:
+        yield current, series
+
+
+def _continue_in_new_invocation(state: Dict, context: Any):
+    boto3.client('lambda', region_name=settings.REGION).invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps({'dataArchival': state}).encode('utf-8')
+    )
@@ -0,0 +1,47 @@
+"""Expire Deployment Batches Lambda Handler - Scheduled"""
+from typing import Any, Dict
+
+from ...shared.middleware.logger import logger
+from ...domain.services.deployment_monitor import DeploymentMonitor
+from ...infrastructure.external.iot_core_provider import IoTCoreProvider
+from ...infrastructure.repositories.dynamodb_deployment_repository import DynamoDBDeploymentRepository
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_firmware_repository import DynamoDBFirmwareRepository
+
+_monitor = None
+
+
+def _get_monitor() -> DeploymentMonitor:
+    """Reuse the monitor and its clients across warm invocations"""
+    global _monitor
+    if _monitor is None:
+        _monitor = DeploymentMonitor(
+            deployment_repository=DynamoDBDeploymentRepository(),
+            firmware_repository=DynamoDBFirmwareRepository(),
+            device_repository=DynamoDBDeviceRepository(),
+            iot_provider=IoTCoreProvider()
+        )
+    return _monitor
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Decide deployment batches whose devices did not all report in time
+
+    Job executions of offline devices stay QUEUED, and the job timeout only
+    applies once an execution is in progress, so without a deadline such a
+    batch would never reach or miss DEPLOYMENT_SUCCESS_THRESHOLD.
+
+    Processing Steps:
+    1. Query the in-progress batches started more than
+       DEPLOYMENT_BATCH_DEADLINE_MINUTES ago (inProgress-index)
+    2. Cancel each batch's queued job executions
+    3. Count its devices without a result as failed, then halt or advance
+       the deployment as the deployment monitor does
+
+    Errors are raised so the next run retries; every step is safe to repeat.
+    """
+    expired = _get_monitor().expire_batches()
+    if expired:
+        logger.info(f"Expired {expired} deployment batches")
+    return {'expiredBatches': expired}
@@ -0,0 +1,70 @@
+"""Flush Notification Digests Lambda Handler - Scheduled"""
+import time
+from typing import Any, Dict
+
+from ...shared.middleware.logger import logger
+from ...domain.services.notification_dispatch_service import NotificationDispatchService
+from ...infrastructure.external.dynamodb_rate_limiter import DynamoDBRateLimiter
+from ...infrastructure.external.fcm_push_provider import FCMPushProvider
+from ...infrastructure.external.ses_email_provider import SESEmailProvider
+from ...infrastructure.repositories.dynamodb_digest_repository import DynamoDBDigestRepository
+from ...infrastructure.repositories.dynamodb_user_repository import DynamoDBUserRepository
+
+# Due entries handled per round
+FLUSH_BATCH_SIZE = 1000
+# Time kept in hand before starting another round
+FLUSH_MARGIN_MILLIS = 30000
+
+_dispatch_service = None
+
+
+def _get_dispatch_service() -> NotificationDispatchService:
+    """Reuse the service (its clients, Firebase app and routing tables) across warm invocations"""
+    global _dispatch_service
+    if _dispatch_service is None:
+        _dispatch_service = NotificationDispatchService(
+            user_repository=DynamoDBUserRepository(),
+            email_provider=SESEmailProvider(),
+            push_provider=FCMPushProvider(),
+            digest_repository=DynamoDBDigestRepository(),
+            rate_limiter=DynamoDBRateLimiter()
+        )
+    return _dispatch_service
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Send the notification digests whose window ended
+
+    Processing Steps:
+    1. Query due entries from the digest table (dueAt-index), a round of
+       FLUSH_BATCH_SIZE at a time, each round continuing after the last
+    2. Send one email and one push per user, covering all of its entries
+    3. Record the sent entries and remove them from the buffer
+    4. Repeat until every due entry was listed, time runs short, or a
+       round makes no progress
+
+    Entries of users in quiet hours become due when the quiet hours end;
+    entries that could not be sent, or did not fit the SES/FCM rate
+    limits, become due again after a backoff.
+    """
+    service = _get_dispatch_service()
+    due = 0
+    cursor = None
+    while True:
+        deadline = None
+        if context is not None:
+            deadline = time.time() + (context.get_remaining_time_in_millis() - FLUSH_MARGIN_MILLIS) / 1000
+        result = service.flush_digests(FLUSH_BATCH_SIZE, deadline=deadline, cursor=cursor)
+        due += result['due']
+        cursor = result['cursor']
+        if cursor is None:
+            break
+        if not result['done'] and not result['deferred']:
+            logger.warning("Stopping digest flush, a round made no progress")
+            break
+        if context is not None and context.get_remaining_time_in_millis() < FLUSH_MARGIN_MILLIS:
+            logger.warning("Stopping digest flush, time limit reached")
+            break
+
+    return {'dueEntries': due}
@@ -0,0 +1,74 @@
+"""Rebuild Device Index Lambda Handler - Scheduled"""
+import json
+from typing import Any, Dict
+
+import boto3
+
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_device_search_index import DynamoDBDeviceSearchIndex
+
+# Stop taking new scan pages when less time than this remains
+CONTINUE_MARGIN_MILLIS = 60 * 1000
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Reconcile DEVICE_INDEX_TABLE with DEVICES_TABLE
+
+    Device writes keep the index in sync incrementally, but index writes
+    never fail the device write, and they only change the postings that
+    differ from the previous version of the device, so postings added to
+    the index later (such as the firmware postings) exist only for devices
+    written since. This job repairs both; it runs daily and can be invoked
+    after deploying an index change.
+
+    Processing Steps:
+    1. Scan DEVICES_TABLE page by page (consistent reads) and put every
+       posting of each page's devices, which backfills missing postings
+       (puts of existing postings are no-ops)
+    2. Scan DEVICE_INDEX_TABLE page by page, read the current version of
+       each page's devices, and delete the postings they no longer have
+       (failed deletes, deleted devices)
+    3. When time runs short, continue in a new invocation from the next
+       page of the current step
+    """
+    state = event.get('deviceIndexRebuild') or {}
+    device_repository = DynamoDBDeviceRepository()
+    search_index = DynamoDBDeviceSearchIndex()
+    stats = state.get('stats') or {'indexed': 0, 'removed': 0}
+
+    if state.get('step', 'devices') == 'devices':
+        for devices, next_key in device_repository.scan_devices(state.get('startKey')):
+            search_index.index_devices(devices)
+            stats['indexed'] += len(devices)
+            if next_key and context.get_remaining_time_in_millis() < CONTINUE_MARGIN_MILLIS:
+                _continue_in_new_invocation({'step': 'devices', 'startKey': next_key, 'stats': stats}, context)
+                return {'status': 'continued', **stats}
+        state = {}
+
+    for postings, next_key in search_index.scan_postings(state.get('startKey')):
+        # Read after the postings, so a posting written for a newer version
+        # of its device is checked against that version
+        devices = device_repository.find_by_ids(
+            sorted({device_id for _, _, device_id in postings}), consistent_read=True
+        )
+        stats['removed'] += search_index.remove_stale_postings(postings, devices)
+        if next_key and context.get_remaining_time_in_millis() < CONTINUE_MARGIN_MILLIS:
+            _continue_in_new_invocation({'step': 'postings', 'startKey': next_key, 'stats': stats}, context)
+            return {'status': 'continued', **stats}
+
+    logger.info(
+        f"Rebuilt device index: postings of {stats['indexed']} devices written, "
+        f"{stats['removed']} stale postings removed"
+    )
+    return {'status': 'completed', **stats}
+
+
+def _continue_in_new_invocation(state: Dict, context: Any):
+    boto3.client('lambda', region_name=settings.REGION).invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps({'deviceIndexRebuild': state}).encode('utf-8')
+    )
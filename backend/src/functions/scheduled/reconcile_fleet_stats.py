@@ -0,0 +1,67 @@
+"""Reconcile Fleet Stats Lambda Handler - Scheduled"""
+import time
+from typing import Any, Dict
+
+from ...shared.middleware.logger import logger
+from ...domain.entities.device import DeviceStatus, OFFLINE_AFTER_SECONDS
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_fleet_stats_repository import DynamoDBFleetStatsRepository
+from ...infrastructure.repositories.dynamodb_device_search_index import DynamoDBDeviceSearchIndex
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Recompute fleet counters from DEVICES_TABLE
+
+    Processing Steps:
+    1. Snapshot the current counters of every organization
+    2. Scan device status attributes (projected scan)
+    3. Mark online devices that stopped reporting as offline
+    4. Tally devices per organization by status and type
+    5. ADD the difference between tally and snapshot to each
+       organization's counters, zeroing organizations that no longer
+       have devices
+
+    Counters are maintained incrementally on every transition; this job
+    only corrects drift (missed updates, failed counter writes). The scan
+    takes minutes, so the counters are corrected by deltas instead of
+    overwritten: increments made by concurrent transitions are kept, and
+    a device counted both by such an increment and by the tally is
+    corrected by the next run.
+    """
+    stats_repository = DynamoDBFleetStatsRepository()
+    # No stats repository here: transitions made by the sweep are already
+    # part of the tally written below
+    device_repository = DynamoDBDeviceRepository(search_index=DynamoDBDeviceSearchIndex())
+
+    baselines = stats_repository.snapshot_counters()
+    stale_before = (time.time() - OFFLINE_AFTER_SECONDS) * 1000
+    tallies: Dict[str, Dict[str, Dict[str, int]]] = {}
+    marked_offline = 0
+
+    for item in device_repository.scan_status_summary():
+        status = item.get('status')
+        if status == DeviceStatus.ONLINE.value and (item.get('lastSeen') or 0) < stale_before:
+            if device_repository.update_status(item['deviceId'], DeviceStatus.OFFLINE):
+                marked_offline += 1
+            status = DeviceStatus.OFFLINE.value
+
+        tally = tallies.setdefault(item['organizationId'], {'byStatus': {}, 'byType': {}})
+        tally['byStatus'][status] = tally['byStatus'].get(status, 0) + 1
+        if status != DeviceStatus.DELETED.value:
+            device_type = item['deviceType']
+            tally['byType'][device_type] = tally['byType'].get(device_type, 0) + 1
+
+    for organization_id in set(baselines) - set(tallies):
+        tallies[organization_id] = {'byStatus': {}, 'byType': {}}
+
+    for organization_id, tally in tallies.items():
+        stats_repository.reconcile_stats(
+            organization_id, tally['byStatus'], tally['byType'], baselines.get(organization_id, {})
+        )
+
+    logger.info(
+        f"Reconciled fleet stats for {len(tallies)} organizations, "
+        f"marked {marked_offline} devices offline"
+    )
+    return {'organizations': len(tallies), 'markedOffline': marked_offline}
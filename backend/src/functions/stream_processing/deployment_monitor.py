@@ -0,0 +1,59 @@
+"""Deployment Monitor Lambda Handler - Gate firmware rollouts on IoT job execution events"""
+import json
+from typing import Any, Dict
+
+from ...shared.middleware.logger import logger
+from ...domain.services.deployment_monitor import DeploymentMonitor
+from ...infrastructure.external.iot_core_provider import IoTCoreProvider
+from ...infrastructure.repositories.dynamodb_deployment_repository import DynamoDBDeploymentRepository
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_firmware_repository import DynamoDBFirmwareRepository
+
+_monitor = None
+
+
+def _get_monitor() -> DeploymentMonitor:
+    """Reuse the monitor and its clients across warm invocations"""
+    global _monitor
+    if _monitor is None:
+        _monitor = DeploymentMonitor(
+            deployment_repository=DynamoDBDeploymentRepository(),
+            firmware_repository=DynamoDBFirmwareRepository(),
+            device_repository=DynamoDBDeviceRepository(),
+            iot_provider=IoTCoreProvider()
+        )
+    return _monitor
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Process a batch of DeploymentEventsQueue messages, each a job execution
+    event forwarded by the IoT topic rule on $aws/events/jobExecution/#
+
+    Processing Steps:
+    1. Parse the events; keep terminal executions of deployment jobs
+    2. Count them per deployment batch, once per device, with one atomic
+       update of the batch counters
+    3. Check each updated batch against DEPLOYMENT_SUCCESS_THRESHOLD:
+       - unreachable: cancel the batch's jobs, fail batch and deployment
+       - met: create the jobs of the next batch, complete this one, and
+         complete the deployment after its last batch
+    4. Report the messages of batches that failed as batchItemFailures so
+       only they are retried
+
+    Malformed messages cannot succeed on retry and are dropped.
+    """
+    events: Dict[str, Dict] = {}
+    for record in event.get('Records', []):
+        try:
+            events[record['messageId']] = json.loads(record['body'])
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Dropping malformed job execution event {record.get('messageId')}: {str(e)}")
+
+    try:
+        failed = _get_monitor().process(events)
+    except Exception as e:
+        logger.error(f"Deployment monitoring failed: {str(e)}", exc_info=True)
+        failed = set(events)
+
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in sorted(failed)]}
@@ -4,6 +4,22 @@ import base64
 from typing import Dict, Any, List
 
 from ...shared.middleware.logger import logger
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from ...infrastructure.repositories.dynamodb_fleet_stats_repository import DynamoDBFleetStatsRepository
+from ...infrastructure.repositories.dynamodb_device_search_index import DynamoDBDeviceSearchIndex
+
+_device_repository = None
+
+
+def _get_device_repository() -> DynamoDBDeviceRepository:
+    """Reuse the repository (and its boto3 clients) across warm invocations"""
+    global _device_repository
+    if _device_repository is None:
+        _device_repository = DynamoDBDeviceRepository(
+            stats_repository=DynamoDBFleetStatsRepository(),
+            search_index=DynamoDBDeviceSearchIndex()
+        )
+    return _device_repository
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -41,9 +57,12 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 # In production:
                 # 1. Validate schema
                 # 2. Write to Timestream
-                # 3. Update DynamoDB device table
-                # 4. Detect anomalies
-                # 5. Trigger alerts if needed
+                # 3. Detect anomalies
+                # 4. Trigger alerts if needed
+
+                # Update last reading; marks the device online and counts
+                # the status transition in the fleet stats if it was not
+                _get_device_repository().update_last_reading(device_id, sensor_data)
 
                 logger.info(f"Processed telemetry for device: {device_id}")
 
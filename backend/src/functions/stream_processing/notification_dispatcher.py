@@ -0,0 +1,92 @@
+"""Notification Dispatcher Lambda Handler - Send alert notifications from the AlertQueue"""
+import json
+import time
+from typing import Any, Dict, Set
+
+from ...shared.middleware.logger import logger
+from ...domain.entities.alert import Alert
+from ...domain.services.notification_dispatch_service import NotificationDispatchService
+from ...infrastructure.external.dynamodb_rate_limiter import DynamoDBRateLimiter
+from ...infrastructure.external.fcm_push_provider import FCMPushProvider
+from ...infrastructure.external.ses_email_provider import SESEmailProvider
+from ...infrastructure.external.sqs_redelivery import SQSRedelivery
+from ...infrastructure.repositories.dynamodb_digest_repository import DynamoDBDigestRepository
+from ...infrastructure.repositories.dynamodb_user_repository import DynamoDBUserRepository
+
+# Time kept in hand after waiting for SES/FCM quota, to send and to back
+# off the messages that did not fit
+QUOTA_WAIT_MARGIN_SECONDS = 10
+
+_dispatch_service = None
+_redelivery = None
+
+
+def _get_dispatch_service() -> NotificationDispatchService:
+    """Reuse the service (clients, routing tables, rate limit leases) across warm invocations"""
+    global _dispatch_service
+    if _dispatch_service is None:
+        _dispatch_service = NotificationDispatchService(
+            user_repository=DynamoDBUserRepository(),
+            email_provider=SESEmailProvider(),
+            push_provider=FCMPushProvider(),
+            digest_repository=DynamoDBDigestRepository(),
+            rate_limiter=DynamoDBRateLimiter()
+        )
+    return _dispatch_service
+
+
+def _get_redelivery() -> SQSRedelivery:
+    """Reuse the SQS client across warm invocations"""
+    global _redelivery
+    if _redelivery is None:
+        _redelivery = SQSRedelivery()
+    return _redelivery
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Process a batch of AlertQueue messages (Alert.to_dict JSON bodies)
+
+    Processing Steps:
+    1. Parse every alert in the batch
+    2. Route the alerts with the cached routing table of each organization
+    3. Send one email per user and one FCM multicast per set of alerts,
+       email and push concurrently, paced by the shared SES/FCM rate
+       limits; non-critical alerts of users with a digest window are
+       buffered for flush_notification_digests instead
+    4. Report the messages with transient failures as batchItemFailures so
+       only they are retried
+    5. Back off the messages still held back by the rate limits when the
+       time runs out: their visibility is extended by a jittered delay,
+       or they are queued again before they could reach the DLQ
+
+    Malformed messages cannot succeed on retry and are dropped.
+    """
+    alerts: Dict[str, Alert] = {}
+    records = {record.get('messageId'): record for record in event.get('Records', [])}
+    for record in records.values():
+        try:
+            alerts[record['messageId']] = Alert.from_dict(json.loads(record['body']))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Dropping malformed alert message {record.get('messageId')}: {str(e)}")
+
+    failed: Set[str]
+    throttled: Set[str] = set()
+    try:
+        deadline = None
+        if context is not None:
+            remaining = context.get_remaining_time_in_millis() / 1000
+            deadline = time.time() + remaining - QUOTA_WAIT_MARGIN_SECONDS
+        failed, throttled = _get_dispatch_service().dispatch(alerts, deadline=deadline)
+    except Exception as e:
+        logger.error(f"Notification dispatch failed: {str(e)}", exc_info=True)
+        failed = set(alerts)
+
+    if throttled:
+        try:
+            failed |= _get_redelivery().defer([records[message_id] for message_id in throttled])
+        except Exception as e:
+            logger.error(f"Failed to defer throttled messages: {str(e)}", exc_info=True)
+            failed |= throttled
+
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in sorted(failed)]}
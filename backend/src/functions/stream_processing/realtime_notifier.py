@@ -0,0 +1,183 @@
+"""Realtime Notifier Lambda Handler - Push device changes to WebSocket subscribers"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...domain.services.update_conflator import UpdateConflator
+from ...infrastructure.external.websocket_broadcaster import WebSocketBroadcaster
+from ...infrastructure.repositories.dynamodb_codec import deserialize_item
+from ...infrastructure.repositories.dynamodb_connection_repository import DynamoDBConnectionRepository
+
+# Attributes pushed to subscribers; changes to anything else (name, tags,
+# ...) do not produce a message
+PUSHED_ATTRIBUTES = ('status', 'lastReading', 'lastSeen')
+# API Gateway rejects WebSocket messages over 128 KB
+MAX_FRAME_BYTES = 120 * 1024
+# Time kept in hand when waiting for rate-limited frames
+FLUSH_MARGIN_MILLIS = 3000
+
+_connection_repository = None
+_broadcaster = None
+_conflator = None
+
+
+def _get_connection_repository() -> DynamoDBConnectionRepository:
+    """Reuse the repository (and its boto3 client) across warm invocations"""
+    global _connection_repository
+    if _connection_repository is None:
+        _connection_repository = DynamoDBConnectionRepository()
+    return _connection_repository
+
+
+def _get_broadcaster() -> WebSocketBroadcaster:
+    """Reuse the broadcaster (its worker pool and clients) across warm invocations"""
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = WebSocketBroadcaster()
+    return _broadcaster
+
+
+def _get_conflator() -> UpdateConflator:
+    """Keep per-connection rate and delta state across warm invocations"""
+    global _conflator
+    if _conflator is None:
+        _conflator = UpdateConflator()
+    return _conflator
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Process the devices table DynamoDB Stream
+
+    Processing Steps:
+    1. Keep the newest image of each device in the batch
+    2. Look up each device's subscribers in the reverse subscription index
+    3. Conflate the updates per connection: one frame packs every changed
+       device, with only the metrics that changed since the last frame
+    4. Post the frames through one bounded pool of management API clients,
+       waiting for connections that are over WEBSOCKET_MAX_FRAMES_PER_SECOND
+    5. Drop connections that are gone (HTTP 410)
+    6. Report devices whose subscribers could not be resolved as failures
+
+    Work is proportional to the number of subscribers of the changed
+    devices, not to the number of open connections. Frames still pending
+    when the invocation runs short of time stay queued in the conflator and
+    go out with the next batch.
+    """
+    updates: Dict[str, Dict] = {}
+    first_sequence: Dict[str, str] = {}
+    for record in event.get('Records', []):
+        if record.get('eventName') == 'REMOVE':
+            continue
+        change = record['dynamodb']
+        new_image = deserialize_item(change.get('NewImage', {}))
+        device_id = new_image.get('deviceId')
+        if not device_id:
+            continue
+        old_image = deserialize_item(change['OldImage']) if 'OldImage' in change else {}
+        if old_image and all(old_image.get(a) == new_image.get(a) for a in PUSHED_ATTRIBUTES):
+            continue
+        # Records of one key arrive in order: the last image wins
+        updates[device_id] = new_image
+        first_sequence.setdefault(device_id, change['SequenceNumber'])
+
+    if not updates:
+        return {'batchItemFailures': []}
+
+    repository = _get_connection_repository()
+    device_ids = list(updates)
+    workers = max(1, min(settings.WEBSOCKET_POST_CONCURRENCY, len(device_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        subscribers = dict(zip(device_ids, pool.map(_find_subscribers, device_ids)))
+
+    failed_devices = [device_id for device_id, found in subscribers.items() if found is None]
+    conflator = _get_conflator()
+    for device_id, connection_ids in subscribers.items():
+        for connection_id in connection_ids or ():
+            conflator.offer(connection_id, _device_state(updates[device_id]))
+
+    frames, gone = _flush(conflator, repository, context)
+
+    logger.info(
+        f"Pushed {len(updates)} device updates as {frames} frames, "
+        f"pruned {gone} gone connections"
+    )
+
+    return {
+        'batchItemFailures': [
+            {'itemIdentifier': first_sequence[device_id]} for device_id in failed_devices
+        ]
+    }
+
+
+def _find_subscribers(device_id: str) -> Optional[List[str]]:
+    try:
+        return _get_connection_repository().find_subscribers(device_id)
+    except Exception as e:
+        logger.error(f"Failed to find subscribers of {device_id}: {str(e)}", exc_info=True)
+        return None
+
+
+def _flush(conflator: UpdateConflator, repository, context: Any) -> Tuple[int, int]:
+    """Post frames as connection windows open, until none are pending or time runs short"""
+    frames = gone = 0
+    while True:
+        messages = [
+            (connection_id, payload)
+            for connection_id, device_updates in conflator.drain()
+            for payload in _pack_frames(device_updates)
+        ]
+        result = _get_broadcaster().post(messages)
+        frames += len(messages)
+        gone += len(result['gone'])
+        for connection_id in result['gone']:
+            conflator.forget(connection_id)
+            try:
+                repository.delete(connection_id)
+            except Exception as e:
+                logger.warning(f"Failed to prune connection {connection_id}: {str(e)}")
+        # A lost frame would leave the client behind the delta state
+        for connection_id in result['failed']:
+            conflator.forget(connection_id)
+
+        due = conflator.next_due()
+        if due is None:
+            return frames, gone
+        wait = due - conflator.clock()
+        if context is not None and (
+            context.get_remaining_time_in_millis() - wait * 1000 < FLUSH_MARGIN_MILLIS
+        ):
+            return frames, gone
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _pack_frames(device_updates: List[Dict]) -> List[bytes]:
+    """Pack device updates into as few frames as fit the message size limit"""
+    frames = []
+    encoded = [json.dumps(update, default=str) for update in device_updates]
+    start = size = 0
+    for i, update in enumerate(encoded):
+        if i > start and size + len(update) > MAX_FRAME_BYTES:
+            frames.append(_frame(encoded[start:i]))
+            start, size = i, 0
+        size += len(update) + 1
+    frames.append(_frame(encoded[start:]))
+    return frames
+
+
+def _frame(encoded_updates: List[str]) -> bytes:
+    return ('{"type": "deviceUpdates", "updates": [' + ','.join(encoded_updates) + ']}').encode('utf-8')
+
+
+def _device_state(device: Dict) -> Dict:
+    return {
+        'deviceId': device['deviceId'],
+        'status': device.get('status'),
+        'lastReading': device.get('lastReading'),
+        'lastSeen': device.get('lastSeen'),
+        'updatedAt': device.get('updatedAt')
+    }
@@ -3,6 +3,19 @@ import json
 from typing import Dict, Any
 
 from ...shared.middleware.logger import logger
+from ...shared.middleware.auth import get_token_verifier
+from ...shared.exceptions.base import UnauthorizedError
+from ...infrastructure.repositories.dynamodb_connection_repository import DynamoDBConnectionRepository
+
+_connection_repository = None
+
+
+def _get_connection_repository() -> DynamoDBConnectionRepository:
+    """Reuse the repository (and its boto3 client) across warm invocations"""
+    global _connection_repository
+    if _connection_repository is None:
+        _connection_repository = DynamoDBConnectionRepository()
+    return _connection_repository
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -10,25 +23,23 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Handle WebSocket connection
 
     Processing Steps:
-    1. Validate JWT token from query string
-    2. Extract userId
+    1. Validate JWT token from query string (cached JWKS and verified tokens)
+    2. Extract userId and organizationId
     3. Store connection in DynamoDB
     4. Return success
+
+    Connections without an organization are kept but cannot subscribe.
     """
     try:
         connection_id = event.get('requestContext', {}).get('connectionId')
         query_params = event.get('queryStringParameters') or {}
-        token = query_params.get('token')
-
-        # In production:
-        # 1. Validate JWT token
-        # 2. Extract user ID from token
-        # 3. Store connection in DynamoDB
-        # connections_table.put_item({
-        #     'connectionId': connection_id,
-        #     'userId': user_id,
-        #     'timestamp': int(time.time() * 1000)
-        # })
+        claims = get_token_verifier().verify(query_params.get('token'))
+
+        _get_connection_repository().save(
+            connection_id,
+            user_id=claims['sub'],
+            organization_id=claims.get('custom:organizationId')
+        )
 
         logger.info(f"WebSocket connected: {connection_id}")
 
@@ -37,6 +48,13 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'message': 'Connected'})
         }
 
+    except UnauthorizedError as e:
+        logger.warning(f"WebSocket connection rejected: {e.message}")
+        return {
+            'statusCode': 401,
+            'body': json.dumps({'error': 'Unauthorized'})
+        }
+
     except Exception as e:
         logger.error(f"Connection error: {str(e)}", exc_info=True)
         return {
@@ -3,6 +3,17 @@ import json
 from typing import Dict, Any
 
 from ...shared.middleware.logger import logger
+from ...infrastructure.repositories.dynamodb_connection_repository import DynamoDBConnectionRepository
+
+_connection_repository = None
+
+
+def _get_connection_repository() -> DynamoDBConnectionRepository:
+    """Reuse the repository (and its boto3 client) across warm invocations"""
+    global _connection_repository
+    if _connection_repository is None:
+        _connection_repository = DynamoDBConnectionRepository()
+    return _connection_repository
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -11,14 +22,13 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     Processing Steps:
     1. Remove connection from DynamoDB
-    2. Clean up subscriptions
+    2. Clean up its entries in the subscription index
     3. Return success
     """
     try:
         connection_id = event.get('requestContext', {}).get('connectionId')
 
-        # In production:
-        # connections_table.delete_item(Key={'connectionId': connection_id})
+        _get_connection_repository().delete(connection_id)
 
         logger.info(f"WebSocket disconnected: {connection_id}")
 
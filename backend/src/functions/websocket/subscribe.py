@@ -2,7 +2,30 @@
 import json
 from typing import Dict, Any
 
+from ...shared.config.settings import settings
 from ...shared.middleware.logger import logger
+from ...shared.exceptions.base import UnauthorizedError, ValidationError
+from ...infrastructure.repositories.dynamodb_connection_repository import DynamoDBConnectionRepository
+from ...infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+
+_connection_repository = None
+_device_repository = None
+
+
+def _get_connection_repository() -> DynamoDBConnectionRepository:
+    """Reuse the repository (and its boto3 client) across warm invocations"""
+    global _connection_repository
+    if _connection_repository is None:
+        _connection_repository = DynamoDBConnectionRepository()
+    return _connection_repository
+
+
+def _get_device_repository() -> DynamoDBDeviceRepository:
+    """Reuse the repository (and its boto3 client) across warm invocations"""
+    global _device_repository
+    if _device_repository is None:
+        _device_repository = DynamoDBDeviceRepository()
+    return _device_repository
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -11,37 +34,68 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     Message format:
     {
-        "action": "subscribe",
+        "action": "subscribe" | "unsubscribe",
         "deviceIds": ["dev-abc123", "dev-def456"]
     }
+
+    Subscribed devices must belong to the connection's organization, and a
+    connection holds at most WEBSOCKET_MAX_SUBSCRIPTIONS subscriptions.
     """
     try:
         connection_id = event.get('requestContext', {}).get('connectionId')
-        body = json.loads(event.get('body', '{}'))
+        body = json.loads(event.get('body') or '{}')
+        action = body.get('action', 'subscribe')
         device_ids = body.get('deviceIds', [])
+        if not isinstance(device_ids, list) or not all(isinstance(d, str) for d in device_ids):
+            raise ValidationError("deviceIds must be a list of device IDs", field='deviceIds')
+        device_ids = list(dict.fromkeys(device_ids))
+
+        repository = _get_connection_repository()
+        connection = repository.find_by_id(connection_id)
+        if not connection or not connection.get('organizationId'):
+            raise UnauthorizedError("Connection is not authorized")
+
+        if action == 'unsubscribe':
+            subscribed = repository.unsubscribe(connection_id, device_ids)
+            logger.info(f"Unsubscribed {connection_id} from {len(device_ids)} devices")
+            return _response(200, {'message': 'Unsubscribed', 'deviceIds': subscribed})
+        if action != 'subscribe':
+            raise ValidationError(f"Unknown action: {action}", field='action')
 
-        # In production:
-        # 1. Validate user has access to devices
-        # 2. Update connection record with subscriptions
-        # connections_table.update_item(
-        #     Key={'connectionId': connection_id},
-        #     UpdateExpression='SET subscribedDevices = :devices',
-        #     ExpressionAttributeValues={':devices': device_ids}
-        # )
-
-        logger.info(f"Subscribed to devices: {device_ids}")
-
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'message': 'Subscribed',
-                'deviceIds': device_ids
-            })
+        new_ids = [d for d in device_ids if d not in connection['subscribedDevices']]
+        if len(connection['subscribedDevices']) + len(new_ids) > settings.WEBSOCKET_MAX_SUBSCRIPTIONS:
+            raise ValidationError(
+                f"At most {settings.WEBSOCKET_MAX_SUBSCRIPTIONS} subscriptions per connection",
+                field='deviceIds'
+            )
+        owned = {
+            device.device_id for device in _get_device_repository().find_by_ids(new_ids)
+            if device.organization_id == connection['organizationId']
         }
+        unknown = [d for d in new_ids if d not in owned]
+        if unknown:
+            raise ValidationError(f"Unknown devices: {', '.join(unknown[:10])}", field='deviceIds')
+
+        # Already subscribed devices are passed again: a retry after a
+        # failed reverse index write must still write their entries
+        subscribed = repository.subscribe(connection_id, device_ids)
+        logger.info(f"Subscribed {connection_id} to {len(new_ids)} new devices")
+
+        return _response(200, {'message': 'Subscribed', 'deviceIds': subscribed})
+
+    except (ValidationError, ValueError) as e:
+        message = getattr(e, 'message', str(e))
+        logger.warning(f"Validation error: {message}")
+        return _response(400, {'error': message})
+
+    except UnauthorizedError as e:
+        logger.warning(f"Unauthorized: {e.message}")
+        return _response(403, {'error': e.message})
 
     except Exception as e:
         logger.error(f"Subscribe error: {str(e)}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': 'Failed to subscribe'})
-        }
+        return _response(500, {'error': 'Failed to subscribe'})
+
+
+def _response(status_code: int, body: Dict) -> Dict[str, Any]:
+    return {'statusCode': status_code, 'body': json.dumps(body)}
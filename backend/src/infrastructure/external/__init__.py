@@ -0,0 +1,22 @@
+# External service implementations (driven adapters)
+from .iot_core_provider import IoTCoreProvider
+from .s3_multipart_writer import S3MultipartWriter
+from .websocket_broadcaster import WebSocketBroadcaster
+from .ses_email_provider import SESEmailProvider
+from .fcm_push_provider import FCMPushProvider
+from .dynamodb_rate_limiter import DynamoDBRateLimiter
+from .sqs_redelivery import SQSRedelivery
+from .s3_firmware_storage import S3FirmwareStorage
+from .bsdiff_delta_encoder import BsdiffDeltaEncoder
+
+__all__ = [
+    'IoTCoreProvider',
+    'S3MultipartWriter',
+    'WebSocketBroadcaster',
+    'SESEmailProvider',
+    'FCMPushProvider',
+    'DynamoDBRateLimiter',
+    'SQSRedelivery',
+    'S3FirmwareStorage',
+    'BsdiffDeltaEncoder'
+]
@@ -0,0 +1,24 @@
+"""bsdiff Delta Encoder - Adapter implementing IDeltaEncoder"""
+from ...domain.ports.external.i_delta_encoder import IDeltaEncoder
+
+
+class BsdiffDeltaEncoder(IDeltaEncoder):
+    """
+    BSDIFF40 patches, applied on devices with any bspatch implementation
+
+    Requires bsdiff4. bsdiff holds both images and a suffix array of the
+    source in memory, roughly 10x the image size.
+    """
+
+    format = 'bsdiff4'
+
+    def __init__(self):
+        try:
+            import bsdiff4
+        except ImportError:
+            raise ValueError("Delta firmware requires bsdiff4")
+        self._bsdiff4 = bsdiff4
+
+    def diff(self, source: bytes, target: bytes) -> bytes:
+        """Patch that turns source into target"""
+        return self._bsdiff4.diff(source, target)
@@ -0,0 +1,109 @@
+"""DynamoDB Rate Limiter - Adapter implementing IRateLimiter"""
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.ports.external.i_rate_limiter import IRateLimiter
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError
+
+# Tokens a container takes at once, in seconds of refill; unused lease
+# tokens are forfeited when the lease expires
+LEASE_SECONDS = 1.0
+MAX_ATTEMPTS = 5
+# Idle buckets (mostly per-recipient ones) expire through the table TTL
+BUCKET_TTL_SECONDS = 24 * 60 * 60
+
+
+class DynamoDBRateLimiter(IRateLimiter):
+    """
+    Token buckets in RATE_LIMITS_TABLE, shared by all containers
+
+    Each bucket is one item {bucketId, tokens, updatedAt, version}. Taking
+    tokens refills the bucket for the elapsed time, then writes the
+    remainder back with the next version, conditioned on the version being
+    unchanged (optimistic locking, retried on conflict). updatedAt cannot
+    serve as the lock: it is kept when the writer's clock lags behind it,
+    so two such writers would both succeed.
+
+    To keep the table off the hot path, a container takes a lease of up
+    to LEASE_SECONDS worth of refill and serves later requests from it
+    until it runs out or expires, so a busy channel costs one read and one
+    write per lease instead of per notification.
+    """
+
+    def __init__(
+        self,
+        table_name: Optional[str] = None,
+        client=None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.table_name = table_name or settings.RATE_LIMITS_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+        self.clock = clock
+        # bucket -> [tokens, expires at]
+        self._leases: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, bucket: str, count: int, rate: float, burst: float) -> int:
+        """Take up to count tokens from a bucket, without waiting"""
+        if count <= 0:
+            return 0
+        with self._lock:
+            now = self.clock()
+            lease = self._leases.get(bucket)
+            local = lease[0] if lease and lease[1] > now else 0.0
+            if local < count:
+                wanted = min(burst, max(count - local, rate * LEASE_SECONDS))
+                local += self._take(bucket, wanted, rate, burst, now)
+            granted = min(count, int(local))
+            self._leases[bucket] = [local - granted, now + LEASE_SECONDS]
+            return granted
+
+    def _take(self, bucket: str, wanted: float, rate: float, burst: float, now: float) -> int:
+        key = {'bucketId': {'S': bucket}}
+        for _ in range(MAX_ATTEMPTS):
+            try:
+                item = self.client.get_item(TableName=self.table_name, Key=key, ConsistentRead=True).get('Item')
+            except ClientError as e:
+                raise DatabaseError(f"Failed to read rate limit {bucket}: {e}")
+            if item:
+                updated_at = float(item['updatedAt']['N'])
+                version = int(item['version']['N']) if 'version' in item else 0
+                # Clocks of different containers may disagree slightly
+                elapsed = max(0.0, now - updated_at)
+                available = min(burst, float(item['tokens']['N']) + elapsed * rate)
+            else:
+                updated_at = None
+                version = 0
+                available = burst
+            granted = min(int(math.floor(wanted)), int(math.floor(available)))
+            if granted <= 0:
+                return 0
+
+            request = {
+                'TableName': self.table_name,
+                'Item': {
+                    **key,
+                    'tokens': {'N': repr(available - granted)},
+                    'updatedAt': {'N': repr(max(now, updated_at or now))},
+                    'version': {'N': str(version + 1)},
+                    'expiresAt': {'N': str(int(now) + BUCKET_TTL_SECONDS)}
+                }
+            }
+            # Version 0: no bucket yet, or one without a version attribute
+            request['ConditionExpression'] = 'attribute_not_exists(#v) OR #v = :seen'
+            request['ExpressionAttributeNames'] = {'#v': 'version'}
+            request['ExpressionAttributeValues'] = {':seen': {'N': str(version)}}
+            try:
+                self.client.put_item(**request)
+                return granted
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise DatabaseError(f"Failed to update rate limit {bucket}: {e}")
+        # Contended by other containers; behave as if the bucket were empty
+        return 0
@@ -0,0 +1,93 @@
+"""Firebase Cloud Messaging Push Provider - Adapter implementing IPushProvider"""
+import json
+import threading
+from typing import Dict, List, Optional
+
+import boto3
+import firebase_admin
+from firebase_admin import credentials, exceptions, messaging
+
+from ...domain.ports.external.i_push_provider import IPushProvider
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import ExternalServiceError
+from ...shared.middleware.logger import logger
+
+FCM_MULTICAST_MAX_TOKENS = 500  # send_each_for_multicast hard limit
+# Errors meaning the token will never work again
+INVALID_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
+
+class FCMPushProvider(IPushProvider):
+    """
+    Sends push notifications with FCM multicast, 500 tokens per call
+
+    The Firebase app is initialised on first use from the service account
+    JSON stored in Secrets Manager (FCM_CREDENTIALS_SECRET) and reused for
+    the life of the container.
+    """
+
+    _app_lock = threading.Lock()
+
+    def __init__(self, app: Optional[firebase_admin.App] = None, secret_id: Optional[str] = None):
+        self._app = app
+        self.secret_id = secret_id or settings.FCM_CREDENTIALS_SECRET
+
+    def send_multicast(self, tokens: List[str], message: Dict) -> List[str]:
+        """Send the same notification to many tokens, returns a status per token"""
+        statuses = []
+        for start in range(0, len(tokens), FCM_MULTICAST_MAX_TOKENS):
+            statuses.extend(self._send_chunk(tokens[start:start + FCM_MULTICAST_MAX_TOKENS], message))
+        return statuses
+
+    def _send_chunk(self, tokens: List[str], message: Dict) -> List[str]:
+        multicast = messaging.MulticastMessage(
+            tokens=tokens,
+            notification=messaging.Notification(title=message['title'], body=message['body']),
+            data=message.get('data') or {},
+            android=messaging.AndroidConfig(
+                priority='high',
+                notification=messaging.AndroidNotification(channel_id='alerts', sound='default')
+            ),
+            apns=messaging.APNSConfig(
+                headers={'apns-priority': '10'},
+                payload=messaging.APNSPayload(aps=messaging.Aps(sound='default'))
+            )
+        )
+        try:
+            batch = messaging.send_each_for_multicast(multicast, app=self._get_app())
+        except (exceptions.FirebaseError, ValueError) as e:
+            logger.warning(f"FCM multicast failed for {len(tokens)} tokens: {e}")
+            throttled = isinstance(e, messaging.QuotaExceededError)
+            return ['throttled' if throttled else 'failed'] * len(tokens)
+
+        statuses = []
+        for response in batch.responses:
+            if response.success:
+                statuses.append('sent')
+            elif isinstance(response.exception, INVALID_TOKEN_ERRORS):
+                statuses.append('invalid')
+            elif isinstance(response.exception, messaging.QuotaExceededError):
+                statuses.append('throttled')
+            else:
+                statuses.append('failed')
+        return statuses
+
+    def _get_app(self) -> firebase_admin.App:
+        with self._app_lock:
+            if self._app is None:
+                self._app = self._initialize_app()
+        return self._app
+
+    def _initialize_app(self) -> firebase_admin.App:
+        try:
+            return firebase_admin.get_app('fcm')
+        except ValueError:
+            pass
+        try:
+            secret = boto3.client('secretsmanager', region_name=settings.REGION).get_secret_value(
+                SecretId=self.secret_id
+            )
+        except Exception as e:
+            raise ExternalServiceError('Secrets Manager', f"Failed to read FCM credentials: {e}")
+        certificate = credentials.Certificate(json.loads(secret['SecretString']))
+        return firebase_admin.initialize_app(certificate, name='fcm')
@@ -0,0 +1,190 @@
+"""AWS IoT Core Provider - Adapter implementing IIoTProvider"""
+import json
+import time
+from typing import Dict, List, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from ...domain.entities.device import Device
+from ...domain.ports.external.i_iot_provider import IIoTProvider
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import ExternalServiceError
+from ...shared.middleware.logger import logger
+
+# Control-plane APIs such as CreateThing are throttled at low TPS; adaptive
+# retry mode adds client-side rate limiting on top of exponential backoff.
+IOT_CLIENT_CONFIG = Config(retries={'max_attempts': 10, 'mode': 'adaptive'})
+# Lifetime of the S3 URLs substituted into job documents; devices fetch
+# the document when their execution starts
+PRESIGNED_URL_EXPIRY_SECONDS = 3600
+# Detaching a certificate from its thing propagates asynchronously
+CERTIFICATE_DELETE_ATTEMPTS = 3
+
+
+class IoTCoreProvider(IIoTProvider):
+    """IoT provider backed by AWS IoT Core"""
+
+    def __init__(
+        self,
+        client=None,
+        policy_name: Optional[str] = None,
+        account_id: Optional[str] = None,
+        jobs_role_arn: Optional[str] = None
+    ):
+        self.client = client or boto3.client(
+            'iot', region_name=settings.REGION, config=IOT_CLIENT_CONFIG
+        )
+        self.policy_name = settings.IOT_DEVICE_POLICY if policy_name is None else policy_name
+        self.account_id = account_id or settings.AWS_ACCOUNT_ID
+        self.jobs_role_arn = settings.IOT_JOBS_ROLE_ARN if jobs_role_arn is None else jobs_role_arn
+
+    def create_thing(self, device: Device) -> str:
+        """Create the IoT thing for a device, returns the thing ARN"""
+        try:
+            response = self.client.create_thing(
+                thingName=device.device_id,
+                attributePayload={
+                    'attributes': {
+                        'organizationId': device.organization_id,
+                        'deviceType': device.device_type
+                    }
+                }
+            )
+        except ClientError as e:
+            raise ExternalServiceError('IoT Core', f"CreateThing failed for {device.device_id}: {e}")
+        return response['thingArn']
+
+    def create_certificates(self, device: Device, replace_existing: bool = False) -> Dict:
+        """
+        Create an active certificate and attach it to the device's thing
+
+        With replace_existing, certificates already attached to the thing
+        (by an interrupted earlier attempt) are revoked first.
+        """
+        try:
+            if replace_existing:
+                self._revoke_certificates(device.device_id)
+            certificate = self.client.create_keys_and_certificate(setAsActive=True)
+            self.client.attach_thing_principal(
+                thingName=device.device_id,
+                principal=certificate['certificateArn']
+            )
+            if self.policy_name:
+                self.client.attach_policy(
+                    policyName=self.policy_name,
+                    target=certificate['certificateArn']
+                )
+        except ClientError as e:
+            raise ExternalServiceError(
+                'IoT Core', f"Certificate provisioning failed for {device.device_id}: {e}"
+            )
+        return {
+            'certificateArn': certificate['certificateArn'],
+            'certificatePem': certificate['certificatePem'],
+            'privateKey': certificate['keyPair']['PrivateKey']
+        }
+
+    def delete_thing(self, device_id: str) -> bool:
+        """Delete the IoT thing of a device, revoking its certificates first"""
+        try:
+            self._revoke_certificates(device_id)
+            self.client.delete_thing(thingName=device_id)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                return False
+            raise ExternalServiceError('IoT Core', f"DeleteThing failed for {device_id}: {e}")
+        return True
+
+    def _revoke_certificates(self, device_id: str):
+        """
+        Detach the thing's certificates, deactivate and delete them
+
+        Deactivation comes first and is what matters: a certificate that
+        cannot be deleted yet (detaching propagates asynchronously) stays
+        INACTIVE and can no longer connect.
+        """
+        try:
+            principals = self.client.list_thing_principals(thingName=device_id)['principals']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                return
+            raise
+        for principal in principals:
+            self.client.detach_thing_principal(thingName=device_id, principal=principal)
+            if ':cert/' not in principal:
+                continue
+            certificate_id = principal.rsplit('/', 1)[1]
+            self.client.update_certificate(certificateId=certificate_id, newStatus='INACTIVE')
+            if self.policy_name:
+                try:
+                    self.client.detach_policy(policyName=self.policy_name, target=principal)
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ResourceNotFoundException':
+                        raise
+            for attempt in range(CERTIFICATE_DELETE_ATTEMPTS):
+                if attempt:
+                    time.sleep(attempt)
+                try:
+                    # forceDelete also detaches any other policy
+                    self.client.delete_certificate(certificateId=certificate_id, forceDelete=True)
+                    break
+                except ClientError as e:
+                    if e.response['Error']['Code'] not in ('DeleteConflictException', 'CertificateStateException'):
+                        raise
+            else:
+                logger.warning(f"Certificate {certificate_id} of {device_id} left inactive, not deleted")
+
+    def create_job(
+        self,
+        job_id: str,
+        device_ids: List[str],
+        document: Dict,
+        timeout_minutes: Optional[int] = None
+    ) -> bool:
+        """
+        Create a snapshot job running document on the things of device_ids
+
+        ${aws:iot:s3-presigned-url:...} placeholders in the document are
+        signed with IOT_JOBS_ROLE_ARN when the device fetches it.
+        """
+        request = {
+            'jobId': job_id,
+            'targets': [self._thing_arn(device_id) for device_id in device_ids],
+            'document': json.dumps(document),
+            'targetSelection': 'SNAPSHOT'
+        }
+        if self.jobs_role_arn:
+            request['presignedUrlConfig'] = {
+                'roleArn': self.jobs_role_arn,
+                'expiresInSec': PRESIGNED_URL_EXPIRY_SECONDS
+            }
+        if timeout_minutes:
+            request['timeoutConfig'] = {'inProgressTimeoutInMinutes': timeout_minutes}
+        try:
+            self.client.create_job(**request)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceAlreadyExistsException':
+                return False
+            raise ExternalServiceError('IoT Core', f"CreateJob failed for {job_id}: {e}")
+        return True
+
+    def cancel_job(self, job_id: str) -> bool:
+        """Cancel the executions of a job that have not started; False if the job does not exist"""
+        try:
+            self.client.cancel_job(jobId=job_id, reasonCode='DEPLOYMENT_HALTED', force=False)
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code == 'ResourceNotFoundException':
+                return False
+            # Already completed or canceled
+            if code == 'InvalidRequestException':
+                return True
+            raise ExternalServiceError('IoT Core', f"CancelJob failed for {job_id}: {e}")
+        return True
+
+    def _thing_arn(self, device_id: str) -> str:
+        if not self.account_id:
+            self.account_id = boto3.client('sts', region_name=settings.REGION).get_caller_identity()['Account']
+        return f"arn:aws:iot:{settings.REGION}:{self.account_id}:thing/{device_id}"
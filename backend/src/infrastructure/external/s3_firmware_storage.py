@@ -0,0 +1,85 @@
+"""S3 Firmware Storage - Adapter implementing IFirmwareStorage"""
+import hashlib
+from typing import Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.ports.external.i_firmware_storage import IFirmwareStorage
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import ExternalServiceError
+from ...shared.middleware.logger import logger
+from .s3_multipart_writer import S3MultipartWriter
+
+# Bytes read from the upload at a time
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class S3FirmwareStorage(IFirmwareStorage):
+    """
+    Firmware images and patches in FIRMWARE_BUCKET
+
+    ingest() streams the upload through SHA-256 into a multipart upload
+    whose parts are sent concurrently, so an image is read once and memory
+    stays at about (concurrency + 1) parts whatever its size.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        client=None,
+        part_size: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ):
+        self.bucket = bucket or settings.FIRMWARE_BUCKET
+        self.client = client or boto3.client('s3', region_name=settings.REGION)
+        self.part_size = part_size or settings.FIRMWARE_PART_SIZE_BYTES
+        self.concurrency = concurrency or settings.FIRMWARE_UPLOAD_CONCURRENCY
+
+    def read(self, key: str) -> bytes:
+        """Read an object"""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"GetObject failed for {key}: {e}")
+
+    def write(self, key: str, data: bytes) -> None:
+        """Write an object, replacing any previous one"""
+        try:
+            self.client.put_object(
+                Bucket=self.bucket, Key=key, Body=data, ContentType='application/octet-stream'
+            )
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"PutObject failed for {key}: {e}")
+
+    def ingest(self, source_key: str, key: str, expected_checksum: str) -> Tuple[int, str]:
+        """Copy an uploaded object to key, hashing it on the way"""
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=source_key)['Body']
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"GetObject failed for {source_key}: {e}")
+
+        digest = hashlib.sha256()
+        size = 0
+        writer = S3MultipartWriter(
+            self.client, self.bucket, key, part_size=self.part_size, max_concurrency=self.concurrency
+        )
+        try:
+            for chunk in body.iter_chunks(READ_CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+                writer.write(chunk)
+            checksum = digest.hexdigest()
+            if checksum == expected_checksum.lower():
+                writer.complete()
+            else:
+                writer.abort()
+        except Exception:
+            try:
+                writer.abort()
+            except ExternalServiceError as e:
+                logger.warning(f"Failed to abort upload of {key}: {str(e)}")
+            raise
+        finally:
+            body.close()
+        return size, checksum
@@ -0,0 +1,184 @@
+"""S3 Multipart Writer - Streams bytes to an S3 object part by part"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from ...shared.exceptions.base import ExternalServiceError
+
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for every part but the last
+
+
+class S3MultipartWriter:
+    """
+    Write-only file object backed by an S3 multipart upload
+
+    Bytes are buffered until `part_size` is reached and then uploaded as
+    one part, so memory stays bounded by roughly one part whatever the
+    object size. With max_concurrency > 1 full parts are uploaded on a
+    thread pool while writing continues; at most max_concurrency parts
+    are in flight, so memory stays bounded by max_concurrency + 1 parts.
+
+    For resumable writes, call `upload_buffered()` at a point the producer
+    can restart from and save `state()` together with that position. A
+    writer created with the saved `resume_state` continues after the
+    recorded parts; parts uploaded after the checkpoint are overwritten
+    with the same part numbers.
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        part_size: int = 8 * 1024 * 1024,
+        content_type: str = 'application/octet-stream',
+        resume_state: Optional[Dict] = None,
+        max_concurrency: int = 1
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.max_concurrency = max(1, max_concurrency)
+        self._buffer = bytearray()
+        # Parts in flight, in part number order, with their sizes
+        self._pending: List[Tuple[Future, int]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.closed = False
+
+        if resume_state:
+            self.upload_id = resume_state['uploadId']
+            self.parts: List[Dict] = list(resume_state['parts'])
+            self._uploaded_bytes = resume_state['bytesUploaded']
+            return
+
+        try:
+            response = self.client.create_multipart_upload(
+                Bucket=bucket, Key=key, ContentType=content_type
+            )
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"CreateMultipartUpload failed for {key}: {e}")
+        self.upload_id = response['UploadId']
+        self.parts = []
+        self._uploaded_bytes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+        return len(data)
+
+    def tell(self) -> int:
+        return self._uploaded_bytes + sum(size for _, size in self._pending) + len(self._buffer)
+
+    def flush(self):
+        """Parts are uploaded as they fill; nothing to do before that"""
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._buffer)
+
+    def upload_buffered(self) -> bool:
+        """Upload the buffer now if it is large enough to be a part"""
+        if len(self._buffer) < MIN_PART_SIZE:
+            return False
+        self._upload_part()
+        return True
+
+    def state(self) -> Dict:
+        """Resumable state covering the uploaded parts only"""
+        self._wait_pending()
+        return {
+            'uploadId': self.upload_id,
+            'parts': list(self.parts),
+            'bytesUploaded': self._uploaded_bytes
+        }
+
+    def complete(self):
+        """Upload the remaining bytes as the last part and assemble the object"""
+        if self.closed:
+            return
+        if self._buffer or not (self.parts or self._pending):
+            self._upload_part()
+        self._wait_pending()
+        self._shutdown()
+        try:
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={'Parts': self.parts}
+            )
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"CompleteMultipartUpload failed for {self.key}: {e}")
+        self.closed = True
+
+    def abort(self):
+        """Discard the upload and its parts"""
+        self.closed = True
+        self._buffer = bytearray()
+        # Parts still uploading would outlive the abort
+        for future, _ in self._pending:
+            future.exception()
+        self._pending = []
+        self._shutdown()
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"AbortMultipartUpload failed for {self.key}: {e}")
+
+    def close(self):
+        """Closing leaves the upload open; call complete() or abort()"""
+
+    def _upload_part(self):
+        if self.max_concurrency > 1:
+            self._submit_part()
+            return
+        part, size = self._send_part(len(self.parts) + 1, bytes(self._buffer))
+        self.parts.append(part)
+        self._uploaded_bytes += size
+        self._buffer = bytearray()
+
+    def _submit_part(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        while len(self._pending) >= self.max_concurrency:
+            self._wait_oldest()
+        part_number = len(self.parts) + len(self._pending) + 1
+        body = bytes(self._buffer)
+        self._buffer = bytearray()
+        self._pending.append((self._executor.submit(self._send_part, part_number, body), len(body)))
+
+    def _wait_oldest(self):
+        future, _ = self._pending.pop(0)
+        part, size = future.result()
+        self.parts.append(part)
+        self._uploaded_bytes += size
+
+    def _wait_pending(self):
+        while self._pending:
+            self._wait_oldest()
+
+    def _shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _send_part(self, part_number: int, body: bytes) -> Tuple[Dict, int]:
+        try:
+            response = self.client.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"UploadPart {part_number} failed for {self.key}: {e}")
+        return {'PartNumber': part_number, 'ETag': response['ETag']}, len(body)
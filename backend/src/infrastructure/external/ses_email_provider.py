@@ -0,0 +1,77 @@
+"""Amazon SES Email Provider - Adapter implementing IEmailProvider"""
+import json
+from typing import Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.ports.external.i_email_provider import IEmailProvider
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+
+SES_BULK_MAX_DESTINATIONS = 50  # SendBulkTemplatedEmail hard limit
+# Per-destination statuses that will not succeed on retry
+PERMANENT_STATUSES = {'MessageRejected', 'InvalidParameterValue'}
+# Sending rate exceeded; call-level error codes and per-destination statuses
+THROTTLING_ERRORS = {'Throttling', 'ThrottlingException', 'AccountThrottled'}
+
+
+class SESEmailProvider(IEmailProvider):
+    """
+    Sends templated email with SendBulkTemplatedEmail, 50 destinations
+    per call, each with its own template data
+    """
+
+    def __init__(
+        self,
+        client=None,
+        sender: Optional[str] = None,
+        configuration_set: Optional[str] = None
+    ):
+        self.client = client or boto3.client('ses', region_name=settings.REGION)
+        self.sender = sender or settings.SES_SENDER_EMAIL
+        self.configuration_set = (
+            settings.SES_CONFIGURATION_SET if configuration_set is None else configuration_set
+        )
+
+    def send_templated_bulk(self, template: str, destinations: List[Dict]) -> List[str]:
+        """Send one templated email per destination, returns a status per destination"""
+        statuses = []
+        for start in range(0, len(destinations), SES_BULK_MAX_DESTINATIONS):
+            statuses.extend(self._send_chunk(template, destinations[start:start + SES_BULK_MAX_DESTINATIONS]))
+        return statuses
+
+    def _send_chunk(self, template: str, destinations: List[Dict]) -> List[str]:
+        request = {
+            'Source': self.sender,
+            'Template': template,
+            'DefaultTemplateData': '{}',
+            'Destinations': [
+                {
+                    'Destination': {'ToAddresses': [destination['email']]},
+                    'ReplacementTemplateData': json.dumps(destination['data'], default=str)
+                }
+                for destination in destinations
+            ]
+        }
+        if self.configuration_set:
+            request['ConfigurationSetName'] = self.configuration_set
+        try:
+            response = self.client.send_bulk_templated_email(**request)
+        except ClientError as e:
+            logger.warning(f"SendBulkTemplatedEmail failed for {len(destinations)} destinations: {e}")
+            throttled = e.response['Error']['Code'] in THROTTLING_ERRORS
+            return ['throttled' if throttled else 'failed'] * len(destinations)
+
+        statuses = []
+        for result in response['Status']:
+            status = result['Status']
+            if status == 'Success':
+                statuses.append('sent')
+            elif status in PERMANENT_STATUSES:
+                statuses.append('invalid')
+            elif status in THROTTLING_ERRORS:
+                statuses.append('throttled')
+            else:
+                statuses.append('failed')
+        return statuses
@@ -0,0 +1,116 @@
+"""SQS Redelivery - Delay throttled messages instead of failing them"""
+import random
+from typing import Dict, List, Optional, Set
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+
+SQS_BATCH_SIZE = 10  # ChangeMessageVisibilityBatch / SendMessageBatch hard limit
+SQS_MAX_DELAY_SECONDS = 900  # SendMessage DelaySeconds limit
+
+
+class SQSRedelivery:
+    """
+    Backs off SQS messages that were throttled by a rate limit
+
+    Throttled messages are reported as batch item failures with their
+    visibility extended to a jittered, exponentially growing delay, so the
+    event source mapping retries them later instead of at once. Each of
+    these receives counts toward the queue's maxReceiveCount, so on the
+    last receive before the dead-letter queue a message is sent again as a
+    new, delayed message and the original is deleted. Throttling alone
+    never moves a message to the DLQ.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        max_receives: Optional[int] = None,
+        base_delay_seconds: Optional[int] = None
+    ):
+        self.client = client or boto3.client('sqs', region_name=settings.REGION)
+        self.max_receives = max_receives or settings.ALERT_QUEUE_MAX_RECEIVES
+        self.base_delay_seconds = base_delay_seconds or settings.THROTTLE_BASE_DELAY_SECONDS
+
+    def defer(self, records: List[Dict]) -> Set[str]:
+        """
+        Delay the redelivery of SQS event records
+
+        Returns:
+            Message IDs to report as batch item failures; the others were
+            sent again and can be deleted
+        """
+        extend: Dict[str, List[Dict]] = {}
+        resend: Dict[str, List[Dict]] = {}
+        for record in records:
+            receives = int(record.get('attributes', {}).get('ApproximateReceiveCount', 1))
+            target = resend if receives >= self.max_receives - 1 else extend
+            target.setdefault(_queue_url(record['eventSourceARN']), []).append(record)
+
+        failures = set()
+        for queue_url, queue_records in extend.items():
+            for start in range(0, len(queue_records), SQS_BATCH_SIZE):
+                self._extend_visibility(queue_url, queue_records[start:start + SQS_BATCH_SIZE])
+            failures.update(record['messageId'] for record in queue_records)
+        for queue_url, queue_records in resend.items():
+            for start in range(0, len(queue_records), SQS_BATCH_SIZE):
+                failures.update(self._resend(queue_url, queue_records[start:start + SQS_BATCH_SIZE]))
+        return failures
+
+    def _delay(self, receives: int) -> int:
+        # Jitter spreads throttled messages over the upper half of the
+        # window so they do not come back as one burst
+        ceiling = min(SQS_MAX_DELAY_SECONDS, self.base_delay_seconds * 2 ** max(0, receives - 1))
+        return max(1, int(random.uniform(ceiling / 2, ceiling)))
+
+    def _extend_visibility(self, queue_url: str, records: List[Dict]):
+        entries = [
+            {
+                'Id': str(index),
+                'ReceiptHandle': record['receiptHandle'],
+                'VisibilityTimeout': self._delay(
+                    int(record.get('attributes', {}).get('ApproximateReceiveCount', 1))
+                )
+            }
+            for index, record in enumerate(records)
+        ]
+        try:
+            response = self.client.change_message_visibility_batch(QueueUrl=queue_url, Entries=entries)
+        except ClientError as e:
+            # The messages still come back after the queue's visibility timeout
+            logger.warning(f"Failed to extend visibility of {len(records)} messages: {e}")
+            return
+        if response.get('Failed'):
+            logger.warning(f"Failed to extend visibility of {len(response['Failed'])} messages")
+
+    def _resend(self, queue_url: str, records: List[Dict]) -> Set[str]:
+        entries = [
+            {
+                'Id': str(index),
+                'MessageBody': record['body'],
+                'DelaySeconds': self._delay(self.max_receives),
+                'MessageAttributes': {
+                    name: {'DataType': attribute['dataType'], 'StringValue': attribute['stringValue']}
+                    for name, attribute in (record.get('messageAttributes') or {}).items()
+                    if attribute.get('stringValue') is not None
+                }
+            }
+            for index, record in enumerate(records)
+        ]
+        try:
+            response = self.client.send_message_batch(QueueUrl=queue_url, Entries=entries)
+        except ClientError as e:
+            logger.warning(f"Failed to send {len(records)} throttled messages again: {e}")
+            return {record['messageId'] for record in records}
+        failed = {int(failure['Id']) for failure in response.get('Failed', [])}
+        logger.info(f"Sent {len(records) - len(failed)} throttled messages again")
+        return {records[index]['messageId'] for index in failed}
+
+
+def _queue_url(queue_arn: str) -> str:
+    """arn:aws:sqs:<region>:<account>:<name> -> queue URL"""
+    _, _, _, region, account, name = queue_arn.split(':', 5)
+    return f"https://sqs.{region}.amazonaws.com/{account}/{name}"
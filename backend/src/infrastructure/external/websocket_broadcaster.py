@@ -0,0 +1,96 @@
+"""API Gateway WebSocket Broadcaster - Adapter implementing IRealtimeBroadcaster"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from ...domain.ports.external.i_realtime_broadcaster import IRealtimeBroadcaster
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+
+# One PostToConnection in flight per client; retries stay short so a slow
+# connection does not hold a worker
+MANAGEMENT_CLIENT_CONFIG = Config(
+    max_pool_connections=1,
+    retries={'max_attempts': 2, 'mode': 'standard'},
+    connect_timeout=2,
+    read_timeout=5
+)
+
+
+class WebSocketBroadcaster(IRealtimeBroadcaster):
+    """
+    Posts messages through the API Gateway management API in parallel
+
+    A bounded pool of `concurrency` workers each owns one management API
+    client (created lazily per worker thread), so at most `concurrency`
+    clients and HTTP connections exist however large the fan-out.
+    GoneException (HTTP 410) marks connections that closed without a
+    $disconnect; they are reported so the caller can prune them.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        client_factory: Optional[Callable[[], object]] = None
+    ):
+        self.endpoint_url = endpoint_url or settings.WEBSOCKET_API_ENDPOINT
+        self.concurrency = concurrency or settings.WEBSOCKET_POST_CONCURRENCY
+        self._client_factory = client_factory or self._create_client
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix='ws-post'
+        )
+
+    def post(self, messages: List[Tuple[str, bytes]]) -> Dict[str, List[str]]:
+        """Post (connectionId, payload) messages, preserving order per connection"""
+        result: Dict[str, List[str]] = {'sent': [], 'gone': [], 'failed': []}
+        if not messages:
+            return result
+        by_connection: Dict[str, List[bytes]] = {}
+        for connection_id, payload in messages:
+            by_connection.setdefault(connection_id, []).append(payload)
+
+        for connection_id, outcome in zip(
+            by_connection,
+            self._pool.map(self._post_all, by_connection.items())
+        ):
+            result[outcome].append(connection_id)
+        if result['gone'] or result['failed']:
+            logger.info(
+                f"Posted to {len(result['sent'])} connections, "
+                f"{len(result['gone'])} gone, {len(result['failed'])} failed"
+            )
+        return result
+
+    def _post_all(self, entry: Tuple[str, List[bytes]]) -> str:
+        """Post one connection's payloads in order; stops at the first failure"""
+        connection_id, payloads = entry
+        client = self._client()
+        for payload in payloads:
+            try:
+                client.post_to_connection(ConnectionId=connection_id, Data=payload)
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'GoneException':
+                    return 'gone'
+                logger.warning(f"PostToConnection failed for {connection_id}: {e}")
+                return 'failed'
+        return 'sent'
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._client_factory()
+        return client
+
+    def _create_client(self):
+        return boto3.client(
+            'apigatewaymanagementapi',
+            endpoint_url=self.endpoint_url,
+            region_name=settings.REGION,
+            config=MANAGEMENT_CLIENT_CONFIG
+        )
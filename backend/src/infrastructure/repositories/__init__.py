@@ -0,0 +1,28 @@
+# Repository implementations (driven adapters)
+from .dynamodb_device_repository import DynamoDBDeviceRepository
+from .dynamodb_fleet_stats_repository import DynamoDBFleetStatsRepository
+from .dynamodb_device_search_index import DynamoDBDeviceSearchIndex
+from .timestream_repository import TimestreamRepository
+from .cached_timeseries_repository import CachedTimeSeriesRepository
+from .mmap_timeseries_repository import MmapTimeSeriesRepository
+from .s3_archive_repository import S3ArchiveRepository
+from .dynamodb_connection_repository import DynamoDBConnectionRepository
+from .dynamodb_user_repository import DynamoDBUserRepository
+from .dynamodb_digest_repository import DynamoDBDigestRepository
+from .dynamodb_deployment_repository import DynamoDBDeploymentRepository
+from .dynamodb_firmware_repository import DynamoDBFirmwareRepository
+
+__all__ = [
+    'DynamoDBDeviceRepository',
+    'DynamoDBFleetStatsRepository',
+    'DynamoDBDeviceSearchIndex',
+    'TimestreamRepository',
+    'CachedTimeSeriesRepository',
+    'MmapTimeSeriesRepository',
+    'S3ArchiveRepository',
+    'DynamoDBConnectionRepository',
+    'DynamoDBUserRepository',
+    'DynamoDBDigestRepository',
+    'DynamoDBDeploymentRepository',
+    'DynamoDBFirmwareRepository'
+]
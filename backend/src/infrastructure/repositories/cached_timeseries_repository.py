@@ -0,0 +1,313 @@
+"""Cached Time Series Repository - Closed-bucket cache for aggregated queries"""
+import math
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.ports.repositories.i_timeseries_repository import ITimeSeriesRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError
+from ...shared.middleware.logger import logger
+from ...shared.utils.ddsketch import DDSketch, bucket_sketches
+from .timestream_repository import interval_to_millis
+
+BATCH_WRITE_SIZE = 25
+# More gaps than this are fetched as one range instead of one query each
+MAX_GAP_QUERIES = 4
+# Finer intervals are not cached: one item per bucket would cost more to
+# store and read than querying them again
+MIN_CACHED_INTERVAL_MILLIS = 5 * 60 * 1000
+# Cached buckets expire (expiresAt TTL) so the table does not grow with
+# every range ever queried; buckets without data are cheap to query again
+CACHE_TTL_SECONDS = 30 * 24 * 3600
+EMPTY_BUCKET_TTL_SECONDS = 24 * 3600
+
+
+class CachedTimeSeriesRepository(ITimeSeriesRepository):
+    """
+    Decorator caching closed aggregation buckets of another repository
+
+    Aggregates of a bucket that ended more than
+    AGGREGATE_CACHE_SETTLE_SECONDS ago never change, so they are stored in
+    AGGREGATE_CACHE_TABLE, one item per bucket:
+        pk='{deviceId}|{metric}|{interval}'  bucket=<bucket start, epoch ms>
+    Buckets without data are stored without a value so they are not
+    fetched again. Quantile sketches of closed buckets are cached the same
+    way under pk='{deviceId}|{metric}|{interval}|sketch' (binary `sketch`
+    attribute), built once from the raw points. Requests are aligned to
+    bucket boundaries (Timestream bin() aligns to the epoch); only missing
+    closed buckets and the open tail are queried from the wrapped
+    repository. Items expire after
+    CACHE_TTL_SECONDS (EMPTY_BUCKET_TTL_SECONDS without data), and
+    intervals under 5 minutes bypass the cache.
+
+    Every other method is delegated unchanged.
+    """
+
+    def __init__(
+        self,
+        inner: ITimeSeriesRepository,
+        table_name: Optional[str] = None,
+        client=None
+    ):
+        self.inner = inner
+        self.table_name = table_name or settings.AGGREGATE_CACHE_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+
+    def write_sensor_data(self, device_id: str, data: Dict, timestamp: datetime) -> bool:
+        return self.inner.write_sensor_data(device_id, data, timestamp)
+
+    def query_recent_data(self, device_id: str, metric: str, time_range_minutes: int = 5) -> List[Dict]:
+        return self.inner.query_recent_data(device_id, metric, time_range_minutes)
+
+    def query_raw_series(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[Tuple[int, float]]:
+        return self.inner.query_raw_series(device_id, metric, start_time, end_time)
+
+    def query_multiple_devices(
+        self,
+        device_ids: List[str],
+        metrics: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict:
+        return self.inner.query_multiple_devices(device_ids, metrics, start_time, end_time)
+
+    def query_aggregated_data(
+        self,
+        device_id: str,
+        metrics: List[str],
+        start_time: datetime,
+        end_time: datetime,
+        aggregation_interval: str = '15m'
+    ) -> List[Dict]:
+        """Query per-interval averages, reading closed buckets from the cache"""
+        if not metrics:
+            return []
+        width = interval_to_millis(aggregation_interval)
+        if width < MIN_CACHED_INTERVAL_MILLIS:
+            return self.inner.query_aggregated_data(
+                device_id, metrics, start_time, end_time, aggregation_interval
+            )
+        first = math.floor(_millis(start_time) / width) * width
+        stop = math.floor(_millis(end_time) / width) * width + width
+        now = _millis(datetime.utcnow()) - settings.AGGREGATE_CACHE_SETTLE_SECONDS * 1000
+        # A bucket is closed once its end is before the settle horizon
+        closed_stop = max(first, min(stop, (now // width) * width))
+
+        values: Dict[str, Dict[int, Optional[float]]] = {
+            metric: self._read_cached(device_id, metric, aggregation_interval, first, closed_stop)
+            for metric in metrics
+        }
+
+        ranges = _missing_ranges(
+            [bucket for bucket in range(first, closed_stop, width)
+             if any(bucket not in values[metric] for metric in metrics)],
+            width
+        )
+        if closed_stop < stop:
+            ranges.append((closed_stop, stop))
+
+        fetched_closed: Dict[str, Dict[int, Optional[float]]] = {metric: {} for metric in metrics}
+        for range_start, range_stop in ranges:
+            rows = self.inner.query_aggregated_data(
+                device_id, metrics,
+                _datetime(range_start), _datetime(range_stop - 1),
+                aggregation_interval
+            )
+            found = {row['timestamp']: row for row in rows}
+            for bucket in range(range_start, range_stop, width):
+                row = found.get(bucket, {})
+                for metric in metrics:
+                    value = row.get(metric)
+                    values[metric][bucket] = value
+                    if bucket < closed_stop:
+                        fetched_closed[metric][bucket] = value
+
+        for metric, buckets in fetched_closed.items():
+            if buckets:
+                self._write_cached(device_id, metric, aggregation_interval, buckets)
+
+        logger.info(
+            f"Aggregates for {device_id}: {(stop - first) // width} buckets, "
+            f"{len(ranges)} range queries"
+        )
+
+        result = []
+        for bucket in range(first, stop, width):
+            row = {
+                metric: values[metric][bucket]
+                for metric in metrics if values[metric].get(bucket) is not None
+            }
+            if row:
+                result.append({'timestamp': bucket, **row})
+        return result
+
+    def query_bucket_sketches(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime,
+        aggregation_interval: str = '1h'
+    ) -> Dict[int, DDSketch]:
+        """Per-bucket quantile sketches, reading closed buckets from the cache"""
+        width = interval_to_millis(aggregation_interval)
+        if width < MIN_CACHED_INTERVAL_MILLIS:
+            return self.inner.query_bucket_sketches(
+                device_id, metric, start_time, end_time, aggregation_interval
+            )
+        first = math.floor(_millis(start_time) / width) * width
+        stop = math.floor(_millis(end_time) / width) * width + width
+        now = _millis(datetime.utcnow()) - settings.AGGREGATE_CACHE_SETTLE_SECONDS * 1000
+        closed_stop = max(first, min(stop, (now // width) * width))
+
+        key = _cache_key(device_id, metric, aggregation_interval) + '|sketch'
+        cached = self._read_sketches(key, first, closed_stop)
+        ranges = _missing_ranges(
+            [bucket for bucket in range(first, closed_stop, width) if bucket not in cached],
+            width
+        )
+        if closed_stop < stop:
+            ranges.append((closed_stop, stop))
+
+        sketches = {bucket: sketch for bucket, sketch in cached.items() if sketch is not None}
+        fetched_closed: Dict[int, Optional[DDSketch]] = {}
+        for range_start, range_stop in ranges:
+            points = self.inner.query_raw_series(
+                device_id, metric, _datetime(range_start), _datetime(range_stop - 1)
+            )
+            built = bucket_sketches(points, width)
+            sketches.update(built)
+            for bucket in range(range_start, min(range_stop, closed_stop), width):
+                if bucket not in cached:
+                    fetched_closed[bucket] = built.get(bucket)
+
+        if fetched_closed:
+            self._put_items(device_id, [
+                _sketch_item(key, bucket, sketch) for bucket, sketch in fetched_closed.items()
+            ])
+        return {bucket: sketches[bucket] for bucket in sorted(sketches) if first <= bucket < stop}
+
+    def _read_sketches(self, key: str, first: int, stop: int) -> Dict[int, Optional[DDSketch]]:
+        """Cached sketches in [first, stop), None for buckets without data"""
+        if stop <= first:
+            return {}
+        cached = {}
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                KeyConditionExpression='pk = :pk AND #b BETWEEN :first AND :last',
+                ExpressionAttributeNames={'#b': 'bucket'},
+                ExpressionAttributeValues={
+                    ':pk': {'S': key},
+                    ':first': {'N': str(first)},
+                    ':last': {'N': str(stop - 1)}
+                }
+            ):
+                for item in response.get('Items', []):
+                    sketch = item.get('sketch')
+                    cached[int(item['bucket']['N'])] = DDSketch.from_bytes(sketch['B']) if sketch else None
+        except ClientError as e:
+            raise DatabaseError(f"Failed to read sketch cache for {key}: {e}")
+        return cached
+
+    def _read_cached(
+        self,
+        device_id: str,
+        metric: str,
+        interval: str,
+        first: int,
+        stop: int
+    ) -> Dict[int, Optional[float]]:
+        """Cached buckets in [first, stop), None for buckets without data"""
+        if stop <= first:
+            return {}
+        cached = {}
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                KeyConditionExpression='pk = :pk AND #b BETWEEN :first AND :last',
+                ExpressionAttributeNames={'#b': 'bucket'},
+                ExpressionAttributeValues={
+                    ':pk': {'S': _cache_key(device_id, metric, interval)},
+                    ':first': {'N': str(first)},
+                    ':last': {'N': str(stop - 1)}
+                }
+            ):
+                for item in response.get('Items', []):
+                    value = item.get('value')
+                    cached[int(item['bucket']['N'])] = float(value['N']) if value else None
+        except ClientError as e:
+            raise DatabaseError(f"Failed to read aggregate cache for {device_id}: {e}")
+        return cached
+
+    def _write_cached(self, device_id: str, metric: str, interval: str, buckets: Dict[int, Optional[float]]):
+        """Store closed buckets"""
+        key = _cache_key(device_id, metric, interval)
+        items = []
+        for bucket, value in buckets.items():
+            item = {'pk': {'S': key}, 'bucket': {'N': str(bucket)}, 'expiresAt': _expires_at(value is None)}
+            if value is not None:
+                item['value'] = {'N': repr(value)}
+            items.append(item)
+        self._put_items(device_id, items)
+
+    def _put_items(self, device_id: str, items: List[Dict]):
+        """Batch-write cache items; cache writes never fail the query"""
+        requests = [{'PutRequest': {'Item': item}} for item in items]
+        try:
+            for start in range(0, len(requests), BATCH_WRITE_SIZE):
+                pending = requests[start:start + BATCH_WRITE_SIZE]
+                while pending:
+                    response = self.client.batch_write_item(RequestItems={self.table_name: pending})
+                    pending = response.get('UnprocessedItems', {}).get(self.table_name, [])
+        except ClientError as e:
+            logger.warning(f"Failed to write aggregate cache for {device_id}: {e}")
+
+
+def _missing_ranges(buckets: List[int], width: int) -> List[Tuple[int, int]]:
+    """Coalesce missing bucket starts into [start, stop) ranges"""
+    ranges: List[Tuple[int, int]] = []
+    for bucket in buckets:
+        if ranges and ranges[-1][1] == bucket:
+            ranges[-1] = (ranges[-1][0], bucket + width)
+        else:
+            ranges.append((bucket, bucket + width))
+    if len(ranges) > MAX_GAP_QUERIES:
+        ranges = [(ranges[0][0], ranges[-1][1])]
+    return ranges
+
+
+def _sketch_item(key: str, bucket: int, sketch: Optional[DDSketch]) -> Dict:
+    item = {'pk': {'S': key}, 'bucket': {'N': str(bucket)}, 'expiresAt': _expires_at(sketch is None)}
+    if sketch is not None:
+        item['sketch'] = {'B': sketch.to_bytes()}
+    return item
+
+
+def _expires_at(empty: bool) -> Dict:
+    ttl = EMPTY_BUCKET_TTL_SECONDS if empty else CACHE_TTL_SECONDS
+    return {'N': str(int(time.time()) + ttl)}
+
+
+def _cache_key(device_id: str, metric: str, interval: str) -> str:
+    return f"{device_id}|{metric}|{interval}"
+
+
+def _millis(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def _datetime(millis: int) -> datetime:
+    return datetime.fromtimestamp(millis / 1000)
@@ -0,0 +1,74 @@
+"""DynamoDB attribute value codec
+
+boto3's TypeSerializer/TypeDeserializer round-trip every number through
+Decimal, which then has to be converted again before it reaches pydantic
+or json.dumps. These helpers map numbers straight to int/float and are
+used with the low-level client by the repositories in this package.
+"""
+from decimal import Decimal
+from typing import Any, Dict
+
+
+def serialize_value(value: Any) -> Dict:
+    """Convert a Python value to a DynamoDB AttributeValue"""
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    if isinstance(value, dict):
+        return {'M': {k: serialize_value(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [serialize_value(v) for v in value]}
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if isinstance(value, (set, frozenset)):
+        if all(isinstance(v, str) for v in value):
+            return {'SS': list(value)}
+        return {'NS': [str(v) for v in value]}
+    raise TypeError(f"Unsupported DynamoDB type: {type(value).__name__}")
+
+
+def deserialize_value(attribute: Dict) -> Any:
+    """Convert a DynamoDB AttributeValue to a Python value"""
+    (type_, value), = attribute.items()
+    if type_ == 'S':
+        return value
+    if type_ == 'N':
+        return _parse_number(value)
+    if type_ == 'M':
+        return {k: deserialize_value(v) for k, v in value.items()}
+    if type_ == 'L':
+        return [deserialize_value(v) for v in value]
+    if type_ == 'NULL':
+        return None
+    if type_ == 'BOOL':
+        return value
+    if type_ == 'SS':
+        return set(value)
+    if type_ == 'NS':
+        return {_parse_number(v) for v in value}
+    if type_ == 'B':
+        return value
+    if type_ == 'BS':
+        return set(value)
+    raise TypeError(f"Unsupported DynamoDB type: {type_}")
+
+
+def serialize_item(item: Dict) -> Dict:
+    """Convert a dict to a DynamoDB item"""
+    return {k: serialize_value(v) for k, v in item.items()}
+
+
+def deserialize_item(item: Dict) -> Dict:
+    """Convert a DynamoDB item to a dict"""
+    return {k: deserialize_value(v) for k, v in item.items()}
+
+
+def _parse_number(value: str):
+    if '.' in value or 'e' in value or 'E' in value:
+        return float(value)
+    return int(value)
@@ -0,0 +1,197 @@
+"""DynamoDB Connection Repository - Adapter implementing IConnectionRepository"""
+import time
+from typing import Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.ports.repositories.i_connection_repository import IConnectionRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError
+from .dynamodb_codec import deserialize_item, serialize_item
+
+BATCH_WRITE_SIZE = 25  # BatchWriteItem hard limit
+BATCH_WRITE_MAX_ATTEMPTS = 5
+# API Gateway closes WebSocket connections after 2 hours; entries left
+# behind by a missed $disconnect expire through the table TTL after this
+CONNECTION_TTL_SECONDS = 3 * 60 * 60
+
+
+class DynamoDBConnectionRepository(IConnectionRepository):
+    """
+    WebSocket connections in CONNECTIONS_TABLE plus a reverse index
+
+    Each connection item keeps the set of devices it subscribed to
+    (subscribedDevices). SUBSCRIPTIONS_TABLE holds the reverse mapping, one
+    item per subscription:
+        deviceId=<device>  connectionId=<connection>
+    so the subscribers of a device are one Query, whatever the number of
+    connections. Both sides are written by subscribe/unsubscribe, and
+    delete() removes the reverse entries listed on the connection item.
+    Items carry an expiresAt TTL as a backstop for missed disconnects.
+    """
+
+    def __init__(
+        self,
+        connections_table: Optional[str] = None,
+        subscriptions_table: Optional[str] = None,
+        client=None
+    ):
+        self.connections_table = connections_table or settings.CONNECTIONS_TABLE
+        self.subscriptions_table = subscriptions_table or settings.SUBSCRIPTIONS_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+
+    def save(self, connection_id: str, user_id: Optional[str], organization_id: Optional[str]) -> Dict:
+        """Register a new connection"""
+        now = int(time.time())
+        connection = {
+            'connectionId': connection_id,
+            'userId': user_id,
+            'organizationId': organization_id,
+            'connectedAt': now * 1000,
+            'expiresAt': now + CONNECTION_TTL_SECONDS
+        }
+        try:
+            self.client.put_item(
+                TableName=self.connections_table,
+                Item=serialize_item({k: v for k, v in connection.items() if v is not None})
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to save connection {connection_id}: {e}")
+        return connection
+
+    def find_by_id(self, connection_id: str) -> Optional[Dict]:
+        """Get a connection"""
+        try:
+            response = self.client.get_item(
+                TableName=self.connections_table,
+                Key={'connectionId': {'S': connection_id}},
+                ConsistentRead=True
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to get connection {connection_id}: {e}")
+        if 'Item' not in response:
+            return None
+        connection = deserialize_item(response['Item'])
+        connection.setdefault('subscribedDevices', set())
+        return connection
+
+    def delete(self, connection_id: str) -> bool:
+        """Remove a connection and all of its subscriptions"""
+        try:
+            response = self.client.delete_item(
+                TableName=self.connections_table,
+                Key={'connectionId': {'S': connection_id}},
+                ReturnValues='ALL_OLD'
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to delete connection {connection_id}: {e}")
+        attributes = response.get('Attributes')
+        if not attributes:
+            return False
+        device_ids = deserialize_item(attributes).get('subscribedDevices') or set()
+        self._write_subscriptions(connection_id, sorted(device_ids), delete=True)
+        return True
+
+    def subscribe(self, connection_id: str, device_ids: List[str]) -> List[str]:
+        """
+        Subscribe a connection to devices
+
+        Idempotent: the reverse index entries of every given device are
+        written, including devices the connection already holds, so a
+        retry repairs entries a failed call did not write.
+
+        Raises:
+            DatabaseError: if the connection does not exist
+        """
+        device_ids = list(dict.fromkeys(device_ids))
+        if not device_ids:
+            connection = self.find_by_id(connection_id)
+            return sorted(connection['subscribedDevices']) if connection else []
+        try:
+            response = self.client.update_item(
+                TableName=self.connections_table,
+                Key={'connectionId': {'S': connection_id}},
+                UpdateExpression='ADD subscribedDevices :devices',
+                ConditionExpression='attribute_exists(connectionId)',
+                ExpressionAttributeValues={':devices': {'SS': device_ids}},
+                ReturnValues='ALL_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                raise DatabaseError(f"Connection {connection_id} is gone")
+            raise DatabaseError(f"Failed to subscribe {connection_id}: {e}")
+        # Reverse entries written after the connection item: a concurrent
+        # delete() that missed them leaves entries that expire via TTL and
+        # are pruned on the first failed post
+        self._write_subscriptions(connection_id, device_ids, delete=False)
+        return sorted(deserialize_item(response['Attributes']).get('subscribedDevices') or ())
+
+    def unsubscribe(self, connection_id: str, device_ids: List[str]) -> List[str]:
+        """Unsubscribe a connection from devices"""
+        device_ids = list(dict.fromkeys(device_ids))
+        if not device_ids:
+            connection = self.find_by_id(connection_id)
+            return sorted(connection['subscribedDevices']) if connection else []
+        try:
+            response = self.client.update_item(
+                TableName=self.connections_table,
+                Key={'connectionId': {'S': connection_id}},
+                UpdateExpression='DELETE subscribedDevices :devices',
+                ConditionExpression='attribute_exists(connectionId)',
+                ExpressionAttributeValues={':devices': {'SS': device_ids}},
+                ReturnValues='ALL_NEW'
+            )
+            remaining = deserialize_item(response['Attributes']).get('subscribedDevices') or ()
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise DatabaseError(f"Failed to unsubscribe {connection_id}: {e}")
+            remaining = ()
+        self._write_subscriptions(connection_id, device_ids, delete=True)
+        return sorted(remaining)
+
+    def find_subscribers(self, device_id: str) -> List[str]:
+        """Connection IDs subscribed to a device"""
+        connection_ids = []
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.subscriptions_table,
+                KeyConditionExpression='deviceId = :device',
+                ExpressionAttributeValues={':device': {'S': device_id}},
+                ProjectionExpression='connectionId'
+            ):
+                connection_ids.extend(item['connectionId']['S'] for item in response.get('Items', []))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to query subscribers of {device_id}: {e}")
+        return connection_ids
+
+    def _write_subscriptions(self, connection_id: str, device_ids: List[str], delete: bool):
+        """Put or delete the reverse index entries of a connection"""
+        expires_at = str(int(time.time()) + CONNECTION_TTL_SECONDS)
+        requests = []
+        for device_id in device_ids:
+            key = {'deviceId': {'S': device_id}, 'connectionId': {'S': connection_id}}
+            if delete:
+                requests.append({'DeleteRequest': {'Key': key}})
+            else:
+                requests.append({'PutRequest': {'Item': {**key, 'expiresAt': {'N': expires_at}}}})
+        for start in range(0, len(requests), BATCH_WRITE_SIZE):
+            self._batch_write(requests[start:start + BATCH_WRITE_SIZE])
+
+    def _batch_write(self, requests: List[Dict]):
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+            try:
+                response = self.client.batch_write_item(
+                    RequestItems={self.subscriptions_table: requests}
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ProvisionedThroughputExceededException':
+                    raise DatabaseError(f"Failed to write subscriptions: {e}")
+                continue
+            requests = response.get('UnprocessedItems', {}).get(self.subscriptions_table, [])
+            if not requests:
+                return
+        raise DatabaseError(f"{len(requests)} subscription index writes left unprocessed")
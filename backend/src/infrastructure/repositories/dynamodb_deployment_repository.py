@@ -0,0 +1,383 @@
+"""DynamoDB Deployment Repository - Adapter implementing IDeploymentRepository"""
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.entities.deployment import Deployment, DeploymentBatch
+from ...domain.ports.repositories.i_deployment_repository import IDeploymentRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError
+from .dynamodb_codec import deserialize_item, serialize_item
+
+BATCH_WRITE_SIZE = 25  # BatchWriteItem hard limit
+BATCH_WRITE_MAX_ATTEMPTS = 5
+# TransactWriteItems takes up to 100 items: the batch counter update and
+# up to 99 result markers
+TRANSACT_RESULTS_SIZE = 99
+TRANSACT_MAX_ATTEMPTS = 8
+# Device IDs per target item; ~40 KB at 36-character IDs, well under the
+# 400 KB item limit
+TARGET_CHUNK_SIZE = 1000
+HEADER_KEY = 'DEPLOYMENT'
+BATCH_PREFIX = 'BATCH#'
+TARGETS_PREFIX = 'TARGETS#'
+RESULT_PREFIX = 'RESULT#'
+# Targets not assigned to a batch yet
+UNBATCHED = 0
+# inProgressKey of in-progress batch items, the partition of the sparse
+# inProgress-index; there are few such batches at any time
+IN_PROGRESS_KEY = 'BATCH'
+TERMINAL_STATUSES = ('completed', 'failed', 'rolled_back')
+
+
+class DynamoDBDeploymentRepository(IDeploymentRepository):
+    """
+    Deployments in DEPLOYMENTS_TABLE, partitioned by deploymentId
+
+    Batches:  itemKey=BATCH#<batchId>             (status, deviceCount, counters, startedAt)
+    Header:   itemKey=DEPLOYMENT                  (status, targetCount, ...)
+    Results:  itemKey=RESULT#<batchId>#<deviceId> (succeeded)
+    Targets:  itemKey=TARGETS#<batchId>#<chunk>   (up to TARGET_CHUNK_SIZE IDs)
+
+    Device results are counted with ADD on the batch item, so recording a
+    result is one small write regardless of the deployment size and
+    concurrent writers never overwrite each other. record_device_results
+    also puts a result item per device, conditioned on it not existing, in
+    the same transaction as the ADD, so a redelivered result is never
+    counted twice. Progress is summed from the batch items, which sort
+    before the header: find_by_id reads the header and batches with one
+    query that stops short of the results and device lists. Only headers
+    carry firmwareId, so firmwareId-index lists deployments and nothing
+    else; only in-progress batches carry inProgressKey, so inProgress-index
+    (PK inProgressKey, SK startedAt) lists them by start time.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, client=None):
+        self.table_name = table_name or settings.DEPLOYMENTS_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+
+    def save(self, deployment: Deployment) -> Deployment:
+        """Save a new deployment with its batches and target devices"""
+        requests = []
+        batched = set()
+        for batch in deployment.batches:
+            requests.extend(self._target_requests(deployment.deployment_id, batch.batch_id, batch.devices))
+            batched.update(batch.devices)
+        unbatched = [device_id for device_id in deployment.target_devices if device_id not in batched]
+        requests.extend(self._target_requests(deployment.deployment_id, UNBATCHED, unbatched))
+
+        for batch in deployment.batches:
+            item = batch.to_dict(include_devices=False)
+            item.update({'deploymentId': deployment.deployment_id, 'itemKey': _batch_key(batch.batch_id)})
+            requests.append({'PutRequest': {'Item': serialize_item(item)}})
+        self._batch_write(requests)
+
+        # The header goes last, so a deployment is only found once complete
+        header = deployment.to_dict(include_devices=False)
+        del header['batches'], header['progress']
+        header = {k: v for k, v in header.items() if v is not None}
+        header.update({'itemKey': HEADER_KEY, 'batchCount': len(deployment.batches)})
+        try:
+            self.client.put_item(TableName=self.table_name, Item=serialize_item(header))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to save deployment {deployment.deployment_id}: {e}")
+        deployment.update_progress()
+        return deployment
+
+    def find_by_id(self, deployment_id: str) -> Optional[Deployment]:
+        """Find a deployment with its batch counters and progress, without device lists"""
+        header = None
+        batches: List[DeploymentBatch] = []
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                KeyConditionExpression='deploymentId = :id AND itemKey <= :header',
+                ExpressionAttributeValues={':id': {'S': deployment_id}, ':header': {'S': HEADER_KEY}}
+            ):
+                for item in response.get('Items', []):
+                    data = deserialize_item(item)
+                    if data['itemKey'] == HEADER_KEY:
+                        header = data
+                    else:
+                        batches.append(DeploymentBatch.from_dict(data))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to read deployment {deployment_id}: {e}")
+        if header is None:
+            return None
+
+        deployment = Deployment.from_dict(header)
+        deployment.batches = sorted(batches, key=lambda b: b.batch_id)
+        deployment.update_progress()
+        return deployment
+
+    def find_by_firmware(self, firmware_id: str) -> List[Deployment]:
+        """Find all deployments of a firmware, without device lists"""
+        deployment_ids = []
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                IndexName='firmwareId-index',
+                KeyConditionExpression='firmwareId = :firmware',
+                ExpressionAttributeValues={':firmware': {'S': firmware_id}}
+            ):
+                deployment_ids.extend(item['deploymentId']['S'] for item in response.get('Items', []))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to query deployments of firmware {firmware_id}: {e}")
+        deployments = (self.find_by_id(deployment_id) for deployment_id in deployment_ids)
+        return [deployment for deployment in deployments if deployment]
+
+    def find_target_devices(self, deployment_id: str, batch_id: Optional[int] = None) -> Iterator[str]:
+        """Stream the target device IDs of a deployment, or of one of its batches"""
+        prefix = TARGETS_PREFIX if batch_id is None else f'{TARGETS_PREFIX}{batch_id:05d}#'
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                KeyConditionExpression='deploymentId = :id AND begins_with(itemKey, :prefix)',
+                ExpressionAttributeValues={':id': {'S': deployment_id}, ':prefix': {'S': prefix}}
+            ):
+                for item in response.get('Items', []):
+                    for device_id in item['devices']['L']:
+                        yield device_id['S']
+        except ClientError as e:
+            raise DatabaseError(f"Failed to read target devices of deployment {deployment_id}: {e}")
+
+    def find_reported_devices(self, deployment_id: str, batch_id: int) -> Set[str]:
+        """IDs of the batch's devices whose result was counted"""
+        prefix = f'{RESULT_PREFIX}{batch_id:05d}#'
+        device_ids: Set[str] = set()
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                KeyConditionExpression='deploymentId = :id AND begins_with(itemKey, :prefix)',
+                ExpressionAttributeValues={':id': {'S': deployment_id}, ':prefix': {'S': prefix}},
+                ProjectionExpression='itemKey'
+            ):
+                device_ids.update(item['itemKey']['S'][len(prefix):] for item in response.get('Items', []))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to read results of deployment {deployment_id}: {e}")
+        return device_ids
+
+    def find_batches_started_before(self, started_before: int) -> List[Tuple[str, int]]:
+        """(deploymentId, batchId) of in-progress batches started before a time (epoch ms)"""
+        batches = []
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                IndexName='inProgress-index',
+                KeyConditionExpression='inProgressKey = :key AND startedAt < :before',
+                ExpressionAttributeValues={
+                    ':key': {'S': IN_PROGRESS_KEY},
+                    ':before': {'N': str(started_before)}
+                }
+            ):
+                batches.extend(
+                    (item['deploymentId']['S'], int(item['itemKey']['S'][len(BATCH_PREFIX):]))
+                    for item in response.get('Items', [])
+                )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to query in-progress deployment batches: {e}")
+        return batches
+
+    def record_results(
+        self,
+        deployment_id: str,
+        batch_id: int,
+        succeeded: int = 0,
+        failed: int = 0
+    ) -> Optional[DeploymentBatch]:
+        """Atomically add device results to a batch; None if the batch does not exist"""
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key={'deploymentId': {'S': deployment_id}, 'itemKey': {'S': _batch_key(batch_id)}},
+                UpdateExpression='ADD successCount :succeeded, failureCount :failed',
+                ConditionExpression='attribute_exists(itemKey)',
+                ExpressionAttributeValues={':succeeded': {'N': str(succeeded)}, ':failed': {'N': str(failed)}},
+                ReturnValues='ALL_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return None
+            raise DatabaseError(f"Failed to record results of deployment {deployment_id}: {e}")
+        return DeploymentBatch.from_dict(deserialize_item(response['Attributes']))
+
+    def record_device_results(
+        self,
+        deployment_id: str,
+        batch_id: int,
+        results: Dict[str, bool]
+    ) -> Optional[DeploymentBatch]:
+        """
+        Count the results of a batch's devices, each device at most once
+
+        Every transaction puts the result items of up to TRANSACT_RESULTS_SIZE
+        devices and adds their counts to the batch item. When it is canceled
+        because some results were already recorded, those are dropped and
+        the rest is tried again.
+        """
+        key = {'deploymentId': {'S': deployment_id}, 'itemKey': {'S': _batch_key(batch_id)}}
+        device_ids = sorted(results)
+        for start in range(0, len(device_ids), TRANSACT_RESULTS_SIZE):
+            chunk = device_ids[start:start + TRANSACT_RESULTS_SIZE]
+            for attempt in range(TRANSACT_MAX_ATTEMPTS):
+                if not chunk:
+                    break
+                if attempt:
+                    time.sleep(min(0.05 * 2 ** attempt, 1.0))
+                succeeded = sum(1 for device_id in chunk if results[device_id])
+                items = [
+                    {'Put': {
+                        'TableName': self.table_name,
+                        'Item': {
+                            'deploymentId': {'S': deployment_id},
+                            'itemKey': {'S': f'{RESULT_PREFIX}{batch_id:05d}#{device_id}'},
+                            'succeeded': {'BOOL': results[device_id]}
+                        },
+                        'ConditionExpression': 'attribute_not_exists(itemKey)'
+                    }}
+                    for device_id in chunk
+                ]
+                items.append({'Update': {
+                    'TableName': self.table_name,
+                    'Key': key,
+                    'UpdateExpression': 'ADD successCount :succeeded, failureCount :failed',
+                    'ConditionExpression': 'attribute_exists(itemKey)',
+                    'ExpressionAttributeValues': {
+                        ':succeeded': {'N': str(succeeded)},
+                        ':failed': {'N': str(len(chunk) - succeeded)}
+                    }
+                }})
+                try:
+                    self.client.transact_write_items(TransactItems=items)
+                    break
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'TransactionCanceledException':
+                        raise DatabaseError(f"Failed to record results of deployment {deployment_id}: {e}")
+                    reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+                if len(reasons) == len(items) and reasons[-1] == 'ConditionalCheckFailed':
+                    return None
+                if len(reasons) == len(chunk) + 1:
+                    chunk = [
+                        device_id for device_id, reason in zip(chunk, reasons)
+                        if reason != 'ConditionalCheckFailed'
+                    ]
+                # Otherwise a conflict with a concurrent transaction: retry as is
+            else:
+                raise DatabaseError(f"Failed to record results of deployment {deployment_id}: contended")
+
+        try:
+            item = self.client.get_item(TableName=self.table_name, Key=key, ConsistentRead=True).get('Item')
+        except ClientError as e:
+            raise DatabaseError(f"Failed to read batch {batch_id} of deployment {deployment_id}: {e}")
+        return DeploymentBatch.from_dict(deserialize_item(item)) if item else None
+
+    def update_batch_status(
+        self,
+        deployment_id: str,
+        batch_id: int,
+        status: str,
+        expected_status: Optional[str] = None
+    ) -> bool:
+        """
+        Set a batch's status, if it is still expected_status; whether it
+        was set. Moving a batch to in_progress records when it started.
+        """
+        started = status == 'in_progress'
+        timestamps = {'startedAt': int(time.time() * 1000)} if started else {}
+        return self._set_status(
+            deployment_id, _batch_key(batch_id), status, expected_status, timestamps, in_progress=started
+        )
+
+    def update_status(
+        self,
+        deployment_id: str,
+        status: str,
+        expected_status: Optional[str] = None
+    ) -> bool:
+        """Set a deployment's status, if it is still expected_status; whether it was set"""
+        timestamps = {}
+        if status == 'in_progress':
+            timestamps['startedAt'] = int(time.time() * 1000)
+        elif status in TERMINAL_STATUSES:
+            timestamps['completedAt'] = int(time.time() * 1000)
+        return self._set_status(deployment_id, HEADER_KEY, status, expected_status, timestamps)
+
+    def _set_status(
+        self,
+        deployment_id: str,
+        item_key: str,
+        status: str,
+        expected_status: Optional[str],
+        timestamps: Dict[str, int],
+        in_progress: Optional[bool] = None
+    ) -> bool:
+        names = {'#status': 'status'}
+        values = {':status': {'S': status}}
+        assignments = ['#status = :status']
+        for name, value in timestamps.items():
+            assignments.append(f'{name} = if_not_exists({name}, :{name})')
+            values[f':{name}'] = {'N': str(value)}
+        update = 'SET ' + ', '.join(assignments)
+        # Batch items are in inProgress-index only while in progress
+        if in_progress:
+            update += ', inProgressKey = :inProgressKey'
+            values[':inProgressKey'] = {'S': IN_PROGRESS_KEY}
+        elif in_progress is False:
+            update += ' REMOVE inProgressKey'
+        condition = 'attribute_exists(itemKey)'
+        if expected_status is not None:
+            condition += ' AND #status = :expected'
+            values[':expected'] = {'S': expected_status}
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key={'deploymentId': {'S': deployment_id}, 'itemKey': {'S': item_key}},
+                UpdateExpression=update,
+                ConditionExpression=condition,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise DatabaseError(f"Failed to update status of deployment {deployment_id}: {e}")
+        return True
+
+    def _target_requests(self, deployment_id: str, batch_id: int, devices: List[str]) -> List[Dict]:
+        return [
+            {'PutRequest': {'Item': serialize_item({
+                'deploymentId': deployment_id,
+                'itemKey': f'{TARGETS_PREFIX}{batch_id:05d}#{chunk:05d}',
+                'devices': devices[start:start + TARGET_CHUNK_SIZE]
+            })}}
+            for chunk, start in enumerate(range(0, len(devices), TARGET_CHUNK_SIZE))
+        ]
+
+    def _batch_write(self, requests: List[Dict]):
+        for start in range(0, len(requests), BATCH_WRITE_SIZE):
+            chunk = requests[start:start + BATCH_WRITE_SIZE]
+            for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(min(0.05 * 2 ** attempt, 1.0))
+                try:
+                    response = self.client.batch_write_item(RequestItems={self.table_name: chunk})
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ProvisionedThroughputExceededException':
+                        raise DatabaseError(f"Failed to write deployment items: {e}")
+                    continue
+                chunk = response.get('UnprocessedItems', {}).get(self.table_name, [])
+                if not chunk:
+                    break
+            else:
+                raise DatabaseError(f"{len(chunk)} deployment item writes left unprocessed")
+
+
+def _batch_key(batch_id: int) -> str:
+    return f'{BATCH_PREFIX}{batch_id:05d}'
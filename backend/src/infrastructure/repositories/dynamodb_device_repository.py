@@ -0,0 +1,584 @@
+"""DynamoDB Device Repository - Adapter implementing IDeviceRepository"""
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.entities.device import Device, DeviceStatus
+from ...domain.ports.repositories.i_device_repository import IDeviceRepository
+from ...domain.ports.repositories.i_device_search_index import IDeviceSearchIndex
+from ...domain.ports.repositories.i_fleet_stats_repository import IFleetStatsRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError, DeviceNotFoundError
+from ...shared.middleware.logger import logger
+from ...shared.utils.geohash import haversine_meters
+from .dynamodb_codec import deserialize_item, serialize_item, serialize_value
+
+ORGANIZATION_INDEX = 'organizationId-index'
+BATCH_WRITE_SIZE = 25  # BatchWriteItem hard limit
+BATCH_WRITE_MAX_ATTEMPTS = 5
+BATCH_GET_SIZE = 100  # BatchGetItem hard limit
+
+
+class DynamoDBDeviceRepository(IDeviceRepository):
+    """
+    Device repository backed by DEVICES_TABLE
+
+    Items read back from the table were written by this repository, so
+    they are hydrated through Device.from_trusted_dynamodb_item() instead
+    of full pydantic validation.
+
+    When a stats repository is given, every write that adds, removes or
+    changes the status of a device also applies the matching counter
+    delta, using the previous item returned by the write itself. The
+    same previous item keeps the optional search index in sync, and
+    filtered listings are answered from that index instead of reading
+    every device of the organization.
+
+    The last reading written for each device is cached so telemetry
+    updates only send the metrics that changed, and unchanged readings
+    refresh lastSeen at most every LAST_SEEN_WRITE_INTERVAL_SECONDS.
+    """
+
+    def __init__(
+        self,
+        table_name: Optional[str] = None,
+        client=None,
+        stats_repository: Optional[IFleetStatsRepository] = None,
+        search_index: Optional[IDeviceSearchIndex] = None
+    ):
+        self.table_name = table_name or settings.DEVICES_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+        self.stats_repository = stats_repository
+        self.search_index = search_index
+        self._last_readings: OrderedDict = OrderedDict()
+
+    def save(self, device: Device) -> Device:
+        """Save device to storage"""
+        item = device.to_trusted_dynamodb_item()
+        try:
+            response = self.client.put_item(
+                TableName=self.table_name,
+                Item=serialize_item(item),
+                ReturnValues='ALL_OLD'
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to save device {device.device_id}: {e}")
+        self._record_change(_old_item(response), item)
+        return device
+
+    def save_batch(self, devices: List[Device]) -> List[str]:
+        """
+        Save many new devices with BatchWriteItem, retrying unprocessed items
+
+        BatchWriteItem cannot return previous items, so fleet counters
+        treat every written device as newly added.
+        """
+        failed = []
+        for start in range(0, len(devices), BATCH_WRITE_SIZE):
+            chunk = devices[start:start + BATCH_WRITE_SIZE]
+            requests = [
+                {'PutRequest': {'Item': serialize_item(device.to_trusted_dynamodb_item())}}
+                for device in chunk
+            ]
+            failed.extend(self._batch_write(requests))
+
+        unwritten = set(failed)
+        written = [device for device in devices if device.device_id not in unwritten]
+        if self.search_index and written:
+            self._safe_index(self.search_index.index_devices, written)
+        if self.stats_repository:
+            added: Dict = {}
+            for device in written:
+                key = (device.organization_id, device.device_type, device.status.value)
+                added[key] = added.get(key, 0) + 1
+            for (organization_id, device_type, status), count in added.items():
+                self._safe_stats(
+                    self.stats_repository.record_added, organization_id, device_type, status, count
+                )
+        return failed
+
+    def find_by_id(self, device_id: str) -> Optional[Device]:
+        """Find device by ID"""
+        try:
+            response = self.client.get_item(
+                TableName=self.table_name,
+                Key={'deviceId': {'S': device_id}}
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to get device {device_id}: {e}")
+
+        item = response.get('Item')
+        if not item:
+            return None
+        return Device.from_trusted_dynamodb_item(deserialize_item(item))
+
+    def find_by_organization(
+        self,
+        organization_id: str,
+        filters: Optional[Dict] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> Dict:
+        """
+        Find devices by organization with pagination
+
+        Filters the search index can answer resolve to a sorted ID list and
+        only the requested page is read; anything else falls back to
+        querying the organization index and filtering in memory.
+        """
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        device_ids = None
+        if filters and self.search_index:
+            device_ids = self.search_index.search(organization_id, filters)
+
+        if device_ids is None:
+            items = [
+                item for item in self._query_organization(organization_id)
+                if _matches(item, filters)
+            ]
+            return _paginate(items, page, page_size)
+
+        start = (page - 1) * page_size
+        return {
+            'items': self.find_by_ids(device_ids[start:start + page_size]),
+            'pagination': _pagination(len(device_ids), page, page_size)
+        }
+
+    def find_by_ids(self, device_ids: List[str], consistent_read: bool = False) -> List[Device]:
+        """Find devices by ID with BatchGetItem, keeping the given order"""
+        items: Dict[str, Dict] = {}
+        for start in range(0, len(device_ids), BATCH_GET_SIZE):
+            chunk = device_ids[start:start + BATCH_GET_SIZE]
+            request = {self.table_name: {
+                'Keys': [{'deviceId': {'S': device_id}} for device_id in chunk],
+                'ConsistentRead': consistent_read
+            }}
+            attempt = 0
+            while request:
+                if attempt:
+                    time.sleep(min(0.05 * 2 ** attempt, 1.0))
+                try:
+                    response = self.client.batch_get_item(RequestItems=request)
+                except ClientError as e:
+                    raise DatabaseError(f"Failed to batch get devices: {e}")
+                for item in response.get('Responses', {}).get(self.table_name, []):
+                    item = deserialize_item(item)
+                    items[item['deviceId']] = item
+                request = response.get('UnprocessedKeys')
+                attempt += 1
+        # IDs missing from the table (index lagging behind a delete) are skipped
+        return Device.from_trusted_dynamodb_items(
+            [items[device_id] for device_id in device_ids if device_id in items]
+        )
+
+    def update(self, device_id: str, updates: Dict) -> Device:
+        """
+        Update device attributes
+
+        Keys of `updates` are DynamoDB attribute names (camelCase).
+        """
+        if not updates:
+            device = self.find_by_id(device_id)
+            if device is None:
+                raise DeviceNotFoundError(device_id)
+            return device
+
+        names = {}
+        values = {}
+        assignments = []
+        for i, (attribute, value) in enumerate(updates.items()):
+            names[f'#a{i}'] = attribute
+            values[f':v{i}'] = serialize_value(_to_storage_value(value))
+            assignments.append(f'#a{i} = :v{i}')
+
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key={'deviceId': {'S': device_id}},
+                UpdateExpression='SET ' + ', '.join(assignments),
+                ConditionExpression='attribute_exists(deviceId)',
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_OLD'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                raise DeviceNotFoundError(device_id)
+            raise DatabaseError(f"Failed to update device {device_id}: {e}")
+
+        # Only top-level attributes are SET, so the new item is the old one
+        # overlaid with the updates
+        old_item = deserialize_item(response['Attributes'])
+        new_item = {**old_item, **{k: _to_storage_value(v) for k, v in updates.items()}}
+        self._record_change(old_item, new_item)
+        return Device.from_trusted_dynamodb_item(new_item)
+
+    def update_status(self, device_id: str, status: DeviceStatus) -> Optional[DeviceStatus]:
+        """
+        Set the device status if it differs from the stored one
+
+        Returns:
+            The previous status on a transition, None if unchanged
+        """
+        now = int(datetime.utcnow().timestamp() * 1000)
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key={'deviceId': {'S': device_id}},
+                UpdateExpression='SET #s = :s, updatedAt = :t',
+                ConditionExpression='attribute_exists(deviceId) AND #s <> :s',
+                ExpressionAttributeNames={'#s': 'status'},
+                ExpressionAttributeValues={
+                    ':s': {'S': status.value},
+                    ':t': {'N': str(now)}
+                },
+                ReturnValues='ALL_OLD'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return None
+            raise DatabaseError(f"Failed to update status of device {device_id}: {e}")
+
+        old_item = deserialize_item(response['Attributes'])
+        self._record_change(old_item, {**old_item, 'status': status.value})
+        return DeviceStatus(old_item['status'])
+
+    def delete(self, device_id: str) -> bool:
+        """Delete device"""
+        try:
+            response = self.client.delete_item(
+                TableName=self.table_name,
+                Key={'deviceId': {'S': device_id}},
+                ReturnValues='ALL_OLD'
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to delete device {device_id}: {e}")
+        self._last_readings.pop(device_id, None)
+        self._record_change(_old_item(response), None)
+        return True
+
+    def update_last_reading(self, device_id: str, reading: Dict):
+        """
+        Update device's last reading; a reporting device is online unless
+        it is in maintenance (deleted devices raise DeviceNotFoundError)
+
+        With a cached previous reading only the changed metrics are SET
+        (removed ones REMOVEd) and updatedAt is left alone when nothing
+        changed. A delta write is conditional on the device still being
+        online with a stored reading; otherwise the cache is stale and
+        the full reading is written instead.
+        """
+        now = int(datetime.utcnow().timestamp() * 1000)
+        cached = self._last_readings.get(device_id)
+        if cached is not None:
+            previous = cached['reading']
+            changed = {k: v for k, v in reading.items() if k not in previous or previous[k] != v}
+            removed = [k for k in previous if k not in reading]
+            if not changed and not removed and (
+                now - cached['lastSeen'] < settings.LAST_SEEN_WRITE_INTERVAL_SECONDS * 1000
+            ):
+                return
+            if self._write_reading_delta(device_id, changed, removed, now):
+                self._cache_reading(device_id, reading, now)
+                return
+            del self._last_readings[device_id]
+
+        # Delta writes need an online device, so others are not cached
+        if self._write_last_reading(device_id, reading, now):
+            self._cache_reading(device_id, reading, now)
+
+    def _write_last_reading(self, device_id: str, reading: Dict, now: int) -> bool:
+        """
+        Replace the whole reading and mark the device online
+
+        Only online, offline and registered devices are brought online; a
+        device in maintenance keeps its status and only the reading is
+        written, and readings of deleted devices are rejected.
+
+        Returns:
+            Whether the device is online after the write
+        """
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key={'deviceId': {'S': device_id}},
+                UpdateExpression='SET lastReading = :r, lastSeen = :t, updatedAt = :t, #s = :online',
+                ConditionExpression='attribute_exists(deviceId) AND #s IN (:online, :offline, :registered)',
+                ExpressionAttributeNames={'#s': 'status'},
+                ExpressionAttributeValues={
+                    ':r': serialize_value(reading),
+                    ':t': {'N': str(now)},
+                    ':online': {'S': DeviceStatus.ONLINE.value},
+                    ':offline': {'S': DeviceStatus.OFFLINE.value},
+                    ':registered': {'S': DeviceStatus.REGISTERED.value}
+                },
+                ReturnValues='ALL_OLD'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                self._write_maintenance_reading(device_id, reading, now)
+                return False
+            raise DatabaseError(f"Failed to update last reading for {device_id}: {e}")
+
+        old_item = deserialize_item(response['Attributes'])
+        if old_item.get('status') != DeviceStatus.ONLINE.value:
+            self._record_change(old_item, {**old_item, 'status': DeviceStatus.ONLINE.value})
+        return True
+
+    def _write_maintenance_reading(self, device_id: str, reading: Dict, now: int):
+        """Write the reading of a device in maintenance without changing its status"""
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key={'deviceId': {'S': device_id}},
+                UpdateExpression='SET lastReading = :r, lastSeen = :t, updatedAt = :t',
+                ConditionExpression='attribute_exists(deviceId) AND #s = :maintenance',
+                ExpressionAttributeNames={'#s': 'status'},
+                ExpressionAttributeValues={
+                    ':r': serialize_value(reading),
+                    ':t': {'N': str(now)},
+                    ':maintenance': {'S': DeviceStatus.MAINTENANCE.value}
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                raise DeviceNotFoundError(device_id)
+            raise DatabaseError(f"Failed to update last reading for {device_id}: {e}")
+
+    def _write_reading_delta(self, device_id: str, changed: Dict, removed: List[str], now: int) -> bool:
+        """
+        Write only the changed metrics of an online device
+
+        Returns:
+            False if the device is no longer online with a stored reading
+        """
+        names = {'#s': 'status'}
+        values = {':t': {'N': str(now)}, ':online': {'S': DeviceStatus.ONLINE.value}}
+        assignments = ['lastSeen = :t']
+        if changed or removed:
+            assignments.append('updatedAt = :t')
+        for i, (metric, value) in enumerate(changed.items()):
+            names[f'#m{i}'] = metric
+            values[f':m{i}'] = serialize_value(value)
+            assignments.append(f'lastReading.#m{i} = :m{i}')
+        removals = []
+        for i, metric in enumerate(removed):
+            names[f'#r{i}'] = metric
+            removals.append(f'lastReading.#r{i}')
+
+        expression = 'SET ' + ', '.join(assignments)
+        if removals:
+            expression += ' REMOVE ' + ', '.join(removals)
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key={'deviceId': {'S': device_id}},
+                UpdateExpression=expression,
+                ConditionExpression='attribute_exists(lastReading) AND #s = :online',
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise DatabaseError(f"Failed to update last reading for {device_id}: {e}")
+        return True
+
+    def _cache_reading(self, device_id: str, reading: Dict, now: int):
+        """Remember the reading written for a device, evicting the least recent"""
+        self._last_readings[device_id] = {'reading': dict(reading), 'lastSeen': now}
+        self._last_readings.move_to_end(device_id)
+        while len(self._last_readings) > settings.LAST_READING_CACHE_SIZE:
+            self._last_readings.popitem(last=False)
+
+    def _record_change(self, old_item: Optional[Dict], new_item: Optional[Dict]):
+        """Propagate a write to the fleet counters and the search index"""
+        if old_item is None and new_item is None:
+            return
+        if self.stats_repository:
+            self._update_stats(old_item, new_item)
+        if self.search_index:
+            self._safe_index(
+                self.search_index.index_device,
+                Device.from_trusted_dynamodb_item(old_item) if old_item else None,
+                Device.from_trusted_dynamodb_item(new_item) if new_item else None
+            )
+
+    def _update_stats(self, old_item: Optional[Dict], new_item: Optional[Dict]):
+        """Apply the fleet counter delta between two versions of an item"""
+        stats = self.stats_repository
+        if old_item is None:
+            self._safe_stats(stats.record_added, new_item['organizationId'],
+                             new_item['deviceType'], new_item['status'])
+        elif new_item is None:
+            self._safe_stats(stats.record_removed, old_item['organizationId'],
+                             old_item['deviceType'], old_item['status'])
+        elif (old_item['organizationId'] != new_item['organizationId']
+              or old_item['deviceType'] != new_item['deviceType']):
+            self._safe_stats(stats.record_removed, old_item['organizationId'],
+                             old_item['deviceType'], old_item['status'])
+            self._safe_stats(stats.record_added, new_item['organizationId'],
+                             new_item['deviceType'], new_item['status'])
+        elif old_item['status'] != new_item['status']:
+            self._safe_stats(stats.record_transition, new_item['organizationId'],
+                             new_item['deviceType'], old_item['status'], new_item['status'])
+
+    @staticmethod
+    def _safe_stats(operation, *args):
+        """Counter updates never fail the device write; reconciliation repairs drift"""
+        try:
+            operation(*args)
+        except Exception as e:
+            logger.warning(f"Fleet stats update failed: {str(e)}")
+
+    @staticmethod
+    def _safe_index(operation, *args):
+        """Index updates never fail the device write; failures are logged"""
+        try:
+            operation(*args)
+        except Exception as e:
+            logger.warning(f"Device index update failed: {str(e)}")
+
+    def scan_status_summary(self):
+        """
+        Yield the status-relevant attributes of every device
+
+        Used by the fleet stats reconciliation job; the projection keeps the
+        scan cheap compared to reading full items.
+        """
+        paginator = self.client.get_paginator('scan')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                ProjectionExpression='deviceId, organizationId, deviceType, #s, lastSeen',
+                ExpressionAttributeNames={'#s': 'status'}
+            ):
+                for item in response.get('Items', []):
+                    yield deserialize_item(item)
+        except ClientError as e:
+            raise DatabaseError(f"Failed to scan devices: {e}")
+
+    def scan_devices(self, start_key: Optional[Dict] = None) -> Iterator[Tuple[List[Device], Optional[Dict]]]:
+        """
+        Yield every device, one scan page at a time, with the key to resume
+        the scan after that page (None after the last one)
+
+        Used by the search index rebuild, which continues a long scan in a
+        new invocation from the last key it finished.
+        """
+        kwargs = {'TableName': self.table_name, 'ConsistentRead': True}
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        while True:
+            try:
+                response = self.client.scan(**kwargs)
+            except ClientError as e:
+                raise DatabaseError(f"Failed to scan devices: {e}")
+            next_key = response.get('LastEvaluatedKey')
+            devices = Device.from_trusted_dynamodb_items(
+                [deserialize_item(item) for item in response.get('Items', [])]
+            )
+            yield devices, next_key
+            if not next_key:
+                return
+            kwargs['ExclusiveStartKey'] = next_key
+
+    def _batch_write(self, requests: List[Dict]) -> List[str]:
+        """Write one BatchWriteItem chunk, returns device IDs left unprocessed"""
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+            try:
+                response = self.client.batch_write_item(
+                    RequestItems={self.table_name: requests}
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ProvisionedThroughputExceededException':
+                    raise DatabaseError(f"Failed to batch write devices: {e}")
+                continue
+            requests = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not requests:
+                return []
+        return [r['PutRequest']['Item']['deviceId']['S'] for r in requests]
+
+    def _query_organization(self, organization_id: str):
+        """Yield deserialized items of an organization, page by page"""
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                IndexName=ORGANIZATION_INDEX,
+                KeyConditionExpression='organizationId = :org',
+                ExpressionAttributeValues={':org': {'S': organization_id}}
+            ):
+                for item in response.get('Items', []):
+                    yield deserialize_item(item)
+        except ClientError as e:
+            raise DatabaseError(f"Failed to query devices for {organization_id}: {e}")
+
+
+def _old_item(response: Dict) -> Optional[Dict]:
+    """Previous item returned by a write with ReturnValues=ALL_OLD"""
+    attributes = response.get('Attributes')
+    return deserialize_item(attributes) if attributes else None
+
+
+def _to_storage_value(value):
+    """Convert entity values to the representation stored in DynamoDB"""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(by_alias=True)
+    return value
+
+
+def _matches(item: Dict, filters: Dict) -> bool:
+    """Apply list filters (status, deviceType, tags, near, bbox) to a raw item"""
+    status = filters.get('status')
+    if status and item.get('status') != status:
+        return False
+    device_type = filters.get('deviceType')
+    if device_type and item.get('deviceType') != device_type:
+        return False
+    tags = filters.get('tags')
+    if tags and not set(tags).issubset(item.get('tags') or []):
+        return False
+    location = item.get('location') or {}
+    near = filters.get('near')
+    if near and haversine_meters(
+        float(near['lat']), float(near['lon']), location['lat'], location['lon']
+    ) > float(near['radiusMeters']):
+        return False
+    bbox = filters.get('bbox')
+    if bbox and not (
+        float(bbox['minLat']) <= location['lat'] <= float(bbox['maxLat'])
+        and float(bbox['minLon']) <= location['lon'] <= float(bbox['maxLon'])
+    ):
+        return False
+    return True
+
+
+def _paginate(items: List[Dict], page: int, page_size: int) -> Dict:
+    """Slice raw items into the repository pagination shape, hydrating only the page"""
+    start = (page - 1) * page_size
+    return {
+        'items': Device.from_trusted_dynamodb_items(items[start:start + page_size]),
+        'pagination': _pagination(len(items), page, page_size)
+    }
+
+
+def _pagination(total: int, page: int, page_size: int) -> Dict:
+    return {
+        'page': page,
+        'pageSize': page_size,
+        'totalItems': total,
+        'totalPages': math.ceil(total / page_size) if page_size else 0
+    }
@@ -0,0 +1,297 @@
+"""DynamoDB Device Search Index - Adapter implementing IDeviceSearchIndex"""
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.entities.device import Device
+from ...domain.entities.firmware import FirmwareVersion
+from ...domain.ports.repositories.i_device_search_index import IDeviceSearchIndex
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError, ValidationError
+from ...shared.middleware.logger import logger
+from ...shared.utils import geohash
+
+BATCH_WRITE_SIZE = 25
+# Devices are stored with a full-precision geohash; the partition holds a
+# precision-5 cell (~4.9 km x 4.9 km) and finer cells are sort-key prefixes
+GEOHASH_PRECISION = 9
+GEO_PARTITION_PRECISION = 5
+# Geo queries use the finest precision whose cover stays under this many
+# cells; areas needing more partitions than allowed fall back to scanning
+MAX_GEO_CELLS = 16
+MAX_GEO_PARTITIONS = 64
+# Firmware postings span organizations, so each device type is spread
+# over this many partitions and read in parallel
+FIRMWARE_SHARDS = 8
+# Sorts before every version key
+UNKNOWN_VERSION_KEY = '-'
+
+
+class DynamoDBDeviceSearchIndex(IDeviceSearchIndex):
+    """
+    Inverted device index stored in DEVICE_INDEX_TABLE (term, sk)
+
+    Postings, one item each:
+        term='{org}|status|{status}'   sk='{deviceId}'
+        term='{org}|type|{type}'       sk='{deviceId}'
+        term='{org}|tag|{tag}'         sk='{deviceId}'
+        term='{org}|geo|{geohash[:5]}' sk='{geohash9}#{deviceId}' (+ lat, lon)
+        term='fw|{type}|{shard}'       sk='{versionKey}#{deviceId}' (+ deviceId, organizationId)
+
+    Conjunctive filters intersect posting lists; radius and bounding-box
+    filters read the geohash cells covering the area and check the exact
+    position stored on each posting, so no device item is read.
+
+    Firmware postings are fleet-wide and sorted by FirmwareVersion.sort_key,
+    so "TS-2000 below v1.3.0" is one range read per shard.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, client=None):
+        self.table_name = table_name or settings.DEVICE_INDEX_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+
+    def index_device(self, old: Optional[Device], new: Optional[Device]):
+        """Write only the postings that differ between two versions"""
+        old_postings = _postings(old) if old else {}
+        new_postings = _postings(new) if new else {}
+        requests = [
+            {'DeleteRequest': {'Key': _key(term, sk)}}
+            for (term, sk) in old_postings.keys() - new_postings.keys()
+        ]
+        requests.extend(
+            {'PutRequest': {'Item': item}}
+            for key, item in new_postings.items()
+            if old_postings.get(key) != item
+        )
+        self._batch_write(requests)
+
+    def index_devices(self, devices: List[Device]):
+        """Add postings for newly created devices"""
+        self._batch_write([
+            {'PutRequest': {'Item': item}}
+            for device in devices
+            for item in _postings(device).values()
+        ])
+
+    def scan_postings(self, start_key: Optional[Dict] = None) -> Iterator[Tuple[List[Tuple[str, str, str]], Optional[Dict]]]:
+        """
+        Yield every posting as (term, sk, deviceId), one scan page at a
+        time, with the key to resume the scan after that page (None after
+        the last one)
+        """
+        kwargs = {'TableName': self.table_name, 'ProjectionExpression': 'term, sk'}
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        while True:
+            try:
+                response = self.client.scan(**kwargs)
+            except ClientError as e:
+                raise DatabaseError(f"Failed to scan device index: {e}")
+            next_key = response.get('LastEvaluatedKey')
+            # Every sort key ends with the device ID
+            yield [
+                (item['term']['S'], item['sk']['S'], item['sk']['S'].rsplit('#', 1)[-1])
+                for item in response.get('Items', [])
+            ], next_key
+            if not next_key:
+                return
+            kwargs['ExclusiveStartKey'] = next_key
+
+    def remove_stale_postings(self, postings: List[Tuple[str, str, str]], devices: List[Device]) -> int:
+        """
+        Delete the postings (from scan_postings) that the current version
+        of their device does not have; devices missing from `devices` no
+        longer exist. Returns the number of postings deleted.
+        """
+        current = set()
+        for device in devices:
+            current.update(_postings(device).keys())
+        stale = [(term, sk) for term, sk, _ in postings if (term, sk) not in current]
+        self._batch_write([{'DeleteRequest': {'Key': _key(term, sk)}} for term, sk in stale])
+        return len(stale)
+
+    def search(self, organization_id: str, filters: Dict) -> Optional[List[str]]:
+        """Resolve filters to sorted device IDs, None if not indexable"""
+        terms = []
+        if filters.get('tags'):
+            terms.extend(f"{organization_id}|tag|{tag}" for tag in filters['tags'])
+        if filters.get('deviceType'):
+            terms.append(f"{organization_id}|type|{filters['deviceType']}")
+        if filters.get('status'):
+            terms.append(f"{organization_id}|status|{filters['status']}")
+
+        area = _area_filter(filters)
+        if not terms and area is None:
+            return None
+
+        matches: Optional[Set[str]] = None
+        if area is not None:
+            min_lat, min_lon, max_lat, max_lon = area[0]
+            if min_lat > max_lat or min_lon > max_lon:
+                return []
+            matches = self._search_area(organization_id, *area)
+            # Term postings alone would ignore the location filter
+            if matches is None:
+                return None
+
+        # Status postings are typically the largest lists, so they go last
+        # and are skipped entirely once the intersection is empty
+        for term in terms:
+            if matches is not None and not matches:
+                break
+            ids = set(self._query_term(term))
+            matches = ids if matches is None else matches & ids
+
+        return sorted(matches or ())
+
+    def find_by_firmware(
+        self,
+        device_type: str,
+        below: Optional[FirmwareVersion] = None,
+        organization_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """Stream the IDs of devices of a type whose firmware version is below `below`"""
+        def query_shard(shard: int) -> List[str]:
+            kwargs = {
+                'KeyConditionExpression': 'term = :t',
+                'ExpressionAttributeValues': {':t': {'S': f"fw|{device_type}|{shard}"}},
+                'ProjectionExpression': 'deviceId'
+            }
+            if below is not None:
+                kwargs['KeyConditionExpression'] += ' AND sk < :below'
+                kwargs['ExpressionAttributeValues'][':below'] = {'S': below.sort_key()}
+            if organization_id is not None:
+                kwargs['FilterExpression'] = 'organizationId = :org'
+                kwargs['ExpressionAttributeValues'][':org'] = {'S': organization_id}
+            return [item['deviceId']['S'] for item in self._query(**kwargs)]
+
+        with ThreadPoolExecutor(max_workers=FIRMWARE_SHARDS) as executor:
+            for device_ids in executor.map(query_shard, range(FIRMWARE_SHARDS)):
+                yield from device_ids
+
+    def _search_area(
+        self,
+        organization_id: str,
+        bbox: Tuple[float, float, float, float],
+        center: Optional[Tuple[float, float, float]]
+    ) -> Optional[Set[str]]:
+        """Device IDs inside a bounding box (and radius), None if too large"""
+        min_lat, min_lon, max_lat, max_lon = bbox
+        precision = next(
+            (p for p in range(GEOHASH_PRECISION, GEO_PARTITION_PRECISION - 1, -1)
+             if geohash.cover_count(min_lat, min_lon, max_lat, max_lon, p) <= MAX_GEO_CELLS),
+            None
+        )
+        if precision is None:
+            precision = GEO_PARTITION_PRECISION
+            if geohash.cover_count(min_lat, min_lon, max_lat, max_lon, precision) > MAX_GEO_PARTITIONS:
+                logger.info("Geo filter area too large for the index, falling back to scan")
+                return None
+
+        matches = set()
+        for cell in geohash.cover(min_lat, min_lon, max_lat, max_lon, precision):
+            term = f"{organization_id}|geo|{cell[:GEO_PARTITION_PRECISION]}"
+            for item in self._query_geo_cell(term, cell):
+                lat, lon = float(item['lat']['N']), float(item['lon']['N'])
+                if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                    continue
+                if center and geohash.haversine_meters(center[0], center[1], lat, lon) > center[2]:
+                    continue
+                matches.add(item['deviceId']['S'])
+        return matches
+
+    def _query_term(self, term: str) -> Iterable[str]:
+        for item in self._query(
+            KeyConditionExpression='term = :t',
+            ExpressionAttributeValues={':t': {'S': term}},
+            ProjectionExpression='sk'
+        ):
+            yield item['sk']['S']
+
+    def _query_geo_cell(self, term: str, cell: str) -> Iterable[Dict]:
+        return self._query(
+            KeyConditionExpression='term = :t AND begins_with(sk, :cell)',
+            ExpressionAttributeValues={':t': {'S': term}, ':cell': {'S': cell}},
+            ProjectionExpression='deviceId, lat, lon'
+        )
+
+    def _query(self, **kwargs) -> Iterable[Dict]:
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(TableName=self.table_name, **kwargs):
+                yield from response.get('Items', [])
+        except ClientError as e:
+            raise DatabaseError(f"Failed to query device index: {e}")
+
+    def _batch_write(self, requests: List[Dict]):
+        for start in range(0, len(requests), BATCH_WRITE_SIZE):
+            pending = requests[start:start + BATCH_WRITE_SIZE]
+            try:
+                while pending:
+                    response = self.client.batch_write_item(RequestItems={self.table_name: pending})
+                    pending = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            except ClientError as e:
+                raise DatabaseError(f"Failed to write device index postings: {e}")
+
+
+def _postings(device: Device) -> Dict[Tuple[str, str], Dict]:
+    """All postings of a device keyed by (term, sk)"""
+    org = device.organization_id
+    device_id = device.device_id
+    terms = [f"{org}|status|{device.status.value}", f"{org}|type|{device.device_type}"]
+    terms.extend(f"{org}|tag|{tag}" for tag in set(device.tags))
+    postings = {(term, device_id): _key(term, device_id) for term in terms}
+
+    location = device.location
+    cell = geohash.encode(location.lat, location.lon, GEOHASH_PRECISION)
+    term = f"{org}|geo|{cell[:GEO_PARTITION_PRECISION]}"
+    sk = f"{cell}#{device_id}"
+    postings[(term, sk)] = {
+        **_key(term, sk),
+        'deviceId': {'S': device_id},
+        'lat': {'N': str(location.lat)},
+        'lon': {'N': str(location.lon)}
+    }
+
+    version = FirmwareVersion.parse(device.firmware_version)
+    shard = zlib.crc32(device_id.encode('utf-8')) % FIRMWARE_SHARDS
+    term = f"fw|{device.device_type}|{shard}"
+    sk = f"{version.sort_key() if version else UNKNOWN_VERSION_KEY}#{device_id}"
+    postings[(term, sk)] = {
+        **_key(term, sk),
+        'deviceId': {'S': device_id},
+        'organizationId': {'S': org}
+    }
+    return postings
+
+
+def _key(term: str, sk: str) -> Dict:
+    return {'term': {'S': term}, 'sk': {'S': sk}}
+
+
+def _area_filter(filters: Dict):
+    """
+    Normalize 'near'/'bbox' filters to (bbox, center-with-radius); with
+    both, the bbox is the intersection of the radius bbox and the given
+    one (empty when min > max)
+    """
+    bbox = center = None
+    try:
+        if filters.get('near'):
+            near = filters['near']
+            lat, lon, radius = float(near['lat']), float(near['lon']), float(near['radiusMeters'])
+            bbox, center = geohash.radius_bbox(lat, lon, radius), (lat, lon, radius)
+        if filters.get('bbox'):
+            box = filters['bbox']
+            given = (float(box['minLat']), float(box['minLon']),
+                     float(box['maxLat']), float(box['maxLon']))
+            bbox = given if bbox is None else (
+                max(bbox[0], given[0]), max(bbox[1], given[1]),
+                min(bbox[2], given[2]), min(bbox[3], given[3])
+            )
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError("Invalid location filter", field='near' if 'near' in filters else 'bbox')
+    return None if bbox is None else (bbox, center)
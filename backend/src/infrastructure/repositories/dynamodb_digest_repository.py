@@ -0,0 +1,168 @@
+"""DynamoDB Digest Repository - Adapter implementing IDigestRepository"""
+import time
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.entities.digest_entry import DigestEntry
+from ...domain.ports.repositories.i_digest_repository import IDigestRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError
+from .dynamodb_codec import deserialize_item, serialize_item
+
+BATCH_WRITE_SIZE = 25  # BatchWriteItem hard limit
+BATCH_WRITE_MAX_ATTEMPTS = 5
+# Due entries are spread over this many dueAt-index partitions
+DUE_SHARDS = 8
+SENT_PREFIX = 'SENT#'
+# Sent markers only need to outlive redeliveries of the alert queue
+SENT_TTL_SECONDS = 2 * 24 * 60 * 60
+# Entries that could never be flushed (user gone, ...) expire after this
+ENTRY_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+class DynamoDBDigestRepository(IDigestRepository):
+    """
+    Digest buffer in DIGEST_TABLE, partitioned by userId
+
+    Entries:       userId=<user>  entryKey=<windowEnd>#<channel>#<alertId>
+    Sent markers:  userId=<user>  entryKey=SENT#<windowEnd>  (entryKeys SS)
+
+    Entries carry dueShard/dueAt, so dueAt-index (PK dueShard, SK dueAt)
+    lists the due entries of all users; markers do not appear in it. dueAt
+    starts at the window end and is moved later for entries that cannot be
+    sent yet. Put requests overwrite, so buffering an entry again is
+    idempotent.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, client=None):
+        self.table_name = table_name or settings.DIGEST_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+
+    def add_entries(self, entries: List[DigestEntry]) -> None:
+        """Buffer entries; adding an entry again is a no-op"""
+        self._put_entries(entries, None)
+
+    def defer_entries(self, entries: List[DigestEntry], due_at: int) -> None:
+        """Make entries due again at due_at (epoch seconds) instead of now"""
+        self._put_entries(entries, due_at)
+
+    def find_due(
+        self,
+        now: int,
+        limit: int,
+        cursor: Optional[Dict] = None
+    ) -> Tuple[List[DigestEntry], Optional[Dict]]:
+        """
+        Up to limit entries due at or before now (epoch seconds), after
+        cursor, and the cursor to continue from (None once all were listed)
+
+        The cursor is {'shard': n, 'startKey': ...}, the query position in
+        one dueAt-index partition.
+        """
+        entries: List[DigestEntry] = []
+        shard = cursor['shard'] if cursor else 0
+        start_key = cursor.get('startKey') if cursor else None
+        try:
+            while shard < DUE_SHARDS:
+                kwargs = {
+                    'TableName': self.table_name,
+                    'IndexName': 'dueAt-index',
+                    'KeyConditionExpression': 'dueShard = :shard AND dueAt <= :now',
+                    'ExpressionAttributeValues': {':shard': {'S': f'shard-{shard}'}, ':now': {'N': str(now)}},
+                    'Limit': limit - len(entries)
+                }
+                if start_key:
+                    kwargs['ExclusiveStartKey'] = start_key
+                response = self.client.query(**kwargs)
+                entries.extend(
+                    DigestEntry.from_dict(deserialize_item(item)) for item in response.get('Items', [])
+                )
+                start_key = response.get('LastEvaluatedKey')
+                if not start_key:
+                    shard += 1
+                if len(entries) >= limit:
+                    break
+        except ClientError as e:
+            raise DatabaseError(f"Failed to query due digest entries: {e}")
+        if shard >= DUE_SHARDS:
+            return entries, None
+        return entries, {'shard': shard, 'startKey': start_key}
+
+    def find_sent_keys(self, user_id: str) -> Set[str]:
+        """Keys of a user's entries that were sent recently"""
+        keys: Set[str] = set()
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                KeyConditionExpression='userId = :user AND begins_with(entryKey, :sent)',
+                ExpressionAttributeValues={':user': {'S': user_id}, ':sent': {'S': SENT_PREFIX}}
+            ):
+                for item in response.get('Items', []):
+                    keys.update(item.get('entryKeys', {}).get('SS', []))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to query sent digests of {user_id}: {e}")
+        return keys
+
+    def mark_sent(self, user_id: str, entries: List[DigestEntry]) -> None:
+        """Record entries as sent, so entries added again are not sent twice"""
+        by_window: Dict[int, Set[str]] = {}
+        for entry in entries:
+            by_window.setdefault(entry.window_end, set()).add(entry.key)
+        for window_end, keys in by_window.items():
+            try:
+                self.client.update_item(
+                    TableName=self.table_name,
+                    Key={'userId': {'S': user_id}, 'entryKey': {'S': f'{SENT_PREFIX}{window_end:012d}'}},
+                    UpdateExpression='ADD entryKeys :keys SET expiresAt = :expires',
+                    ExpressionAttributeValues={
+                        ':keys': {'SS': sorted(keys)},
+                        ':expires': {'N': str(int(time.time()) + SENT_TTL_SECONDS)}
+                    }
+                )
+            except ClientError as e:
+                raise DatabaseError(f"Failed to mark digest of {user_id} sent: {e}")
+
+    def delete_entries(self, entries: List[DigestEntry]) -> None:
+        """Remove entries from the buffer"""
+        keys = {(entry.user_id, entry.key) for entry in entries}
+        self._batch_write([
+            {'DeleteRequest': {'Key': {'userId': {'S': user_id}, 'entryKey': {'S': key}}}}
+            for user_id, key in keys
+        ])
+
+    def _put_entries(self, entries: List[DigestEntry], due_at: Optional[int]):
+        # A batch may not contain the same key twice
+        unique = {(entry.user_id, entry.key): entry for entry in entries}
+        requests = []
+        for entry in unique.values():
+            item = entry.to_dict()
+            item.update({
+                'entryKey': entry.key,
+                'dueShard': f"shard-{zlib.crc32(entry.user_id.encode('utf-8')) % DUE_SHARDS}",
+                'dueAt': entry.window_end if due_at is None else due_at,
+                'expiresAt': entry.window_end + ENTRY_TTL_SECONDS
+            })
+            requests.append({'PutRequest': {'Item': serialize_item(item)}})
+        self._batch_write(requests)
+
+    def _batch_write(self, requests: List[Dict]):
+        for start in range(0, len(requests), BATCH_WRITE_SIZE):
+            chunk = requests[start:start + BATCH_WRITE_SIZE]
+            for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(min(0.05 * 2 ** attempt, 1.0))
+                try:
+                    response = self.client.batch_write_item(RequestItems={self.table_name: chunk})
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ProvisionedThroughputExceededException':
+                        raise DatabaseError(f"Failed to write digest entries: {e}")
+                    continue
+                chunk = response.get('UnprocessedItems', {}).get(self.table_name, [])
+                if not chunk:
+                    break
+            else:
+                raise DatabaseError(f"{len(chunk)} digest entry writes left unprocessed")
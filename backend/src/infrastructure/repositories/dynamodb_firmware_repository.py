@@ -0,0 +1,80 @@
+"""DynamoDB Firmware Repository - Adapter implementing IFirmwareRepository"""
+from typing import Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.entities.firmware import Firmware
+from ...domain.ports.repositories.i_firmware_repository import IFirmwareRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError
+from .dynamodb_codec import deserialize_item, serialize_item, serialize_value
+
+
+class DynamoDBFirmwareRepository(IFirmwareRepository):
+    """
+    Firmware in FIRMWARE_TABLE, keyed by firmwareId
+
+    The catalog holds one item per release, so listing it is a scan.
+    update_firmware only sets the given attributes, so processes that
+    work on the same release (ingestion, delta generation) do not
+    overwrite each other.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, client=None):
+        self.table_name = table_name or settings.FIRMWARE_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+
+    def save_firmware(self, firmware: Firmware) -> Firmware:
+        """Save firmware"""
+        item = {k: v for k, v in firmware.to_dict().items() if v is not None}
+        try:
+            self.client.put_item(TableName=self.table_name, Item=serialize_item(item))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to save firmware {firmware.firmware_id}: {e}")
+        return firmware
+
+    def find_firmware_by_id(self, firmware_id: str) -> Optional[Firmware]:
+        """Find firmware by ID"""
+        try:
+            response = self.client.get_item(
+                TableName=self.table_name,
+                Key={'firmwareId': {'S': firmware_id}}
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to get firmware {firmware_id}: {e}")
+        item = response.get('Item')
+        return Firmware.from_dict(deserialize_item(item)) if item else None
+
+    def update_firmware(self, firmware_id: str, updates: Dict) -> Optional[Firmware]:
+        """Update attributes of a firmware (to_dict names); None if it does not exist"""
+        names = {f'#a{i}': name for i, name in enumerate(updates)}
+        values = {f':v{i}': serialize_value(value) for i, value in enumerate(updates.values())}
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key={'firmwareId': {'S': firmware_id}},
+                UpdateExpression='SET ' + ', '.join(f'#a{i} = :v{i}' for i in range(len(updates))),
+                ConditionExpression='attribute_exists(firmwareId)',
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return None
+            raise DatabaseError(f"Failed to update firmware {firmware_id}: {e}")
+        return Firmware.from_dict(deserialize_item(response['Attributes']))
+
+    def find_all_firmware(self, device_type: Optional[str] = None) -> List[Firmware]:
+        """Find all firmware, optionally filtered by device type"""
+        firmware = []
+        paginator = self.client.get_paginator('scan')
+        try:
+            for response in paginator.paginate(TableName=self.table_name):
+                firmware.extend(Firmware.from_dict(deserialize_item(item)) for item in response.get('Items', []))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to scan firmware: {e}")
+        if device_type is not None:
+            firmware = [f for f in firmware if f.is_compatible_with(device_type)]
+        return firmware
@@ -0,0 +1,158 @@
+"""DynamoDB Fleet Stats Repository - Adapter implementing IFleetStatsRepository"""
+from datetime import datetime
+from typing import Dict, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.entities.device import DeviceStatus
+from ...domain.ports.repositories.i_fleet_stats_repository import IFleetStatsRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError
+from .dynamodb_codec import deserialize_item, serialize_item
+
+STATUS_PREFIX = 'status#'
+TYPE_PREFIX = 'type#'
+
+
+class DynamoDBFleetStatsRepository(IFleetStatsRepository):
+    """
+    Fleet counters stored as one item per organization in FLEET_STATS_TABLE
+
+    Every counter is a top-level number attribute ('status#online',
+    'type#temperature-sensor', ...) changed with atomic ADD, so concurrent
+    writers never lose increments and the dashboard reads one item.
+    Type counters exclude soft-deleted devices.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, client=None):
+        self.table_name = table_name or settings.FLEET_STATS_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+
+    def record_added(self, organization_id: str, device_type: str, status: str, count: int = 1):
+        """Count devices added to the fleet"""
+        deltas = {STATUS_PREFIX + status: count}
+        if status != DeviceStatus.DELETED.value:
+            deltas[TYPE_PREFIX + device_type] = count
+        self._add(organization_id, deltas)
+
+    def record_removed(self, organization_id: str, device_type: str, status: str):
+        """Count a device removed from the fleet"""
+        deltas = {STATUS_PREFIX + status: -1}
+        if status != DeviceStatus.DELETED.value:
+            deltas[TYPE_PREFIX + device_type] = -1
+        self._add(organization_id, deltas)
+
+    def record_transition(
+        self,
+        organization_id: str,
+        device_type: str,
+        old_status: str,
+        new_status: str
+    ):
+        """Move a device from one status counter to another"""
+        if old_status == new_status:
+            return
+        deltas = {STATUS_PREFIX + old_status: -1, STATUS_PREFIX + new_status: 1}
+        if new_status == DeviceStatus.DELETED.value:
+            deltas[TYPE_PREFIX + device_type] = -1
+        elif old_status == DeviceStatus.DELETED.value:
+            deltas[TYPE_PREFIX + device_type] = 1
+        self._add(organization_id, deltas)
+
+    def get_stats(self, organization_id: str) -> Optional[Dict]:
+        """Read the counters of an organization with a single GetItem"""
+        try:
+            response = self.client.get_item(
+                TableName=self.table_name,
+                Key={'organizationId': {'S': organization_id}}
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to get fleet stats for {organization_id}: {e}")
+
+        if 'Item' not in response:
+            return None
+
+        item = deserialize_item(response['Item'])
+        by_status = {
+            key[len(STATUS_PREFIX):]: max(value, 0)
+            for key, value in item.items() if key.startswith(STATUS_PREFIX)
+        }
+        by_type = {
+            key[len(TYPE_PREFIX):]: value
+            for key, value in item.items() if key.startswith(TYPE_PREFIX) and value > 0
+        }
+        return {
+            'totalDevices': sum(
+                count for status, count in by_status.items()
+                if status != DeviceStatus.DELETED.value
+            ),
+            'byStatus': by_status,
+            'byType': by_type,
+            'reconciledAt': item.get('reconciledAt')
+        }
+
+    def snapshot_counters(self) -> Dict[str, Dict[str, int]]:
+        """Raw counters of every organization (organization ID -> counter -> value)"""
+        paginator = self.client.get_paginator('scan')
+        snapshot = {}
+        try:
+            for response in paginator.paginate(TableName=self.table_name, ConsistentRead=True):
+                for raw in response.get('Items', []):
+                    item = deserialize_item(raw)
+                    snapshot[item['organizationId']] = {
+                        key: int(value) for key, value in item.items()
+                        if key.startswith(STATUS_PREFIX) or key.startswith(TYPE_PREFIX)
+                    }
+        except ClientError as e:
+            raise DatabaseError(f"Failed to scan fleet stats: {e}")
+        return snapshot
+
+    def reconcile_stats(
+        self,
+        organization_id: str,
+        by_status: Dict[str, int],
+        by_type: Dict[str, int],
+        baseline: Dict[str, int]
+    ):
+        """
+        Move the counters of an organization from baseline to the given
+        counts with atomic ADDs; increments made since baseline was read
+        are kept
+        """
+        target = {STATUS_PREFIX + status.value: by_status.get(status.value, 0) for status in DeviceStatus}
+        target.update({TYPE_PREFIX + device_type: count for device_type, count in by_type.items()})
+        deltas = {}
+        for attribute in set(target) | set(baseline):
+            delta = target.get(attribute, 0) - baseline.get(attribute, 0)
+            if delta:
+                deltas[attribute] = delta
+        self._add(organization_id, deltas, reconciled_at=int(datetime.utcnow().timestamp() * 1000))
+
+    def _add(self, organization_id: str, deltas: Dict[str, int], reconciled_at: Optional[int] = None):
+        """Apply counter deltas with one atomic UpdateItem"""
+        names = {}
+        values = {}
+        clauses = []
+        for i, (attribute, delta) in enumerate(deltas.items()):
+            names[f'#c{i}'] = attribute
+            values[f':d{i}'] = {'N': str(delta)}
+            clauses.append(f'#c{i} :d{i}')
+        expression = 'ADD ' + ', '.join(clauses) if clauses else ''
+        if reconciled_at is not None:
+            values[':r'] = {'N': str(reconciled_at)}
+            expression = f"{expression} SET reconciledAt = :r".strip()
+        if not expression:
+            return
+        params = {
+            'TableName': self.table_name,
+            'Key': {'organizationId': {'S': organization_id}},
+            'UpdateExpression': expression,
+            'ExpressionAttributeValues': values
+        }
+        if names:
+            params['ExpressionAttributeNames'] = names
+        try:
+            self.client.update_item(**params)
+        except ClientError as e:
+            raise DatabaseError(f"Failed to update fleet stats for {organization_id}: {e}")
@@ -0,0 +1,196 @@
+"""DynamoDB User Repository - Adapter implementing IUserRepository"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.entities.user import User
+from ...domain.ports.repositories.i_user_repository import IUserRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError, UserNotFoundError
+from .dynamodb_codec import deserialize_item, serialize_item, serialize_value
+
+# Key prefix of the per-organization version items; they have no
+# organizationId attribute, so they stay out of both indexes
+ORGANIZATION_KEY_PREFIX = 'ORG#'
+
+
+class DynamoDBUserRepository(IUserRepository):
+    """
+    Users in USERS_TABLE, keyed by userId
+
+    organizationId-index and email-index serve the organization and email
+    lookups. Device tokens are a string set so they can be added and
+    removed atomically.
+
+    Every write also increments the usersVersion of the user's
+    organization (item 'ORG#<organizationId>'), which lets caches of an
+    organization's users validate themselves with one read.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, client=None):
+        self.table_name = table_name or settings.USERS_TABLE
+        self.client = client or boto3.client('dynamodb', region_name=settings.REGION)
+
+    def save(self, user: User) -> User:
+        """Save user"""
+        try:
+            self.client.put_item(TableName=self.table_name, Item=serialize_item(_to_item(user)))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to save user {user.user_id}: {e}")
+        self._bump_version(user.organization_id)
+        return user
+
+    def find_by_id(self, user_id: str) -> Optional[User]:
+        """Find user by ID"""
+        try:
+            response = self.client.get_item(
+                TableName=self.table_name,
+                Key={'userId': {'S': user_id}}
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to get user {user_id}: {e}")
+        item = response.get('Item')
+        return _from_item(deserialize_item(item)) if item else None
+
+    def find_by_email(self, email: str) -> Optional[User]:
+        """Find user by email"""
+        users = self._query_index('email-index', 'email', email)
+        return users[0] if users else None
+
+    def find_by_organization(self, organization_id: str) -> List[User]:
+        """Find all users in organization"""
+        return self._query_index('organizationId-index', 'organizationId', organization_id)
+
+    def update(self, user_id: str, updates: Dict) -> User:
+        """Update user attributes (camelCase names, as in User.to_dict)"""
+        updates = {k: v for k, v in updates.items() if k != 'userId'}
+        # Moving a user changes both organizations
+        previous = self.find_by_id(user_id) if 'organizationId' in updates else None
+        updates['updatedAt'] = int(datetime.utcnow().timestamp() * 1000)
+        names = {f'#a{i}': name for i, name in enumerate(updates)}
+        values = {f':v{i}': serialize_value(value) for i, value in enumerate(updates.values())}
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key={'userId': {'S': user_id}},
+                UpdateExpression='SET ' + ', '.join(f'#a{i} = :v{i}' for i in range(len(updates))),
+                ConditionExpression='attribute_exists(userId)',
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                raise UserNotFoundError(user_id)
+            raise DatabaseError(f"Failed to update user {user_id}: {e}")
+        user = _from_item(deserialize_item(response['Attributes']))
+        if previous and previous.organization_id != user.organization_id:
+            self._bump_version(previous.organization_id)
+        self._bump_version(user.organization_id)
+        return user
+
+    def delete(self, user_id: str) -> bool:
+        """Delete user"""
+        try:
+            response = self.client.delete_item(
+                TableName=self.table_name,
+                Key={'userId': {'S': user_id}},
+                ReturnValues='ALL_OLD'
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to delete user {user_id}: {e}")
+        if 'Attributes' not in response:
+            return False
+        self._bump_version(response['Attributes']['organizationId']['S'])
+        return True
+
+    def add_device_token(self, user_id: str, token: str) -> bool:
+        """Add device token for push notifications"""
+        return self._update_tokens(user_id, 'ADD', token)
+
+    def remove_device_token(self, user_id: str, token: str) -> bool:
+        """Remove device token"""
+        return self._update_tokens(user_id, 'DELETE', token)
+
+    def _update_tokens(self, user_id: str, action: str, token: str) -> bool:
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key={'userId': {'S': user_id}},
+                UpdateExpression=f'{action} deviceTokens :token',
+                ConditionExpression='attribute_exists(userId)',
+                ExpressionAttributeValues={':token': {'SS': [token]}},
+                ReturnValues='ALL_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise DatabaseError(f"Failed to update device tokens of {user_id}: {e}")
+        self._bump_version(response['Attributes']['organizationId']['S'])
+        return True
+
+    def get_organization_version(self, organization_id: str) -> Tuple[int, int]:
+        """
+        Version of an organization's users, incremented by every change to
+        one of them, and the time of the last change (epoch ms, 0 if unknown)
+        """
+        try:
+            response = self.client.get_item(
+                TableName=self.table_name,
+                Key={'userId': {'S': ORGANIZATION_KEY_PREFIX + organization_id}},
+                ProjectionExpression='usersVersion, usersChangedAt',
+                ConsistentRead=True
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to get users version of {organization_id}: {e}")
+        item = response.get('Item', {})
+        return (
+            int(item.get('usersVersion', {}).get('N', 0)),
+            int(item.get('usersChangedAt', {}).get('N', 0))
+        )
+
+    def _bump_version(self, organization_id: str):
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key={'userId': {'S': ORGANIZATION_KEY_PREFIX + organization_id}},
+                UpdateExpression='ADD usersVersion :one SET usersChangedAt = :now',
+                ExpressionAttributeValues={
+                    ':one': {'N': '1'},
+                    ':now': {'N': str(int(datetime.utcnow().timestamp() * 1000))}
+                }
+            )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to bump users version of {organization_id}: {e}")
+
+    def _query_index(self, index_name: str, key: str, value: str) -> List[User]:
+        users = []
+        paginator = self.client.get_paginator('query')
+        try:
+            for response in paginator.paginate(
+                TableName=self.table_name,
+                IndexName=index_name,
+                KeyConditionExpression='#k = :v',
+                ExpressionAttributeNames={'#k': key},
+                ExpressionAttributeValues={':v': {'S': value}}
+            ):
+                users.extend(_from_item(deserialize_item(item)) for item in response.get('Items', []))
+        except ClientError as e:
+            raise DatabaseError(f"Failed to query users by {key}: {e}")
+        return users
+
+
+def _to_item(user: User) -> Dict:
+    item = {k: v for k, v in user.to_dict().items() if v is not None}
+    # String sets cannot be empty
+    tokens = set(item.pop('deviceTokens', None) or ())
+    if tokens:
+        item['deviceTokens'] = tokens
+    return item
+
+
+def _from_item(item: Dict) -> User:
+    item['deviceTokens'] = sorted(item.get('deviceTokens') or ())
+    return User.from_dict(item)
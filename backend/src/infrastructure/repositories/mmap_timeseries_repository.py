@@ -0,0 +1,347 @@
+"""Memory-mapped Time Series Repository - Local adapter implementing ITimeSeriesRepository"""
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from ...domain.ports.repositories.i_timeseries_repository import ITimeSeriesRepository
+from ...shared.config.settings import settings
+from ...shared.middleware.logger import logger
+from ...shared.utils.ddsketch import DDSketch, bucket_sketches
+from .timestream_repository import interval_to_millis
+
+# One block index entry (first timestamp of the block) per this many points
+BLOCK_POINTS = 1024
+# Out-of-order points are buffered and merged by compaction past this size
+MAX_PENDING_POINTS = 4096
+
+
+class MmapTimeSeriesRepository(ITimeSeriesRepository):
+    """
+    Embedded time-series store on the local filesystem
+
+    Every device/metric series is a directory of append-only columns:
+        ts.bin   int64 timestamps (epoch ms), ascending
+        val.bin  float64 values
+        idx.bin  int64 first timestamp of every BLOCK_POINTS block
+        ooo.bin  (timestamp, value) float64 pairs written out of order
+
+    Columns are memory-mapped and cast to typed memoryviews, so range reads
+    slice the page cache without copying: the block index narrows a seek to
+    one block, then bisect finds the exact position. Points older than the
+    last appended one go to ooo.bin; compact() merges them into the sorted
+    columns (last write wins on equal timestamps) and rewrites them
+    atomically. Compaction runs when the buffer fills, and optionally on a
+    background thread every `compaction_interval` seconds.
+
+    Intended as a hot tier on local storage and as a drop-in replacement
+    for Timestream when running the pipeline offline.
+    """
+
+    def __init__(self, root_dir: Optional[str] = None, compaction_interval: Optional[float] = None):
+        self.root_dir = root_dir or settings.LOCAL_TIMESERIES_DIR
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._maps: Dict[str, Tuple[Tuple[int, int], memoryview, memoryview, memoryview]] = {}
+        self._stop = threading.Event()
+        self._compactor = None
+        if compaction_interval:
+            self._compactor = threading.Thread(
+                target=self._compact_periodically, args=(compaction_interval,), daemon=True
+            )
+            self._compactor.start()
+
+    def close(self):
+        """Stop the background compactor"""
+        self._stop.set()
+        if self._compactor:
+            self._compactor.join()
+
+    def write_sensor_data(self, device_id: str, data: Dict, timestamp: datetime) -> bool:
+        """Append the numeric metrics of a reading"""
+        millis = int(timestamp.timestamp() * 1000)
+        for metric, value in data.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.append(device_id, metric, [(millis, float(value))])
+        return True
+
+    def append(self, device_id: str, metric: str, points: List[Tuple[int, float]]):
+        """Append points to a series; out-of-order points are buffered"""
+        path = self._series_path(device_id, metric)
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            count = _file_points(os.path.join(path, 'ts.bin'), 8)
+            last = self._last_timestamp(path, count)
+            timestamps, values, index, pending = array('q'), array('d'), array('q'), array('d')
+            for millis, value in sorted(points):
+                if last is not None and millis <= last:
+                    pending.extend((float(millis), value))
+                    continue
+                if count % BLOCK_POINTS == 0:
+                    index.append(millis)
+                timestamps.append(millis)
+                values.append(value)
+                count += 1
+                last = millis
+
+            # Values first: a concurrent reader never sees a timestamp
+            # without its value
+            _append(os.path.join(path, 'val.bin'), values)
+            _append(os.path.join(path, 'ts.bin'), timestamps)
+            _append(os.path.join(path, 'idx.bin'), index)
+            if pending:
+                _append(os.path.join(path, 'ooo.bin'), pending)
+                if _file_points(os.path.join(path, 'ooo.bin'), 16) > MAX_PENDING_POINTS:
+                    self._compact_series(path)
+
+    def query_recent_data(
+        self,
+        device_id: str,
+        metric: str,
+        time_range_minutes: int = 5
+    ) -> List[Dict]:
+        """Query recent sensor data"""
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(minutes=time_range_minutes)
+        return [
+            {'timestamp': timestamp, 'value': value}
+            for timestamp, value in self.query_raw_series(device_id, metric, start_time, end_time)
+        ]
+
+    def query_raw_series(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[Tuple[int, float]]:
+        """Stream raw points of one metric in time order"""
+        timestamps, values = self.read_range(
+            device_id, metric,
+            int(start_time.timestamp() * 1000), int(end_time.timestamp() * 1000)
+        )
+        return zip(timestamps, values)
+
+    def read_range(self, device_id: str, metric: str, start: int, end: int):
+        """
+        Timestamps and values in [start, end] (epoch ms) as column sequences
+
+        Without buffered out-of-order points the columns are zero-copy
+        memoryview slices of the mapped files. They stay valid after the
+        lock is released: compaction replaces the files, never the pages
+        mapped here.
+        """
+        path = self._series_path(device_id, metric)
+        # Compaction replaces ts.bin, val.bin, idx.bin and ooo.bin one at
+        # a time: map and read them as one consistent generation
+        with self._lock:
+            timestamps, values, index = self._mapped(path)
+            lo = _seek(timestamps, index, start, bisect_left)
+            hi = max(_seek(timestamps, index, end, bisect_right), lo)
+            pending = [
+                point for point in _read_pending(os.path.join(path, 'ooo.bin'))
+                if start <= point[0] <= end
+            ]
+        if not pending:
+            return timestamps[lo:hi], values[lo:hi]
+
+        merged = dict(zip(timestamps[lo:hi], values[lo:hi]))
+        merged.update(pending)
+        ordered = sorted(merged.items())
+        return [point[0] for point in ordered], [point[1] for point in ordered]
+
+    def query_aggregated_data(
+        self,
+        device_id: str,
+        metrics: List[str],
+        start_time: datetime,
+        end_time: datetime,
+        aggregation_interval: str = '15m'
+    ) -> List[Dict]:
+        """
+        Query per-interval averages, buckets aligned to the epoch
+
+        Returns:
+            [{'timestamp': epoch ms, '<metric>': float, ...}] ordered by time
+        """
+        width = interval_to_millis(aggregation_interval)
+        start = int(start_time.timestamp() * 1000)
+        end = int(end_time.timestamp() * 1000)
+        rows: Dict[int, Dict] = {}
+        for metric in metrics:
+            timestamps, values = self.read_range(device_id, metric, start, end)
+            bucket, total, count = None, 0.0, 0
+            for timestamp, value in zip(timestamps, values):
+                current = timestamp - timestamp % width
+                if current != bucket:
+                    if count:
+                        rows.setdefault(bucket, {'timestamp': bucket})[metric] = total / count
+                    bucket, total, count = current, 0.0, 0
+                total += value
+                count += 1
+            if count:
+                rows.setdefault(bucket, {'timestamp': bucket})[metric] = total / count
+        return [rows[bucket] for bucket in sorted(rows)]
+
+    def query_bucket_sketches(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime,
+        aggregation_interval: str = '1h'
+    ) -> Dict[int, DDSketch]:
+        """Per-bucket quantile sketches, buckets aligned to the epoch"""
+        width = interval_to_millis(aggregation_interval)
+        return bucket_sketches(self.query_raw_series(device_id, metric, start_time, end_time), width)
+
+    def query_multiple_devices(
+        self,
+        device_ids: List[str],
+        metrics: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict:
+        """
+        Query raw data for several devices
+
+        Returns:
+            {deviceId: {'timestamps': [epoch ms, ...], '<metric>': [float|None, ...]}}
+        """
+        start = int(start_time.timestamp() * 1000)
+        end = int(end_time.timestamp() * 1000)
+        result = {}
+        for device_id in dict.fromkeys(device_ids):
+            series = {metric: self.read_range(device_id, metric, start, end) for metric in metrics}
+            if len(metrics) == 1:
+                timestamps, values = series[metrics[0]]
+                result[device_id] = {'timestamps': list(timestamps), metrics[0]: list(values)}
+                continue
+            all_timestamps = sorted(set().union(*(timestamps for timestamps, _ in series.values())))
+            columns = {'timestamps': all_timestamps}
+            for metric, (timestamps, values) in series.items():
+                by_time = dict(zip(timestamps, values))
+                columns[metric] = [by_time.get(timestamp) for timestamp in all_timestamps]
+            result[device_id] = columns
+        return result
+
+    def compact(self):
+        """Merge buffered out-of-order points of every series"""
+        compacted = 0
+        for device_dir in _list_dirs(self.root_dir):
+            for series_dir in _list_dirs(device_dir):
+                if os.path.exists(os.path.join(series_dir, 'ooo.bin')):
+                    with self._lock:
+                        self._compact_series(series_dir)
+                    compacted += 1
+        if compacted:
+            logger.info(f"Compacted {compacted} local time series")
+        return compacted
+
+    def _compact_periodically(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logger.warning(f"Local time-series compaction failed: {str(e)}")
+
+    def _compact_series(self, path: str):
+        """Rewrite a series with its pending points merged in (caller holds the lock)"""
+        pending_path = os.path.join(path, 'ooo.bin')
+        pending = _read_pending(pending_path)
+        timestamps, values, _ = self._mapped(path)
+        merged = dict(zip(timestamps, values))
+        merged.update(pending)
+        ordered = sorted(merged.items())
+
+        new_timestamps = array('q', (point[0] for point in ordered))
+        new_values = array('d', (point[1] for point in ordered))
+        new_index = array('q', new_timestamps[::BLOCK_POINTS])
+        # Readers keep their existing maps of the replaced files
+        for name, column in (('ts.bin', new_timestamps), ('val.bin', new_values), ('idx.bin', new_index)):
+            temporary = os.path.join(path, name + '.tmp')
+            with open(temporary, 'wb') as f:
+                column.tofile(f)
+            os.replace(temporary, os.path.join(path, name))
+        os.remove(pending_path)
+        self._maps.pop(path, None)
+
+    def _mapped(self, path: str):
+        """Typed views of the mapped columns, remapped when files grew (caller holds the lock)"""
+        ts_path = os.path.join(path, 'ts.bin')
+        try:
+            stat = os.stat(ts_path)
+            identity = (stat.st_ino, stat.st_size)
+        except FileNotFoundError:
+            return (), (), ()
+        cached = self._maps.get(path)
+        if cached and cached[0] == identity:
+            return cached[1:]
+        if not identity[1]:
+            return (), (), ()
+
+        timestamps = _map(ts_path).cast('q')
+        values = _map(os.path.join(path, 'val.bin')).cast('d')[:len(timestamps)]
+        index = _map(os.path.join(path, 'idx.bin')).cast('q')
+        self._maps[path] = (identity, timestamps, values, index)
+        return timestamps, values, index
+
+    def _last_timestamp(self, path: str, count: int) -> Optional[int]:
+        if not count:
+            return None
+        with open(os.path.join(path, 'ts.bin'), 'rb') as f:
+            f.seek((count - 1) * 8)
+            last = array('q')
+            last.frombytes(f.read(8))
+        return last[0]
+
+    def _series_path(self, device_id: str, metric: str) -> str:
+        return os.path.join(self.root_dir, quote(device_id, safe=''), quote(metric, safe=''))
+
+
+def _seek(timestamps, index, value: int, search) -> int:
+    """Position of `value` found through the block index, then within one block"""
+    count = len(timestamps)
+    block = max(bisect_right(index, value) - 1, 0)
+    lo = min(block * BLOCK_POINTS, count)
+    hi = count if block >= len(index) - 1 else min((block + 1) * BLOCK_POINTS, count)
+    return search(timestamps, value, lo, hi)
+
+
+def _map(path: str) -> memoryview:
+    with open(path, 'rb') as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _append(path: str, column: array):
+    if column:
+        with open(path, 'ab') as f:
+            column.tofile(f)
+
+
+def _file_points(path: str, point_size: int) -> int:
+    try:
+        return os.path.getsize(path) // point_size
+    except FileNotFoundError:
+        return 0
+
+
+def _read_pending(path: str) -> List[Tuple[int, float]]:
+    """Buffered out-of-order points in write order"""
+    if not os.path.exists(path):
+        return []
+    pairs = array('d')
+    with open(path, 'rb') as f:
+        pairs.frombytes(f.read())
+    return [(int(pairs[i]), pairs[i + 1]) for i in range(0, len(pairs) - 1, 2)]
+
+
+def _list_dirs(path: str) -> List[str]:
+    try:
+        return [entry.path for entry in os.scandir(path) if entry.is_dir()]
+    except FileNotFoundError:
+        return []
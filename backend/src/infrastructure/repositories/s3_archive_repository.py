@@ -0,0 +1,180 @@
+"""S3 Archive Repository - Gorilla-compressed cold tier for sensor data"""
+import json
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import ExternalServiceError
+from ...shared.utils.gorilla import (
+    TRAILER_SIZE, ChunkRef, decode_chunk, index_length, pack_archive, parse_index
+)
+
+# Suffix fetched first; large enough to hold the index of a typical device-day
+TAIL_FETCH_BYTES = 16 * 1024
+# Runs of wanted chunks separated by less than this are fetched in one request
+RANGE_MERGE_GAP_BYTES = 64 * 1024
+
+
+class S3ArchiveRepository:
+    """
+    Archived sensor data in DATA_ARCHIVE_BUCKET
+
+    One object per device and UTC day, archive/{deviceId}/{YYYY}/{MM}/{DD}.gor,
+    holding every metric of that day as Gorilla chunks of
+    ARCHIVE_CHUNK_MINUTES (see shared.utils.gorilla). Reads fetch the
+    chunk index with a suffix range request, then only the byte ranges of
+    chunks overlapping the requested time range, and decode those.
+    """
+
+    def __init__(self, bucket: Optional[str] = None, client=None):
+        self.bucket = bucket or settings.DATA_ARCHIVE_BUCKET
+        self.client = client or boto3.client('s3', region_name=settings.REGION)
+        self.chunk_millis = settings.ARCHIVE_CHUNK_MINUTES * 60 * 1000
+
+    def write_day(
+        self,
+        device_id: str,
+        day: date,
+        series: Dict[str, Tuple[Sequence[int], Sequence[float]]]
+    ) -> int:
+        """
+        Archive one device-day, replacing any earlier archive of it
+
+        Args:
+            series: {metric: (ascending timestamps in epoch ms, values)}
+
+        Returns:
+            Size of the archive in bytes
+        """
+        body = pack_archive(series, self.chunk_millis)
+        try:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=archive_key(device_id, day),
+                Body=body,
+                ContentType='application/octet-stream',
+                Metadata={'points': str(sum(len(timestamps) for timestamps, _ in series.values()))}
+            )
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"Failed to archive {device_id} for {day}: {e}")
+        return len(body)
+
+    def mark_day_archived(self, day: date, summary: Dict):
+        """Record that every device was archived for a day"""
+        key = _day_marker_key(day)
+        try:
+            self.client.put_object(
+                Bucket=self.bucket, Key=key, Body=json.dumps(summary), ContentType='application/json'
+            )
+        except ClientError as e:
+            raise ExternalServiceError('S3', f"Failed to write {key}: {e}")
+
+    def is_day_archived(self, day: date) -> bool:
+        key = _day_marker_key(day)
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise ExternalServiceError('S3', f"Failed to check {key}: {e}")
+        return True
+
+    def query_raw_series(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[Tuple[int, float]]:
+        """Stream archived points of one metric in time order; missing days are skipped"""
+        start = int(start_time.timestamp() * 1000)
+        end = int(end_time.timestamp() * 1000)
+        day = start_time.date()
+        while day <= end_time.date():
+            timestamps, values = self.read_range(device_id, metric, day, start, end)
+            yield from zip(timestamps, values)
+            day += timedelta(days=1)
+
+    def read_range(
+        self,
+        device_id: str,
+        metric: str,
+        day: date,
+        start: int,
+        end: int
+    ) -> Tuple[List[int], List[float]]:
+        """Points of one metric in [start, end] (epoch ms) from one device-day archive"""
+        key = archive_key(device_id, day)
+        refs = self._read_index(key)
+        wanted = [
+            ref for ref in refs
+            if ref.metric == metric and ref.end >= start and ref.start <= end
+        ]
+        timestamps: List[int] = []
+        values: List[float] = []
+        for batch, data in self._fetch_chunks(key, wanted):
+            for ref in batch:
+                offset = ref.offset - batch[0].offset
+                chunk_timestamps, chunk_values = decode_chunk(data[offset:offset + ref.length])
+                if start <= ref.start and ref.end <= end:
+                    timestamps.extend(chunk_timestamps)
+                    values.extend(chunk_values)
+                    continue
+                for timestamp, value in zip(chunk_timestamps, chunk_values):
+                    if start <= timestamp <= end:
+                        timestamps.append(timestamp)
+                        values.append(value)
+        return timestamps, values
+
+    def _read_index(self, key: str) -> List[ChunkRef]:
+        """Chunk index of an archive, or [] when the day was not archived"""
+        tail = self._get_range(key, f'bytes=-{TAIL_FETCH_BYTES}')
+        if tail is None:
+            return []
+        length = index_length(tail)
+        if length + TRAILER_SIZE > len(tail):
+            tail = self._get_range(key, f'bytes=-{length + TRAILER_SIZE}')
+        return parse_index(tail[-TRAILER_SIZE - length:-TRAILER_SIZE])
+
+    def _fetch_chunks(self, key: str, refs: List[ChunkRef]) -> Iterator[Tuple[List[ChunkRef], bytes]]:
+        """
+        Fetch the chunks with as few range requests as possible
+
+        Yields (chunks, bytes from the first chunk's offset) per request;
+        chunks of one metric are contiguous in the archive.
+        """
+        first = 0
+        while first < len(refs):
+            last = first
+            while (
+                last + 1 < len(refs)
+                and refs[last + 1].offset - (refs[last].offset + refs[last].length) < RANGE_MERGE_GAP_BYTES
+            ):
+                last += 1
+            begin = refs[first].offset
+            stop = refs[last].offset + refs[last].length - 1
+            data = self._get_range(key, f'bytes={begin}-{stop}')
+            if data is None:
+                return
+            yield refs[first:last + 1], data
+            first = last + 1
+
+    def _get_range(self, key: str, byte_range: str) -> Optional[bytes]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key, Range=byte_range)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise ExternalServiceError('S3', f"Failed to read {key}: {e}")
+        return response['Body'].read()
+
+
+def archive_key(device_id: str, day: date) -> str:
+    return f"archive/{device_id}/{day:%Y/%m/%d}.gor"
+
+
+def _day_marker_key(day: date) -> str:
+    return f"archive/_days/{day:%Y-%m-%d}.json"
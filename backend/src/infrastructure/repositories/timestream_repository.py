@@ -0,0 +1,302 @@
+"""Timestream Repository - Adapter implementing ITimeSeriesRepository"""
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ...domain.ports.repositories.i_timeseries_repository import ITimeSeriesRepository
+from ...shared.config.settings import settings
+from ...shared.exceptions.base import DatabaseError, ValidationError
+from ...shared.utils.ddsketch import DDSketch, bucket_sketches
+
+INTERVAL_PATTERN = re.compile(r'^\d+[smhd]$')
+UNIT_MILLIS = {'s': 1000, 'm': 60 * 1000, 'h': 60 * 60 * 1000, 'd': 24 * 60 * 60 * 1000}
+WRITE_BATCH_SIZE = 100  # WriteRecords hard limit
+
+
+class TimestreamRepository(ITimeSeriesRepository):
+    """
+    Sensor data in TIMESTREAM_DATABASE.TIMESTREAM_TABLE
+
+    One single-measure record per metric: dimension deviceId, measure_name
+    is the metric and measure_value::double its value. Query results are
+    consumed page by page so large ranges are never held in memory here.
+    """
+
+    def __init__(
+        self,
+        database: Optional[str] = None,
+        table: Optional[str] = None,
+        write_client=None,
+        query_client=None
+    ):
+        self.database = database or settings.TIMESTREAM_DATABASE
+        self.table = table or settings.TIMESTREAM_TABLE
+        self.write_client = write_client or boto3.client('timestream-write', region_name=settings.REGION)
+        self.query_client = query_client or boto3.client('timestream-query', region_name=settings.REGION)
+
+    def write_sensor_data(self, device_id: str, data: Dict, timestamp: datetime) -> bool:
+        """Write the numeric metrics of a reading"""
+        time_value = str(int(timestamp.timestamp() * 1000))
+        records = [
+            {
+                'MeasureName': metric,
+                'MeasureValue': str(value),
+                'MeasureValueType': 'DOUBLE',
+                'Time': time_value
+            }
+            for metric, value in data.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+        try:
+            for start in range(0, len(records), WRITE_BATCH_SIZE):
+                self.write_client.write_records(
+                    DatabaseName=self.database,
+                    TableName=self.table,
+                    CommonAttributes={
+                        'Dimensions': [{'Name': 'deviceId', 'Value': device_id}],
+                        'TimeUnit': 'MILLISECONDS'
+                    },
+                    Records=records[start:start + WRITE_BATCH_SIZE]
+                )
+        except ClientError as e:
+            raise DatabaseError(f"Failed to write sensor data for {device_id}: {e}")
+        return True
+
+    def query_recent_data(
+        self,
+        device_id: str,
+        metric: str,
+        time_range_minutes: int = 5
+    ) -> List[Dict]:
+        """Query recent sensor data"""
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(minutes=time_range_minutes)
+        return [
+            {'timestamp': timestamp, 'value': value}
+            for timestamp, value in self.query_raw_series(device_id, metric, start_time, end_time)
+        ]
+
+    def query_raw_series(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[Tuple[int, float]]:
+        """Stream raw points of one metric in time order"""
+        query = (
+            f"SELECT time, measure_value::double AS value FROM {self._table_ref()} "
+            f"WHERE deviceId = {_literal(device_id)} AND measure_name = {_literal(metric)} "
+            f"AND {_time_range(start_time, end_time)} "
+            f"ORDER BY time"
+        )
+        for row in self._query(query):
+            if row['value'] is not None:
+                yield _parse_time(row['time']), float(row['value'])
+
+    def query_aggregated_data(
+        self,
+        device_id: str,
+        metrics: List[str],
+        start_time: datetime,
+        end_time: datetime,
+        aggregation_interval: str = '15m'
+    ) -> List[Dict]:
+        """
+        Query per-interval averages
+
+        Returns:
+            [{'timestamp': epoch ms, '<metric>': float, ...}] ordered by time
+        """
+        if not INTERVAL_PATTERN.match(aggregation_interval):
+            raise ValidationError(f"Invalid aggregation interval: {aggregation_interval}", field='aggregation')
+        if not metrics:
+            return []
+        query = (
+            f"SELECT bin(time, {aggregation_interval}) AS binned_time, measure_name, "
+            f"avg(measure_value::double) AS value FROM {self._table_ref()} "
+            f"WHERE deviceId = {_literal(device_id)} "
+            f"AND measure_name IN ({', '.join(_literal(m) for m in metrics)}) "
+            f"AND {_time_range(start_time, end_time)} "
+            f"GROUP BY 1, 2 ORDER BY 1"
+        )
+        rows: Dict[int, Dict] = {}
+        for row in self._query(query):
+            timestamp = _parse_time(row['binned_time'])
+            entry = rows.setdefault(timestamp, {'timestamp': timestamp})
+            entry[row['measure_name']] = float(row['value']) if row['value'] is not None else None
+        return list(rows.values())
+
+    def query_multiple_devices(
+        self,
+        device_ids: List[str],
+        metrics: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict:
+        """
+        Query raw data for many devices as a scatter-gather
+
+        Device IDs are split into groups of TIMESTREAM_QUERY_GROUP_SIZE and
+        the groups are queried concurrently (TIMESTREAM_QUERY_CONCURRENCY
+        workers). Each worker folds result pages into columns as they
+        arrive, so the total time is close to that of the slowest group.
+
+        Returns:
+            {deviceId: {'timestamps': [epoch ms, ...], '<metric>': [float|None, ...]}}
+        """
+        if not device_ids or not metrics:
+            return {}
+        device_ids = list(dict.fromkeys(device_ids))
+        group_size = settings.TIMESTREAM_QUERY_GROUP_SIZE
+        groups = [device_ids[i:i + group_size] for i in range(0, len(device_ids), group_size)]
+
+        result = {device_id: _empty_columns(metrics) for device_id in device_ids}
+        if len(groups) == 1:
+            result.update(self._query_device_group(groups[0], metrics, start_time, end_time))
+            return result
+
+        workers = min(settings.TIMESTREAM_QUERY_CONCURRENCY, len(groups))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(self._query_device_group, group, metrics, start_time, end_time)
+                for group in groups
+            ]
+            for future in as_completed(futures):
+                result.update(future.result())
+        return result
+
+    def _query_device_group(
+        self,
+        device_ids: List[str],
+        metrics: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[str, Dict[str, List]]:
+        """One query for a group of devices, folded into per-device columns"""
+        query = (
+            f"SELECT deviceId, time, measure_name, measure_value::double AS value "
+            f"FROM {self._table_ref()} "
+            f"WHERE deviceId IN ({', '.join(_literal(d) for d in device_ids)}) "
+            f"AND measure_name IN ({', '.join(_literal(m) for m in metrics)}) "
+            f"AND {_time_range(start_time, end_time)} "
+            f"ORDER BY deviceId, time"
+        )
+        columns_by_device: Dict[str, Dict[str, List]] = {}
+        for row in self._query(query):
+            columns = columns_by_device.get(row['deviceId'])
+            if columns is None:
+                columns = columns_by_device[row['deviceId']] = _empty_columns(metrics)
+            timestamp = _parse_time(row['time'])
+            timestamps = columns['timestamps']
+            if not timestamps or timestamps[-1] != timestamp:
+                timestamps.append(timestamp)
+                for metric in metrics:
+                    columns[metric].append(None)
+            if row['value'] is not None:
+                columns[row['measure_name']][-1] = float(row['value'])
+        return columns_by_device
+
+    def query_bucket_sketches(
+        self,
+        device_id: str,
+        metric: str,
+        start_time: datetime,
+        end_time: datetime,
+        aggregation_interval: str = '1h'
+    ) -> Dict[int, DDSketch]:
+        """Build per-bucket quantile sketches from the raw points (streamed)"""
+        width = interval_to_millis(aggregation_interval)
+        return bucket_sketches(self.query_raw_series(device_id, metric, start_time, end_time), width)
+
+    def query_device_series(
+        self,
+        device_ids: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Iterator[Tuple[str, str, List[int], List[float]]]:
+        """
+        Stream every metric of a group of devices, one series at a time
+
+        Yields (deviceId, metric, timestamps, values) ordered by device and
+        metric, so only one series is held in memory.
+        """
+        if not device_ids:
+            return
+        query = (
+            f"SELECT deviceId, measure_name, time, measure_value::double AS value "
+            f"FROM {self._table_ref()} "
+            f"WHERE deviceId IN ({', '.join(_literal(d) for d in device_ids)}) "
+            f"AND {_time_range(start_time, end_time)} "
+            f"ORDER BY deviceId, measure_name, time"
+        )
+        current: Optional[Tuple[str, str]] = None
+        timestamps: List[int] = []
+        values: List[float] = []
+        for row in self._query(query):
+            if row['value'] is None:
+                continue
+            key = (row['deviceId'], row['measure_name'])
+            if key != current:
+                if timestamps:
+                    yield current[0], current[1], timestamps, values
+                current, timestamps, values = key, [], []
+            timestamps.append(_parse_time(row['time']))
+            values.append(float(row['value']))
+        if timestamps:
+            yield current[0], current[1], timestamps, values
+
+    def _table_ref(self) -> str:
+        return f'"{self.database}"."{self.table}"'
+
+    def _query(self, query: str) -> Iterator[Dict]:
+        """Run a query and yield rows as dicts, following NextToken"""
+        paginator = self.query_client.get_paginator('query')
+        try:
+            for page in paginator.paginate(QueryString=query):
+                columns = [column['Name'] for column in page['ColumnInfo']]
+                for row in page['Rows']:
+                    yield {
+                        name: datum.get('ScalarValue')
+                        for name, datum in zip(columns, row['Data'])
+                    }
+        except ClientError as e:
+            raise DatabaseError(f"Timestream query failed: {e}")
+
+
+def interval_to_millis(interval: str) -> int:
+    """'15m' -> 900000"""
+    if not INTERVAL_PATTERN.match(interval):
+        raise ValidationError(f"Invalid aggregation interval: {interval}", field='aggregation')
+    return int(interval[:-1]) * UNIT_MILLIS[interval[-1]]
+
+
+def _empty_columns(metrics: List[str]) -> Dict[str, List]:
+    return {'timestamps': [], **{metric: [] for metric in metrics}}
+
+
+def _literal(value: str) -> str:
+    """Quote a string literal for a Timestream query"""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _time_range(start_time: datetime, end_time: datetime) -> str:
+    return (
+        f"time BETWEEN from_milliseconds({int(start_time.timestamp() * 1000)}) "
+        f"AND from_milliseconds({int(end_time.timestamp() * 1000)})"
+    )
+
+
+def _parse_time(value: str) -> int:
+    """Timestream timestamp ('2025-11-14 10:00:00.000000000') to epoch ms"""
+    seconds, _, fraction = value.partition('.')
+    parsed = datetime.strptime(seconds, '%Y-%m-%d %H:%M:%S')
+    millis = int((fraction + '000')[:3])
+    return int((parsed - _EPOCH).total_seconds()) * 1000 + millis
+
+
+_EPOCH = datetime(1970, 1, 1)
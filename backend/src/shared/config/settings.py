@@ -9,6 +9,7 @@ class Settings:
     # Environment
     ENVIRONMENT: str = os.getenv('ENVIRONMENT', 'dev')
     REGION: str = os.getenv('AWS_REGION', 'us-east-1')
+    AWS_ACCOUNT_ID: str = os.getenv('AWS_ACCOUNT_ID', '')
 
     # DynamoDB Tables
     DEVICES_TABLE: str = os.getenv('DEVICES_TABLE', 'iot-monitoring-devices')
@@ -19,29 +20,110 @@ class Settings:
     DEPLOYMENTS_TABLE: str = os.getenv('DEPLOYMENTS_TABLE', 'iot-monitoring-deployments')
     NOTIFICATIONS_TABLE: str = os.getenv('NOTIFICATIONS_TABLE', 'iot-monitoring-notifications')
     CONNECTIONS_TABLE: str = os.getenv('CONNECTIONS_TABLE', 'iot-monitoring-connections')
+    SUBSCRIPTIONS_TABLE: str = os.getenv('SUBSCRIPTIONS_TABLE', 'iot-monitoring-subscriptions')
+    DIGEST_TABLE: str = os.getenv('DIGEST_TABLE', 'iot-monitoring-digests')
+    RATE_LIMITS_TABLE: str = os.getenv('RATE_LIMITS_TABLE', 'iot-monitoring-rate-limits')
+    FLEET_STATS_TABLE: str = os.getenv('FLEET_STATS_TABLE', 'iot-monitoring-fleet-stats')
+    DEVICE_INDEX_TABLE: str = os.getenv('DEVICE_INDEX_TABLE', 'iot-monitoring-device-index')
+    AGGREGATE_CACHE_TABLE: str = os.getenv('AGGREGATE_CACHE_TABLE', 'iot-monitoring-aggregate-cache')
 
     # Timestream
     TIMESTREAM_DATABASE: str = os.getenv('TIMESTREAM_DATABASE', 'iot_monitoring')
     TIMESTREAM_TABLE: str = os.getenv('TIMESTREAM_TABLE', 'sensor_data')
+    # Buckets that ended longer ago than this are treated as immutable;
+    # covers late-arriving telemetry
+    AGGREGATE_CACHE_SETTLE_SECONDS: int = int(os.getenv('AGGREGATE_CACHE_SETTLE_SECONDS', '300'))
+    # Multi-device queries: devices per query and concurrent queries
+    TIMESTREAM_QUERY_GROUP_SIZE: int = int(os.getenv('TIMESTREAM_QUERY_GROUP_SIZE', '20'))
+    TIMESTREAM_QUERY_CONCURRENCY: int = int(os.getenv('TIMESTREAM_QUERY_CONCURRENCY', '8'))
+    # 'timestream' or 'local' (memory-mapped files under LOCAL_TIMESERIES_DIR)
+    TIMESERIES_STORE: str = os.getenv('TIMESERIES_STORE', 'timestream')
+    LOCAL_TIMESERIES_DIR: str = os.getenv('LOCAL_TIMESERIES_DIR', '/tmp/timeseries')
 
     # S3 Buckets
     FIRMWARE_BUCKET: str = os.getenv('FIRMWARE_BUCKET', 'iot-monitoring-firmware')
     DATA_EXPORT_BUCKET: str = os.getenv('DATA_EXPORT_BUCKET', 'iot-monitoring-exports')
+    DATA_ARCHIVE_BUCKET: str = os.getenv('DATA_ARCHIVE_BUCKET', 'iot-monitoring-archive')
+
+    # Data Export
+    EXPORT_PART_SIZE_BYTES: int = int(os.getenv('EXPORT_PART_SIZE_BYTES', str(8 * 1024 * 1024)))
+    EXPORT_WINDOW_HOURS: int = int(os.getenv('EXPORT_WINDOW_HOURS', '6'))
+    EXPORT_RESUME_MARGIN_SECONDS: int = int(os.getenv('EXPORT_RESUME_MARGIN_SECONDS', '60'))
+
+    # Bulk Device Import
+    # Results (with private keys) are checkpointed to S3 every this many
+    # rows; an interrupted import redoes at most the rows since
+    BULK_IMPORT_SEGMENT_ROWS: int = int(os.getenv('BULK_IMPORT_SEGMENT_ROWS', '2000'))
+    # Time kept to finish a provisioning window before continuing in a new
+    # invocation
+    BULK_IMPORT_RESUME_MARGIN_SECONDS: int = int(os.getenv('BULK_IMPORT_RESUME_MARGIN_SECONDS', '120'))
+
+    # Data Archival
+    # Days older than this are archived to DATA_ARCHIVE_BUCKET; must stay
+    # below the Timestream magnetic store retention (90 days)
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv('ARCHIVE_AFTER_DAYS', '80'))
+    # Missed days within this window are archived on the next run
+    ARCHIVE_CATCHUP_DAYS: int = int(os.getenv('ARCHIVE_CATCHUP_DAYS', '7'))
+    ARCHIVE_CHUNK_MINUTES: int = int(os.getenv('ARCHIVE_CHUNK_MINUTES', '120'))
+
+    # Firmware
+    # Uploaded images are copied to their final key in parts of this size,
+    # this many parts at a time
+    FIRMWARE_PART_SIZE_BYTES: int = int(os.getenv('FIRMWARE_PART_SIZE_BYTES', str(8 * 1024 * 1024)))
+    FIRMWARE_UPLOAD_CONCURRENCY: int = int(os.getenv('FIRMWARE_UPLOAD_CONCURRENCY', '4'))
+    # Patches are built from this many of the newest earlier releases
+    FIRMWARE_DELTA_SOURCES: int = int(os.getenv('FIRMWARE_DELTA_SOURCES', '3'))
+    # Patches larger than this fraction of the full image are not kept
+    FIRMWARE_DELTA_MAX_RATIO: float = float(os.getenv('FIRMWARE_DELTA_MAX_RATIO', '0.6'))
+    # Percentage of a batch's devices that must update before the next
+    # batch starts; a batch that can no longer reach it halts the deployment
+    DEPLOYMENT_SUCCESS_THRESHOLD: float = float(os.getenv('DEPLOYMENT_SUCCESS_THRESHOLD', '95'))
+    # Job executions still in progress after this long time out (fail)
+    DEPLOYMENT_JOB_TIMEOUT_MINUTES: int = int(os.getenv('DEPLOYMENT_JOB_TIMEOUT_MINUTES', '60'))
+    # Devices of a batch that have not reported this long after it started
+    # (offline, execution still queued) count as failed
+    DEPLOYMENT_BATCH_DEADLINE_MINUTES: int = int(os.getenv('DEPLOYMENT_BATCH_DEADLINE_MINUTES', '1440'))
 
     # SQS Queues
     ALERT_QUEUE_URL: str = os.getenv('ALERT_QUEUE_URL', '')
     NOTIFICATION_QUEUE_URL: str = os.getenv('NOTIFICATION_QUEUE_URL', '')
+    # Must match the AlertQueue redrive policy maxReceiveCount
+    ALERT_QUEUE_MAX_RECEIVES: int = int(os.getenv('ALERT_QUEUE_MAX_RECEIVES', '3'))
+    # Throttled messages come back after up to this delay, doubled per receive
+    THROTTLE_BASE_DELAY_SECONDS: int = int(os.getenv('THROTTLE_BASE_DELAY_SECONDS', '30'))
 
     # Cognito
     USER_POOL_ID: str = os.getenv('USER_POOL_ID', '')
     USER_POOL_CLIENT_ID: str = os.getenv('USER_POOL_CLIENT_ID', '')
+    # Verified tokens remembered per warm container until they expire
+    VERIFIED_TOKEN_CACHE_SIZE: int = int(os.getenv('VERIFIED_TOKEN_CACHE_SIZE', '10000'))
 
     # API Gateway
     WEBSOCKET_API_ENDPOINT: str = os.getenv('WEBSOCKET_API_ENDPOINT', '')
+    WEBSOCKET_POST_CONCURRENCY: int = int(os.getenv('WEBSOCKET_POST_CONCURRENCY', '16'))
+    WEBSOCKET_MAX_SUBSCRIPTIONS: int = int(os.getenv('WEBSOCKET_MAX_SUBSCRIPTIONS', '100'))
+    # Frames (each packing many device updates) per connection per second
+    WEBSOCKET_MAX_FRAMES_PER_SECOND: float = float(os.getenv('WEBSOCKET_MAX_FRAMES_PER_SECOND', '1'))
+    # Devices are sent in full at least this often, as deltas in between
+    WEBSOCKET_KEYFRAME_SECONDS: int = int(os.getenv('WEBSOCKET_KEYFRAME_SECONDS', '30'))
 
     # Notification Settings
     SES_SENDER_EMAIL: str = os.getenv('SES_SENDER_EMAIL', 'noreply@example.com')
+    SES_ALERT_TEMPLATE: str = os.getenv('SES_ALERT_TEMPLATE', 'iot-monitoring-alert')
+    SES_CONFIGURATION_SET: str = os.getenv('SES_CONFIGURATION_SET', '')
     FCM_CREDENTIALS_SECRET: str = os.getenv('FCM_CREDENTIALS_SECRET', '')
+    # Sending quotas in notifications per second, shared by all containers
+    # (SES account sending rate; FCM allows 600k messages per minute)
+    SES_MAX_SEND_RATE: float = float(os.getenv('SES_MAX_SEND_RATE', '14'))
+    FCM_MAX_SEND_RATE: float = float(os.getenv('FCM_MAX_SEND_RATE', '5000'))
+    # Non-critical notifications per user per minute on each channel; the
+    # excess goes to the user's digest
+    RECIPIENT_MAX_NOTIFICATIONS_PER_MINUTE: float = float(
+        os.getenv('RECIPIENT_MAX_NOTIFICATIONS_PER_MINUTE', '2')
+    )
+    RECIPIENT_NOTIFICATION_BURST: int = int(os.getenv('RECIPIENT_NOTIFICATION_BURST', '5'))
+    # Base URL of the links in notifications
+    DASHBOARD_URL: str = os.getenv('DASHBOARD_URL', '')
 
     # Application Settings
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
@@ -50,6 +132,16 @@ class Settings:
 
     # IoT Core
     IOT_ENDPOINT: str = os.getenv('IOT_ENDPOINT', '')
+    IOT_DEVICE_POLICY: str = os.getenv('IOT_DEVICE_POLICY', '')
+    IOT_PROVISIONING_CONCURRENCY: int = int(os.getenv('IOT_PROVISIONING_CONCURRENCY', '8'))
+    # Role IoT Jobs assumes to presign the firmware URLs of job documents
+    IOT_JOBS_ROLE_ARN: str = os.getenv('IOT_JOBS_ROLE_ARN', '')
+
+    # Telemetry
+    LAST_READING_CACHE_SIZE: int = int(os.getenv('LAST_READING_CACHE_SIZE', '10000'))
+    # Unchanged readings refresh lastSeen at most this often; must stay well
+    # below OFFLINE_AFTER_SECONDS
+    LAST_SEEN_WRITE_INTERVAL_SECONDS: int = int(os.getenv('LAST_SEEN_WRITE_INTERVAL_SECONDS', '60'))
 
     @classmethod
     def is_production(cls) -> bool:
@@ -1,4 +1,5 @@
 # Middleware
 from .logger import logger, setup_logger
+from .auth import TokenVerifier, get_claims, get_token_verifier
 
-__all__ = ['logger', 'setup_logger']
+__all__ = ['logger', 'setup_logger', 'TokenVerifier', 'get_claims', 'get_token_verifier']
@@ -0,0 +1,195 @@
+"""Cognito token verification shared by the REST and WebSocket handlers"""
+import hashlib
+import json
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import jwt
+
+from ..config.settings import settings
+from ..exceptions.base import UnauthorizedError
+from .logger import logger
+
+ALGORITHMS = ['RS256']  # Cognito signs with RS256 only
+# An unknown kid triggers at most one JWKS fetch per interval, so forged
+# tokens cannot turn a reconnect storm into a JWKS request storm
+JWKS_MIN_REFRESH_SECONDS = 60
+# A failed fetch is retried sooner, so a JWKS outage does not reject every
+# token for a whole refresh interval
+JWKS_RETRY_SECONDS = 5
+JWKS_FETCH_TIMEOUT_SECONDS = 3
+CLOCK_SKEW_SECONDS = 30
+
+
+class TokenVerifier:
+    """
+    Verifies Cognito ID and access tokens
+
+    Signing keys are fetched from the user pool JWKS once per warm container
+    and refetched only when a token names an unknown kid (key rotation).
+    Tokens that verified are remembered by SHA-256 digest, with their
+    claims, until they expire, so a client reconnecting with the same
+    token skips the signature check. The digest cache is a bounded LRU.
+
+    Checks: RS256 signature, exp/nbf, issuer, token_use ('id' or
+    'access') and, when a client ID is configured, aud (ID tokens) or
+    client_id (access tokens).
+    """
+
+    def __init__(
+        self,
+        issuer: Optional[str] = None,
+        client_id: Optional[str] = None,
+        jwks_fetcher: Optional[Callable[[], Dict]] = None,
+        cache_size: Optional[int] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.issuer = issuer or (
+            f"https://cognito-idp.{settings.REGION}.amazonaws.com/{settings.USER_POOL_ID}"
+        )
+        self.client_id = client_id if client_id is not None else settings.USER_POOL_CLIENT_ID
+        self._fetch_jwks = jwks_fetcher or self._fetch_issuer_jwks
+        self.cache_size = cache_size or settings.VERIFIED_TOKEN_CACHE_SIZE
+        self.clock = clock
+        self._keys: Dict[str, Any] = {}
+        self._next_fetch_at = float('-inf')
+        self._verified: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> Dict:
+        """
+        Verify a token and return its claims
+
+        Raises:
+            UnauthorizedError: if the token is malformed, expired or not
+                signed by the user pool
+        """
+        if not token:
+            raise UnauthorizedError("Missing token")
+        now = self.clock()
+        digest = hashlib.sha256(token.encode('utf-8')).digest()
+        with self._lock:
+            cached = self._verified.get(digest)
+            if cached is not None:
+                if cached['exp'] + CLOCK_SKEW_SECONDS > now:
+                    self._verified.move_to_end(digest)
+                    return cached
+                del self._verified[digest]
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError:
+            raise UnauthorizedError("Malformed token")
+        if header.get('alg') not in ALGORITHMS:
+            raise UnauthorizedError("Unsupported token algorithm")
+        key = self._signing_key(header.get('kid'), now)
+
+        try:
+            claims = jwt.decode(
+                token,
+                key=key,
+                algorithms=ALGORITHMS,
+                issuer=self.issuer,
+                leeway=CLOCK_SKEW_SECONDS,
+                options={
+                    'require': ['exp', 'iss', 'sub', 'token_use'],
+                    'verify_aud': False,
+                    # Checked below against self.clock, like the cache
+                    'verify_exp': False,
+                    'verify_iat': False,
+                    'verify_nbf': False
+                }
+            )
+        except jwt.PyJWTError as e:
+            raise UnauthorizedError(f"Invalid token: {e}")
+        self._check_times(claims, now)
+        self._check_client(claims)
+
+        with self._lock:
+            self._verified[digest] = claims
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return claims
+
+    def _check_times(self, claims: Dict, now: float):
+        try:
+            expires_at = float(claims['exp'])
+            not_before = float(claims.get('nbf', now))
+        except (TypeError, ValueError):
+            raise UnauthorizedError("Invalid token times")
+        if expires_at + CLOCK_SKEW_SECONDS <= now:
+            raise UnauthorizedError("Token expired")
+        if not_before - CLOCK_SKEW_SECONDS > now:
+            raise UnauthorizedError("Token not yet valid")
+
+    def _check_client(self, claims: Dict):
+        token_use = claims['token_use']
+        if token_use not in ('id', 'access'):
+            raise UnauthorizedError("Invalid token_use")
+        if not self.client_id:
+            return
+        audience = claims.get('aud') if token_use == 'id' else claims.get('client_id')
+        if audience != self.client_id:
+            raise UnauthorizedError("Token issued for another client")
+
+    def _signing_key(self, kid: Optional[str], now: float):
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and now >= self._next_fetch_at:
+                try:
+                    self._keys = {
+                        jwk.key_id: jwk.key
+                        for jwk in jwt.PyJWKSet.from_dict(self._fetch_jwks()).keys
+                    }
+                    self._next_fetch_at = now + JWKS_MIN_REFRESH_SECONDS
+                except Exception as e:
+                    logger.error(f"Failed to refresh JWKS: {str(e)}")
+                    self._next_fetch_at = now + JWKS_RETRY_SECONDS
+                key = self._keys.get(kid)
+        if key is None:
+            raise UnauthorizedError("Unknown signing key")
+        return key
+
+    def _fetch_issuer_jwks(self) -> Dict:
+        url = f"{self.issuer}/.well-known/jwks.json"
+        with urllib.request.urlopen(url, timeout=JWKS_FETCH_TIMEOUT_SECONDS) as response:
+            return json.loads(response.read())
+
+
+_token_verifier = None
+
+
+def get_token_verifier() -> TokenVerifier:
+    """Reuse the verifier (and its key and token caches) across warm invocations"""
+    global _token_verifier
+    if _token_verifier is None:
+        _token_verifier = TokenVerifier()
+    return _token_verifier
+
+
+def get_claims(event: Dict[str, Any]) -> Dict:
+    """
+    Claims of the caller of an API Gateway request
+
+    Claims placed in the request context by an API Gateway JWT authorizer
+    (REST or HTTP API format) were verified by the gateway and are used
+    as is. Otherwise the bearer token of the Authorization header is
+    verified here. Returns {} when there is no valid token.
+    """
+    authorizer = (event.get('requestContext') or {}).get('authorizer') or {}
+    claims = authorizer.get('claims') or (authorizer.get('jwt') or {}).get('claims')
+    if claims:
+        return claims
+
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    scheme, _, token = (headers.get('authorization') or '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return {}
+    try:
+        return get_token_verifier().verify(token.strip())
+    except UnauthorizedError as e:
+        logger.warning(f"Rejected bearer token: {e.message}")
+        return {}
@@ -0,0 +1,4 @@
+# Validation schemas (Pydantic)
+from .device_schemas import RegisterDeviceRequest
+
+__all__ = ['RegisterDeviceRequest']
@@ -0,0 +1,18 @@
+"""Device request schemas"""
+from typing import Dict
+from pydantic import BaseModel, Field
+
+from ...domain.entities.device import DeviceLocation, Connectivity
+
+
+class RegisterDeviceRequest(BaseModel):
+    """Request schema for device registration"""
+    device_type: str = Field(..., alias='deviceType')
+    name: str
+    location: DeviceLocation
+    connectivity: Connectivity
+    metadata: Dict = Field(default_factory=dict)
+    tags: list = Field(default_factory=list)
+
+    class Config:
+        populate_by_name = True
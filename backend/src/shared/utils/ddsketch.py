@@ -0,0 +1,214 @@
+"""
+DDSketch: mergeable quantile sketch with relative-error guarantees
+
+Values are counted in logarithmic bins of ratio gamma = (1 + a) / (1 - a),
+so every quantile estimate is within a relative error `a` of an actual
+value of the data set (Masson et al., VLDB 2019). Sketches with the same
+accuracy merge exactly by adding bin counts, which lets per-bucket rollups
+of one device be combined across time and across devices.
+
+Serialized form (all integers are LEB128 varints, signed ones zigzag):
+    version u8, relative accuracy f64, count, zero count, min f64,
+    max f64, sum f64, then the positive and the negative bins, each as
+    bin count followed by (key delta, count) pairs in ascending key order
+"""
+import math
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Bounds memory for pathological ranges; 2048 bins at 1% span ~1e17:1
+MAX_BINS = 2048
+# Magnitudes below this are counted as zero
+MIN_INDEXABLE = 1e-300
+
+_VERSION = 1
+_FLOATS = struct.Struct('>ddd')
+
+
+class DDSketch:
+    """Quantile sketch of a stream of floats"""
+
+    __slots__ = ('relative_accuracy', 'count', 'zero_count', 'min', 'max', 'sum',
+                 '_positive', '_negative', '_gamma', '_multiplier')
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self._gamma)
+        self.count = 0
+        self.zero_count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+
+    def add(self, value: float, count: int = 1):
+        if value != value:
+            return  # NaN carries no rank
+        if value > MIN_INDEXABLE:
+            key = math.ceil(math.log(value) * self._multiplier)
+            self._positive[key] = self._positive.get(key, 0) + count
+        elif value < -MIN_INDEXABLE:
+            key = math.ceil(math.log(-value) * self._multiplier)
+            self._negative[key] = self._negative.get(key, 0) + count
+        else:
+            self.zero_count += count
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_all(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+        self._collapse()
+
+    def merge(self, other: 'DDSketch'):
+        """Add another sketch's counts; both must have the same accuracy"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if not other.count:
+            return
+        for key, count in other._positive.items():
+            self._positive[key] = self._positive.get(key, 0) + count
+        for key, count in other._negative.items():
+            self._negative[key] = self._negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._collapse()
+
+    @property
+    def avg(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q in [0, 1], None for an empty sketch"""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if not self.count:
+            return None
+        # The extremes are tracked exactly
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, count in self._bins_ascending():
+            seen += count
+            if seen > rank:
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        return [self.quantile(q) for q in qs]
+
+    def to_bytes(self) -> bytes:
+        out = bytearray([_VERSION])
+        out += struct.pack('>d', self.relative_accuracy)
+        _write_varint(out, self.count)
+        _write_varint(out, self.zero_count)
+        out += _FLOATS.pack(self.min, self.max, self.sum)
+        for bins in (self._positive, self._negative):
+            _write_varint(out, len(bins))
+            previous = 0
+            for key in sorted(bins):
+                _write_varint(out, _zigzag(key - previous))
+                _write_varint(out, bins[key])
+                previous = key
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'DDSketch':
+        if not data or data[0] != _VERSION:
+            raise ValueError("Unsupported sketch encoding")
+        (relative_accuracy,) = struct.unpack_from('>d', data, 1)
+        sketch = cls(relative_accuracy)
+        position = 9
+        sketch.count, position = _read_varint(data, position)
+        sketch.zero_count, position = _read_varint(data, position)
+        sketch.min, sketch.max, sketch.sum = _FLOATS.unpack_from(data, position)
+        position += _FLOATS.size
+        for bins in (sketch._positive, sketch._negative):
+            size, position = _read_varint(data, position)
+            key = 0
+            for _ in range(size):
+                delta, position = _read_varint(data, position)
+                key += _unzigzag(delta)
+                bins[key], position = _read_varint(data, position)
+        return sketch
+
+    def _bins_ascending(self) -> Iterator[Tuple[float, int]]:
+        """(representative value, count) from the most negative value up"""
+        for key in sorted(self._negative, reverse=True):
+            yield -self._value(key), self._negative[key]
+        if self.zero_count:
+            yield 0.0, self.zero_count
+        for key in sorted(self._positive):
+            yield self._value(key), self._positive[key]
+
+    def _value(self, key: int) -> float:
+        """Midpoint (in relative terms) of bin (gamma^(key-1), gamma^key]"""
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def _collapse(self):
+        """Fold the smallest magnitudes into one bin past MAX_BINS"""
+        for bins in (self._positive, self._negative):
+            if len(bins) > MAX_BINS:
+                keys = sorted(bins)
+                cut = keys[len(keys) - MAX_BINS]
+                folded = sum(bins.pop(key) for key in keys[:len(keys) - MAX_BINS])
+                bins[cut] += folded
+
+
+def bucket_sketches(
+    points: Iterable[Tuple[int, float]],
+    width: int,
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+) -> Dict[int, DDSketch]:
+    """One sketch per epoch-aligned bucket of `width` ms from (timestamp, value) points"""
+    sketches: Dict[int, DDSketch] = {}
+    for timestamp, value in points:
+        bucket = timestamp - timestamp % width
+        sketch = sketches.get(bucket)
+        if sketch is None:
+            sketch = sketches[bucket] = DDSketch(relative_accuracy)
+        sketch.add(value)
+    for sketch in sketches.values():
+        sketch._collapse()
+    return sketches
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
@@ -0,0 +1,122 @@
+"""Time-series downsampling for charts (LTTB and min/max buckets)"""
+from itertools import chain, islice
+from typing import Iterable, List, Optional, Tuple
+
+Point = Tuple[int, float]
+
+
+def lttb(points: Iterable[Point], max_points: int, start: int, end: int) -> List[Point]:
+    """
+    Largest-Triangle-Three-Buckets over a time-ordered stream
+
+    Buckets split [start, end] evenly in time, so the stream is consumed
+    in a single pass holding at most two buckets. The first and last
+    points are always kept; every other bucket contributes the point that
+    forms the largest triangle with the previously kept point and the
+    average of the next bucket.
+
+    Returns the input unchanged when it has at most `max_points` points.
+    """
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    stream, head = _head(points, max_points)
+    if head is not None:
+        return head
+
+    first = next(stream)
+    selected = [first]
+    buckets = max_points - 2
+    pending: Optional[List[Point]] = None
+    current: List[Point] = []
+    current_index = None
+    for point in stream:
+        index = _bucket_index(point[0], start, end, buckets)
+        if current and index != current_index:
+            if pending:
+                selected.append(_largest_triangle(pending, selected[-1], _average(current)))
+            pending, current = current, []
+        current_index = index
+        current.append(point)
+
+    last = current.pop()
+    if current:
+        if pending:
+            selected.append(_largest_triangle(pending, selected[-1], _average(current)))
+        pending = current
+    if pending:
+        selected.append(_largest_triangle(pending, selected[-1], last))
+    selected.append(last)
+    return selected
+
+
+def min_max(points: Iterable[Point], max_points: int, start: int, end: int) -> List[Point]:
+    """
+    Keep the minimum and maximum of each time bucket, in time order
+
+    Every spike survives, which makes this the safer choice for alerting
+    views; LTTB gives smoother lines for the same point budget.
+    """
+    if max_points < 2:
+        raise ValueError("max_points must be at least 2")
+    stream, head = _head(points, max_points)
+    if head is not None:
+        return head
+
+    buckets = max_points // 2
+    selected: List[Point] = []
+    low = high = None
+    current_index = None
+    for point in stream:
+        index = _bucket_index(point[0], start, end, buckets)
+        if low is not None and index != current_index:
+            _emit_extremes(selected, low, high)
+            low = high = None
+        current_index = index
+        if low is None or point[1] < low[1]:
+            low = point
+        if high is None or point[1] > high[1]:
+            high = point
+    if low is not None:
+        _emit_extremes(selected, low, high)
+    return selected
+
+
+def _head(points: Iterable[Point], max_points: int):
+    """Return (stream, None), or (None, points) when no downsampling is needed"""
+    iterator = iter(points)
+    head = list(islice(iterator, max_points + 1))
+    if len(head) <= max_points:
+        return None, head
+    return chain(head, iterator), None
+
+
+def _bucket_index(timestamp: int, start: int, end: int, buckets: int) -> int:
+    if end <= start:
+        return 0
+    index = int((timestamp - start) * buckets / (end - start))
+    return min(max(index, 0), buckets - 1)
+
+
+def _average(bucket: List[Point]) -> Tuple[float, float]:
+    count = len(bucket)
+    return (
+        sum(point[0] for point in bucket) / count,
+        sum(point[1] for point in bucket) / count
+    )
+
+
+def _largest_triangle(bucket: List[Point], a: Point, c: Tuple[float, float]) -> Point:
+    """Point of `bucket` forming the largest triangle with `a` and `c`"""
+    a_t, a_v = a
+    dt = a_t - c[0]
+    dv = c[1] - a_v
+    return max(bucket, key=lambda b: abs(dt * (b[1] - a_v) - (a_t - b[0]) * dv))
+
+
+def _emit_extremes(selected: List[Point], low: Point, high: Point):
+    if low is high:
+        selected.append(low)
+    elif low[0] <= high[0]:
+        selected.extend((low, high))
+    else:
+        selected.extend((high, low))
@@ -0,0 +1,137 @@
+"""Incremental encoders for time-series exports (CSV, NDJSON, Parquet)"""
+import csv
+import importlib.util
+import io
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+EXPORT_FORMATS = ('csv', 'ndjson', 'parquet')
+_EPOCH = datetime(1970, 1, 1)
+
+
+class CsvExportEncoder:
+    """deviceId,timestamp,<metric>... rows; empty cells for missing values"""
+
+    extension = 'csv'
+    content_type = 'text/csv'
+    resumable = True
+
+    def __init__(self, sink, metrics: List[str], resume: bool = False):
+        self.sink = sink
+        self.metrics = metrics
+        if not resume:
+            self._write_rows([['deviceId', 'timestamp', *metrics]])
+
+    def write_block(self, device_id: str, columns: Dict[str, List]):
+        """Encode one device's columns (timestamps + one list per metric)"""
+        metric_columns = [columns[metric] for metric in self.metrics]
+        self._write_rows(
+            [device_id, _iso(timestamp), *('' if value is None else value for value in values)]
+            for timestamp, *values in zip(columns['timestamps'], *metric_columns)
+        )
+
+    def close(self):
+        pass
+
+    def _write_rows(self, rows):
+        text = io.StringIO()
+        csv.writer(text, lineterminator='\n').writerows(rows)
+        self.sink.write(text.getvalue().encode('utf-8'))
+
+
+class NdjsonExportEncoder:
+    """One JSON object per row: {"deviceId", "timestamp", <metric>: value|null}"""
+
+    extension = 'ndjson'
+    content_type = 'application/x-ndjson'
+    resumable = True
+
+    def __init__(self, sink, metrics: List[str], resume: bool = False):
+        self.sink = sink
+        self.metrics = metrics
+
+    def write_block(self, device_id: str, columns: Dict[str, List]):
+        metric_columns = [columns[metric] for metric in self.metrics]
+        lines = []
+        for timestamp, *values in zip(columns['timestamps'], *metric_columns):
+            row = {'deviceId': device_id, 'timestamp': _iso(timestamp)}
+            row.update(zip(self.metrics, values))
+            lines.append(json.dumps(row))
+        if lines:
+            self.sink.write(('\n'.join(lines) + '\n').encode('utf-8'))
+
+    def close(self):
+        pass
+
+
+class ParquetExportEncoder:
+    """
+    Parquet file written one row group at a time
+
+    Requires pyarrow, which is not packaged with the functions: the format
+    is only accepted where a layer provides it (see format_available). The
+    footer is written on close(), so a Parquet export cannot resume from a
+    checkpoint and restarts instead.
+    """
+
+    extension = 'parquet'
+    content_type = 'application/vnd.apache.parquet'
+    resumable = False
+
+    def __init__(self, sink, metrics: List[str], resume: bool = False, row_group_size: int = 100_000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Parquet export requires pyarrow")
+        self._pa = pyarrow
+        self.metrics = metrics
+        self.row_group_size = row_group_size
+        self.schema = pyarrow.schema(
+            [('deviceId', pyarrow.string()), ('timestamp', pyarrow.timestamp('ms', tz='UTC'))]
+            + [(metric, pyarrow.float64()) for metric in metrics]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(sink, self.schema, compression='snappy')
+        self._reset()
+
+    def write_block(self, device_id: str, columns: Dict[str, List]):
+        count = len(columns['timestamps'])
+        self._columns['deviceId'].extend([device_id] * count)
+        self._columns['timestamp'].extend(columns['timestamps'])
+        for metric in self.metrics:
+            self._columns[metric].extend(columns[metric])
+        self._rows += count
+        if self._rows >= self.row_group_size:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.table(self._columns, schema=self.schema))
+            self._reset()
+
+    def _reset(self):
+        self._columns = {name: [] for name in self.schema.names}
+        self._rows = 0
+
+
+ENCODERS = {
+    'csv': CsvExportEncoder,
+    'ndjson': NdjsonExportEncoder,
+    'parquet': ParquetExportEncoder
+}
+
+
+def format_available(data_format: str) -> bool:
+    """Whether the encoder of a format can run here (Parquet needs pyarrow)"""
+    if data_format == 'parquet':
+        return importlib.util.find_spec('pyarrow') is not None
+    return data_format in ENCODERS
+
+
+def _iso(millis: int) -> str:
+    return (_EPOCH + timedelta(milliseconds=millis)).isoformat(timespec='milliseconds') + 'Z'
@@ -0,0 +1,85 @@
+"""Geohash encoding and bounding-box cover helpers"""
+import math
+from typing import List, Tuple
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+
+
+def encode(lat: float, lon: float, precision: int = 9) -> str:
+    """Encode a coordinate as a geohash of `precision` characters"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_range[0] = mid
+            else:
+                value <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_range[0] = mid
+            else:
+                value <<= 1
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Height and width in degrees of a geohash cell"""
+    lon_bits = (precision * 5 + 1) // 2
+    lat_bits = precision * 5 // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def cover(min_lat: float, min_lon: float, max_lat: float, max_lon: float, precision: int) -> List[str]:
+    """Geohash cells of `precision` that together cover a bounding box"""
+    height, width = cell_size(precision)
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0 - 1e-12)
+    min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0 - 1e-12)
+    cells = []
+    for row in range(int((min_lat + 90) // height), int((max_lat + 90) // height) + 1):
+        lat = -90 + (row + 0.5) * height
+        for col in range(int((min_lon + 180) // width), int((max_lon + 180) // width) + 1):
+            cells.append(encode(lat, -180 + (col + 0.5) * width, precision))
+    return cells
+
+
+def cover_count(min_lat: float, min_lon: float, max_lat: float, max_lon: float, precision: int) -> int:
+    """Number of cells cover() would return, without encoding them"""
+    height, width = cell_size(precision)
+    rows = int((min(max_lat, 90.0 - 1e-12) + 90) // height) - int((max(min_lat, -90.0) + 90) // height) + 1
+    cols = int((min(max_lon, 180.0 - 1e-12) + 180) // width) - int((max(min_lon, -180.0) + 180) // width) + 1
+    return rows * cols
+
+
+def radius_bbox(lat: float, lon: float, radius_meters: float) -> Tuple[float, float, float, float]:
+    """Bounding box (min_lat, min_lon, max_lat, max_lon) around a circle"""
+    dlat = radius_meters / METERS_PER_DEGREE_LAT
+    dlon = radius_meters / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
@@ -0,0 +1,246 @@
+"""
+Gorilla time-series compression and the archive container format
+
+Chunks follow the Gorilla paper (Pelkonen et al., VLDB 2015):
+timestamps are stored as delta-of-deltas in variable-width buckets and
+values as the XOR with the previous value, keeping only the meaningful
+bits. Smooth, regularly sampled series compress to about 1-2 bytes per
+point; noisy sensor readings with jittered timestamps to about 4-6.
+
+Chunk layout:
+    header  count u32, first timestamp i64 (epoch ms), first value f64
+    body    bit stream of (timestamp, value) pairs for the other points
+
+Archive layout (one object holds several series):
+    'GTSZ' version u8
+    chunk bytes ...
+    index   entry count u32, then per chunk:
+            metric (u16 length + UTF-8), start i64, end i64, count u32,
+            offset u64, length u32
+    trailer index length u32, 'GTSZ'
+
+The trailer sits at a fixed distance from the end of the object, so a
+reader fetches the index with a suffix range request and then only the
+chunks overlapping the range it needs.
+"""
+import struct
+from array import array
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+MAGIC = b'GTSZ'
+VERSION = 1
+TRAILER_SIZE = 8
+
+_HEADER = struct.Struct('>Iqd')
+_ENTRY = struct.Struct('>qqIQI')
+_TRAILER = struct.Struct('>I4s')
+_U64 = (1 << 64) - 1
+
+
+class ChunkRef(NamedTuple):
+    """Index entry of one chunk in an archive"""
+    metric: str
+    start: int
+    end: int
+    count: int
+    offset: int
+    length: int
+
+
+def encode_chunk(timestamps: Sequence[int], values: Sequence[float]) -> bytes:
+    """Compress ascending timestamps (epoch ms) and their values"""
+    count = len(timestamps)
+    if not count:
+        raise ValueError("Cannot encode an empty chunk")
+    header = _HEADER.pack(count, timestamps[0], values[0])
+    bits = array('Q')
+    bits.frombytes(array('d', values).tobytes())
+
+    writer = _BitWriter()
+    write = writer.write
+    previous_time, previous_delta = timestamps[0], 0
+    previous_bits = bits[0]
+    leading, trailing = 65, 0
+    for i in range(1, count):
+        timestamp = timestamps[i]
+        delta = timestamp - previous_time
+        dod = delta - previous_delta
+        if dod == 0:
+            write(0, 1)
+        elif -63 <= dod <= 64:
+            write(0b10 << 7 | (dod + 63), 9)
+        elif -255 <= dod <= 256:
+            write(0b110 << 9 | (dod + 255), 12)
+        elif -2047 <= dod <= 2048:
+            write(0b1110 << 12 | (dod + 2047), 16)
+        else:
+            write(0b1111, 4)
+            write(dod & _U64, 64)
+        previous_time, previous_delta = timestamp, delta
+
+        current = bits[i]
+        xor = current ^ previous_bits
+        previous_bits = current
+        if not xor:
+            write(0, 1)
+            continue
+        lead = min(64 - xor.bit_length(), 31)
+        trail = (xor & -xor).bit_length() - 1
+        if lead >= leading and trail >= trailing:
+            # Meaningful bits fit in the previous window
+            write(0b10, 2)
+            write(xor >> trailing, 64 - leading - trailing)
+        else:
+            meaningful = 64 - lead - trail
+            write(0b11 << 11 | lead << 6 | (meaningful - 1), 13)
+            write(xor >> trail, meaningful)
+            leading, trailing = lead, trail
+
+    return header + writer.getvalue()
+
+
+def decode_chunk(data: bytes) -> Tuple[array, array]:
+    """Decompress a chunk into timestamp ('q') and value ('d') arrays"""
+    count, first_time, first_value = _HEADER.unpack_from(data)
+    timestamps = array('q', [first_time])
+    bits = array('Q')
+    bits.frombytes(array('d', [first_value]).tobytes())
+
+    reader = _BitReader(data, _HEADER.size)
+    read, read_bit = reader.read, reader.read_bit
+    previous_time, previous_delta = first_time, 0
+    previous_bits = bits[0]
+    leading, meaningful = 0, 64
+    for _ in range(count - 1):
+        if not read_bit():
+            dod = 0
+        elif not read_bit():
+            dod = read(7) - 63
+        elif not read_bit():
+            dod = read(9) - 255
+        elif not read_bit():
+            dod = read(12) - 2047
+        else:
+            dod = read(64)
+            if dod >= 1 << 63:
+                dod -= 1 << 64
+        previous_delta += dod
+        previous_time += previous_delta
+        timestamps.append(previous_time)
+
+        if read_bit():
+            if read_bit():
+                header = read(11)
+                leading, meaningful = header >> 6, (header & 0x3F) + 1
+            previous_bits ^= read(meaningful) << (64 - leading - meaningful)
+        bits.append(previous_bits)
+
+    values = array('d')
+    values.frombytes(bits.tobytes())
+    return timestamps, values
+
+
+def pack_archive(
+    series: Dict[str, Tuple[Sequence[int], Sequence[float]]],
+    chunk_millis: int
+) -> bytes:
+    """
+    Pack series into one archive
+
+    Args:
+        series: {metric: (ascending timestamps in epoch ms, values)}
+        chunk_millis: chunk width; chunks are aligned to the epoch so a
+            range read decodes at most one partial chunk at each end
+    """
+    body = bytearray(MAGIC + bytes([VERSION]))
+    index = bytearray()
+    entries = 0
+    for metric in sorted(series):
+        timestamps, values = series[metric]
+        start = 0
+        while start < len(timestamps):
+            boundary = timestamps[start] - timestamps[start] % chunk_millis + chunk_millis
+            end = start + 1
+            while end < len(timestamps) and timestamps[end] < boundary:
+                end += 1
+            chunk = encode_chunk(timestamps[start:end], values[start:end])
+            name = metric.encode('utf-8')
+            index += struct.pack('>H', len(name)) + name + _ENTRY.pack(
+                timestamps[start], timestamps[end - 1], end - start, len(body), len(chunk)
+            )
+            body += chunk
+            entries += 1
+            start = end
+    index = struct.pack('>I', entries) + index
+    return bytes(body + index + _TRAILER.pack(len(index), MAGIC))
+
+
+def index_length(trailer: bytes) -> int:
+    """Length of the index that precedes a TRAILER_SIZE trailer"""
+    length, magic = _TRAILER.unpack(trailer[-TRAILER_SIZE:])
+    if magic != MAGIC:
+        raise ValueError("Not a Gorilla archive")
+    return length
+
+
+def parse_index(data: bytes) -> List[ChunkRef]:
+    """Chunk index entries, in archive order"""
+    (entries,) = struct.unpack_from('>I', data)
+    position = 4
+    refs = []
+    for _ in range(entries):
+        (name_length,) = struct.unpack_from('>H', data, position)
+        position += 2
+        metric = data[position:position + name_length].decode('utf-8')
+        position += name_length
+        refs.append(ChunkRef(metric, *_ENTRY.unpack_from(data, position)))
+        position += _ENTRY.size
+    return refs
+
+
+class _BitWriter:
+    """Append-only bit stream, most significant bit first"""
+
+    __slots__ = ('_buffer', '_acc', '_bits')
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int):
+        self._acc = self._acc << bits | value
+        self._bits += bits
+        if self._bits >= 64:
+            spare = self._bits & 7
+            self._buffer += (self._acc >> spare).to_bytes(self._bits >> 3, 'big')
+            self._acc &= (1 << spare) - 1
+            self._bits = spare
+
+    def getvalue(self) -> bytes:
+        padding = -self._bits % 8
+        tail = (self._acc << padding).to_bytes((self._bits + padding) >> 3, 'big')
+        return bytes(self._buffer) + tail
+
+
+class _BitReader:
+    """Reads a bit stream written by _BitWriter"""
+
+    __slots__ = ('_data', '_position')
+
+    def __init__(self, data: bytes, offset: int = 0):
+        self._data = data
+        self._position = offset * 8
+
+    def read_bit(self) -> int:
+        position = self._position
+        self._position = position + 1
+        return self._data[position >> 3] >> (7 - (position & 7)) & 1
+
+    def read(self, bits: int) -> int:
+        position = self._position
+        self._position = position + bits
+        first = position >> 3
+        span = ((position & 7) + bits + 7) >> 3
+        chunk = int.from_bytes(self._data[first:first + span], 'big')
+        return chunk >> (span * 8 - (position & 7) - bits) & ((1 << bits) - 1)
@@ -0,0 +1,288 @@
+"""DeploymentMonitor tests with an in-memory deployment repository and a stub IoT provider"""
+import copy
+
+import pytest
+
+from src.domain.entities.deployment import Deployment, DeploymentBatch
+from src.domain.entities.device import Connectivity, Device, DeviceLocation, DeviceStatus
+from src.domain.entities.firmware import Firmware, FirmwareVersion
+from src.domain.ports.external.i_iot_provider import IIoTProvider
+from src.domain.ports.repositories.i_deployment_repository import IDeploymentRepository
+from src.domain.services.deployment_monitor import DeploymentMonitor
+
+DEPLOYMENT_ID = 'dep-1'
+FIRMWARE_ID = 'fw-2'
+THRESHOLD = 80
+DEADLINE_MINUTES = 60
+STARTED_AT = 1_700_000_000_000
+# Batch 1: dev-0..dev-9, batch 2: dev-10..dev-14
+BATCHES = {1: [f'dev-{i}' for i in range(10)], 2: [f'dev-{i}' for i in range(10, 15)]}
+# Devices on v1.0.0 download the delta, the others the full image
+DELTA_DEVICES = {'dev-10', 'dev-11'}
+
+
+class InMemoryDeploymentRepository(IDeploymentRepository):
+    """Deployments with out-of-line device lists; batches start at `now` (epoch ms)"""
+
+    def __init__(self):
+        self.now = STARTED_AT
+        self._deployments = {}
+        self._targets = {}
+        self._reported = {}
+        self._started = {}
+
+    def save(self, deployment):
+        for batch in deployment.batches:
+            self._targets[(deployment.deployment_id, batch.batch_id)] = list(batch.devices)
+            self._reported[(deployment.deployment_id, batch.batch_id)] = {}
+        stored = copy.deepcopy(deployment)
+        for batch in stored.batches:
+            batch.devices = []
+        stored.target_devices = []
+        stored.update_progress()
+        self._deployments[deployment.deployment_id] = stored
+        return deployment
+
+    def find_by_id(self, deployment_id):
+        return copy.deepcopy(self._deployments.get(deployment_id))
+
+    def find_by_firmware(self, firmware_id):
+        return [copy.deepcopy(d) for d in self._deployments.values() if d.firmware_id == firmware_id]
+
+    def find_target_devices(self, deployment_id, batch_id=None):
+        for (stored_id, stored_batch), device_ids in self._targets.items():
+            if stored_id == deployment_id and batch_id in (None, stored_batch):
+                yield from device_ids
+
+    def find_reported_devices(self, deployment_id, batch_id):
+        return set(self._reported[(deployment_id, batch_id)])
+
+    def find_batches_started_before(self, started_before):
+        return [
+            (deployment_id, batch.batch_id)
+            for deployment_id, deployment in self._deployments.items()
+            for batch in deployment.batches
+            if batch.status == 'in_progress'
+            and self._started[(deployment_id, batch.batch_id)] < started_before
+        ]
+
+    def record_results(self, deployment_id, batch_id, succeeded=0, failed=0):
+        deployment = self._deployments.get(deployment_id)
+        if deployment is None or deployment.get_batch(batch_id) is None:
+            return None
+        return copy.deepcopy(deployment.record_results(batch_id, succeeded, failed))
+
+    def record_device_results(self, deployment_id, batch_id, results):
+        reported = self._reported.get((deployment_id, batch_id))
+        if reported is None:
+            return None
+        new = {device_id: ok for device_id, ok in results.items() if device_id not in reported}
+        reported.update(new)
+        succeeded = sum(1 for ok in new.values() if ok)
+        return self.record_results(deployment_id, batch_id, succeeded, len(new) - succeeded)
+
+    def update_batch_status(self, deployment_id, batch_id, status, expected_status=None):
+        deployment = self._deployments[deployment_id]
+        if expected_status and deployment.get_batch(batch_id).status != expected_status:
+            return False
+        deployment.set_batch_status(batch_id, status)
+        if status == 'in_progress':
+            self._started[(deployment_id, batch_id)] = self.now
+        return True
+
+    def update_status(self, deployment_id, status, expected_status=None):
+        deployment = self._deployments[deployment_id]
+        if expected_status and deployment.status != expected_status:
+            return False
+        deployment.status = status
+        return True
+
+    def batch(self, batch_id):
+        return self._deployments[DEPLOYMENT_ID].get_batch(batch_id)
+
+    @property
+    def status(self):
+        return self._deployments[DEPLOYMENT_ID].status
+
+
+class StubIoTProvider(IIoTProvider):
+    """Records created and cancelled jobs"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.cancelled = []
+
+    def create_thing(self, device):
+        raise NotImplementedError
+
+    def create_certificates(self, device, replace_existing=False):
+        raise NotImplementedError
+
+    def delete_thing(self, device_id):
+        raise NotImplementedError
+
+    def create_job(self, job_id, device_ids, document, timeout_minutes=None):
+        if job_id in self.jobs:
+            return False
+        self.jobs[job_id] = (list(device_ids), document)
+        return True
+
+    def cancel_job(self, job_id):
+        if job_id not in self.jobs:
+            return False
+        self.cancelled.append(job_id)
+        return True
+
+
+class FirmwareRepository:
+    def __init__(self, firmware):
+        self.firmware = firmware
+
+    def find_firmware_by_id(self, firmware_id):
+        return self.firmware if firmware_id == self.firmware.firmware_id else None
+
+
+class DeviceRepository:
+    def find_by_ids(self, device_ids):
+        return [_device(device_id) for device_id in device_ids]
+
+
+def _device(device_id):
+    return Device(
+        deviceId=device_id,
+        organizationId='org-1',
+        deviceType='temperature-sensor',
+        name=device_id,
+        status=DeviceStatus.ONLINE,
+        location=DeviceLocation(lat=37.7, lon=-122.4, address='Dock 4'),
+        connectivity=Connectivity(type='wifi'),
+        firmwareVersion='v1.0.0' if device_id in DELTA_DEVICES else 'v0.9.0'
+    )
+
+
+def _event(device_id, status='SUCCEEDED', batch_id=1, index=0):
+    return {
+        'eventType': 'JOB_EXECUTION',
+        'status': status,
+        'jobId': f'{DEPLOYMENT_ID}_b{batch_id}_{index}',
+        'thingArn': f'arn:aws:iot:us-east-1:123456789012:thing/{device_id}'
+    }
+
+
+def _events(device_ids, status='SUCCEEDED', prefix='msg'):
+    return {f'{prefix}-{device_id}': _event(device_id, status) for device_id in device_ids}
+
+
+@pytest.fixture
+def monitor():
+    firmware = Firmware(
+        firmware_id=FIRMWARE_ID,
+        version=FirmwareVersion(2, 0, 0),
+        device_types=['temperature-sensor'],
+        s3_bucket='firmware',
+        s3_key='firmware/fw-2.bin',
+        checksum='f' * 64,
+        size=4096,
+        status='available',
+        metadata={'deltas': {'v1.0.0': {
+            'sourceFirmwareId': 'fw-1', 'sourceVersion': 'v1.0.0', 'sourceChecksum': 'e' * 64,
+            's3Key': 'deltas/fw-1-fw-2.bsdiff', 'checksum': 'd' * 64, 'size': 512, 'format': 'bsdiff4'
+        }}}
+    )
+    repository = InMemoryDeploymentRepository()
+    repository.save(Deployment(
+        deployment_id=DEPLOYMENT_ID,
+        firmware_id=FIRMWARE_ID,
+        strategy='staged',
+        target_devices=[device_id for devices in BATCHES.values() for device_id in devices],
+        status='scheduled',
+        batches=[DeploymentBatch(batch_id, devices, 'pending') for batch_id, devices in BATCHES.items()]
+    ))
+    iot = StubIoTProvider()
+    monitor = DeploymentMonitor(
+        repository, FirmwareRepository(firmware), DeviceRepository(), iot,
+        success_threshold=THRESHOLD, batch_deadline_minutes=DEADLINE_MINUTES
+    )
+    assert monitor.start(DEPLOYMENT_ID)
+    assert list(iot.jobs) == [f'{DEPLOYMENT_ID}_b1_0']
+    return monitor, repository, iot
+
+
+def test_redelivered_results_are_counted_once(monitor):
+    monitor, repository, _ = monitor
+    first = _events(['dev-0', 'dev-1', 'dev-2'])
+    assert monitor.process(first) == set()
+    # Redelivered with new message IDs, and dev-2 reported twice in one delivery
+    again = {**_events(['dev-0', 'dev-1', 'dev-2'], prefix='again'), 'dup': _event('dev-2')}
+    assert monitor.process(again) == set()
+    # A device's first result stands
+    assert monitor.process(_events(['dev-0'], status='FAILED', prefix='late')) == set()
+
+    batch = repository.batch(1)
+    assert (batch.success_count, batch.failure_count, batch.status) == (3, 0, 'in_progress')
+
+
+def test_threshold_met_starts_next_batch(monitor):
+    monitor, repository, iot = monitor
+    monitor.process(_events(BATCHES[1][:7]))
+    assert repository.batch(2).status == 'pending'
+
+    monitor.process(_events(BATCHES[1][7:8]))
+
+    assert repository.batch(1).status == 'completed'
+    assert repository.batch(2).status == 'in_progress'
+    assert repository.status == 'in_progress'
+    # One job per image, the full image first
+    full, _ = iot.jobs[f'{DEPLOYMENT_ID}_b2_0']
+    delta, document = iot.jobs[f'{DEPLOYMENT_ID}_b2_1']
+    assert sorted(full) == ['dev-12', 'dev-13', 'dev-14']
+    assert sorted(delta) == sorted(DELTA_DEVICES)
+    assert document['image']['type'] == 'delta'
+
+    # The rest of batch 1 and all of batch 2 complete the deployment
+    monitor.process(_events(BATCHES[1][8:]))
+    monitor.process({f'b2-{d}': _event(d, batch_id=2, index=0) for d in BATCHES[2]})
+    assert repository.batch(2).status == 'completed'
+    assert repository.status == 'completed'
+
+
+def test_threshold_unreachable_cancels_jobs_and_fails_deployment(monitor):
+    monitor, repository, iot = monitor
+    monitor.process(_events(BATCHES[1][:5]))
+    monitor.process({
+        'failed': _event('dev-5', 'FAILED'),
+        'timed-out': _event('dev-6', 'TIMED_OUT'),
+        # Cancelled executions are not results
+        'canceled': _event('dev-7', 'CANCELED')
+    })
+    assert repository.batch(1).status == 'in_progress'
+
+    monitor.process({'rejected': _event('dev-8', 'REJECTED')})
+
+    assert iot.cancelled == [f'{DEPLOYMENT_ID}_b1_0']
+    assert repository.batch(1).status == 'failed'
+    assert repository.batch(2).status == 'pending'
+    assert repository.status == 'failed'
+    assert not any(job_id.startswith(f'{DEPLOYMENT_ID}_b2_') for job_id in iot.jobs)
+
+
+def test_expired_batch_counts_unreported_devices_as_failed(monitor):
+    monitor, repository, iot = monitor
+    # 7 of 10 succeeded: neither enough nor out of reach of 80%
+    monitor.process(_events(BATCHES[1][:7]))
+    deadline = STARTED_AT + DEADLINE_MINUTES * 60 * 1000
+
+    assert monitor.expire_batches(now=deadline) == 0
+    assert repository.batch(1).status == 'in_progress'
+
+    assert monitor.expire_batches(now=deadline + 1) == 1
+
+    batch = repository.batch(1)
+    assert (batch.success_count, batch.failure_count, batch.status) == (7, 3, 'failed')
+    # Cancelled before the unreported devices are counted, and again by the halt
+    assert set(iot.cancelled) == {f'{DEPLOYMENT_ID}_b1_0'}
+    assert repository.status == 'failed'
+    # A result arriving afterwards is counted once and changes nothing
+    monitor.process(_events(['dev-9']))
+    assert (repository.batch(1).success_count, repository.batch(1).failure_count) == (7, 3)
+    assert monitor.expire_batches(now=deadline + 1) == 0
@@ -0,0 +1,245 @@
+"""NotificationDispatchService tests with stub email and push providers"""
+import json
+from datetime import datetime
+
+import pytest
+from firebase_admin import messaging
+
+from src.domain.entities.alert import Alert, AlertSeverity, AlertStatus
+from src.domain.entities.user import User, UserPreferences, UserRole
+from src.domain.ports.external.i_email_provider import IEmailProvider
+from src.domain.ports.external.i_push_provider import IPushProvider
+from src.domain.ports.repositories.i_user_repository import IUserRepository
+from src.domain.services.notification_dispatch_service import NotificationDispatchService
+from src.functions.stream_processing import notification_dispatcher
+from src.infrastructure.external import fcm_push_provider
+from src.infrastructure.external.fcm_push_provider import FCMPushProvider
+
+ORGANIZATION_ID = 'org-1'
+NOW = datetime(2024, 1, 1, 12, 0)
+
+
+class InMemoryUserRepository(IUserRepository):
+    """Users of one organization; records removed device tokens"""
+
+    def __init__(self, users):
+        self.users = {user.user_id: user for user in users}
+        self.removed_tokens = []
+
+    def save(self, user):
+        self.users[user.user_id] = user
+        return user
+
+    def find_by_id(self, user_id):
+        return self.users.get(user_id)
+
+    def find_by_email(self, email):
+        return next((user for user in self.users.values() if user.email == email), None)
+
+    def find_by_organization(self, organization_id):
+        return [user for user in self.users.values() if user.organization_id == organization_id]
+
+    def update(self, user_id, updates):
+        raise NotImplementedError
+
+    def delete(self, user_id):
+        return self.users.pop(user_id, None) is not None
+
+    def add_device_token(self, user_id, token):
+        self.users[user_id].add_device_token(token)
+        return True
+
+    def remove_device_token(self, user_id, token):
+        self.removed_tokens.append((user_id, token))
+        self.users[user_id].remove_device_token(token)
+        return True
+
+    def get_organization_version(self, organization_id):
+        return 1, 0
+
+
+class StubEmailProvider(IEmailProvider):
+    """Records bulk sends; `statuses` maps an address to its send status"""
+
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.calls = []
+
+    def send_templated_bulk(self, template, destinations):
+        self.calls.append(destinations)
+        return [self.statuses.get(destination['email'], 'sent') for destination in destinations]
+
+
+class StubPushProvider(IPushProvider):
+    """Records multicasts; `statuses` maps a token to its send status"""
+
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.calls = []
+
+    def send_multicast(self, tokens, message):
+        self.calls.append((list(tokens), message))
+        return [self.statuses.get(token, 'sent') for token in tokens]
+
+
+def _user(user_id, email=True, push=True, tokens=(), devices=()):
+    return User(
+        user_id=user_id,
+        email=f'{user_id}@example.com',
+        organization_id=ORGANIZATION_ID,
+        role=UserRole.OPERATOR,
+        preferences=UserPreferences(
+            notifications={'email': email, 'push': push},
+            subscribed_devices=list(devices),
+            digest={'enabled': False}
+        ),
+        device_tokens=list(tokens)
+    )
+
+
+def _alert(alert_id, device_id, severity=AlertSeverity.WARNING):
+    return Alert(
+        alert_id=alert_id,
+        rule_id='rule-1',
+        device_id=device_id,
+        organization_id=ORGANIZATION_ID,
+        severity=severity,
+        status=AlertStatus.TRIGGERED,
+        condition='temperature > 30',
+        actual_value=35.0,
+        threshold=30.0,
+        timestamp=NOW
+    )
+
+
+def _service(users, email=None, push=None):
+    repository = InMemoryUserRepository(users)
+    service = NotificationDispatchService(
+        user_repository=repository,
+        email_provider=email or StubEmailProvider(),
+        push_provider=push or StubPushProvider(),
+        email_template='alert',
+        dashboard_url='https://app.example.com'
+    )
+    return service, repository
+
+
+def test_deliveries_are_grouped_per_recipient():
+    email, push = StubEmailProvider(), StubPushProvider()
+    service, _ = _service([
+        _user('u1', tokens=['t1', 't2']),
+        _user('u2', tokens=['t3']),
+        _user('u3', push=False, devices=['dev-2'])
+    ], email, push)
+    alerts = {'m1': _alert('a1', 'dev-1'), 'm2': _alert('a2', 'dev-2'), 'm3': _alert('a3', 'dev-1')}
+
+    assert service.dispatch(alerts, now=NOW) == (set(), set())
+
+    # One bulk call, one email per user listing all of its alerts
+    assert len(email.calls) == 1
+    by_address = {destination['email']: destination['data'] for destination in email.calls[0]}
+    assert {address: data['alertCount'] for address, data in by_address.items()} == {
+        'u1@example.com': 3, 'u2@example.com': 3, 'u3@example.com': 1
+    }
+    assert [alert['alertId'] for alert in by_address['u3@example.com']['alerts']] == ['a2']
+    # Users notified of the same alerts share one multicast
+    assert len(push.calls) == 1
+    tokens, message = push.calls[0]
+    assert sorted(tokens) == ['t1', 't2', 't3']
+    assert message['title'] == '3 new alerts'
+
+
+def test_push_multicasts_are_sent_500_tokens_at_a_time(monkeypatch):
+    sent = []
+
+    def send_each_for_multicast(multicast, app=None):
+        sent.append(list(multicast.tokens))
+        return messaging.BatchResponse([
+            messaging.SendResponse(None, messaging.UnregisteredError('gone'))
+            if token.endswith('-stale') else messaging.SendResponse({'name': 'ok'}, None)
+            for token in multicast.tokens
+        ])
+
+    monkeypatch.setattr(fcm_push_provider.messaging, 'send_each_for_multicast', send_each_for_multicast)
+    users = [
+        _user(f'u{i}', email=False, tokens=[f'u{i}-t{n}' for n in range(399)] + [f'u{i}-stale'])
+        for i in range(3)
+    ]
+    all_tokens = sorted(token for user in users for token in user.device_tokens)
+    service, repository = _service(users, push=FCMPushProvider(app=object()))
+
+    assert service.dispatch({'m1': _alert('a1', 'dev-1')}, now=NOW) == (set(), set())
+
+    # The three users share one multicast, which FCM takes 500 tokens per call
+    assert [len(tokens) for tokens in sent] == [500, 500, 200]
+    assert sorted(token for tokens in sent for token in tokens) == all_tokens
+    # Tokens FCM reports as unregistered are removed, in any chunk
+    assert sorted(repository.removed_tokens) == [(f'u{i}', f'u{i}-stale') for i in range(3)]
+
+
+def test_invalid_tokens_are_pruned_in_bulk():
+    push = StubPushProvider({'t1': 'invalid', 't3': 'invalid'})
+    service, repository = _service([
+        _user('u1', email=False, tokens=['t1', 't2']),
+        _user('u2', email=False, tokens=['t3'])
+    ], push=push)
+    alerts = {'m1': _alert('a1', 'dev-1'), 'm2': _alert('a2', 'dev-2')}
+
+    # u1 was reached on t2; u2 had no valid token left, which is not retried
+    assert service.dispatch(alerts, now=NOW) == (set(), set())
+    assert len(push.calls) == 1
+    assert sorted(repository.removed_tokens) == [('u1', 't1'), ('u2', 't3')]
+    assert repository.users['u1'].device_tokens == ['t2']
+    assert repository.users['u2'].device_tokens == []
+
+
+def test_failed_and_throttled_sends_are_reported_per_message():
+    email = StubEmailProvider({'u1@example.com': 'failed', 'u3@example.com': 'invalid'})
+    push = StubPushProvider({'t2': 'throttled'})
+    service, _ = _service([
+        _user('u1', push=False, devices=['dev-1']),
+        _user('u2', email=False, tokens=['t2'], devices=['dev-2']),
+        _user('u3', push=False, devices=['dev-3'])
+    ], email, push)
+    alerts = {'m1': _alert('a1', 'dev-1'), 'm2': _alert('a2', 'dev-2'), 'm3': _alert('a3', 'dev-3')}
+
+    # A rejected address is not retried
+    assert service.dispatch(alerts, now=NOW) == ({'m1'}, {'m2'})
+
+
+def test_handler_reports_failed_and_unrescheduled_messages(monkeypatch):
+    email = StubEmailProvider({'u1@example.com': 'failed'})
+    push = StubPushProvider({'t2': 'throttled', 't4': 'throttled'})
+    service, _ = _service([
+        _user('u1', push=False, devices=['dev-1']),
+        _user('u2', email=False, tokens=['t2'], devices=['dev-2']),
+        _user('u3', email=False, tokens=['t3'], devices=['dev-3']),
+        _user('u4', email=False, tokens=['t4'], devices=['dev-4'])
+    ], email, push)
+    deferred = []
+
+    class Redelivery:
+        def defer(self, records):
+            deferred.extend(record['messageId'] for record in records)
+            # m4 was queued again; m2 only had its visibility extended
+            return {'m2'}
+
+    monkeypatch.setattr(notification_dispatcher, '_get_dispatch_service', lambda: service)
+    monkeypatch.setattr(notification_dispatcher, '_get_redelivery', lambda: Redelivery())
+    records = [
+        {'messageId': f'm{i}', 'body': json.dumps(_alert(f'a{i}', f'dev-{i}').to_dict())}
+        for i in range(1, 5)
+    ] + [{'messageId': 'm5', 'body': '{"alertId":'}]
+
+    response = notification_dispatcher.lambda_handler({'Records': records}, None)
+
+    assert sorted(deferred) == ['m2', 'm4']
+    # m3 was delivered and the malformed m5 can never succeed
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}, {'itemIdentifier': 'm2'}]}
+
+
+@pytest.mark.parametrize('status', ['failed', 'throttled'])
+def test_user_reached_on_another_device_is_not_retried(status):
+    push = StubPushProvider({'t1': status})
+    service, _ = _service([_user('u1', email=False, tokens=['t1', 't2'])], push=push)
+    assert service.dispatch({'m1': _alert('a1', 'dev-1')}, now=NOW) == (set(), set())
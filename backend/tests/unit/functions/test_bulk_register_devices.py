@@ -0,0 +1,171 @@
+"""Bulk registration S3 import tests against moto (DynamoDB, IoT, S3)"""
+import json
+
+import boto3
+import pytest
+from moto import mock_dynamodb, mock_iot, mock_s3
+
+from src.domain.services.device_provisioning_service import DeviceProvisioningService, _device_id
+from src.functions.device import bulk_register_devices
+from src.infrastructure.external.iot_core_provider import IoTCoreProvider
+from src.infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from src.shared.config.settings import settings
+
+ORGANIZATION_ID = 'org-1'
+IMPORT_ID = 'imp-0123456789ab'
+ROWS = 23
+WINDOW_SIZE = 4
+SEGMENT_ROWS = 8
+
+
+class Context:
+    """Lambda context whose remaining time runs out after `calls` checks"""
+
+    function_name = 'bulkRegisterDevices'
+
+    def __init__(self, calls: int = 10 ** 6):
+        self.calls = calls
+
+    def get_remaining_time_in_millis(self) -> int:
+        self.calls -= 1
+        return 900_000 if self.calls >= 0 else 0
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN'):
+        monkeypatch.setenv(name, 'testing')
+    with mock_dynamodb(), mock_s3(), mock_iot():
+        dynamodb = boto3.client('dynamodb', region_name=settings.REGION)
+        dynamodb.create_table(
+            TableName=settings.DEVICES_TABLE,
+            BillingMode='PAY_PER_REQUEST',
+            AttributeDefinitions=[
+                {'AttributeName': 'deviceId', 'AttributeType': 'S'},
+                {'AttributeName': 'organizationId', 'AttributeType': 'S'}
+            ],
+            KeySchema=[{'AttributeName': 'deviceId', 'KeyType': 'HASH'}],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'organizationId-index',
+                'KeySchema': [{'AttributeName': 'organizationId', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            }]
+        )
+        s3 = boto3.client('s3', region_name=settings.REGION)
+        s3.create_bucket(Bucket=settings.DATA_EXPORT_BUCKET)
+        iot = boto3.client('iot', region_name=settings.REGION)
+        yield dynamodb, s3, iot
+
+
+@pytest.fixture
+def job(aws, monkeypatch):
+    dynamodb, s3, iot = aws
+    # moto's IoT backend is not thread-safe: provision one device at a time
+    monkeypatch.setattr(bulk_register_devices, '_build_service', lambda: DeviceProvisioningService(
+        DynamoDBDeviceRepository(client=dynamodb),
+        IoTCoreProvider(client=iot, policy_name='', account_id='123456789012'),
+        max_workers=1,
+        window_size=WINDOW_SIZE
+    ))
+    monkeypatch.setattr(settings, 'BULK_IMPORT_SEGMENT_ROWS', SEGMENT_ROWS)
+    continued = []
+    monkeypatch.setattr(bulk_register_devices, '_continue_in_new_invocation',
+                        lambda job, context: continued.append(job))
+
+    rows = '\n'.join(
+        json.dumps({
+            'name': f'Sensor {i}',
+            'deviceType': 'temperature-sensor',
+            'location': {'lat': 37.7, 'lon': -122.4, 'address': 'Dock 4'},
+            'connectivity': {'type': 'wifi'}
+        }) if i != 5 else '{"name": "broken"'
+        for i in range(1, ROWS + 1)
+    )
+    prefix = f"imports/{ORGANIZATION_ID}/{IMPORT_ID}/"
+    key = f'{prefix}rows.ndjson'
+    s3.put_object(Bucket=settings.DATA_EXPORT_BUCKET, Key=key, Body=rows.encode())
+    job = bulk_register_devices._build_job(s3, ORGANIZATION_ID, 'ndjson', key)
+    return job, continued
+
+
+def _results(s3, manifest):
+    lines = []
+    for key in manifest['resultKeys']:
+        body = s3.get_object(Bucket=settings.DATA_EXPORT_BUCKET, Key=key)['Body'].read()
+        lines.extend(json.loads(line) for line in body.decode().splitlines())
+    return lines
+
+
+def _manifest(s3, job):
+    body = s3.get_object(Bucket=settings.DATA_EXPORT_BUCKET, Key=job['manifestKey'])['Body']
+    return json.loads(body.read())
+
+
+def _assert_imported_once(aws, job):
+    dynamodb, s3, iot = aws
+    manifest = _manifest(s3, job)
+    assert manifest['status'] == 'completed'
+    assert manifest['summary'] == {'created': ROWS - 1, 'invalid': 1, 'failed': 0}
+
+    results = _results(s3, manifest)
+    assert [result['row'] for result in results] == list(range(1, ROWS + 1))
+    seed = f'{ORGANIZATION_ID}/{IMPORT_ID}'
+    expected_ids = [_device_id(seed, row) for row in range(1, ROWS + 1) if row != 5]
+    created = [result['deviceId'] for result in results if result['status'] == 'created']
+    assert created == expected_ids
+
+    items = dynamodb.scan(TableName=settings.DEVICES_TABLE)['Items']
+    assert sorted(item['deviceId']['S'] for item in items) == sorted(expected_ids)
+    things = iot.list_things()['things']
+    assert sorted(thing['thingName'] for thing in things) == sorted(expected_ids)
+    # Rows processed again replaced their certificate instead of adding one
+    for device_id in expected_ids:
+        assert len(iot.list_thing_principals(thingName=device_id)['principals']) == 1
+
+
+def test_import_continues_in_new_invocation_after_checkpoint(aws, job):
+    job, continued = job
+    _, s3, _ = aws
+
+    result = bulk_register_devices._run_s3_import(job, Context(calls=2))
+    assert result['status'] == 'continued'
+    assert continued == [job]
+    checkpoint = _manifest(s3, job)['checkpoint']
+    assert checkpoint['rowsDone'] == 3 * WINDOW_SIZE
+    assert len(checkpoint['resultKeys']) == 2
+
+    bulk_register_devices._run_s3_import(job, Context())
+    _assert_imported_once(aws, job)
+
+
+def test_import_killed_after_checkpoint_resumes_without_duplicates(aws, job, monkeypatch):
+    job, _ = job
+    _, s3, _ = aws
+    save_segment = bulk_register_devices._save_segment
+    saved = []
+
+    def killed_after_first_segment(*args):
+        # The rows of the second segment are provisioned, its results lost
+        if saved:
+            raise RuntimeError('invocation killed')
+        saved.append(True)
+        return save_segment(*args)
+
+    monkeypatch.setattr(bulk_register_devices, '_save_segment', killed_after_first_segment)
+    with pytest.raises(RuntimeError):
+        bulk_register_devices._run_s3_import(job, Context())
+    manifest = _manifest(s3, job)
+    assert manifest['status'] == 'failed'
+    assert manifest['checkpoint']['rowsDone'] == SEGMENT_ROWS
+
+    monkeypatch.setattr(bulk_register_devices, '_save_segment', save_segment)
+    bulk_register_devices._run_s3_import(job, Context())
+    _assert_imported_once(aws, job)
+
+
+def test_completed_import_is_not_run_again(aws, job):
+    job, _ = job
+    dynamodb, _, _ = aws
+    first = bulk_register_devices._run_s3_import(job, Context())
+    assert bulk_register_devices._run_s3_import(job, Context()) == first
+    assert dynamodb.scan(TableName=settings.DEVICES_TABLE)['Count'] == ROWS - 1
@@ -0,0 +1,164 @@
+"""Time-series export tests: multipart CSV export to moto S3 from the local store"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import boto3
+import pytest
+from moto import mock_dynamodb, mock_s3
+
+from src.domain.entities.device import Connectivity, Device, DeviceLocation, DeviceStatus
+from src.functions.analytics import export_data
+from src.infrastructure.repositories.dynamodb_device_repository import DynamoDBDeviceRepository
+from src.infrastructure.repositories.mmap_timeseries_repository import MmapTimeSeriesRepository
+from src.shared.config.settings import settings
+from src.shared.utils import export_encoders
+
+ORGANIZATION_ID = 'org-1'
+DEVICE_IDS = ['dev-a', 'dev-b']
+METRICS = ['temperature', 'humidity']
+START = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+# One point per second: about 5.6 export windows of 6 hours, ~12 MB of CSV
+POINTS = 120_000
+MIB = 1024 * 1024
+
+
+class Context:
+    """Lambda context whose remaining time runs out after `calls` checks"""
+
+    function_name = 'exportData'
+
+    def __init__(self, calls: int = 10 ** 6):
+        self.calls = calls
+
+    def get_remaining_time_in_millis(self) -> int:
+        self.calls -= 1
+        return 900_000 if self.calls >= 0 else 0
+
+
+def _expected_rows():
+    """Rows ordered by window, then device, then time"""
+    window_points = settings.EXPORT_WINDOW_HOURS * 3600
+    rows = []
+    for window_start in range(0, POINTS, window_points):
+        for device_number, device_id in enumerate(DEVICE_IDS):
+            for i in range(window_start, min(window_start + window_points, POINTS)):
+                # Humidity is reported every other second only
+                humidity = '' if i % 2 else repr(float(i % 100))
+                rows.append([device_id, _iso(START + i * 1000), repr(device_number + i / 4), humidity])
+    return rows
+
+
+def _iso(millis: int) -> str:
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN'):
+        monkeypatch.setenv(name, 'testing')
+    # moto 4 does not decode the aws-chunked bodies botocore sends with
+    # its default request checksums
+    monkeypatch.setenv('AWS_REQUEST_CHECKSUM_CALCULATION', 'when_required')
+    monkeypatch.setenv('AWS_RESPONSE_CHECKSUM_VALIDATION', 'when_required')
+    with mock_dynamodb(), mock_s3():
+        dynamodb = boto3.client('dynamodb', region_name=settings.REGION)
+        dynamodb.create_table(
+            TableName=settings.DEVICES_TABLE,
+            BillingMode='PAY_PER_REQUEST',
+            AttributeDefinitions=[{'AttributeName': 'deviceId', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'deviceId', 'KeyType': 'HASH'}]
+        )
+        repository = DynamoDBDeviceRepository(client=dynamodb)
+        for device_id in DEVICE_IDS:
+            repository.save(Device(
+                deviceId=device_id,
+                organizationId=ORGANIZATION_ID,
+                deviceType='temperature-sensor',
+                name=device_id,
+                status=DeviceStatus.ONLINE,
+                location=DeviceLocation(lat=37.7, lon=-122.4, address='Dock 4'),
+                connectivity=Connectivity(type='wifi')
+            ))
+        s3 = boto3.client('s3', region_name=settings.REGION)
+        s3.create_bucket(Bucket=settings.DATA_EXPORT_BUCKET)
+        yield s3
+
+
+@pytest.fixture
+def job(aws, tmp_path, monkeypatch):
+    timeseries = MmapTimeSeriesRepository(str(tmp_path))
+    for device_number, device_id in enumerate(DEVICE_IDS):
+        timeseries.append(device_id, 'temperature', [
+            (START + i * 1000, device_number + i / 4) for i in range(POINTS)
+        ])
+        timeseries.append(device_id, 'humidity', [
+            (START + i * 1000, float(i % 100)) for i in range(0, POINTS, 2)
+        ])
+    monkeypatch.setattr(export_data, '_get_timeseries_repository', lambda: timeseries)
+    monkeypatch.setattr(settings, 'EXPORT_PART_SIZE_BYTES', 8 * MIB)
+    continued = []
+    monkeypatch.setattr(export_data, '_continue_in_new_invocation',
+                        lambda job, context: continued.append(job))
+
+    job = export_data._build_job({
+        'deviceIds': DEVICE_IDS,
+        'metrics': METRICS,
+        'startDate': '2024-01-01T00:00:00Z',
+        'endDate': '2024-01-03T00:00:00Z',
+        'format': 'csv'
+    }, ORGANIZATION_ID)
+    return job, continued
+
+
+def _manifest(s3, job):
+    body = s3.get_object(Bucket=settings.DATA_EXPORT_BUCKET, Key=job['manifestKey'])['Body']
+    return json.loads(body.read())
+
+
+def _assert_exported(s3, job):
+    manifest = _manifest(s3, job)
+    assert manifest['status'] == 'completed'
+    assert manifest['rowsWritten'] == len(DEVICE_IDS) * POINTS
+
+    head = s3.head_object(Bucket=settings.DATA_EXPORT_BUCKET, Key=job['dataKey'], PartNumber=1)
+    assert head['PartsCount'] > 1
+    body = s3.get_object(Bucket=settings.DATA_EXPORT_BUCKET, Key=job['dataKey'])['Body'].read()
+    assert len(body) == manifest['bytesWritten']
+    rows = list(csv.reader(io.StringIO(body.decode('utf-8'))))
+    assert rows[0] == ['deviceId', 'timestamp', *METRICS]
+    assert rows[1:] == _expected_rows()
+
+
+def test_export_streams_multipart_csv(aws, job):
+    job, continued = job
+    result = export_data._run_export(job, Context())
+    assert result['status'] == 'completed'
+    assert not continued
+    _assert_exported(aws, job)
+
+
+def test_export_continues_from_checkpoint_in_new_invocation(aws, job):
+    job, continued = job
+    # Checked after every 6-hour window; the first checkpoint follows window 3
+    result = export_data._run_export(job, Context(calls=4))
+    assert result['status'] == 'continued'
+    assert continued == [job]
+    checkpoint = _manifest(aws, job)['checkpoint']
+    assert result['rowsWritten'] == checkpoint['rowsWritten'] < len(DEVICE_IDS) * POINTS
+    assert len(checkpoint['upload']['parts']) == 1
+
+    export_data._run_export(job, Context())
+    _assert_exported(aws, job)
+    assert not aws.list_multipart_uploads(Bucket=settings.DATA_EXPORT_BUCKET).get('Uploads')
+
+
+def test_parquet_rejected_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(export_encoders.importlib.util, 'find_spec', lambda name: None)
+    response = export_data.lambda_handler({
+        'requestContext': {'authorizer': {'claims': {'custom:organizationId': ORGANIZATION_ID}}},
+        'body': json.dumps({'deviceIds': DEVICE_IDS, 'metrics': METRICS, 'format': 'parquet'})
+    }, Context())
+    assert response['statusCode'] == 400
+    assert 'parquet' in json.loads(response['body'])['error']['message']
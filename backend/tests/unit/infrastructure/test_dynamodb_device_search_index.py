@@ -0,0 +1,80 @@
+"""Device search index tests against moto: location filters with other filters"""
+import boto3
+import pytest
+from moto import mock_dynamodb
+
+from src.domain.entities.device import Connectivity, Device, DeviceLocation, DeviceStatus
+from src.infrastructure.repositories.dynamodb_device_search_index import DynamoDBDeviceSearchIndex
+from src.shared.config.settings import settings
+
+ORGANIZATION_ID = 'org-1'
+# San Francisco, Oakland (13 km away), San Jose (68 km away)
+LOCATIONS = {
+    'dev-sf': (37.7749, -122.4194),
+    'dev-oak': (37.8044, -122.2712),
+    'dev-sj': (37.3382, -121.8863),
+}
+
+
+@pytest.fixture
+def index(monkeypatch):
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN'):
+        monkeypatch.setenv(name, 'testing')
+    with mock_dynamodb():
+        client = boto3.client('dynamodb', region_name=settings.REGION)
+        client.create_table(
+            TableName=settings.DEVICE_INDEX_TABLE,
+            BillingMode='PAY_PER_REQUEST',
+            AttributeDefinitions=[
+                {'AttributeName': 'term', 'AttributeType': 'S'},
+                {'AttributeName': 'sk', 'AttributeType': 'S'}
+            ],
+            KeySchema=[
+                {'AttributeName': 'term', 'KeyType': 'HASH'},
+                {'AttributeName': 'sk', 'KeyType': 'RANGE'}
+            ]
+        )
+        index = DynamoDBDeviceSearchIndex(client=client)
+        index.index_devices([
+            Device(
+                deviceId=device_id,
+                organizationId=ORGANIZATION_ID,
+                deviceType='temperature-sensor',
+                name=device_id,
+                status=DeviceStatus.ONLINE,
+                location=DeviceLocation(lat=lat, lon=lon, address='Dock 4'),
+                connectivity=Connectivity(type='wifi'),
+                tags=['office']
+            )
+            for device_id, (lat, lon) in LOCATIONS.items()
+        ])
+        yield index
+
+
+def _near(device_id: str, radius_meters: float):
+    lat, lon = LOCATIONS[device_id]
+    return {'lat': lat, 'lon': lon, 'radiusMeters': radius_meters}
+
+
+def test_radius_filter_applies_with_tags(index):
+    filters = {'tags': ['office'], 'near': _near('dev-sf', 15_000)}
+    assert index.search(ORGANIZATION_ID, filters) == ['dev-oak', 'dev-sf']
+
+
+def test_area_too_large_for_index_falls_back_to_scan(index):
+    # Term postings alone would return dev-sj, outside the radius
+    filters = {'tags': ['office'], 'status': 'online', 'near': _near('dev-sf', 200_000)}
+    assert index.search(ORGANIZATION_ID, filters) is None
+
+
+def test_radius_and_bbox_both_apply(index):
+    # The box holds San Francisco and San Jose; the radius excludes San Jose
+    bbox = {'minLat': 37.3, 'minLon': -122.5, 'maxLat': 37.79, 'maxLon': -122.35}
+    filters = {'near': _near('dev-sf', 15_000), 'bbox': bbox}
+    assert index.search(ORGANIZATION_ID, filters) == ['dev-sf']
+
+
+def test_disjoint_radius_and_bbox_match_nothing(index):
+    bbox = {'minLat': 37.3, 'minLon': -121.9, 'maxLat': 37.4, 'maxLon': -121.8}
+    filters = {'tags': ['office'], 'near': _near('dev-sf', 15_000), 'bbox': bbox}
+    assert index.search(ORGANIZATION_ID, filters) == []
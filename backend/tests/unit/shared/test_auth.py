@@ -0,0 +1,191 @@
+"""TokenVerifier tests against locally generated RS256 keys"""
+import base64
+import json
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from src.shared.exceptions.base import UnauthorizedError
+from src.shared.middleware import auth
+from src.shared.middleware.auth import TokenVerifier
+
+ISSUER = 'https://cognito-idp.us-east-1.amazonaws.com/us-east-1_test'
+CLIENT_ID = 'client-1'
+NOW = 1_700_000_000
+
+
+def _rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _jwk(private_key, kid: str) -> dict:
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    return {**jwk, 'kid': kid, 'alg': 'RS256', 'use': 'sig'}
+
+
+class FakeJWKS:
+    """JWKS endpoint stand-in counting fetches; raises while `failing`"""
+
+    def __init__(self, *keys):
+        self.keys = list(keys)
+        self.fetches = 0
+        self.failing = False
+
+    def __call__(self):
+        self.fetches += 1
+        if self.failing:
+            raise OSError('JWKS unavailable')
+        return {'keys': self.keys}
+
+
+class Clock:
+    def __init__(self, now: float = NOW):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(scope='module')
+def signing_key():
+    return _rsa_key()
+
+
+@pytest.fixture
+def jwks(signing_key):
+    return FakeJWKS(_jwk(signing_key, 'kid-1'))
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def verifier(jwks, clock):
+    return TokenVerifier(issuer=ISSUER, client_id=CLIENT_ID, jwks_fetcher=jwks, clock=clock)
+
+
+def _claims(**overrides) -> dict:
+    claims = {
+        'sub': 'user-1',
+        'iss': ISSUER,
+        'token_use': 'id',
+        'aud': CLIENT_ID,
+        'iat': NOW,
+        'exp': NOW + 3600,
+        'custom:organizationId': 'org-1'
+    }
+    claims.update(overrides)
+    return {key: value for key, value in claims.items() if value is not None}
+
+
+def _token(private_key, kid: str = 'kid-1', **overrides) -> str:
+    return jwt.encode(_claims(**overrides), private_key, algorithm='RS256', headers={'kid': kid})
+
+
+def _segment(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+
+
+def test_valid_id_token(verifier, signing_key):
+    claims = verifier.verify(_token(signing_key))
+    assert claims['sub'] == 'user-1'
+    assert claims['custom:organizationId'] == 'org-1'
+
+
+def test_valid_access_token(verifier, signing_key):
+    token = _token(signing_key, token_use='access', aud=None, client_id=CLIENT_ID)
+    assert verifier.verify(token)['token_use'] == 'access'
+
+
+def test_tampered_payload_is_rejected(verifier, signing_key):
+    header, _, signature = _token(signing_key).split('.')
+    forged = '.'.join([header, _segment(_claims(**{'custom:organizationId': 'org-2'})), signature])
+    with pytest.raises(UnauthorizedError):
+        verifier.verify(forged)
+
+
+def test_token_signed_by_another_key_is_rejected(verifier):
+    with pytest.raises(UnauthorizedError):
+        verifier.verify(_token(_rsa_key()))
+
+
+def test_expired_token_is_rejected(verifier, signing_key):
+    token = _token(signing_key, exp=NOW - auth.CLOCK_SKEW_SECONDS - 1)
+    with pytest.raises(UnauthorizedError, match='expired'):
+        verifier.verify(token)
+
+
+def test_cached_token_is_rejected_once_expired(verifier, signing_key, clock):
+    token = _token(signing_key, exp=NOW + 60)
+    verifier.verify(token)
+    clock.now = NOW + 60 + auth.CLOCK_SKEW_SECONDS
+    with pytest.raises(UnauthorizedError, match='expired'):
+        verifier.verify(token)
+
+
+def test_wrong_issuer_is_rejected(verifier, signing_key):
+    with pytest.raises(UnauthorizedError):
+        verifier.verify(_token(signing_key, iss='https://example.com/other-pool'))
+
+
+def test_id_token_for_another_client_is_rejected(verifier, signing_key):
+    with pytest.raises(UnauthorizedError, match='another client'):
+        verifier.verify(_token(signing_key, aud='client-2'))
+
+
+def test_access_token_for_another_client_is_rejected(verifier, signing_key):
+    token = _token(signing_key, token_use='access', aud=None, client_id='client-2')
+    with pytest.raises(UnauthorizedError, match='another client'):
+        verifier.verify(token)
+
+
+def test_alg_none_is_rejected(verifier):
+    token = '.'.join([_segment({'alg': 'none', 'kid': 'kid-1'}), _segment(_claims()), ''])
+    with pytest.raises(UnauthorizedError, match='algorithm'):
+        verifier.verify(token)
+
+
+def test_hs256_token_is_rejected(verifier):
+    token = jwt.encode(_claims(), 'not-the-signing-key', algorithm='HS256', headers={'kid': 'kid-1'})
+    with pytest.raises(UnauthorizedError, match='algorithm'):
+        verifier.verify(token)
+
+
+def test_unknown_kid_refreshes_keys(verifier, jwks, signing_key, clock):
+    verifier.verify(_token(signing_key))
+    rotated = _rsa_key()
+    jwks.keys.append(_jwk(rotated, 'kid-2'))
+    clock.now += auth.JWKS_MIN_REFRESH_SECONDS
+
+    assert verifier.verify(_token(rotated, kid='kid-2'))['sub'] == 'user-1'
+    assert jwks.fetches == 2
+
+
+def test_unknown_kid_refetches_at_most_once_per_interval(verifier, jwks, signing_key, clock):
+    verifier.verify(_token(signing_key))
+    for _ in range(3):
+        with pytest.raises(UnauthorizedError, match='signing key'):
+            verifier.verify(_token(signing_key, kid='kid-9', sub='user-2'))
+    assert jwks.fetches == 1
+
+    clock.now += auth.JWKS_MIN_REFRESH_SECONDS
+    with pytest.raises(UnauthorizedError, match='signing key'):
+        verifier.verify(_token(signing_key, kid='kid-9', sub='user-3'))
+    assert jwks.fetches == 2
+
+
+def test_failed_fetch_is_retried_after_a_short_backoff(verifier, jwks, signing_key, clock):
+    jwks.failing = True
+    with pytest.raises(UnauthorizedError, match='signing key'):
+        verifier.verify(_token(signing_key))
+    with pytest.raises(UnauthorizedError, match='signing key'):
+        verifier.verify(_token(signing_key))
+    assert jwks.fetches == 1
+
+    jwks.failing = False
+    clock.now += auth.JWKS_RETRY_SECONDS
+    assert verifier.verify(_token(signing_key))['sub'] == 'user-1'
+    assert jwks.fetches == 2